@@ -113,6 +113,7 @@ class EntityConfig:
         llm_provider: str = "anthropic",
         default_model: Optional[str] = None,
         host: Optional[str] = None,
+        vector_backend: str = "pinecone",
     ):
         self.index_name = index_name
         self.label = label
@@ -120,6 +121,7 @@ class EntityConfig:
         self.llm_provider = llm_provider  # "anthropic", "openai", "google", or "minimax"
         self.default_model = default_model  # If None, uses global default for provider
         self.host = host  # Pinecone index host URL (required for serverless indexes)
+        self.vector_backend = vector_backend  # "pinecone" or "local" (in-process store)
 
     def to_dict(self):
         return {
@@ -129,6 +131,7 @@ class EntityConfig:
             "llm_provider": self.llm_provider,
             "default_model": self.default_model,
             "host": self.host,
+            "vector_backend": self.vector_backend,
         }
 
 
@@ -356,13 +359,80 @@ class Settings(BaseSettings):
 
     # Multiple Pinecone indexes (JSON array of objects with index_name, label, description, llm_provider, default_model)
     # Example: '[{"index_name": "claude", "label": "Claude", "description": "Primary AI entity", "llm_provider": "anthropic", "default_model": "claude-sonnet-4-5-20250929"}]'
+    # Add "vector_backend": "local" to an entry to keep that entity's vectors in the
+    # in-process local store instead of Pinecone (no API key or network needed)
     pinecone_indexes: str = ""
 
+    # Local vector store settings (entities with "vector_backend": "local")
+    # Directory holding each local entity's memory-mapped vectors and metadata
+    local_vector_store_dir: str = "./vector_store"
+    # Optional sentence-transformers model for local embeddings. Empty uses the
+    # built-in hashing embedder (no extra dependencies; lexical similarity only)
+    local_embedding_model: str = ""
+    # Vector width of the built-in hashing embedder
+    local_embedding_dim: int = 512
+    # Namespaces switch from an exact scan to an IVF index at this many records
+    local_vector_ivf_min_records: int = 20000
+    # IVF lists probed per query (higher = better recall, slower)
+    local_vector_ivf_nprobe: int = 16
+    # Local-backend searches also hit the search cache when a cached query's
+    # embedding is at least this similar (cosine) to the new one. 0 disables
+    search_cache_similarity_threshold: float = 0.95
+
+    # /api/chat/prefetch retrieves memories for a draft message while the user
+    # types. The next turn reuses them if sent within the TTL and the final
+    # text is at least this similar (difflib ratio) to the draft
+    memory_prefetch_ttl_seconds: float = 60.0
+    memory_prefetch_min_similarity: float = 0.9
+
+    # Retrieval counts are committed to SQL immediately; the times_retrieved copy
+    # in vector metadata is synced in the background (retrieval_count_queue.py).
+    # Pending updates flush every N seconds, or sooner once a batch fills up
+    retrieval_count_flush_interval_seconds: float = 5.0
+    retrieval_count_flush_batch_size: int = 100
+
+    # New messages are vectorized from a SQLite outbox by a background worker
+    # (memory_outbox.py). The worker polls this often when not woken by a commit;
+    # failed upserts retry with exponential backoff from base up to max seconds
+    memory_outbox_poll_interval_seconds: float = 2.0
+    memory_outbox_retry_base_seconds: float = 5.0
+    memory_outbox_retry_max_seconds: float = 600.0
+
+    # Live conversation sessions (session_store.py) are kept in an LRU store
+    # capped by count and by estimated size (MB of held text), and dropped
+    # after sitting idle this many minutes; evicted sessions reload from the
+    # database on next use. 0 disables a limit
+    session_store_max_sessions: int = 200
+    session_store_max_mb: int = 512
+    session_idle_ttl_minutes: float = 240.0
+    # After a full rebuild, a session's history is snapshotted to a file per
+    # conversation (session_snapshots.py); later loads restore it while the
+    # conversation and its memory links are unchanged
+    session_snapshots_enabled: bool = True
+    session_snapshot_dir: str = "./session_snapshots"
+
+    # Stored memory significance (memory_significance.py) decays with age; it is
+    # recomputed for every memory this often, and once at startup
+    memory_significance_refresh_interval_seconds: float = 3600.0
+
     # Database
     here_i_am_database_url: str = Field(
         default="sqlite+aiosqlite:///./here_i_am.db",
         alias="HERE_I_AM_DATABASE_URL"
     )
+    # SQLite performance profile, applied to every connection (database.py).
+    # WAL lets readers proceed while a turn is writing; synchronous=NORMAL is
+    # durable across application crashes in WAL mode (only a power loss can
+    # drop the last commits)
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_busy_timeout_ms: int = 5000  # Wait this long for a lock before "database is locked"
+    sqlite_cache_size_kib: int = 65536  # Page cache per connection
+    sqlite_mmap_size_mb: int = 256  # 0 disables memory-mapped reads
+    sqlite_temp_store: str = "memory"
+    # GET routes use a separate read-only engine so list and browse calls never
+    # queue behind a streaming turn's writes (file-based SQLite in WAL mode only)
+    sqlite_read_engine: bool = True
 
     # Application
     debug: bool = True
@@ -376,6 +446,20 @@ class Settings(BaseSettings):
     # messages, so they need a lower similarity floor
     query_similarity_threshold: float = 0.2
     retrieval_candidate_multiplier: int = 2  # Fetch this many times top_k, then re-rank by significance
+    # Token-budgeted selection: when > 0, retrieved memories are chosen to fill
+    # this many tokens per turn (maximizing summed combined score) instead of
+    # taking the top_k by count. 0 keeps count-based selection
+    initial_retrieval_token_budget: int = 0  # First retrieval in a conversation
+    retrieval_token_budget: int = 0  # Subsequent retrievals
+    # Hybrid retrieval: alongside the vector search, rank memories by BM25 over
+    # the local full-text index (rare words of the query only: names,
+    # identifiers, dates) and merge the two rankings by reciprocal-rank fusion
+    # before significance re-ranking. Runs in-process; no extra network calls
+    hybrid_retrieval_enabled: bool = False
+    hybrid_rrf_k: int = 60  # Fusion constant; smaller values favor each list's top hits
+    # Query words found in more than this fraction of all messages are too
+    # common to search for lexically
+    hybrid_lexical_max_doc_fraction: float = 0.05
 
     # Significance calculation
     recency_boost_strength: float = 1.2
@@ -500,6 +584,7 @@ class Settings(BaseSettings):
                     llm_provider=idx.get("llm_provider", "anthropic"),
                     default_model=idx.get("default_model"),
                     host=idx.get("host"),
+                    vector_backend=idx.get("vector_backend", "pinecone"),
                 )
                 for idx in indexes_data
             ]
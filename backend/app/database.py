@@ -1,20 +1,84 @@
+import logging
 import re
+from typing import List
 
-from sqlalchemy import text
+from sqlalchemy import event, make_url, text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 class Base(DeclarativeBase):
     pass
 
 
+# Accepted values for the SQLite profile settings that are interpolated into
+# PRAGMA statements
+_JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal", "off")
+_SYNCHRONOUS_MODES = ("off", "normal", "full", "extra")
+_TEMP_STORES = ("default", "file", "memory")
+
+
+def _pragma_choice(name: str, value: str, allowed, default: str) -> str:
+    value = str(value).strip().lower()
+    if value in allowed:
+        return value
+    logger.warning(f"Invalid SQLite {name} '{value}', using '{default}'")
+    return default
+
+
+def sqlite_pragmas(read_only: bool = False) -> List[str]:
+    """
+    PRAGMA statements applied to each new SQLite connection (settings.sqlite_*).
+
+    journal_mode is a property of the database file, so only the read-write
+    engine sets it. Read-only connections get query_only, which makes any
+    write through them fail instead of taking the write lock.
+    """
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}",
+        "PRAGMA synchronous = "
+        + _pragma_choice("synchronous", settings.sqlite_synchronous, _SYNCHRONOUS_MODES, "normal"),
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size = {-abs(int(settings.sqlite_cache_size_kib))}",
+        f"PRAGMA mmap_size = {max(0, int(settings.sqlite_mmap_size_mb)) * 1024 * 1024}",
+        "PRAGMA temp_store = "
+        + _pragma_choice("temp_store", settings.sqlite_temp_store, _TEMP_STORES, "memory"),
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        pragmas.insert(0, "PRAGMA journal_mode = " + _pragma_choice(
+            "journal_mode", settings.sqlite_journal_mode, _JOURNAL_MODES, "wal"
+        ))
+    return pragmas
+
+
+def _apply_sqlite_profile(async_engine, read_only: bool = False) -> None:
+    """Run sqlite_pragmas on every connection the engine opens."""
+    pragmas = sqlite_pragmas(read_only)
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    event.listen(async_engine.sync_engine, "connect", on_connect)
+
+
+_database_url = make_url(settings.here_i_am_database_url)
+_is_sqlite = _database_url.get_backend_name() == "sqlite"
+
 engine = create_async_engine(
     settings.here_i_am_database_url,
     echo=False,  # SQL logging disabled; use logging config if needed
 )
+if _is_sqlite:
+    _apply_sqlite_profile(engine)
 
 async_session_maker = async_sessionmaker(
     engine,
@@ -22,6 +86,30 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False
 )
 
+# Read-only engine for the GET routes. In WAL mode readers never wait for the
+# writer, but sharing one pool means a list call still queues for a connection
+# behind a long streaming turn; a separate pool removes that. Only possible for
+# a file-backed SQLite database in WAL mode (an in-memory database is private
+# to its connection, and without WAL readers block on the writer anyway);
+# otherwise reads share the main engine.
+_separate_read_engine = (
+    _is_sqlite
+    and settings.sqlite_read_engine
+    and _database_url.database not in (None, "", ":memory:")
+    and str(settings.sqlite_journal_mode).strip().lower() == "wal"
+)
+if _separate_read_engine:
+    read_engine = create_async_engine(settings.here_i_am_database_url, echo=False)
+    _apply_sqlite_profile(read_engine, read_only=True)
+    read_session_maker = async_sessionmaker(
+        read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+else:
+    read_engine = engine
+    read_session_maker = async_session_maker
+
 
 async def get_db():
     async with async_session_maker() as session:
@@ -31,6 +119,15 @@ async def get_db():
             await session.close()
 
 
+async def get_read_db():
+    """Session for routes that only read (see read_engine)."""
+    async with read_session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
 async def _migrate_messages_role_enum(conn):
     """
     Migrate the messages.role enum to support TOOL_USE and TOOL_RESULT values.
@@ -123,10 +220,10 @@ async def _migrate_messages_role_enum(conn):
         # Step 4: Rename new table
         await conn.execute(text("ALTER TABLE messages_new RENAME TO messages"))
 
-        # Step 5: Recreate indexes if any existed
-        await conn.execute(text(
-            "CREATE INDEX IF NOT EXISTS ix_messages_conversation_id ON messages(conversation_id)"
-        ))
+        # Step 5: Indexes and triggers went with the old table, and rowids may
+        # have changed under the full-text index; _migrate_schema recreates
+        # and rebuilds them once create_all has run (see init_db)
+        await conn.execute(text("PRAGMA user_version = 0"))
 
         print("  ✓ Updated messages table to support tool_use and tool_result roles")
 
@@ -188,6 +285,14 @@ async def run_migrations(conn):
         ))
         print("  ✓ Added memory_status column for pinned/released memories")
 
+    if 'significance' not in columns:
+        # Filled in by the significance refresher on startup
+        print("Migrating: Adding 'significance' column to messages table...")
+        await conn.execute(text(
+            "ALTER TABLE messages ADD COLUMN significance FLOAT"
+        ))
+        print("  ✓ Added significance column for memory browser sorting")
+
     # Check if entity_id column exists in conversation_memory_links table
     result = await conn.execute(text(
         "SELECT name FROM sqlite_master WHERE type='table' AND name='conversation_memory_links'"
@@ -203,6 +308,43 @@ async def run_migrations(conn):
             ))
             print("  ✓ Added entity_id column for multi-entity memory isolation")
 
+        if 'passage_index' not in columns:
+            print("Migrating: Adding 'passage_index' column to conversation_memory_links table...")
+            await conn.execute(text(
+                "ALTER TABLE conversation_memory_links ADD COLUMN passage_index INTEGER"
+            ))
+            print("  ✓ Added passage_index column for passage-level memories")
+
+    result = await conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name='memory_outbox'"
+    ))
+    if result.fetchone():
+        result = await conn.execute(text("PRAGMA table_info(memory_outbox)"))
+        columns = [row[1] for row in result.fetchall()]
+
+        if 'replace_existing' not in columns:
+            print("Migrating: Adding 'replace_existing' column to memory_outbox table...")
+            await conn.execute(text(
+                "ALTER TABLE memory_outbox ADD COLUMN replace_existing BOOLEAN NOT NULL DEFAULT 0"
+            ))
+            print("  ✓ Added replace_existing column for re-vectorizing edited messages")
+
+    result = await conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name='memory_query_results'"
+    ))
+    if result.fetchone():
+        result = await conn.execute(text("PRAGMA table_info(memory_query_results)"))
+        columns = [row[1] for row in result.fetchall()]
+
+        if 'tool_result_id' not in columns:
+            print("Migrating: Adding 'tool_result_id' column to memory_query_results table...")
+            await conn.execute(text(
+                "ALTER TABLE memory_query_results ADD COLUMN tool_result_id VARCHAR(36) "
+                "REFERENCES messages(id)"
+            ))
+            # Filled in by the schema migration's backfill (_migrate_schema)
+            print("  ✓ Added tool_result_id column for deleting query results with their tool exchange")
+
     # Check if entity_system_prompts column exists in conversations table
     result = await conn.execute(text(
         "SELECT name FROM sqlite_master WHERE type='table' AND name='conversations'"
@@ -225,6 +367,77 @@ async def run_migrations(conn):
             ))
             print("  ✓ Added notes_seed column for frozen single-entity notes seed")
 
+        if 'message_count' not in columns:
+            # Filled in by the schema migration's summary backfill (_migrate_schema)
+            print("Migrating: Adding listing summary columns to conversations table...")
+            await conn.execute(text(
+                "ALTER TABLE conversations ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0"
+            ))
+            await conn.execute(text("ALTER TABLE conversations ADD COLUMN preview TEXT"))
+            await conn.execute(text("ALTER TABLE conversations ADD COLUMN last_message_at DATETIME"))
+            print("  ✓ Added message_count, preview and last_message_at columns")
+
+
+# Schema version, recorded in SQLite's user_version pragma. Bump it whenever
+# the indexes or triggers declared on the models change, so existing databases
+# pick them up (see _migrate_schema) on the next start.
+#   1: secondary indexes for the hot query shapes
+#   2: conversation listing summary triggers (models/message.py) and backfill
+#   3: memory browser sort indexes (significance, times_retrieved)
+#   4: full-text index over message content (models/message.py) and rebuild
+#   5: term statistics view of the full-text index (hybrid retrieval)
+#   6: memory_query result table (models/memory_query_result.py) and backfill
+#   7: memory_query results keyed to their tool_result message, re-derived
+SCHEMA_VERSION = 7
+
+# Indexes superseded by ones now declared on the models
+_OBSOLETE_INDEXES = (
+    "ix_messages_conversation_id",  # Covered by ix_messages_conversation_id_created_at
+)
+
+
+def _migrate_schema(sync_conn):
+    """
+    Bring the indexes and triggers of an existing database in line with the models.
+
+    create_all only creates indexes and triggers together with a new table, so
+    ones added to an existing table's model would never be built. When the
+    stored schema version is behind SCHEMA_VERSION this creates any missing
+    declared indexes and triggers, drops superseded indexes, backfills the
+    conversation listing summaries, the message full-text index and the
+    memory_query result table, refreshes the planner statistics with ANALYZE
+    and records the new version. Every start also runs PRAGMA optimize, which
+    re-analyzes only tables whose statistics have drifted.
+    """
+    from app.models.memory_query_result import backfill_memory_query_results
+    from app.models.message import (
+        CONVERSATION_SUMMARY_BACKFILL,
+        CONVERSATION_SUMMARY_TRIGGERS,
+        MESSAGE_SEARCH_BACKFILL,
+        MESSAGE_SEARCH_DDL,
+    )
+
+    version = sync_conn.execute(text("PRAGMA user_version")).scalar() or 0
+    if version < SCHEMA_VERSION:
+        print(f"Migrating: Updating schema (version {version} -> {SCHEMA_VERSION})...")
+        for name in _OBSOLETE_INDEXES:
+            sync_conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(sync_conn, checkfirst=True)
+        for statement in CONVERSATION_SUMMARY_TRIGGERS + MESSAGE_SEARCH_DDL:
+            sync_conn.exec_driver_sql(statement)
+        # Summaries and the full-text index are only maintained incrementally
+        # from here on; build them once from the existing messages. Safe to repeat
+        sync_conn.exec_driver_sql(CONVERSATION_SUMMARY_BACKFILL)
+        sync_conn.exec_driver_sql(MESSAGE_SEARCH_BACKFILL)
+        backfill_memory_query_results(sync_conn)
+        sync_conn.execute(text("ANALYZE"))
+        sync_conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
+        print(f"  ✓ Schema at version {SCHEMA_VERSION}")
+
+    sync_conn.execute(text("PRAGMA optimize"))
+
 
 async def init_db():
     async with engine.begin() as conn:
@@ -232,3 +445,5 @@ async def init_db():
         await run_migrations(conn)
         # Then create any new tables
         await conn.run_sync(Base.metadata.create_all)
+        # Then indexes and triggers, which need every table to exist
+        await conn.run_sync(_migrate_schema)
@@ -10,7 +10,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 
 from app.config import settings
-from app.database import init_db
+from app.database import async_session_maker, init_db
 from app.routes import (
     chat_router,
     conversations_router,
@@ -22,7 +22,10 @@ from app.routes import (
     stt_router,
     tts_router,
 )
+from app.services.memory_outbox import memory_outbox
 from app.services.memory_service import memory_service
+from app.services.memory_significance import significance_refresher
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 
 def setup_logging():
@@ -73,13 +76,12 @@ def run_pinecone_connection_test():
 
     if not result["configured"]:
         print("Status: SKIPPED")
-        print("Reason: No PINECONE_API_KEY configured in environment")
+        print("Reason: No PINECONE_API_KEY configured and no local vector-store entities")
         print("Memory system will be disabled.")
         print("=" * 60 + "\n")
         return
 
-    print("Pinecone API Key: Configured")
-    print("Embedding Model: Pinecone integrated inference (llama-text-embed-v2)")
+    print(f"Pinecone API Key: {'Configured' if settings.pinecone_api_key else 'Not configured'}")
 
     print(f"\nEntities to test: {len(result['entities'])}")
     print("-" * 60)
@@ -91,7 +93,11 @@ def run_pinecone_connection_test():
             all_passed = False
 
         print(f"\nEntity: {entity.get('label', 'Unknown')} ({entity['entity_id']})")
-        print(f"  Host: {entity.get('host') or 'Not specified'}")
+        if entity.get("backend") == "local":
+            print("  Backend: local vector store")
+        else:
+            print("  Backend: Pinecone integrated inference (llama-text-embed-v2)")
+            print(f"  Host: {entity.get('host') or 'Not specified'}")
         print(f"  Status: {status}")
         print(f"  Message: {entity['message']}")
 
@@ -110,9 +116,16 @@ async def lifespan(app: FastAPI):
     # Startup
     await init_db()
     run_pinecone_connection_test()
+    async with async_session_maker() as db:
+        await memory_service.load_archived_conversation_ids(db)
+    memory_service.retrieval_count_queue.start()
+    memory_outbox.start()
+    significance_refresher.start()
     yield
     # Shutdown
-    pass
+    await significance_refresher.stop()
+    await memory_outbox.stop()
+    await memory_service.retrieval_count_queue.stop()
 
 
 app = FastAPI(
@@ -128,6 +141,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
@@ -172,7 +186,7 @@ async def health_check():
         "status": "healthy",
         "version": "0.1.0",
         "debug": settings.debug,
-        "memory_system": "configured" if settings.pinecone_api_key else "not configured",
+        "memory_system": "configured" if memory_service.is_configured() else "not configured",
     }
 
 
@@ -2,6 +2,8 @@ from app.models.conversation import Conversation, ConversationType
 from app.models.conversation_entity import ConversationEntity
 from app.models.conversation_memory_link import ConversationMemoryLink
 from app.models.entity_setting import EntitySetting
+from app.models.memory_outbox import MemoryOutboxEntry
+from app.models.memory_query_result import MemoryQueryResult
 from app.models.message import Message, MessageRole
 
-__all__ = ["Conversation", "ConversationType", "Message", "MessageRole", "ConversationMemoryLink", "ConversationEntity", "EntitySetting"]
+__all__ = ["Conversation", "ConversationType", "Message", "MessageRole", "ConversationMemoryLink", "ConversationEntity", "EntitySetting", "MemoryOutboxEntry", "MemoryQueryResult"]
@@ -3,7 +3,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING, List, Optional
 
-from sqlalchemy import JSON, Boolean, DateTime, String, Text
+from sqlalchemy import JSON, Boolean, DateTime, Index, Integer, String, Text
 from sqlalchemy import Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -12,6 +12,7 @@ from app.database import Base
 if TYPE_CHECKING:
     from app.models.conversation_entity import ConversationEntity
     from app.models.conversation_memory_link import ConversationMemoryLink
+    from app.models.memory_query_result import MemoryQueryResult
     from app.models.message import Message
 
 
@@ -23,6 +24,13 @@ class ConversationType(str, enum.Enum):
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        # Conversation list: visible conversations, most recently updated first
+        Index(
+            "ix_conversations_is_archived_is_imported_updated_at",
+            "is_archived", "is_imported", "updated_at",
+        ),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -56,6 +64,13 @@ class Conversation(Base):
     # cache re-write. Not used for multi-entity conversations (their notes live
     # in the per-turn message, not a position-0 seed).
     notes_seed: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # Listing summary, maintained by triggers on the messages table (see
+    # models/message.py) so the conversation list never reads message bodies:
+    # number of messages, the first human message truncated for display, and
+    # the newest message's timestamp
+    message_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    preview: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    last_message_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
     messages: Mapped[List["Message"]] = relationship(
         "Message", back_populates="conversation", cascade="all, delete-orphan"
@@ -66,6 +81,11 @@ class Conversation(Base):
         cascade="all, delete-orphan",
         foreign_keys="ConversationMemoryLink.conversation_id"
     )
+    memory_query_results: Mapped[List["MemoryQueryResult"]] = relationship(
+        "MemoryQueryResult",
+        back_populates="conversation",
+        cascade="all, delete-orphan"
+    )
     # For multi-entity conversations: tracks which entities participate
     entities: Mapped[List["ConversationEntity"]] = relationship(
         "ConversationEntity",
@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, ForeignKey, String
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -19,12 +19,21 @@ class ConversationMemoryLink(Base):
     This allows each entity to maintain its own isolated memory retrieval history.
     """
     __tablename__ = "conversation_memory_links"
+    __table_args__ = (
+        # Dedup and session reload: a conversation's links (per entity) in order
+        Index(
+            "ix_conversation_memory_links_conversation_id_entity_id",
+            "conversation_id", "entity_id", "retrieved_at",
+        ),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     conversation_id: Mapped[str] = mapped_column(String(36), ForeignKey("conversations.id"))
     message_id: Mapped[str] = mapped_column(String(36), ForeignKey("messages.id"))
     retrieved_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     entity_id: Mapped[str] = mapped_column(String(100), nullable=True)  # Which entity retrieved this memory
+    # For memories stored as passages: which passage was injected (None = whole message)
+    passage_index: Mapped[int] = mapped_column(Integer, nullable=True)
 
     conversation: Mapped["Conversation"] = relationship(
         "Conversation",
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class MemoryOutboxEntry(Base):
+    """A message waiting to be vectorized into one entity's memory index.
+
+    Rows are written in the same transaction as the messages they describe and
+    drained by the memory outbox worker (services/memory_outbox.py), which
+    deletes each row once its record is upserted. The row carries the exact
+    record text and metadata, since the vectorized text can differ from the
+    stored message content (e.g. attachment text is persisted but not
+    vectorized) and the role differs per entity in multi-entity conversations.
+    Rows queued by an edit replace the message's existing records, whose
+    layout (whole message or passages) may differ from the new text's.
+    """
+    __tablename__ = "memory_outbox"
+    __table_args__ = (Index("ix_memory_outbox_next_attempt_at", "next_attempt_at"),)
+
+    # Autoincrement keeps draining FIFO within an entity
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    message_id: Mapped[str] = mapped_column(String(36))
+    conversation_id: Mapped[str] = mapped_column(String(36))
+    entity_id: Mapped[str] = mapped_column(String(100), nullable=True)  # None = default entity
+    role: Mapped[str] = mapped_column(String(100))
+    content: Mapped[str] = mapped_column(Text)
+    message_created_at: Mapped[datetime] = mapped_column(DateTime)
+    replace_existing: Mapped[bool] = mapped_column(Boolean, default=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
@@ -0,0 +1,140 @@
+import json
+import re
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, insert, select
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.database import Base
+
+if TYPE_CHECKING:
+    from app.models.conversation import Conversation
+    from app.models.message import Message
+
+
+class MemoryQueryResult(Base):
+    """A memory that a memory_query tool call surfaced in a conversation.
+
+    Written with the turn's tool exchange messages. Query results are tool
+    output, not context memories, so a ConversationMemoryLink for the same
+    (conversation, entity, memory) is stale; the link cleanup
+    (MemoryService.cleanup_memory_query_links) deletes those with one
+    set-based statement instead of re-parsing every persisted tool exchange.
+
+    Each row belongs to the tool_result message that surfaced the memory and
+    is deleted with it (message_history.delete_tool_exchange_messages), so a
+    discarded response's query results can't delete links retrieved later.
+    """
+    __tablename__ = "memory_query_results"
+    __table_args__ = (
+        # The cleanup's EXISTS lookup per link
+        Index("ix_memory_query_results_conversation_id_message_id", "conversation_id", "message_id"),
+        # Deleting a turn's tool exchange rows
+        Index("ix_memory_query_results_tool_result_id", "tool_result_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    conversation_id: Mapped[str] = mapped_column(String(36), ForeignKey("conversations.id"))
+    # The querying entity in multi-entity conversations (the tool_use row's
+    # speaker_entity_id); None when the conversation has a single entity
+    entity_id: Mapped[str] = mapped_column(String(100), nullable=True)
+    message_id: Mapped[str] = mapped_column(String(36))  # The surfaced memory
+    # The tool_result message the memory appeared in
+    tool_result_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("messages.id"), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    conversation: Mapped["Conversation"] = relationship(
+        "Conversation", back_populates="memory_query_results"
+    )
+    tool_result: Mapped["Message"] = relationship("Message")
+
+
+# "--- Memory <id[:8]> (...)" headers in memory_query tool results
+_RESULT_MARKER_RE = re.compile(r"--- Memory ([0-9a-fA-F]{8}) \(")
+
+
+def backfill_memory_query_results(sync_conn) -> int:
+    """
+    Record the results of memory_query calls persisted before this table
+    existed, from the tool exchange messages: the memory-ID prefixes in the
+    tool_result blocks answering a memory_query tool_use, resolved to the
+    messages they name. Run by the schema migration; returns the rows
+    written. Rows recorded before they were keyed to their tool_result
+    message are re-derived.
+    """
+    from app.models.message import Message, MessageRole
+
+    table = MemoryQueryResult.__table__
+    sync_conn.execute(table.delete().where(table.c.tool_result_id.is_(None)))
+
+    # memory_query calls, by tool_use block ID -> (conversation, querying entity)
+    scopes = {}
+    rows = sync_conn.execute(
+        select(Message.conversation_id, Message.speaker_entity_id, Message.content)
+        .where(Message.role == MessageRole.TOOL_USE, Message.content.contains('"memory_query"'))
+    )
+    for conversation_id, speaker_entity_id, content in rows:
+        for block in _content_blocks(content):
+            if block.get("type") == "tool_use" and block.get("name") == "memory_query":
+                scopes[block.get("id")] = (conversation_id, speaker_entity_id)
+    if not scopes:
+        return 0
+
+    # tool_result message -> (conversation, querying entity, memory-ID prefixes)
+    prefixes_by_result = {}
+    conversation_ids = {conversation_id for conversation_id, _ in scopes.values()}
+    rows = sync_conn.execute(
+        select(Message.id, Message.content).where(
+            Message.role == MessageRole.TOOL_RESULT,
+            Message.conversation_id.in_(conversation_ids),
+        )
+    )
+    for tool_result_id, content in rows:
+        for block in _content_blocks(content):
+            scope = scopes.get(block.get("tool_use_id"))
+            if block.get("type") != "tool_result" or scope is None:
+                continue
+            if isinstance(block.get("content"), str):
+                found = _RESULT_MARKER_RE.findall(block["content"])
+                _, _, prefixes = prefixes_by_result.setdefault(tool_result_id, (*scope, set()))
+                prefixes.update(p.lower() for p in found)
+
+    # Safe to repeat: rows already recorded are skipped
+    recorded = set(sync_conn.execute(
+        select(table.c.tool_result_id, table.c.message_id)
+        .where(table.c.conversation_id.in_(conversation_ids))
+    ).all())
+
+    now = datetime.utcnow()
+    records = []
+    for tool_result_id, (conversation_id, entity_id, prefixes) in prefixes_by_result.items():
+        for prefix in prefixes:
+            message_ids = sync_conn.execute(
+                select(Message.id).where(Message.id_prefix_clause(prefix))
+            ).scalars()
+            records.extend(
+                {
+                    "conversation_id": conversation_id,
+                    "entity_id": entity_id,
+                    "message_id": message_id,
+                    "tool_result_id": tool_result_id,
+                    "created_at": now,
+                }
+                for message_id in message_ids
+                if (tool_result_id, message_id) not in recorded
+            )
+    if records:
+        sync_conn.execute(insert(table), records)
+    return len(records)
+
+
+def _content_blocks(content):
+    """Parsed content blocks of a tool exchange message ([] if not JSON blocks)."""
+    try:
+        blocks = json.loads(content)
+    except (TypeError, ValueError):
+        return []
+    return [b for b in blocks if isinstance(b, dict)] if isinstance(blocks, list) else []
@@ -4,7 +4,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import DDL, DateTime, Float, ForeignKey, Index, Integer, String, Text, and_, event
 from sqlalchemy import Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -26,8 +26,24 @@ class MessageRole(str, enum.Enum):
     REFLECTION = "reflection"
 
 
+def _initial_significance(context) -> float:
+    """Column default: significance of the row being inserted."""
+    from app.services.memory_significance import initial_significance
+
+    return initial_significance(context.get_current_parameters())
+
+
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Session load: a conversation's messages in order
+        Index("ix_messages_conversation_id_created_at", "conversation_id", "created_at"),
+        # Memory listing, reflections and cleanup select by role
+        Index("ix_messages_role_created_at", "role", "created_at"),
+        # Memory browser sorts (see services/memory_significance.py)
+        Index("ix_messages_significance", "significance"),
+        Index("ix_messages_times_retrieved", "times_retrieved"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     conversation_id: Mapped[str] = mapped_column(String(36), ForeignKey("conversations.id"))
@@ -46,6 +62,14 @@ class Message(Base):
     #   "released" - excluded from memory retrieval (still stored, reversible)
     memory_status: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
 
+    # Precomputed memory significance for SQL-side sorting; recomputed on
+    # retrieval and status changes and periodically as memories age
+    # (services/memory_significance.py). NULL until the first refresh for rows
+    # that predate the column.
+    significance: Mapped[Optional[float]] = mapped_column(
+        Float, nullable=True, default=_initial_significance
+    )
+
     # For multi-entity conversations: tracks which entity spoke this message
     # NULL for single-entity conversations or human messages in multi-entity
     # For AI responses in multi-entity, this is the entity that generated the response
@@ -73,7 +97,152 @@ class Message(Base):
                 return self.content
         return self.content
 
+    @staticmethod
+    def id_prefix_clause(prefix: str):
+        """
+        WHERE clause matching IDs that start with prefix (short memory IDs).
+        Written as a range so SQLite walks the primary key index; LIKE
+        'prefix%' is case-insensitive in SQLite and so scans every row.
+        """
+        return and_(Message.id >= prefix, Message.id < prefix + "\U0010ffff")
+
     @staticmethod
     def serialize_content_blocks(content_blocks: List[Dict[str, Any]]) -> str:
         """Serialize content blocks to JSON for storage."""
         return json.dumps(content_blocks)
+
+
+# Conversation listing summary (Conversation.message_count / preview /
+# last_message_at), maintained by SQLite triggers so that every write path —
+# ORM adds and deletes, bulk DELETE statements, imports — keeps it current
+# without Python bookkeeping. Created with the messages table and, for existing
+# databases, by the schema migration (database._migrate_schema), which also
+# runs CONVERSATION_SUMMARY_BACKFILL once.
+
+PREVIEW_CHARS = 100  # Preview is the first human message, truncated to this
+
+
+def _preview_sql(conversation_id: str) -> str:
+    """Subquery computing a conversation's preview (Enum columns store member names)."""
+    return f"""(
+        SELECT CASE WHEN length(m.content) > {PREVIEW_CHARS}
+                    THEN substr(m.content, 1, {PREVIEW_CHARS}) || '...'
+                    ELSE m.content END
+        FROM messages m
+        WHERE m.conversation_id = {conversation_id} AND m.role = '{MessageRole.HUMAN.name}'
+        ORDER BY m.created_at, m.rowid
+        LIMIT 1
+    )"""
+
+
+def _recompute_summary_sql(conversation_id: str) -> str:
+    """SET clause recomputing the whole summary of the conversation being updated."""
+    return f"""
+        message_count = (SELECT COUNT(*) FROM messages m WHERE m.conversation_id = {conversation_id}),
+        last_message_at = (SELECT MAX(m.created_at) FROM messages m WHERE m.conversation_id = {conversation_id}),
+        preview = {_preview_sql(conversation_id)}
+    """
+
+
+CONVERSATION_SUMMARY_TRIGGERS = [
+    # Inserts adjust incrementally; the preview only changes for human messages
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_messages_summary_insert AFTER INSERT ON messages
+    BEGIN
+        UPDATE conversations SET
+            message_count = message_count + 1,
+            last_message_at = CASE
+                WHEN last_message_at IS NULL OR NEW.created_at > last_message_at THEN NEW.created_at
+                ELSE last_message_at END,
+            preview = CASE
+                WHEN NEW.role = '{MessageRole.HUMAN.name}' THEN {_preview_sql("NEW.conversation_id")}
+                ELSE preview END
+        WHERE id = NEW.conversation_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_messages_summary_delete AFTER DELETE ON messages
+    BEGIN
+        UPDATE conversations SET
+            message_count = MAX(message_count - 1, 0),
+            last_message_at = (
+                SELECT MAX(m.created_at) FROM messages m WHERE m.conversation_id = OLD.conversation_id
+            ),
+            preview = CASE
+                WHEN OLD.role = '{MessageRole.HUMAN.name}' THEN {_preview_sql("OLD.conversation_id")}
+                ELSE preview END
+        WHERE id = OLD.conversation_id;
+    END
+    """,
+    # Edits are rare, so they recompute. Listing only the summary's inputs keeps
+    # frequent writes such as times_retrieved from firing this
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_messages_summary_update
+    AFTER UPDATE OF conversation_id, role, content, created_at ON messages
+    BEGIN
+        UPDATE conversations SET {_recompute_summary_sql("conversations.id")}
+        WHERE id IN (OLD.conversation_id, NEW.conversation_id);
+    END
+    """,
+]
+
+CONVERSATION_SUMMARY_BACKFILL = (
+    f"UPDATE conversations SET {_recompute_summary_sql('conversations.id')}"
+)
+
+for _trigger in CONVERSATION_SUMMARY_TRIGGERS:
+    event.listen(Message.__table__, "after_create", DDL(_trigger).execute_if(dialect="sqlite"))
+
+
+# Full-text index over message content (SQLite FTS5), for exact word and
+# phrase search (services/message_search.py). It is an external-content table:
+# it stores only the index, reading content from messages by rowid, and the
+# triggers below keep it in sync. Created with the messages table and, for
+# existing databases, by the schema migration, which also rebuilds it.
+
+MESSAGE_SEARCH_TABLE = "messages_fts"
+# Per-term document counts of the index (fts5vocab), used by hybrid retrieval
+# to leave out words too common to be worth a lexical search
+MESSAGE_SEARCH_VOCAB_TABLE = "messages_fts_vocab"
+
+MESSAGE_SEARCH_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {MESSAGE_SEARCH_TABLE} USING fts5(
+        content, content='messages', content_rowid='rowid', tokenize='unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_messages_fts_insert AFTER INSERT ON messages
+    BEGIN
+        INSERT INTO {MESSAGE_SEARCH_TABLE}(rowid, content) VALUES (NEW.rowid, NEW.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_messages_fts_delete AFTER DELETE ON messages
+    BEGIN
+        INSERT INTO {MESSAGE_SEARCH_TABLE}({MESSAGE_SEARCH_TABLE}, rowid, content)
+        VALUES ('delete', OLD.rowid, OLD.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_messages_fts_update AFTER UPDATE OF content ON messages
+    BEGIN
+        INSERT INTO {MESSAGE_SEARCH_TABLE}({MESSAGE_SEARCH_TABLE}, rowid, content)
+        VALUES ('delete', OLD.rowid, OLD.content);
+        INSERT INTO {MESSAGE_SEARCH_TABLE}(rowid, content) VALUES (NEW.rowid, NEW.content);
+    END
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {MESSAGE_SEARCH_VOCAB_TABLE}
+    USING fts5vocab({MESSAGE_SEARCH_TABLE}, 'row')
+    """,
+]
+
+# Re-reads every message; also repairs the index after a table rebuild
+# reassigns rowids (database._migrate_messages_role_enum)
+MESSAGE_SEARCH_BACKFILL = (
+    f"INSERT INTO {MESSAGE_SEARCH_TABLE}({MESSAGE_SEARCH_TABLE}) VALUES ('rebuild')"
+)
+
+for _statement in MESSAGE_SEARCH_DDL:
+    event.listen(Message.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
@@ -21,6 +21,7 @@ from app.services import (
 )
 from app.services.attachment_service import build_persistable_content
 from app.services.llm_service import ModelProvider
+from app.services.memory_outbox import memory_outbox
 from app.services.message_history import (
     delete_tool_exchange_messages,
     find_preceding_conversational_message,
@@ -218,6 +219,14 @@ class RegenerateRequest(BaseModel):
     user_display_name: Optional[str] = None
 
 
+class PrefetchRequest(BaseModel):
+    """Draft message to retrieve memories for ahead of sending."""
+    conversation_id: str
+    message: str
+    # For multi-entity conversations: the entity that will respond
+    responding_entity_id: Optional[str] = None
+
+
 @router.post("/send", response_model=ChatResponse)
 async def send_message(
     data: ChatRequest,
@@ -273,17 +282,10 @@ async def send_message(
             )
 
     # Get or create session
-    # For multi-entity, we use the responding entity's session
-    session = session_manager.get_session(data.conversation_id)
-    preserved_context_cache_length = None
-
-    # For multi-entity conversations, close and reload session if responding entity changed
-    # This ensures each entity only gets its own memories
-    if session and is_multi_entity and session.entity_id != responding_entity_id:
-        # Preserve the context cache length for cache stability across entity switches
-        preserved_context_cache_length = session.last_cached_context_length
-        session_manager.close_session(data.conversation_id)
-        session = None
+    # For multi-entity, this is the responding entity's view of the
+    # conversation: only its own memories, caught up with the other entities'
+    # turns (loaded from the database the first time the entity responds)
+    session = session_manager.get_entity_session(data.conversation_id, responding_entity_id)
 
     if not session:
         # Try to load from database
@@ -291,7 +293,6 @@ async def send_message(
             data.conversation_id,
             db,
             responding_entity_id=responding_entity_id if is_multi_entity else None,
-            preserve_context_cache_length=preserved_context_cache_length,
         )
 
         if not session:
@@ -364,18 +365,19 @@ async def send_message(
 
     conversation.updated_at = datetime.utcnow()
 
-    await db.commit()
-    await db.refresh(human_msg)
-    await db.refresh(assistant_msg)
+    # Assigns message IDs and timestamps for the outbox rows
+    await db.flush()
 
-    # Store messages as memories in vector database
+    # Queue messages for vectorization into memory (committed with the
+    # messages; the outbox worker upserts them in the background)
     if memory_service.is_configured():
         if is_multi_entity:
             # For multi-entity conversations, store to ALL participating entities
             responding_label = get_entity_label(responding_entity_id)
             for entity_id in multi_entity_ids:
                 # For human messages: role is "human" for all entities
-                await memory_service.store_memory(
+                memory_outbox.add(
+                    db,
                     message_id=str(human_msg.id),
                     conversation_id=str(data.conversation_id),
                     role="human",
@@ -388,7 +390,8 @@ async def send_message(
                 # - For the responding entity: role is "assistant"
                 # - For other entities: role is the responding entity's label
                 if entity_id == responding_entity_id:
-                    await memory_service.store_memory(
+                    memory_outbox.add(
+                        db,
                         message_id=str(assistant_msg.id),
                         conversation_id=str(data.conversation_id),
                         role="assistant",
@@ -397,7 +400,8 @@ async def send_message(
                         entity_id=entity_id,
                     )
                 else:
-                    await memory_service.store_memory(
+                    memory_outbox.add(
+                        db,
                         message_id=str(assistant_msg.id),
                         conversation_id=str(data.conversation_id),
                         role=responding_label or "other_entity",
@@ -407,7 +411,8 @@ async def send_message(
                     )
         else:
             # Standard single-entity conversation
-            await memory_service.store_memory(
+            memory_outbox.add(
+                db,
                 message_id=str(human_msg.id),
                 conversation_id=str(data.conversation_id),
                 role="human",
@@ -415,7 +420,8 @@ async def send_message(
                 created_at=human_msg.created_at,
                 entity_id=session.entity_id,
             )
-            await memory_service.store_memory(
+            memory_outbox.add(
+                db,
                 message_id=str(assistant_msg.id),
                 conversation_id=str(data.conversation_id),
                 role="assistant",
@@ -424,6 +430,14 @@ async def send_message(
                 entity_id=session.entity_id,
             )
 
+    await db.commit()
+    await db.refresh(human_msg)
+    await db.refresh(assistant_msg)
+    memory_outbox.notify()
+    # Snapshot the session as of this turn, so a reload after a restart or
+    # eviction restores it instead of rebuilding
+    await session_manager.save_snapshot(session, db)
+
     return ChatResponse(
         content=response["content"],
         model=response["model"],
@@ -519,24 +533,15 @@ async def stream_message(data: ChatRequest):
                         yield f"event: error\ndata: {json.dumps({'error': error_msg})}\n\n"
                         return
 
-                # Get or create session
-                session = session_manager.get_session(data.conversation_id)
-                preserved_context_cache_length = None
-
-                # For multi-entity conversations, close and reload session if responding entity changed
-                # This ensures each entity only gets its own memories
-                if session and is_multi_entity and session.entity_id != responding_entity_id:
-                    # Preserve the context cache length for cache stability across entity switches
-                    preserved_context_cache_length = session.last_cached_context_length
-                    session_manager.close_session(data.conversation_id)
-                    session = None
+                # Get or create session (for multi-entity, the responding
+                # entity's view; see send_message)
+                session = session_manager.get_entity_session(data.conversation_id, responding_entity_id)
 
                 if not session:
                     session = await session_manager.load_session_from_db(
                         data.conversation_id,
                         db,
                         responding_entity_id=responding_entity_id if is_multi_entity else None,
-                        preserve_context_cache_length=preserved_context_cache_length,
                     )
                     if not session:
                         yield f"event: error\ndata: {json.dumps({'error': 'Conversation not found'})}\n\n"
@@ -695,6 +700,13 @@ async def stream_message(data: ChatRequest):
                         )
                         db.add(tool_result_msg)
                         tool_exchange_msgs.append(tool_result_msg)
+                        memory_service.record_query_results(
+                            db,
+                            data.conversation_id,
+                            exchange,
+                            tool_result_msg,
+                            entity_id=responding_entity_id if is_multi_entity else None,
+                        )
 
                 assistant_msg = Message(
                     conversation_id=data.conversation_id,
@@ -708,12 +720,11 @@ async def stream_message(data: ChatRequest):
 
                 conversation.updated_at = datetime.utcnow()
 
-                await db.commit()
-                if human_msg:
-                    await db.refresh(human_msg)
-                await db.refresh(assistant_msg)
+                # Assigns message IDs and timestamps for the outbox rows
+                await db.flush()
 
-                # Store messages as memories in vector database
+                # Queue messages for vectorization into memory (committed with
+                # the messages; the outbox worker upserts them in the background)
                 if memory_service.is_configured():
                     if is_multi_entity:
                         # For multi-entity conversations, store to ALL participating entities
@@ -724,7 +735,8 @@ async def stream_message(data: ChatRequest):
                             # attachment-only messages (no text to vectorize -
                             # file content is intentionally not stored in memory).
                             if human_msg and data.message:
-                                await memory_service.store_memory(
+                                memory_outbox.add(
+                                    db,
                                     message_id=str(human_msg.id),
                                     conversation_id=str(data.conversation_id),
                                     role="human",
@@ -737,7 +749,8 @@ async def stream_message(data: ChatRequest):
                             # - For the responding entity: role is "assistant"
                             # - For other entities: role is the responding entity's label
                             if entity_id == responding_entity_id:
-                                await memory_service.store_memory(
+                                memory_outbox.add(
+                                    db,
                                     message_id=str(assistant_msg.id),
                                     conversation_id=str(data.conversation_id),
                                     role="assistant",
@@ -746,7 +759,8 @@ async def stream_message(data: ChatRequest):
                                     entity_id=entity_id,
                                 )
                             else:
-                                await memory_service.store_memory(
+                                memory_outbox.add(
+                                    db,
                                     message_id=str(assistant_msg.id),
                                     conversation_id=str(data.conversation_id),
                                     role=responding_label or "other_entity",
@@ -760,7 +774,8 @@ async def stream_message(data: ChatRequest):
                         # is no text to vectorize and file content is intentionally
                         # not stored in memory (it is still persisted in the DB).
                         if data.message:
-                            await memory_service.store_memory(
+                            memory_outbox.add(
+                                db,
                                 message_id=str(human_msg.id),
                                 conversation_id=str(data.conversation_id),
                                 role="human",
@@ -768,7 +783,8 @@ async def stream_message(data: ChatRequest):
                                 created_at=human_msg.created_at,
                                 entity_id=session.entity_id,
                             )
-                        await memory_service.store_memory(
+                        memory_outbox.add(
+                            db,
                             message_id=str(assistant_msg.id),
                             conversation_id=str(data.conversation_id),
                             role="assistant",
@@ -777,6 +793,13 @@ async def stream_message(data: ChatRequest):
                             entity_id=session.entity_id,
                         )
 
+                await db.commit()
+                if human_msg:
+                    await db.refresh(human_msg)
+                await db.refresh(assistant_msg)
+                memory_outbox.notify()
+                await session_manager.save_snapshot(session, db)
+
                 # Send stored event with message IDs
                 stored_data = {
                     'assistant_message_id': str(assistant_msg.id),
@@ -1162,6 +1185,13 @@ async def regenerate_response(data: RegenerateRequest):
                         )
                         db.add(tool_result_msg)
                         tool_exchange_msgs.append(tool_result_msg)
+                        memory_service.record_query_results(
+                            db,
+                            conversation_id,
+                            exchange,
+                            tool_result_msg,
+                            entity_id=responding_entity_id if is_multi_entity else None,
+                        )
 
                 # Store the new assistant message
                 assistant_msg = Message(
@@ -1177,10 +1207,10 @@ async def regenerate_response(data: RegenerateRequest):
                 # Update conversation timestamp
                 conversation.updated_at = datetime.utcnow()
 
-                await db.commit()
-                await db.refresh(assistant_msg)
+                # Assigns the message ID and timestamp for the outbox rows
+                await db.flush()
 
-                # Store new assistant message as memory
+                # Queue the new assistant message for vectorization into memory
                 if memory_service.is_configured():
                     if is_multi_entity:
                         # For multi-entity conversations, store to ALL participating entities
@@ -1189,7 +1219,8 @@ async def regenerate_response(data: RegenerateRequest):
                             # For the responding entity: role is "assistant"
                             # For other entities: role is the responding entity's label
                             if entity_id == responding_entity_id:
-                                await memory_service.store_memory(
+                                memory_outbox.add(
+                                    db,
                                     message_id=str(assistant_msg.id),
                                     conversation_id=str(conversation_id),
                                     role="assistant",
@@ -1198,7 +1229,8 @@ async def regenerate_response(data: RegenerateRequest):
                                     entity_id=entity_id,
                                 )
                             else:
-                                await memory_service.store_memory(
+                                memory_outbox.add(
+                                    db,
                                     message_id=str(assistant_msg.id),
                                     conversation_id=str(conversation_id),
                                     role=responding_label,
@@ -1207,7 +1239,8 @@ async def regenerate_response(data: RegenerateRequest):
                                     entity_id=entity_id,
                                 )
                     else:
-                        await memory_service.store_memory(
+                        memory_outbox.add(
+                            db,
                             message_id=str(assistant_msg.id),
                             conversation_id=str(conversation_id),
                             role="assistant",
@@ -1216,6 +1249,11 @@ async def regenerate_response(data: RegenerateRequest):
                             entity_id=session.entity_id,
                         )
 
+                await db.commit()
+                await db.refresh(assistant_msg)
+                memory_outbox.notify()
+                await session_manager.save_snapshot(session, db)
+
                 # Send stored event with message IDs
                 stored_data = {
                     'assistant_message_id': str(assistant_msg.id)
@@ -1275,6 +1313,60 @@ async def quick_chat(data: QuickChatRequest):
     }
 
 
+@router.post("/prefetch")
+async def prefetch_memories(
+    data: PrefetchRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Speculatively retrieve memories for a draft message.
+
+    Meant to be called by the frontend after a pause in typing. Runs the
+    normal memory search and content hydration for the draft and parks the
+    results in the session; the next /send or /stream reuses them when the
+    final message is close enough to the draft, and searches normally
+    otherwise. Nothing is added to the conversation.
+
+    For a multi-entity conversation the prefetch is parked on the responding
+    entity's view; without a participating responding entity it is skipped.
+    responding_entity_id is ignored for single-entity conversations, as in
+    /send and /stream, so it can't load the session for another entity.
+    """
+    result = await db.execute(
+        select(Conversation).where(Conversation.id == data.conversation_id)
+    )
+    conversation = result.scalar_one_or_none()
+
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    is_multi_entity = conversation.conversation_type == ConversationType.MULTI_ENTITY
+    responding_entity_id = data.responding_entity_id if is_multi_entity else None
+    if is_multi_entity and (
+        responding_entity_id is None
+        or responding_entity_id not in await get_multi_entity_ids(data.conversation_id, db)
+    ):
+        return {"status": "skipped", "candidates": 0}
+
+    session = session_manager.get_entity_session(data.conversation_id, responding_entity_id)
+
+    if not session:
+        session = await session_manager.load_session_from_db(
+            data.conversation_id,
+            db,
+            responding_entity_id=responding_entity_id,
+        )
+
+    if not session:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    if session.is_multi_entity and session.entity_id != responding_entity_id:
+        return {"status": "skipped", "candidates": 0}
+
+    candidates = await session_manager.prefetch_memories(session, data.message, db)
+    return {"status": "prefetched", "candidates": candidates}
+
+
 @router.get("/session/{conversation_id}")
 async def get_session_info(
     conversation_id: str,
@@ -1368,9 +1460,10 @@ async def _build_memories_by_entity(
             conversation_id, db, entity_id=entity_id
         )
 
+        memory_contents = await memory_service.get_full_memory_contents(retrieved_ids, db)
         memories = []
         for mem_id in retrieved_ids:
-            mem_data = await memory_service.get_full_memory_content(mem_id, db)
+            mem_data = memory_contents.get(str(mem_id))
             if not mem_data or mem_data["conversation_id"] in archived_source_ids:
                 continue
             content = mem_data["content"]
@@ -1404,6 +1497,15 @@ async def close_session(conversation_id: str):
     return {"status": "closed", "conversation_id": conversation_id}
 
 
+@router.get("/sessions/stats")
+async def get_session_stats():
+    """
+    In-memory session store: resident sessions and estimated bytes, limits,
+    evictions by cause, and how many loads rebuilt an evicted session.
+    """
+    return session_manager.get_stats()
+
+
 @router.get("/config")
 async def get_chat_config():
     """Get default chat configuration including available entities and providers."""
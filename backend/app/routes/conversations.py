@@ -2,17 +2,21 @@ import asyncio
 import json
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.database import async_session_maker, get_db
+from app.database import async_session_maker, get_db, get_read_db
 from app.models import Conversation, ConversationEntity, ConversationType, Message, MessageRole
+from app.services.memory_significance import MEMORY_ROLES
+from app.services.message_search import match_expression, search_messages
+from app.services.session_snapshots import session_snapshots
+from app.utils.pagination import NEXT_CURSOR_HEADER, InvalidCursor, KeyColumn, Keyset
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +25,35 @@ router = APIRouter(prefix="/api/conversations", tags=["conversations"])
 # Batch size for committing during imports to prevent memory exhaustion
 IMPORT_BATCH_SIZE = 50
 
+# Listing orders, with the keys their cursors carry (see utils/pagination.py).
+# Conversations never updated through the ORM have no updated_at and list first
+CONVERSATION_KEYSET = Keyset(
+    KeyColumn(Conversation.updated_at, descending=True, nulls_first=True),
+    KeyColumn(Conversation.created_at, descending=True),
+    KeyColumn(Conversation.id, descending=True),
+)
+MESSAGE_KEYSET = Keyset(KeyColumn(Message.created_at), KeyColumn(Message.id))
+# "Latest N" message pages walk the same order backwards, toward older messages
+MESSAGE_LATEST_KEYSET = Keyset(
+    KeyColumn(Message.created_at, descending=True),
+    KeyColumn(Message.id, descending=True),
+)
+
+
+def paginate(keyset: Keyset, query, cursor: Optional[str]):
+    """Order a listing query by keyset, starting after cursor if given."""
+    try:
+        return keyset.paginate(query, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+def set_next_cursor(response: Response, keyset: Keyset, rows, limit: Optional[int]) -> None:
+    """Advertise the next page's cursor, if there may be one."""
+    next_cursor = keyset.next_cursor(rows, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
 
 class ConversationCreate(BaseModel):
     title: Optional[str] = None
@@ -50,6 +83,17 @@ class EntityInfo(BaseModel):
     default_model: Optional[str] = None
 
 
+class MessageSearchResult(BaseModel):
+    message_id: str
+    conversation_id: str
+    conversation_title: Optional[str]
+    entity_id: Optional[str]
+    is_archived: bool
+    role: str
+    created_at: datetime
+    snippet: str  # Matches wrapped in [brackets]
+
+
 class ConversationResponse(BaseModel):
     id: str
     created_at: datetime
@@ -65,6 +109,7 @@ class ConversationResponse(BaseModel):
     entity_missing: bool = False  # True if entity_id references a non-existent entity
     message_count: int = 0
     preview: Optional[str] = None
+    last_message_at: Optional[datetime] = None
     # For multi-entity conversations: list of participating entities
     entities: Optional[List[EntityInfo]] = None
     # Per-entity system prompts: { entity_id: system_prompt, ... }
@@ -103,28 +148,76 @@ def get_entity_label(entity_id: str) -> Optional[str]:
 
 async def get_conversation_entities(conversation_id: str, db: AsyncSession) -> List[EntityInfo]:
     """Get the list of entities participating in a multi-entity conversation."""
+    entities = await get_entities_for_conversations([conversation_id], db)
+    return entities.get(conversation_id, [])
+
+
+async def get_entities_for_conversations(
+    conversation_ids: List[str],
+    db: AsyncSession,
+) -> Dict[str, List[EntityInfo]]:
+    """Participating entities for several multi-entity conversations, in one query."""
+    if not conversation_ids:
+        return {}
     result = await db.execute(
         select(ConversationEntity)
-        .where(ConversationEntity.conversation_id == conversation_id)
-        .order_by(ConversationEntity.display_order)
+        .where(ConversationEntity.conversation_id.in_(conversation_ids))
+        .order_by(ConversationEntity.conversation_id, ConversationEntity.display_order)
     )
-    conv_entities = result.scalars().all()
 
-    entities_info = []
-    for ce in conv_entities:
+    entities: Dict[str, List[EntityInfo]] = {conv_id: [] for conv_id in conversation_ids}
+    for ce in result.scalars().all():
         info = get_entity_info(ce.entity_id)
-        if info:
-            entities_info.append(info)
-        else:
+        if not info:
             # Fallback for entities no longer in settings config
-            entities_info.append(EntityInfo(
+            info = EntityInfo(
                 entity_id=ce.entity_id,
                 label=ce.entity_id,
                 description=None,
                 llm_provider="anthropic",
                 default_model=None,
-            ))
-    return entities_info
+            )
+        entities[ce.conversation_id].append(info)
+    return entities
+
+
+def conversation_summary_response(
+    conv: Conversation,
+    entities: Optional[List[EntityInfo]] = None,
+) -> ConversationResponse:
+    """ConversationResponse from a conversation row and its summary columns."""
+    return ConversationResponse(
+        id=conv.id,
+        created_at=conv.created_at,
+        updated_at=conv.updated_at,
+        title=conv.title,
+        tags=conv.tags,
+        conversation_type=conv.conversation_type.value,
+        system_prompt_used=conv.system_prompt_used,
+        llm_model_used=conv.llm_model_used,
+        notes=conv.notes,
+        entity_id=conv.entity_id,
+        is_archived=conv.is_archived,
+        entity_missing=not check_entity_exists(conv.entity_id) if conv.entity_id != "multi-entity" else False,
+        message_count=conv.message_count or 0,
+        preview=conv.preview,
+        last_message_at=conv.last_message_at,
+        entities=entities,
+        entity_system_prompts=conv.entity_system_prompts,
+    )
+
+
+async def conversation_summary_responses(
+    conversations: List[Conversation],
+    db: AsyncSession,
+) -> List[ConversationResponse]:
+    """Responses for a page of conversations: one batched entity query, no message reads."""
+    multi_entity_ids = [
+        conv.id for conv in conversations
+        if conv.conversation_type == ConversationType.MULTI_ENTITY
+    ]
+    entities = await get_entities_for_conversations(multi_entity_ids, db)
+    return [conversation_summary_response(conv, entities.get(conv.id)) for conv in conversations]
 
 
 class MessageResponse(BaseModel):
@@ -291,9 +384,12 @@ async def create_conversation(
 
 @router.get("/", response_model=List[ConversationResponse])
 async def list_conversations(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    write_db: AsyncSession = Depends(get_db),
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     entity_id: Optional[str] = None,
     include_archived: bool = False,
 ):
@@ -301,6 +397,8 @@ async def list_conversations(
     List all conversations with message counts and previews.
 
     Args:
+        cursor: X-Next-Cursor header of the previous page; when given,
+                offset is ignored.
         entity_id: Optional filter by AI entity (Pinecone index name).
                    Use "multi-entity" to list multi-entity conversations.
                    If not provided, returns all conversations.
@@ -319,80 +417,51 @@ async def list_conversations(
     # Always exclude imported conversations from the list (they only serve as memory sources)
     query = query.where(Conversation.is_imported == False)
 
-    query = query.order_by(
-        Conversation.updated_at.desc().nullsfirst(),
-        Conversation.created_at.desc()
-    ).limit(limit).offset(offset)
+    query = paginate(CONVERSATION_KEYSET, query, cursor).limit(limit)
+    if not cursor:
+        query = query.offset(offset)
 
-    result = await db.execute(query)
+    # Summary columns are written by triggers, behind the ORM's back
+    result = await db.execute(query.execution_options(populate_existing=True))
     conversations = result.scalars().all()
-
-    response = []
-    deleted_empty = False
-    for conv in conversations:
-        # Get message count
-        msg_result = await db.execute(
-            select(Message)
-            .where(Message.conversation_id == conv.id)
+    # Keyed on the last row read, even if it's an empty one removed below
+    set_next_cursor(response, CONVERSATION_KEYSET, conversations, limit)
+
+    # Clean up empty conversations (no messages ever sent), through the write
+    # session (db is read-only). A message may have been sent since the read
+    # snapshot, so emptiness is re-checked by the deletes themselves; the
+    # first one takes the write lock, so both see the same conversations
+    empty_ids = [conv.id for conv in conversations if not conv.message_count]
+    if empty_ids:
+        still_empty = select(Conversation.id).where(
+            Conversation.id.in_(empty_ids), Conversation.message_count == 0
         )
-        messages = msg_result.scalars().all()
-        message_count = len(messages)
-
-        # Clean up empty conversations (no messages ever sent)
-        if message_count == 0:
-            await db.delete(conv)
-            deleted_empty = True
-            continue
-
-        # Get preview from first human message
-        preview = None
-        for msg in messages:
-            if msg.role == MessageRole.HUMAN:
-                preview = msg.content[:100] + "..." if len(msg.content) > 100 else msg.content
-                break
-
-        # Get entity info for multi-entity conversations
-        entities_info = None
-        if conv.conversation_type == ConversationType.MULTI_ENTITY:
-            entities_info = await get_conversation_entities(conv.id, db)
-
-        response.append(ConversationResponse(
-            id=conv.id,
-            created_at=conv.created_at,
-            updated_at=conv.updated_at,
-            title=conv.title,
-            tags=conv.tags,
-            conversation_type=conv.conversation_type.value,
-            system_prompt_used=conv.system_prompt_used,
-            llm_model_used=conv.llm_model_used,
-            notes=conv.notes,
-            entity_id=conv.entity_id,
-            is_archived=conv.is_archived,
-            entity_missing=not check_entity_exists(conv.entity_id) if conv.entity_id != "multi-entity" else False,
-            message_count=message_count,
-            preview=preview,
-            entities=entities_info,
-            entity_system_prompts=conv.entity_system_prompts,
-        ))
-
-    # Commit any deleted empty conversations
-    if deleted_empty:
-        await db.commit()
+        await write_db.execute(
+            delete(ConversationEntity).where(ConversationEntity.conversation_id.in_(still_empty))
+        )
+        await write_db.execute(delete(Conversation).where(Conversation.id.in_(still_empty)))
+        await write_db.commit()
 
-    return response
+    return await conversation_summary_responses(
+        [conv for conv in conversations if conv.message_count], db
+    )
 
 
 @router.get("/archived", response_model=List[ConversationResponse])
 async def list_archived_conversations(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     entity_id: Optional[str] = None,
 ):
     """
     List archived conversations.
 
     Args:
+        cursor: X-Next-Cursor header of the previous page; when given,
+                offset is ignored.
         entity_id: Optional filter by AI entity (Pinecone index name).
     """
     query = select(Conversation).where(Conversation.is_archived == True)
@@ -403,112 +472,80 @@ async def list_archived_conversations(
     if entity_id is not None:
         query = query.where(Conversation.entity_id == entity_id)
 
-    query = query.order_by(
-        Conversation.updated_at.desc().nullsfirst(),
-        Conversation.created_at.desc()
-    ).limit(limit).offset(offset)
+    query = paginate(CONVERSATION_KEYSET, query, cursor).limit(limit)
+    if not cursor:
+        query = query.offset(offset)
 
-    result = await db.execute(query)
+    result = await db.execute(query.execution_options(populate_existing=True))
     conversations = result.scalars().all()
+    set_next_cursor(response, CONVERSATION_KEYSET, conversations, limit)
+    return await conversation_summary_responses(conversations, db)
 
-    response = []
-    for conv in conversations:
-        msg_result = await db.execute(
-            select(Message).where(Message.conversation_id == conv.id)
-        )
-        messages = msg_result.scalars().all()
-        message_count = len(messages)
-
-        preview = None
-        for msg in messages:
-            if msg.role == MessageRole.HUMAN:
-                preview = msg.content[:100] + "..." if len(msg.content) > 100 else msg.content
-                break
-
-        # Get entity info for multi-entity conversations
-        entities_info = None
-        if conv.conversation_type == ConversationType.MULTI_ENTITY:
-            entities_info = await get_conversation_entities(conv.id, db)
-
-        response.append(ConversationResponse(
-            id=conv.id,
-            created_at=conv.created_at,
-            updated_at=conv.updated_at,
-            title=conv.title,
-            tags=conv.tags,
-            conversation_type=conv.conversation_type.value,
-            system_prompt_used=conv.system_prompt_used,
-            llm_model_used=conv.llm_model_used,
-            notes=conv.notes,
-            entity_id=conv.entity_id,
-            is_archived=conv.is_archived,
-            entity_missing=not check_entity_exists(conv.entity_id) if conv.entity_id != "multi-entity" else False,
-            message_count=message_count,
-            preview=preview,
-            entities=entities_info,
-            entity_system_prompts=conv.entity_system_prompts,
-        ))
 
-    return response
+@router.get("/search", response_model=List[MessageSearchResult])
+async def search_conversations(
+    q: str,
+    db: AsyncSession = Depends(get_read_db),
+    phrase: bool = False,
+    entity_id: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Full-text search over conversation messages (human, assistant and
+    reflection text), best match first, with a highlighted snippet per hit.
+
+    Args:
+        q: Words to find; every word must appear in the message.
+        phrase: If True, q must appear as an exact phrase.
+        entity_id: Optional filter by AI entity (Pinecone index name).
+    """
+    if match_expression(q) is None:
+        raise HTTPException(status_code=400, detail="Search text must contain at least one word")
+
+    results = await search_messages(
+        db, q, phrase=phrase, entity_id=entity_id, roles=MEMORY_ROLES, limit=limit
+    )
+    return [MessageSearchResult(**result) for result in results]
 
 
 @router.get("/{conversation_id}", response_model=ConversationResponse)
 async def get_conversation(
     conversation_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific conversation."""
     result = await db.execute(
-        select(Conversation).where(Conversation.id == conversation_id)
+        select(Conversation)
+        .where(Conversation.id == conversation_id)
+        .execution_options(populate_existing=True)
     )
     conversation = result.scalar_one_or_none()
 
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    # Get message count
-    msg_result = await db.execute(
-        select(Message).where(Message.conversation_id == conversation_id)
-    )
-    messages = msg_result.scalars().all()
-
-    preview = None
-    for msg in messages:
-        if msg.role == MessageRole.HUMAN:
-            preview = msg.content[:100] + "..." if len(msg.content) > 100 else msg.content
-            break
-
-    # Get entity info for multi-entity conversations
-    entities_info = None
-    if conversation.conversation_type == ConversationType.MULTI_ENTITY:
-        entities_info = await get_conversation_entities(conversation.id, db)
-
-    return ConversationResponse(
-        id=conversation.id,
-        created_at=conversation.created_at,
-        updated_at=conversation.updated_at,
-        title=conversation.title,
-        tags=conversation.tags,
-        conversation_type=conversation.conversation_type.value,
-        system_prompt_used=conversation.system_prompt_used,
-        llm_model_used=conversation.llm_model_used,
-        notes=conversation.notes,
-        entity_id=conversation.entity_id,
-        is_archived=conversation.is_archived,
-        entity_missing=not check_entity_exists(conversation.entity_id) if conversation.entity_id != "multi-entity" else False,
-        message_count=len(messages),
-        preview=preview,
-        entities=entities_info,
-        entity_system_prompts=conversation.entity_system_prompts,
-    )
+    return (await conversation_summary_responses([conversation], db))[0]
 
 
 @router.get("/{conversation_id}/messages", response_model=List[MessageResponse])
 async def get_conversation_messages(
     conversation_id: str,
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    latest: bool = False,
 ):
-    """Get all messages in a conversation."""
+    """
+    Get a conversation's messages, oldest first.
+
+    Without a limit the whole conversation is returned. With one, pages are
+    keyed by the X-Next-Cursor header: by default each page continues after
+    the cursor, toward newer messages; with latest=true the first page is
+    the newest `limit` messages and each further page the `limit` messages
+    before the cursor, for loading history upward. Every page is in
+    chronological order.
+    """
     # Verify conversation exists
     result = await db.execute(
         select(Conversation).where(Conversation.id == conversation_id)
@@ -516,13 +553,15 @@ async def get_conversation_messages(
     if not result.scalar_one_or_none():
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    # Get messages
-    result = await db.execute(
-        select(Message)
-        .where(Message.conversation_id == conversation_id)
-        .order_by(Message.created_at)
-    )
+    keyset = MESSAGE_LATEST_KEYSET if latest else MESSAGE_KEYSET
+    query = paginate(keyset, select(Message).where(Message.conversation_id == conversation_id), cursor)
+    if limit:
+        query = query.limit(limit)
+    result = await db.execute(query)
     messages = result.scalars().all()
+    set_next_cursor(response, keyset, messages, limit)
+    if latest:
+        messages = list(reversed(messages))
 
     return [
         MessageResponse(
@@ -566,34 +605,7 @@ async def update_conversation(
     await db.commit()
     await db.refresh(conversation)
 
-    # Get message count
-    msg_result = await db.execute(
-        select(Message).where(Message.conversation_id == conversation_id)
-    )
-    message_count = len(msg_result.scalars().all())
-
-    # Get entity info for multi-entity conversations
-    entities_info = None
-    if conversation.conversation_type == ConversationType.MULTI_ENTITY:
-        entities_info = await get_conversation_entities(conversation.id, db)
-
-    return ConversationResponse(
-        id=conversation.id,
-        created_at=conversation.created_at,
-        updated_at=conversation.updated_at,
-        title=conversation.title,
-        tags=conversation.tags,
-        conversation_type=conversation.conversation_type.value,
-        system_prompt_used=conversation.system_prompt_used,
-        llm_model_used=conversation.llm_model_used,
-        notes=conversation.notes,
-        entity_id=conversation.entity_id,
-        is_archived=conversation.is_archived,
-        entity_missing=not check_entity_exists(conversation.entity_id) if conversation.entity_id != "multi-entity" else False,
-        message_count=message_count,
-        entities=entities_info,
-        entity_system_prompts=conversation.entity_system_prompts,
-    )
+    return (await conversation_summary_responses([conversation], db))[0]
 
 
 @router.post("/{conversation_id}/archive")
@@ -607,6 +619,8 @@ async def archive_conversation(
     Archived conversations are hidden from the main list and their messages
     are excluded from memory retrieval. All data is preserved.
     """
+    from app.services import memory_service
+
     result = await db.execute(
         select(Conversation).where(Conversation.id == conversation_id)
     )
@@ -622,6 +636,9 @@ async def archive_conversation(
     conversation.updated_at = datetime.utcnow()
     await db.commit()
 
+    # Keep the in-memory archived set used to filter retrieval current
+    await memory_service.note_conversation_archived(conversation, db)
+
     return {"status": "archived", "id": conversation_id}
 
 
@@ -636,6 +653,8 @@ async def unarchive_conversation(
     Restores the conversation to the main list and re-enables memory retrieval
     for its messages.
     """
+    from app.services import memory_service
+
     result = await db.execute(
         select(Conversation).where(Conversation.id == conversation_id)
     )
@@ -651,6 +670,8 @@ async def unarchive_conversation(
     conversation.updated_at = datetime.utcnow()
     await db.commit()
 
+    memory_service.note_conversation_unarchived(conversation_id)
+
     return {"status": "unarchived", "id": conversation_id}
 
 
@@ -691,14 +712,6 @@ async def delete_conversation(
     )
     message_ids = [row[0] for row in msg_result.fetchall()]
 
-    # Delete from vector database first
-    deleted_memories = 0
-    if memory_service.is_configured() and message_ids:
-        for msg_id in message_ids:
-            success = await memory_service.delete_memory(msg_id, entity_id)
-            if success:
-                deleted_memories += 1
-
     # Delete messages from SQL (cascade would handle this, but let's be explicit)
     await db.execute(
         delete(Message).where(Message.conversation_id == conversation_id)
@@ -708,6 +721,18 @@ async def delete_conversation(
     await db.delete(conversation)
     await db.commit()
 
+    # Delete from vector database after the commit, so a concurrent outbox
+    # upsert either sees the messages gone or is followed by these deletes
+    deleted_memories = 0
+    if memory_service.is_configured() and message_ids:
+        for msg_id in message_ids:
+            success = await memory_service.delete_memory(msg_id, entity_id)
+            if success:
+                deleted_memories += 1
+    memory_service.note_conversation_unarchived(conversation_id)
+    memory_service.invalidate_memory_stats(entity_id)
+    session_snapshots.discard(conversation_id)
+
     logger.info(
         f"Deleted conversation {conversation_id}: "
         f"{len(message_ids)} messages, {deleted_memories} memories removed from vector store"
@@ -724,7 +749,7 @@ async def delete_conversation(
 @router.get("/{conversation_id}/export", response_model=ConversationExport)
 async def export_conversation(
     conversation_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Export a conversation as JSON."""
     result = await db.execute(
@@ -6,7 +6,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import EntitySetting
 from app.services import memory_service
 from app.services.thinking_effort import EFFORT_LEVELS, normalize_effort, resolve_effort
@@ -66,7 +66,7 @@ async def _load_entity_settings(db: AsyncSession) -> Dict[str, EntitySetting]:
 
 
 @router.get("/", response_model=EntityListResponse)
-async def list_entities(db: AsyncSession = Depends(get_db)):
+async def list_entities(db: AsyncSession = Depends(get_read_db)):
     """
     List all configured AI entities.
 
@@ -110,7 +110,7 @@ async def list_entities(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/{entity_id}", response_model=EntityResponse)
-async def get_entity(entity_id: str, db: AsyncSession = Depends(get_db)):
+async def get_entity(entity_id: str, db: AsyncSession = Depends(get_read_db)):
     """Get a specific entity by its index name."""
     entity = settings.get_entity_by_index(entity_id)
 
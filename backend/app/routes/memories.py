@@ -1,17 +1,25 @@
 import asyncio
+import json
 import logging
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import func, select
+from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.database import get_db
+from app.database import async_session_maker, get_db, get_read_db
 from app.models import Conversation, Message, MessageRole
-from app.services import memory_service, vector_rebuild_service
+from app.services import memory_outbox, memory_service, vector_rebuild_service
+from app.services.memory_significance import (
+    MEMORY_ROLES,
+    calculate_significance,
+    significance_refresher,
+)
+from app.utils.pagination import NEXT_CURSOR_HEADER, InvalidCursor, KeyColumn, Keyset
 
 logger = logging.getLogger(__name__)
 
@@ -21,10 +29,15 @@ router = APIRouter(prefix="/api/memories", tags=["memories"])
 # long the database is stuck and we fail the request instead of hanging it
 SEARCH_ENRICHMENT_TIMEOUT_SECONDS = 15
 
-# Only these roles are vectorized into Pinecone; tool exchanges and system
-# messages live in SQL for conversation replay but are never memories, so the
-# memory browser must not show them.
-MEMORY_ROLES = (MessageRole.HUMAN, MessageRole.ASSISTANT, MessageRole.REFLECTION)
+# Memory browser orders by sort_by (see utils/pagination.py); ties break on ID
+MEMORY_KEYSETS = {
+    sort_by: Keyset(KeyColumn(column, descending=True), KeyColumn(Message.id))
+    for sort_by, column in (
+        ("significance", Message.significance),
+        ("created_at", Message.created_at),
+        ("times_retrieved", Message.times_retrieved),
+    )
+}
 
 
 class MemoryResponse(BaseModel):
@@ -60,67 +73,26 @@ class MemoryStats(BaseModel):
     retrieval_distribution: dict
 
 
-def calculate_significance(
-    times_retrieved: int,
-    created_at: datetime,
-    last_retrieved_at: Optional[datetime],
-    memory_status: Optional[str] = None,
-    role: Optional[str] = None,
-) -> float:
-    """
-    Calculate dynamic significance based on retrieval patterns.
-
-    significance = (1 + 0.1 * times_retrieved) * recency_factor * half_life_modifier
-
-    Where:
-    - times_retrieved: How many times this memory has been retrieved (weighted at 10%)
-    - recency_factor: Boost based on how recently retrieved (decays over time)
-    - half_life_modifier: Decay based on memory age (halves every N days);
-      pinned memories (memory_status == "pinned") are exempt from age decay
-    - role: memories saved via memory_save (role == "reflection") are multiplied
-      by settings.reflection_significance_multiplier
-    """
-    now = datetime.utcnow()
-
-    # Half-life modifier - older memories decay in significance
-    # Starts at 1.0 and halves every significance_half_life_days
-    half_life_modifier = 1.0
-    if memory_status != "pinned":
-        days_since_creation = (now - created_at).days
-        half_life_modifier = 0.5 ** (days_since_creation / settings.significance_half_life_days)
-
-    # Recency factor - boosts recently retrieved memories
-    # Cap at 1 day minimum to prevent very recent retrievals from dominating
-    recency_factor = 1.0
-    if last_retrieved_at:
-        days_since_retrieval = max((now - last_retrieved_at).days, 1)
-        recency_factor = 1.0 + min(1.0 / days_since_retrieval, settings.recency_boost_strength)
-
-    # Calculate significance (0.1 weight on times_retrieved to prevent retrieval
-    # count from dominating; +1 base so never-retrieved memories aren't zeroed out)
-    significance = (1 + 0.1 * times_retrieved) * recency_factor * half_life_modifier
-
-    # Boost self-authored memories (saved via the memory_save tool)
-    if role == "reflection":
-        significance *= settings.reflection_significance_multiplier
-
-    # Apply floor
-    return max(significance, settings.significance_floor)
-
-
 @router.get("/", response_model=List[MemoryResponse])
 async def list_memories(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     limit: int = Query(50, le=200),
     offset: int = 0,
+    cursor: Optional[str] = None,
     role: Optional[str] = None,
     entity_id: Optional[str] = None,
     sort_by: str = Query("significance", enum=["significance", "created_at", "times_retrieved"]),
 ):
     """
-    List all memories with significance calculation.
+    List memories, sorted and paginated in SQL.
+
+    Significance is the stored value kept current by memory_significance.py,
+    so only the requested page is loaded. Ties break on ID for stable paging.
 
     Args:
+        cursor: X-Next-Cursor header of the previous page (same sort_by);
+                when given, offset is ignored.
         entity_id: Optional filter by AI entity (Pinecone index name).
     """
     query = select(Message).where(Message.role.in_(MEMORY_ROLES))
@@ -140,44 +112,46 @@ async def list_memories(
         query = query.join(Conversation, Message.conversation_id == Conversation.id)
         query = query.where(Conversation.entity_id == entity_id)
 
+    keyset = MEMORY_KEYSETS[sort_by]
+    try:
+        query = keyset.paginate(query, cursor).limit(limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    if not cursor:
+        query = query.offset(offset)
+
     result = await db.execute(query)
     messages = result.scalars().all()
+    next_cursor = keyset.next_cursor(messages, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
-    # Calculate significance for each
     memories = []
     for msg in messages:
-        significance = calculate_significance(
-            msg.times_retrieved,
-            msg.created_at,
-            msg.last_retrieved_at,
-            msg.memory_status,
-            msg.role.value,
-        )
-        memories.append({
-            "id": msg.id,
-            "conversation_id": msg.conversation_id,
-            "role": msg.role.value,
-            "content": msg.content,
-            "content_preview": msg.content[:200] if len(msg.content) > 200 else msg.content,
-            "created_at": msg.created_at,
-            "times_retrieved": msg.times_retrieved,
-            "last_retrieved_at": msg.last_retrieved_at,
-            "significance": significance,
-            "memory_status": msg.memory_status,
-        })
-
-    # Sort
-    if sort_by == "significance":
-        memories.sort(key=lambda m: m["significance"], reverse=True)
-    elif sort_by == "created_at":
-        memories.sort(key=lambda m: m["created_at"], reverse=True)
-    elif sort_by == "times_retrieved":
-        memories.sort(key=lambda m: m["times_retrieved"], reverse=True)
-
-    # Paginate
-    memories = memories[offset:offset + limit]
+        significance = msg.significance
+        if significance is None:
+            # Row predates the column and the startup refresh hasn't reached it
+            significance = calculate_significance(
+                msg.times_retrieved,
+                msg.created_at,
+                msg.last_retrieved_at,
+                msg.memory_status,
+                msg.role.value,
+            )
+        memories.append(MemoryResponse(
+            id=msg.id,
+            conversation_id=msg.conversation_id,
+            role=msg.role.value,
+            content=msg.content,
+            content_preview=msg.content[:200] if len(msg.content) > 200 else msg.content,
+            created_at=msg.created_at,
+            times_retrieved=msg.times_retrieved,
+            last_retrieved_at=msg.last_retrieved_at,
+            significance=significance,
+            memory_status=msg.memory_status,
+        ))
 
-    return [MemoryResponse(**m) for m in memories]
+    return memories
 
 
 @router.post("/search")
@@ -293,19 +267,36 @@ async def search_memories(
     return results
 
 
+# Retrieval-count histogram buckets for the stats endpoint: (label, upper bound)
+RETRIEVAL_BUCKETS = (("0", 0), ("1-5", 5), ("6-10", 10), ("11-20", 20))
+RETRIEVAL_OVERFLOW_BUCKET = "21+"
+
+# Memories listed in the stats endpoint's most_significant
+MOST_SIGNIFICANT_COUNT = 10
+
+
 @router.get("/stats", response_model=MemoryStats)
 async def get_memory_stats(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     entity_id: Optional[str] = None,
 ):
     """
     Get statistics about stored memories.
 
+    Aggregates only: counts and retrieval figures come from one aggregate
+    query, the retrieval histogram from one bucketed GROUP BY, and the most
+    significant memories from the stored significance index, so no memory
+    content beyond the top-10 previews is read. Results are cached per entity
+    and dropped when that entity's memories are written.
+
     Args:
         entity_id: Optional filter by AI entity (Pinecone index name).
     """
-    # Build base query with optional entity filter; always restricted to
-    # roles that are actually vectorized as memories
+    cached = memory_service.cache.get_memory_stats(entity_id)
+    if cached is not None:
+        return MemoryStats(**cached)
+
+    # Always restricted to roles that are actually vectorized as memories
     def apply_entity_filter(query):
         query = query.where(Message.role.in_(MEMORY_ROLES))
         if entity_id is not None:
@@ -314,76 +305,68 @@ async def get_memory_stats(
             )
         return query
 
-    # Total counts
-    total_query = apply_entity_filter(select(func.count(Message.id)))
-    total_result = await db.execute(total_query)
-    total_count = total_result.scalar()
-
-    human_query = apply_entity_filter(
-        select(func.count(Message.id)).where(Message.role == MessageRole.HUMAN)
+    totals = (await db.execute(apply_entity_filter(select(
+        func.count(Message.id),
+        func.count(case((Message.role == MessageRole.HUMAN, 1))),
+        func.count(case((Message.role == MessageRole.ASSISTANT, 1))),
+        func.avg(Message.times_retrieved),
+        func.max(Message.times_retrieved),
+    )))).one()
+    total_count, human_count, assistant_count, avg_times_retrieved, max_times_retrieved = totals
+
+    bucket = case(
+        *[(Message.times_retrieved <= upper, label) for label, upper in RETRIEVAL_BUCKETS],
+        else_=RETRIEVAL_OVERFLOW_BUCKET,
+    ).label("bucket")
+    distribution = {label: 0 for label, _ in RETRIEVAL_BUCKETS}
+    distribution[RETRIEVAL_OVERFLOW_BUCKET] = 0
+    result = await db.execute(
+        apply_entity_filter(select(bucket, func.count(Message.id))).group_by(bucket)
     )
-    human_result = await db.execute(human_query)
-    human_count = human_result.scalar()
+    for label, count in result.all():
+        distribution[label] = count
 
-    assistant_query = apply_entity_filter(
-        select(func.count(Message.id)).where(Message.role == MessageRole.ASSISTANT)
+    result = await db.execute(
+        apply_entity_filter(select(
+            Message.id,
+            func.substr(Message.content, 1, 100),
+            Message.times_retrieved,
+            Message.significance,
+            Message.created_at,
+            Message.last_retrieved_at,
+            Message.memory_status,
+            Message.role,
+        ))
+        .order_by(Message.significance.desc(), Message.id)
+        .limit(MOST_SIGNIFICANT_COUNT)
     )
-    assistant_result = await db.execute(assistant_query)
-    assistant_count = assistant_result.scalar()
-
-    # Retrieval stats
-    avg_query = apply_entity_filter(select(func.avg(Message.times_retrieved)))
-    avg_result = await db.execute(avg_query)
-    avg_times_retrieved = avg_result.scalar() or 0
-
-    max_query = apply_entity_filter(select(func.max(Message.times_retrieved)))
-    max_result = await db.execute(max_query)
-    max_times_retrieved = max_result.scalar() or 0
-
-    # Most significant memories
-    messages_query = apply_entity_filter(select(Message))
-    result = await db.execute(messages_query)
-    messages = result.scalars().all()
-
-    memories_with_sig = []
-    for msg in messages:
-        sig = calculate_significance(
-            msg.times_retrieved, msg.created_at, msg.last_retrieved_at, role=msg.role.value
-        )
-        memories_with_sig.append({
-            "id": msg.id,
-            "content_preview": msg.content[:100],
-            "times_retrieved": msg.times_retrieved,
-            "significance": sig,
+    most_significant = []
+    for row in result.all():
+        significance = row.significance
+        if significance is None:
+            # Row predates the column and the startup refresh hasn't reached it
+            significance = calculate_significance(
+                row.times_retrieved, row.created_at, row.last_retrieved_at,
+                row.memory_status, row.role.value,
+            )
+        most_significant.append({
+            "id": row.id,
+            "content_preview": row[1],
+            "times_retrieved": row.times_retrieved,
+            "significance": significance,
         })
 
-    memories_with_sig.sort(key=lambda m: m["significance"], reverse=True)
-    most_significant = memories_with_sig[:10]
-
-    # Retrieval distribution (buckets)
-    distribution = {"0": 0, "1-5": 0, "6-10": 0, "11-20": 0, "21+": 0}
-    for msg in messages:
-        count = msg.times_retrieved
-        if count == 0:
-            distribution["0"] += 1
-        elif count <= 5:
-            distribution["1-5"] += 1
-        elif count <= 10:
-            distribution["6-10"] += 1
-        elif count <= 20:
-            distribution["11-20"] += 1
-        else:
-            distribution["21+"] += 1
-
-    return MemoryStats(
+    stats = MemoryStats(
         total_count=total_count,
         human_count=human_count,
         assistant_count=assistant_count,
-        avg_times_retrieved=round(avg_times_retrieved, 2),
-        max_times_retrieved=max_times_retrieved,
+        avg_times_retrieved=round(avg_times_retrieved or 0, 2),
+        max_times_retrieved=max_times_retrieved or 0,
         most_significant=most_significant,
         retrieval_distribution=distribution,
     )
+    memory_service.cache.set_memory_stats(entity_id, stats.model_dump())
+    return stats
 
 
 @router.get("/status/health")
@@ -400,9 +383,20 @@ async def memory_health():
         "similarity_threshold": settings.similarity_threshold,
         "query_similarity_threshold": settings.query_similarity_threshold,
         "recency_boost_strength": settings.recency_boost_strength,
+        "retrieval_count_sync": memory_service.retrieval_count_queue.get_stats(),
+        "significance_refresh": significance_refresher.get_stats(),
     }
 
 
+@router.get("/outbox/status")
+async def memory_outbox_status(db: AsyncSession = Depends(get_read_db)):
+    """
+    Vectorization backlog: messages committed but not yet upserted into their
+    entity's index, per entity, with retry counts and worker counters.
+    """
+    return await memory_outbox.get_status(db)
+
+
 class OrphanedRecord(BaseModel):
     id: str
     metadata: Optional[dict] = None
@@ -430,7 +424,7 @@ class CleanupResponse(BaseModel):
 
 @router.get("/orphans", response_model=OrphanedRecordsResponse)
 async def list_orphaned_records(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     entity_id: Optional[str] = None,
 ):
     """
@@ -492,12 +486,104 @@ async def cleanup_orphaned_records(
     return CleanupResponse(**result)
 
 
+class ReconcileRequest(BaseModel):
+    entity_id: Optional[str] = None
+    delete_orphans: bool = False  # Report only by default
+    check_missing: bool = True  # Also look for memories missing a vector
+
+
+@router.post("/reconcile")
+async def reconcile_vectors(data: ReconcileRequest):
+    """
+    Reconcile an entity's Pinecone index with the SQL database, streaming
+    progress as Server-Sent Events.
+
+    Unlike /orphans, the index is listed one page at a time and each page is
+    checked against SQL with a bounded query, so memory use doesn't grow
+    with the index. Two passes:
+    - orphans: records whose message no longer exists in SQL (deleted page by
+      page when delete_orphans=true)
+    - missing: memories in SQL with no record in the index (when
+      check_missing=true; fix them with POST /rebuild-vectors)
+
+    Events: "orphans" and "missing" per page/batch, then "done" with totals,
+    or "error".
+
+    Args:
+        entity_id: Optional AI entity (Pinecone index name).
+                   If not specified, uses the default entity.
+    """
+    if not memory_service.is_configured():
+        raise HTTPException(
+            status_code=503,
+            detail="Memory system not configured. Set PINECONE_API_KEY in environment."
+        )
+
+    async def generate_stream():
+        summary = {
+            "entity_id": data.entity_id,
+            "records_scanned": 0,
+            "orphans_found": 0,
+            "orphans_deleted": 0,
+            "messages_checked": 0,
+            "messages_missing_vectors": 0,
+            "errors": [],
+        }
+        async with async_session_maker() as db:
+            try:
+                async for page in memory_service.reconcile_orphaned_records(
+                    db, data.entity_id, delete=data.delete_orphans,
+                ):
+                    summary["records_scanned"] = page["records_scanned"]
+                    summary["orphans_found"] += len(page["orphans"])
+                    summary["orphans_deleted"] += page["orphans_deleted"]
+                    summary["errors"].extend(page["errors"])
+                    event = {
+                        "page": page["page"],
+                        "records_scanned": page["records_scanned"],
+                        "orphan_ids": [o["id"] for o in page["orphans"]],
+                        "orphans_deleted": page["orphans_deleted"],
+                    }
+                    yield f"event: orphans\ndata: {json.dumps(event)}\n\n"
+
+                if data.check_missing:
+                    async for batch in vector_rebuild_service.find_missing_vectors(
+                        db, data.entity_id,
+                    ):
+                        summary["messages_checked"] = batch["messages_checked"]
+                        summary["messages_missing_vectors"] += len(batch["missing"])
+                        summary["errors"].extend(batch["errors"])
+                        event = {
+                            "batch": batch["batch"],
+                            "messages_checked": batch["messages_checked"],
+                            "missing": batch["missing"],
+                        }
+                        yield f"event: missing\ndata: {json.dumps(event)}\n\n"
+
+                yield f"event: done\ndata: {json.dumps(summary)}\n\n"
+            except Exception as e:
+                logger.exception("Error during vector reconciliation")
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    return StreamingResponse(
+        generate_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
 class QueryLinkCleanupRequest(BaseModel):
     dry_run: bool = True
+    incremental: bool = False  # Only conversations updated since the last run
 
 
 class QueryLinkCleanupResponse(BaseModel):
     dry_run: bool
+    incremental: bool = False
     conversations_with_query_results: int
     links_matched: int
     links_deleted: int
@@ -509,21 +595,24 @@ async def cleanup_query_links(
     db: AsyncSession = Depends(get_db),
 ):
     """
-    One-time cleanup of stale ConversationMemoryLinks created by memory_query.
+    Cleanup of stale ConversationMemoryLinks created by memory_query.
 
     memory_query no longer records links (its results are not context
     memories), but links from before that fix make session reload inject the
     query results into the rebuilt context mid-history, duplicating them and
-    busting the prompt cache. This scans persisted memory_query tool results
-    for memory-ID markers and deletes the matching links.
+    busting the prompt cache. This deletes the links matching recorded
+    memory_query results in the same conversation, in one statement.
 
     The body is optional: a bare POST (or {}) runs in dry_run mode, which
     only reports what would be deleted. Send {"dry_run": false} to actually
-    delete the links. SQL-only — works without Pinecone configured.
+    delete the links, and {"incremental": true} to check only conversations
+    updated since the previous run. SQL-only — works without Pinecone
+    configured.
     """
     result = await memory_service.cleanup_memory_query_links(
         db=db,
         dry_run=data.dry_run if data is not None else True,
+        incremental=data.incremental if data is not None else False,
     )
     return QueryLinkCleanupResponse(**result)
 
@@ -646,7 +735,7 @@ class MemoryStatusUpdate(BaseModel):
 
 @router.get("/overrides", response_model=List[MemoryResponse])
 async def list_memory_overrides(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     entity_id: Optional[str] = None,
 ):
     """
@@ -721,7 +810,7 @@ async def set_memory_status(
 @router.get("/{memory_id}", response_model=MemoryResponse)
 async def get_memory(
     memory_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific memory by ID."""
     result = await db.execute(
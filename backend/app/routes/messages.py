@@ -13,6 +13,7 @@ from app.config import settings
 from app.database import get_db
 from app.models import Conversation, ConversationEntity, ConversationType, Message, MessageRole
 from app.services import llm_service, memory_service, session_manager
+from app.services.memory_outbox import memory_outbox
 from app.services.message_history import (
     delete_tool_exchange_messages,
     find_preceding_conversational_message,
@@ -106,7 +107,7 @@ async def update_message(
 
     This will:
     1. Update the message content in the database
-    2. Update the message embedding in Pinecone
+    2. Queue the new text for vectorization (memory outbox)
     3. Delete any subsequent assistant message (to be regenerated)
     4. Invalidate the session cache so context is rebuilt
 
@@ -174,32 +175,34 @@ async def update_message(
     # Update conversation timestamp
     conversation.updated_at = datetime.utcnow()
 
-    await db.commit()
-    await db.refresh(message)
-
-    # Update Pinecone embedding for the edited message
+    # Re-vectorize through the outbox, in the edit's transaction: queued rows
+    # for the old text are dropped and the new text queued, replacing the
+    # message's existing records when the worker drains it
+    await memory_outbox.discard(db, [message.id])
+    entity_ids: List[str] = []
     if memory_service.is_configured():
         # Get entity IDs for memory operations (handles multi-entity)
         entity_ids = await get_entity_ids_for_conversation(conversation, db)
-
         for entity_id in entity_ids:
-            # Delete old embedding and store new one
-            await memory_service.delete_memory(message_id, entity_id=entity_id)
-            await memory_service.store_memory(
+            memory_outbox.add(
+                db,
                 message_id=message.id,
                 conversation_id=message.conversation_id,
                 role="human",
                 content=data.content,
                 created_at=message.created_at,
                 entity_id=entity_id,
+                replace=True,
             )
 
-            # Also delete the subsequent assistant message from Pinecone
-            if deleted_assistant_id:
-                await memory_service.delete_memory(
-                    deleted_assistant_id,
-                    entity_id=entity_id
-                )
+    await db.commit()
+    await db.refresh(message)
+    memory_outbox.notify()
+
+    # Also delete the subsequent assistant message from Pinecone
+    if deleted_assistant_id:
+        for entity_id in entity_ids:
+            await memory_service.delete_memory(deleted_assistant_id, entity_id=entity_id)
 
     # Invalidate the session cache so it gets rebuilt
     session_manager.close_session(message.conversation_id)
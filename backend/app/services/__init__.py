@@ -11,7 +11,9 @@ from app.services.github_service import GitHubService, github_service
 from app.services.github_tools import register_github_tools
 from app.services.google_service import GoogleService, google_service
 from app.services.llm_service import LLMService, llm_service
+from app.services.memory_outbox import MemoryOutbox, memory_outbox
 from app.services.memory_service import MemoryService, memory_service
+from app.services.memory_significance import SignificanceRefresher, significance_refresher
 from app.services.memory_tools import register_memory_tools, set_memory_tool_context
 from app.services.moltbook_service import MoltbookService, moltbook_service
 from app.services.moltbook_tools import register_moltbook_tools
@@ -23,6 +25,7 @@ from app.services.session_manager import ConversationSession, SessionManager, se
 from app.services.tool_service import ToolCategory, ToolResult, ToolService, tool_service
 from app.services.tts_service import TTSService, tts_service
 from app.services.vector_rebuild_service import VectorRebuildService, vector_rebuild_service
+from app.services.vector_store import LocalVectorStore
 from app.services.web_tools import register_web_tools
 from app.services.xtts_service import XTTSService, xtts_service
 
@@ -42,7 +45,10 @@ __all__ = [
     "GoogleService",
     "LLMService",
     "MemoryService",
+    "MemoryOutbox",
+    "SignificanceRefresher",
     "VectorRebuildService",
+    "LocalVectorStore",
     "ConversationSession",
     "SessionManager",
     "CacheService",
@@ -64,6 +70,8 @@ __all__ = [
     "google_service",
     "llm_service",
     "memory_service",
+    "memory_outbox",
+    "significance_refresher",
     "vector_rebuild_service",
     "session_manager",
     "cache_service",
@@ -802,6 +802,9 @@ class AnthropicService:
         attachments: Optional[Dict[str, Any]] = None,
         # Provider for formatting attachments correctly
         provider: Optional[str] = None,
+        # Token count of cached_context if the caller already has one
+        # (ConversationSession.cached_prefix_token_count)
+        cached_history_tokens: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
         """
         Build the message list for API call with conversation-first caching.
@@ -862,17 +865,16 @@ class AnthropicService:
 
         # Calculate if we should cache conversation history
         has_conversation = bool(cached_context) or bool(new_context)
-        cached_history_text = ""
-        cached_history_tokens = 0
         will_cache_history = False
 
         if cached_context:
-            # Extract text from content (handles both strings and content blocks)
-            cached_history_text = "\n".join(
-                f"{get_role_label(m['role'])}: {_get_content_text(m['content'])}"
-                for m in cached_context
-            )
-            cached_history_tokens = self.count_tokens(cached_history_text)
+            if cached_history_tokens is None:
+                # Extract text from content (handles both strings and content blocks)
+                cached_history_text = "\n".join(
+                    f"{get_role_label(m['role'])}: {_get_content_text(m['content'])}"
+                    for m in cached_context
+                )
+                cached_history_tokens = self.count_tokens(cached_history_text)
             # 1024 is the minimum cacheable prefix for the default Sonnet
             # models; some models (e.g. Opus 4.x) have higher minimums, where
             # a too-small marker is silently ignored by the API (no error, no
@@ -5,19 +5,42 @@ Provides TTL-based in-memory caching for:
 - Token counting results
 - Memory search results
 - Full memory content lookups
+- Memory statistics (dashboard aggregates)
 
 Caches are designed to reduce redundant API calls and database queries
 during multi-turn conversations and rapid message exchanges.
 """
 
 import hashlib
+import re
 import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import Any, Dict, Generic, List, Optional, TypeVar
 
+import numpy as np
+
 T = TypeVar('T')
 
+# The "[2026-01-05 14:32 UTC] " prefix session_helpers.stamp_human_message adds
+# to human messages in LLM context; it must not make otherwise-equal queries
+# miss the search cache
+_STAMP_PREFIX_RE = re.compile(r"^\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}[^\]]*\]\s*")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Query embeddings kept per search-cache bucket for similarity lookups
+SEARCH_VECTORS_PER_BUCKET = 64
+
+
+def normalize_search_query(query: str) -> str:
+    """
+    Normalize a memory search query for cache keying: drop a leading
+    stamp_human_message timestamp, collapse whitespace, and casefold.
+    """
+    query = _STAMP_PREFIX_RE.sub("", query.strip(), count=1)
+    return _WHITESPACE_RE.sub(" ", query).strip().casefold()
+
 
 @dataclass
 class CacheEntry(Generic[T]):
@@ -183,6 +206,7 @@ class CacheService:
     - token_cache: For token counting results (long TTL, rarely changes)
     - search_cache: For memory search results (short TTL, may change)
     - content_cache: For full memory content (medium TTL)
+    - stats_cache: For memory statistics per entity (invalidated on writes)
     - github_tree_cache: For GitHub repository tree structure
     - github_file_cache: For GitHub file contents
     - github_metadata_cache: For GitHub repository/branch metadata
@@ -202,6 +226,10 @@ class CacheService:
             default_ttl_seconds=60,  # 1 minute
             max_size=1000,
         )
+        # Query embeddings for similarity lookups, per search bucket (see
+        # get_search_results); entries whose results expired are skipped
+        self._search_vectors: Dict[str, "OrderedDict[str, np.ndarray]"] = {}
+        self._search_vectors_lock = threading.Lock()
 
         # Full memory content cache - content fetched from DB
         # Medium TTL since content rarely changes
@@ -210,6 +238,14 @@ class CacheService:
             max_size=5000,
         )
 
+        # Memory statistics cache - GET /api/memories/stats per entity filter
+        # Invalidated on memory writes; the TTL bounds drift from writes that
+        # don't go through memory_service (e.g. conversation imports)
+        self.stats_cache: TTLCache[Dict[str, Any]] = TTLCache(
+            default_ttl_seconds=300,  # 5 minutes
+            max_size=100,
+        )
+
         # GitHub tree structure cache - repository file trees
         # 5 minute TTL since tree doesn't change frequently
         self.github_tree_cache: TTLCache[Dict[str, Any]] = TTLCache(
@@ -251,6 +287,16 @@ class CacheService:
         self.token_cache.set(key, count)
 
     # Memory search helpers
+    def _search_bucket(
+        self,
+        entity_id: Optional[str],
+        top_k: int,
+        exclude_conversation_id: Optional[str],
+        role_filter: Optional[str],
+    ) -> str:
+        """Key prefix shared by searches that differ only in query text."""
+        return f"search:{entity_id}:{top_k}:{exclude_conversation_id}:{role_filter}:"
+
     def _search_key(
         self,
         query: str,
@@ -266,10 +312,14 @@ class CacheService:
         part of the key — role_filter included, or a role-restricted search
         would serve its narrowed results to a later unrestricted one (and vice
         versa) for the length of the TTL. entity_id stays first so
-        invalidate_search_cache_for_entity's prefix match keeps working.
+        invalidate_search_cache_for_entity's prefix match keeps working. The
+        query is hashed in normalized form (normalize_search_query), so
+        queries differing only in case, spacing or timestamp prefix share an
+        entry.
         """
-        query_hash = hashlib.sha256(query.encode()).hexdigest()[:16]
-        return f"search:{entity_id}:{top_k}:{exclude_conversation_id}:{role_filter}:{query_hash}"
+        query_hash = hashlib.sha256(normalize_search_query(query).encode()).hexdigest()[:16]
+        bucket = self._search_bucket(entity_id, top_k, exclude_conversation_id, role_filter)
+        return f"{bucket}{query_hash}"
 
     def get_search_results(
         self,
@@ -278,10 +328,37 @@ class CacheService:
         top_k: int,
         exclude_conversation_id: Optional[str] = None,
         role_filter: Optional[str] = None,
+        query_vector: Optional[np.ndarray] = None,
+        similarity_threshold: float = 0.0,
     ) -> Optional[List[Dict[str, Any]]]:
-        """Get cached search results."""
+        """
+        Get cached search results.
+
+        With a query_vector (entities on the local vector backend, where
+        embedding a query is cheap), a miss on the normalized query falls back
+        to the cached search in the same bucket whose query embedding is most
+        similar, if its cosine similarity reaches similarity_threshold.
+        """
         key = self._search_key(query, entity_id, top_k, exclude_conversation_id, role_filter)
-        return self.search_cache.get(key)
+        results = self.search_cache.get(key)
+        if results is not None or query_vector is None or similarity_threshold <= 0:
+            return results
+
+        bucket = self._search_bucket(entity_id, top_k, exclude_conversation_id, role_filter)
+        with self._search_vectors_lock:
+            vectors = self._search_vectors.get(bucket)
+            if not vectors:
+                return None
+            keys = list(vectors.keys())
+            matrix = np.stack(list(vectors.values()))
+        scores = matrix @ query_vector
+        for i in np.argsort(-scores):
+            if scores[i] < similarity_threshold:
+                break
+            results = self.search_cache.get(keys[i])
+            if results is not None:
+                return results
+        return None
 
     def set_search_results(
         self,
@@ -292,14 +369,27 @@ class CacheService:
         results: List[Dict[str, Any]],
         ttl_seconds: Optional[int] = None,
         role_filter: Optional[str] = None,
+        query_vector: Optional[np.ndarray] = None,
     ) -> None:
-        """Cache search results."""
+        """Cache search results (and the query embedding, if given)."""
         key = self._search_key(query, entity_id, top_k, exclude_conversation_id, role_filter)
         self.search_cache.set(key, results, ttl_seconds)
+        if query_vector is None:
+            return
+        bucket = self._search_bucket(entity_id, top_k, exclude_conversation_id, role_filter)
+        with self._search_vectors_lock:
+            vectors = self._search_vectors.setdefault(bucket, OrderedDict())
+            vectors[key] = np.asarray(query_vector, dtype=np.float32)
+            vectors.move_to_end(key)
+            while len(vectors) > SEARCH_VECTORS_PER_BUCKET:
+                vectors.popitem(last=False)
 
     def invalidate_search_cache_for_entity(self, entity_id: Optional[str]) -> int:
         """Invalidate all search cache entries for an entity."""
         prefix = f"search:{entity_id}:"
+        with self._search_vectors_lock:
+            for bucket in [b for b in self._search_vectors if b.startswith(prefix)]:
+                del self._search_vectors[bucket]
         return self.search_cache.invalidate_by_prefix(prefix)
 
     # Memory content helpers
@@ -318,6 +408,26 @@ class CacheService:
         key = f"mem:{message_id}"
         return self.content_cache.delete(key)
 
+    # Memory statistics helpers
+    def get_memory_stats(self, entity_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Get cached memory statistics (entity_id None: across all entities)."""
+        return self.stats_cache.get(f"memstats:{entity_id}")
+
+    def set_memory_stats(self, entity_id: Optional[str], stats: Dict[str, Any]) -> None:
+        """Cache memory statistics."""
+        self.stats_cache.set(f"memstats:{entity_id}", stats)
+
+    def invalidate_memory_stats(self, entity_id: Optional[str] = None) -> int:
+        """
+        Invalidate cached statistics for an entity and the all-entities
+        totals that include it. With no entity, invalidate everything.
+        """
+        if entity_id is None:
+            return self.stats_cache.clear()
+        count = int(self.stats_cache.delete(f"memstats:{entity_id}"))
+        count += int(self.stats_cache.delete("memstats:None"))
+        return count
+
     # GitHub cache helpers
     def get_github_tree(
         self,
@@ -434,10 +544,13 @@ class CacheService:
     # Utility methods
     def clear_all(self) -> Dict[str, int]:
         """Clear all caches. Returns count of entries cleared per cache."""
+        with self._search_vectors_lock:
+            self._search_vectors.clear()
         return {
             "token_cache": self.token_cache.clear(),
             "search_cache": self.search_cache.clear(),
             "content_cache": self.content_cache.clear(),
+            "stats_cache": self.stats_cache.clear(),
             "github_tree_cache": self.github_tree_cache.clear(),
             "github_file_cache": self.github_file_cache.clear(),
             "github_metadata_cache": self.github_metadata_cache.clear(),
@@ -450,6 +563,7 @@ class CacheService:
             "token_cache": self.token_cache.get_stats(),
             "search_cache": self.search_cache.get_stats(),
             "content_cache": self.content_cache.get_stats(),
+            "stats_cache": self.stats_cache.get_stats(),
             "github_tree_cache": self.github_tree_cache.get_stats(),
             "github_file_cache": self.github_file_cache.get_stats(),
             "github_metadata_cache": self.github_metadata_cache.get_stats(),
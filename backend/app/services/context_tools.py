@@ -47,14 +47,10 @@ async def _context_status() -> str:
 
     # Lazy import to avoid circular imports at module load
     from app.services.llm_service import llm_service
-    from app.services.session_helpers import get_message_content_text
 
     try:
-        context_text = "\n".join(
-            f"{msg['role']}: {get_message_content_text(msg.get('content', ''))}"
-            for msg in session.conversation_context
-        )
-        estimated_tokens = llm_service.count_tokens(context_text) if context_text else 0
+        # The same per-message counts the trimmer sums
+        estimated_tokens = session.context_token_count(llm_service.count_tokens)
         # Apply the same provider-usage calibration the trimmer uses, so the
         # reported fullness matches what trimming will act on
         calibration_ratio = session.token_calibration_ratio
@@ -19,7 +19,7 @@ from app.services.memory_context import (
     format_memory_as_context_message,
 )
 from app.services.session_helpers import (
-    get_message_content_text,
+    message_token_count,
 )
 
 logger = logging.getLogger(__name__)
@@ -34,12 +34,30 @@ class MemoryEntry:
     content: str
     created_at: str
     times_retrieved: int
-    score: float = 0.0  # Similarity score from vector search
+    score: Optional[float] = 0.0  # Similarity score from vector search (None for lexical-only hybrid hits)
+    fused_score: Optional[float] = None  # Hybrid retrieval rank score, used in place of similarity for ranking
     significance: float = 0.0  # Significance score based on retrieval patterns
     combined_score: float = 0.0  # Combined score used for ranking
     days_since_creation: float = 0.0  # Age of the memory in days
     days_since_retrieval: float = 0.0  # Days since last retrieval (None if never retrieved)
     source: str = "unknown"  # What retrieved this memory: "user"/"assistant"/"both" (semantic queries) or "recent_reflection" (first-turn recency injection)
+    passage_index: Optional[int] = None  # Passage injected (content is that excerpt) for memories stored as passages
+
+
+@dataclass
+class MemoryPrefetch:
+    """
+    Memory candidates retrieved speculatively for a draft message
+    (/api/chat/prefetch), parked until the real message arrives.
+    """
+
+    draft: str  # Draft text the user query was built from
+    assistant_query: Optional[str]  # Assistant-side query at prefetch time
+    entity_id: Optional[str]
+    user_candidates: List[Dict[str, Any]]
+    assistant_candidates: List[Dict[str, Any]]
+    memory_contents: Dict[str, Dict[str, Any]]  # Hydrated content by memory ID
+    created_at: float  # time.monotonic() when the prefetch finished
 
 
 @dataclass
@@ -94,6 +112,10 @@ class ConversationSession:
     # Advanced to the full context length after every exchange, so each turn's
     # new messages are written to the cache once and read on later turns.
     last_cached_context_length: int = 0
+    # Memo for cached_prefix_token_count: (context list, prefix length, tokens)
+    _prefix_tokens: Tuple[Optional[List[Dict[str, Any]]], int, int] = field(
+        default=(None, 0, 0), init=False, repr=False, compare=False
+    )
 
     # ===== Provider-usage token calibration =====
     # After each API response, the provider-reported prompt-side total
@@ -103,6 +125,16 @@ class ConversationSession:
     last_prompt_actual_tokens: Optional[int] = None
     last_prompt_estimated_tokens: Optional[int] = None
 
+    # Speculative retrieval for the message being typed. Transient: consumed
+    # (or discarded) by the next retrieval and never persisted.
+    memory_prefetch: Optional[MemoryPrefetch] = None
+
+    # Multi-entity conversations: the views of the other participating
+    # entities, sharing this session's message timeline (see EntityViews),
+    # and how many of the timeline's published messages this view has
+    timeline_position: int = 0
+    entity_views: Optional["EntityViews"] = field(default=None, repr=False)
+
     def record_prompt_usage(self, actual_tokens: int, estimated_tokens: int) -> None:
         """
         Record the provider-reported prompt size and the local estimate of the
@@ -259,6 +291,8 @@ class ConversationSession:
                 Each exchange is a dict with "assistant" and "user" keys containing
                 the tool_use and tool_result messages respectively.
         """
+        exchange_start = len(self.conversation_context)
+
         if human_message:
             # Label with [Human] in multi-entity mode, matching how the message
             # is rendered on session reload (load_session_from_db) — the live
@@ -303,6 +337,10 @@ class ConversationSession:
         else:
             self.conversation_context.append({"role": "assistant", "content": assistant_response})
 
+        # Other entities' views pick the exchange up when they next respond
+        if self.entity_views is not None:
+            self.entity_views.publish(self, self.conversation_context[exchange_start:])
+
     def get_cache_aware_content(self) -> Dict[str, Any]:
         """
         Get context split into cached vs new portions for cache hit optimization.
@@ -337,6 +375,37 @@ class ConversationSession:
         """
         self.last_cached_context_length = cached_context_length
 
+    def cached_prefix_token_count(self, count_tokens_fn: Callable[[str], int]) -> int:
+        """
+        Local token count of the cached history (the context up to
+        last_cached_context_length), memoized. Advancing the breakpoint only
+        adds the messages it moved over, and trim_context_to_limit subtracts
+        what it drops from the front, so the count costs the same every turn
+        however long the conversation is. If the context list is replaced or
+        the breakpoint moves back, it is summed again from the per-message
+        counts.
+        """
+        context = self.conversation_context
+        length = min(self.last_cached_context_length, len(context))
+        memo_context, memo_length, tokens = self._prefix_tokens
+        if memo_context is not context or memo_length > length:
+            memo_length, tokens = 0, 0
+        for msg in context[memo_length:length]:
+            tokens += message_token_count(msg, count_tokens_fn)
+        self._prefix_tokens = (context, length, tokens)
+        return tokens
+
+    def context_token_count(self, count_tokens_fn: Callable[[str], int]) -> int:
+        """
+        Local (uncalibrated) token count of the conversation context: the
+        memoized cached prefix plus the per-message counts of the messages
+        after the breakpoint.
+        """
+        tokens = self.cached_prefix_token_count(count_tokens_fn)
+        for msg in self.conversation_context[self._prefix_tokens[1]:]:
+            tokens += message_token_count(msg, count_tokens_fn)
+        return tokens
+
     def trim_context_to_limit(
         self,
         max_tokens: int,
@@ -349,6 +418,10 @@ class ConversationSession:
         Messages are removed in FIFO order (oldest = first removed).
         Memory tracking is updated for any memories that roll out with them.
 
+        Each message is tokenized once (message_token_count caches the count
+        on it), so a turn only tokenizes what was appended since the last
+        one; trimming subtracts the counts of the messages it drops.
+
         Args:
             max_tokens: Maximum token count for conversation context
             count_tokens_fn: Function to count tokens in a string
@@ -357,37 +430,38 @@ class ConversationSession:
         Returns:
             Number of messages removed
         """
+        context = self.conversation_context
+        total_tokens = self.context_token_count(count_tokens_fn)
+        if current_message:
+            total_tokens += count_tokens_fn(f"user: {current_message}")
+
+        # Calibrate the local estimate against the provider-reported size
+        # of the last prompt (ratio is 1.0 until usage has been recorded)
+        ratio = self.token_calibration_ratio
         removed_count = 0
-
-        while True:
-            # Calculate current token count for context + current message
-            context_text = "\n".join(
-                f"{msg['role']}: {get_message_content_text(msg.get('content', ''))}"
-                for msg in self.conversation_context
-            )
-            if current_message:
-                context_text += f"\nuser: {current_message}"
-
-            # Calibrate the local estimate against the provider-reported size
-            # of the last prompt (ratio is 1.0 until usage has been recorded)
-            current_tokens = int(count_tokens_fn(context_text) * self.token_calibration_ratio)
-
-            if current_tokens <= max_tokens:
-                break
-
-            if len(self.conversation_context) < 2:
+        while int(total_tokens * ratio) > max_tokens:
+            if len(context) - removed_count < 2:
                 # Can't remove any more while maintaining structure
                 break
 
             # Remove the oldest message
-            self.conversation_context.pop(0)
+            total_tokens -= message_token_count(context[removed_count], count_tokens_fn)
             removed_count += 1
-            
+
             # If next message is assistant, remove it too to maintain pairs
-            if self.conversation_context and self.conversation_context[0]["role"] == "assistant":
-                self.conversation_context.pop(0)
+            if removed_count < len(context) and context[removed_count]["role"] == "assistant":
+                total_tokens -= message_token_count(context[removed_count], count_tokens_fn)
                 removed_count += 1
 
+        # The dropped messages leave the front of the memoized cached prefix
+        memo_context, memo_length, memo_tokens = self._prefix_tokens
+        if memo_context is context:
+            dropped = min(removed_count, memo_length)
+            for msg in context[:dropped]:
+                memo_tokens -= message_token_count(msg, count_tokens_fn)
+            self._prefix_tokens = (context, memo_length - dropped, memo_tokens)
+        del context[:removed_count]
+
         if removed_count > 0:
             # Keep the cache breakpoint aligned with the messages that remain.
             # Front-trimming shifts every index down by removed_count, so the
@@ -413,3 +487,64 @@ class ConversationSession:
                 logger.info(f"[MEMORY] Context trimming rolled out {len(rolled_out)} memories")
 
         return removed_count
+
+
+@dataclass
+class EntityViews:
+    """
+    The per-entity sessions ("views") of one loaded multi-entity conversation.
+
+    Each participating entity that has responded has its own
+    ConversationSession: its memories and tracker state, labels, model,
+    system prompt and cache breakpoint. The messages of the conversation are
+    shared. Every exchange a view adds (add_exchange) is published to the
+    timeline, and the other views append it to their contexts when they next
+    respond (catch_up). The message dicts are shared by reference, so a view
+    costs its own memories rather than a copy of the history.
+
+    A view's context therefore grows exactly as a reload from the database
+    would rebuild it: the exchanges other entities added since its last turn
+    all come after its own memory insertions. That keeps its prompt prefix
+    byte-identical across entity switches.
+
+    Positions count messages published since the views were created. The
+    timeline only keeps the messages some view has yet to catch up on.
+    """
+    sessions: Dict[str, ConversationSession] = field(default_factory=dict)
+    timeline: List[Dict[str, Any]] = field(default_factory=list)
+    timeline_start: int = 0  # Position of timeline[0]
+
+    @property
+    def timeline_end(self) -> int:
+        return self.timeline_start + len(self.timeline)
+
+    def join(self, entity_id: str, session: ConversationSession) -> None:
+        """Add (or replace) an entity's view, freshly loaded and so already current."""
+        session.entity_views = self
+        session.timeline_position = self.timeline_end
+        self.sessions[entity_id] = session
+        self._compact()
+
+    def publish(self, session: ConversationSession, messages: List[Dict[str, Any]]) -> None:
+        """Share messages a view just added to its own context with the other views."""
+        self.timeline.extend(messages)
+        session.timeline_position = self.timeline_end
+        self._compact()
+
+    def catch_up(self, session: ConversationSession) -> int:
+        """Append the messages other views published since this view last did; returns the count."""
+        missed = self.timeline[session.timeline_position - self.timeline_start:]
+        session.conversation_context.extend(missed)
+        session.timeline_position = self.timeline_end
+        self._compact()
+        return len(missed)
+
+    def _compact(self) -> None:
+        # Drop the messages every view already has
+        oldest = min(
+            (view.timeline_position for view in self.sessions.values()),
+            default=self.timeline_end,
+        )
+        if oldest > self.timeline_start:
+            del self.timeline[:oldest - self.timeline_start]
+            self.timeline_start = oldest
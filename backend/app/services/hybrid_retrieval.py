@@ -0,0 +1,152 @@
+"""
+Hybrid lexical + semantic memory retrieval.
+
+Dense similarity misses memories whose link to the message is a rare literal
+token: a name, a code identifier, a date. When settings.hybrid_retrieval_enabled
+is on, each retrieval query also runs a BM25 search over the local full-text
+index (services/message_search.py) restricted to the query's rare terms, and
+the vector and lexical rankings are merged by reciprocal-rank fusion (RRF)
+before significance re-ranking (SessionManager._search_candidates).
+
+The lexical leg is a SQLite query against an index the messages table's
+triggers keep current on insert, so it adds no network calls and runs
+alongside the vector search.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import read_session_maker
+from app.services.memory_significance import MEMORY_ROLES
+from app.services.message_search import rare_terms, search_messages
+
+logger = logging.getLogger(__name__)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int) -> Dict[str, float]:
+    """
+    RRF score of every ID across best-first rankings: the sum over rankings
+    of 1 / (k + rank), rank starting at 1. Only ranks count, so rankings on
+    incomparable scales (cosine similarity, BM25) combine without tuning.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return scores
+
+
+def fuse_candidates(
+    semantic: List[Dict[str, Any]],
+    lexical: List[Dict[str, Any]],
+    limit: int,
+    k: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Merge search_memories and lexical_candidates results into one list of
+    at most limit candidates, best fused rank first.
+
+    Each candidate gets a "fused_score": its RRF score scaled so that ranking
+    first in both lists is 1.0, which significance re-ranking uses in place
+    of the similarity (ranking_score). "score" stays the vector similarity
+    (None for lexical-only hits) and "lexical_rank" the BM25 position (None
+    when the lexical list didn't return it). Semantic candidates keep their
+    fields (passage hits, metadata) over lexical ones.
+    """
+    k = settings.hybrid_rrf_k if k is None else k
+    fused = reciprocal_rank_fusion(
+        [[c["id"] for c in semantic], [c["id"] for c in lexical]], k
+    )
+    scale = (k + 1) / 2
+
+    # Semantic candidates first, so they win ties in the (stable) sort below
+    by_id: Dict[str, Dict[str, Any]] = {c["id"]: {**c, "lexical_rank": None} for c in semantic}
+    for candidate in lexical:
+        if candidate["id"] in by_id:
+            by_id[candidate["id"]]["lexical_rank"] = candidate.get("lexical_rank")
+        else:
+            by_id[candidate["id"]] = {**candidate, "score": None}
+    for candidate_id, candidate in by_id.items():
+        candidate["fused_score"] = fused[candidate_id] * scale
+
+    ranked = sorted(by_id.values(), key=lambda c: c["fused_score"], reverse=True)
+    return ranked[:limit]
+
+
+def ranking_score(candidate: Dict[str, Any]) -> float:
+    """
+    The score a retrieval candidate is ranked by: its fused score when hybrid
+    retrieval produced it, otherwise its vector similarity.
+    """
+    fused_score = candidate.get("fused_score")
+    return candidate["score"] if fused_score is None else fused_score
+
+
+def describe_scores(score: Optional[float], fused_score: Optional[float]) -> str:
+    """Similarity (and fused score, if any) of a memory for [MEMORY] log lines."""
+    similarity = "n/a" if score is None else f"{score:.3f}"
+    if fused_score is None:
+        return f"similarity={similarity}"
+    return f"similarity={similarity} fused={fused_score:.3f}"
+
+
+async def lexical_candidates(
+    query: str,
+    entity_id: Optional[str],
+    exclude_conversation_id: Optional[str],
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """
+    search_lexical on its own read session, so it can overlap the request's
+    other database work.
+    """
+    async with read_session_maker() as db:
+        return await search_lexical(db, query, entity_id, exclude_conversation_id, limit)
+
+
+async def search_lexical(
+    db: AsyncSession,
+    query: str,
+    entity_id: Optional[str],
+    exclude_conversation_id: Optional[str],
+    limit: int,
+    max_doc_fraction: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Memories ranked by BM25 on the query's rare terms, in search_memories'
+    candidate shape. Covers exactly the messages the entity's vector index
+    holds (message_search.memory_scope), except the current conversation's,
+    with other entities' words under their speaker's label. Archived and
+    released memories are dropped later, as for vector hits.
+    """
+    if max_doc_fraction is None:
+        max_doc_fraction = settings.hybrid_lexical_max_doc_fraction
+    terms = await rare_terms(db, query, max_doc_fraction)
+    if not terms:
+        return []
+    results = await search_messages(
+        db,
+        " ".join(terms),
+        any_word=True,
+        entity_id=entity_id,
+        include_shared=True,
+        roles=MEMORY_ROLES,
+        exclude_conversation_id=exclude_conversation_id,
+        limit=limit,
+    )
+    logger.info(f"[MEMORY] Lexical search on {terms} matched {len(results)} memories")
+    return [
+        {
+            "id": r["message_id"],
+            "score": None,
+            "conversation_id": r["conversation_id"],
+            "created_at": r["created_at"].isoformat() if r["created_at"] else None,
+            "role": r["role"],
+            "passage_index": None,
+            "lexical_rank": rank,
+        }
+        for rank, r in enumerate(results, start=1)
+    ]
@@ -469,6 +469,8 @@ class LLMService:
         attachments: Optional[Dict[str, Any]] = None,
         # Provider hint for routing
         provider_hint: Optional[str] = None,
+        # Precomputed token count of cached_context (skips counting it here)
+        cached_history_tokens: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
         """
         Build the message list for the API call.
@@ -507,6 +509,8 @@ class LLMService:
             responding_entity_label: Label of the entity receiving this context
             user_display_name: Custom display name for the user/researcher
             attachments: Optional dict with "images" and "files" lists
+            cached_history_tokens: Token count of cached_context, if the caller
+                keeps one (ConversationSession.cached_prefix_token_count)
 
         Returns:
             List of message dicts formatted for the LLM API
@@ -535,6 +539,7 @@ class LLMService:
             user_display_name=user_display_name,
             attachments=attachments,
             provider=provider,
+            cached_history_tokens=cached_history_tokens,
         )
 
 
@@ -0,0 +1,345 @@
+"""
+Memory Outbox - durable, asynchronous vectorization of new messages.
+
+Chat turns used to upsert each new message into the vector index inline,
+after the messages were committed. A slow Pinecone call delayed the turn's
+completion event, and a failed one silently dropped the memory.
+
+Now the chat routes add a MemoryOutboxEntry per (message, entity) in the same
+transaction as the messages themselves, and return as soon as it commits. A
+background worker drains the outbox:
+- Due rows are grouped per entity and upserted in batches of up to
+  UPSERT_BATCH_SIZE messages (long messages expand to several passage
+  records, which are sent in request-sized slices).
+- Rows are deleted once their batch is upserted.
+- A failed batch stays in the outbox; its rows are retried with exponential
+  backoff (capped), so nothing is dropped while the index is unavailable.
+- Rows whose message was deleted before it was vectorized are discarded.
+  A message can also be deleted while its batch is being upserted; every
+  delete path removes the vectors after committing, so once a batch is
+  upserted the worker re-checks its messages and deletes the records of any
+  that are gone. Either the delete sees the upsert or the re-check sees the
+  delete, so a deleted message is never left with an orphan vector.
+- Rows for an entity that is no longer configured are dropped, rather than
+  retried forever.
+- Editing a message discards its queued rows and queues the new text in the
+  edit's transaction. Rows drain in queue order, so the new text always
+  lands last, and an edit's row first deletes the message's existing records
+  (their passage layout may have changed).
+
+get_status() reports the backlog for /api/memories/outbox/status.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models import MemoryOutboxEntry, Message
+from app.services.memory_service import memory_service, run_pinecone
+from app.services.vector_rebuild_service import UPSERT_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Due rows read per drain pass
+DRAIN_FETCH_LIMIT = 500
+
+
+class MemoryOutbox:
+    """Background worker that vectorizes queued messages into entity indexes."""
+
+    def __init__(self):
+        self._wake: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._drain_lock: Optional[asyncio.Lock] = None
+        self._stats = {
+            "vectorized": 0,
+            "failed_batches": 0,
+            "last_drain_at": None,
+            "last_error": None,
+        }
+
+    def add(
+        self,
+        db: AsyncSession,
+        message_id: str,
+        conversation_id: str,
+        role: str,
+        content: str,
+        created_at: datetime,
+        entity_id: Optional[str] = None,
+        replace: bool = False,
+    ) -> None:
+        """
+        Queue a message for vectorization (arguments as for
+        MemoryService.store_memory). With replace=True the message's existing
+        records are deleted before the new ones are upserted, for edits.
+
+        The row is only added to the session; it is written by the caller's
+        commit, alongside the message rows. Call notify() after committing.
+        """
+        db.add(MemoryOutboxEntry(
+            message_id=message_id,
+            conversation_id=conversation_id,
+            entity_id=entity_id,
+            role=role,
+            content=content,
+            message_created_at=created_at,
+            replace_existing=replace,
+        ))
+
+    async def discard(self, db: AsyncSession, message_ids: Iterable[str]) -> None:
+        """
+        Drop the queued rows of these messages, e.g. because the message was
+        edited and its new text is queued instead. Runs in the caller's
+        transaction.
+        """
+        message_ids = list(message_ids)
+        if message_ids:
+            await db.execute(
+                delete(MemoryOutboxEntry).where(MemoryOutboxEntry.message_id.in_(message_ids))
+            )
+
+    def notify(self) -> None:
+        """Wake the worker to drain newly committed rows."""
+        if self._wake is not None:
+            self._wake.set()
+
+    @staticmethod
+    def _retry_delay(attempts: int) -> timedelta:
+        delay = settings.memory_outbox_retry_base_seconds * (2 ** max(0, attempts - 1))
+        return timedelta(seconds=min(delay, settings.memory_outbox_retry_max_seconds))
+
+    async def _process_batch(
+        self,
+        db: AsyncSession,
+        entity_id: Optional[str],
+        rows: List[MemoryOutboxEntry],
+    ) -> int:
+        """Upsert one entity's batch. Returns the number of messages vectorized."""
+        message_ids = list({row.message_id for row in rows})
+        result = await db.execute(select(Message.id).where(Message.id.in_(message_ids)))
+        existing = {row[0] for row in result.fetchall()}
+        stale = [row for row in rows if row.message_id not in existing]
+        for row in stale:
+            await db.delete(row)
+        rows = [row for row in rows if row.message_id in existing]
+        if stale:
+            logger.info(f"[MEMORY] Outbox: discarded {len(stale)} entries for deleted messages")
+        if not rows:
+            await db.commit()
+            return 0
+
+        entity = (
+            settings.get_default_entity() if entity_id is None
+            else settings.get_entity_by_index(entity_id)
+        )
+        if entity is None or not memory_service.is_configured(entity.index_name):
+            for row in rows:
+                await db.delete(row)
+            await db.commit()
+            logger.warning(
+                f"[MEMORY] Outbox: dropped {len(rows)} entries for entity {entity_id}, "
+                f"which is no longer configured"
+            )
+            return 0
+
+        try:
+            index = memory_service.get_index(entity_id)
+            if index is None:
+                raise RuntimeError(f"no vector index available for entity {entity_id}")
+            # Edits replace whatever records the old text left behind
+            for message_id in dict.fromkeys(row.message_id for row in rows if row.replace_existing):
+                stale_ids = [message_id] + await run_pinecone(
+                    memory_service.list_passage_ids, index, message_id
+                )
+                await run_pinecone(index.delete, ids=stale_ids)
+            records = [
+                record
+                for row in rows
+                for record in memory_service.memory_records(
+                    row.message_id,
+                    row.conversation_id,
+                    row.role,
+                    row.content,
+                    row.message_created_at,
+                )
+            ]
+            # Long messages expand to several passage records
+            for i in range(0, len(records), UPSERT_BATCH_SIZE):
+                await run_pinecone(
+                    index.upsert_records,
+                    namespace="",
+                    records=records[i : i + UPSERT_BATCH_SIZE],
+                )
+        except Exception as e:
+            now = datetime.utcnow()
+            for row in rows:
+                row.attempts = (row.attempts or 0) + 1
+                row.next_attempt_at = now + self._retry_delay(row.attempts)
+                row.last_error = str(e)[:500]
+            await db.commit()
+            self._stats["failed_batches"] += 1
+            self._stats["last_error"] = str(e)[:500]
+            logger.warning(
+                f"[MEMORY] Outbox: upsert of {len(rows)} records for entity {entity_id} "
+                f"failed (attempt {rows[0].attempts}), will retry: {e}"
+            )
+            return 0
+
+        for row in rows:
+            await db.delete(row)
+        await db.commit()
+        await self._delete_orphaned_records(db, index, records)
+        memory_service.invalidate_search_results(entity_id)
+        return len(rows)
+
+    async def _delete_orphaned_records(
+        self,
+        db: AsyncSession,
+        index,
+        records: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Delete just-upserted records whose message was deleted during the
+        upsert. Runs in a fresh transaction, after the upsert, so it sees any
+        delete that committed before its vectors were removed.
+        """
+        record_ids: Dict[str, List[str]] = {}
+        for record in records:
+            # Whole-message records are keyed by the message ID itself
+            message_id = record.get("message_id", record["_id"])
+            record_ids.setdefault(message_id, []).append(record["_id"])
+        result = await db.execute(select(Message.id).where(Message.id.in_(list(record_ids))))
+        existing = {row[0] for row in result.fetchall()}
+        await db.commit()
+        orphaned = [
+            record_id
+            for message_id, ids in record_ids.items()
+            if message_id not in existing
+            for record_id in ids
+        ]
+        if not orphaned:
+            return
+        try:
+            await run_pinecone(index.delete, ids=orphaned)
+            logger.info(
+                f"[MEMORY] Outbox: deleted {len(orphaned)} records of messages "
+                f"deleted during their upsert"
+            )
+        except Exception as e:
+            logger.error(f"[MEMORY] Outbox: failed to delete orphaned records {orphaned}: {e}")
+
+    async def drain(self) -> int:
+        """
+        Vectorize every due outbox row. Returns the number of records upserted.
+        """
+        if self._drain_lock is None:
+            self._drain_lock = asyncio.Lock()
+
+        vectorized = 0
+        async with self._drain_lock:
+            async with async_session_maker() as db:
+                while True:
+                    result = await db.execute(
+                        select(MemoryOutboxEntry)
+                        .where(MemoryOutboxEntry.next_attempt_at <= datetime.utcnow())
+                        .order_by(MemoryOutboxEntry.id)
+                        .limit(DRAIN_FETCH_LIMIT)
+                    )
+                    rows = list(result.scalars().all())
+                    if not rows:
+                        break
+
+                    by_entity: Dict[Optional[str], List[MemoryOutboxEntry]] = {}
+                    for row in rows:
+                        by_entity.setdefault(row.entity_id, []).append(row)
+
+                    progressed = 0
+                    for entity_id, entity_rows in by_entity.items():
+                        for i in range(0, len(entity_rows), UPSERT_BATCH_SIZE):
+                            batch = entity_rows[i : i + UPSERT_BATCH_SIZE]
+                            done = await self._process_batch(db, entity_id, batch)
+                            vectorized += done
+                            progressed += done
+                    # Failed rows were rescheduled into the future, so the next
+                    # query only returns rows that are still due
+                    if len(rows) < DRAIN_FETCH_LIMIT and not progressed:
+                        break
+
+        if vectorized:
+            self._stats["vectorized"] += vectorized
+            self._stats["last_drain_at"] = datetime.utcnow().isoformat()
+            logger.info(f"[MEMORY] Outbox: vectorized {vectorized} records")
+        return vectorized
+
+    async def get_status(self, db: AsyncSession) -> Dict[str, Any]:
+        """Backlog per entity, oldest pending entry, and worker counters."""
+        result = await db.execute(
+            select(
+                MemoryOutboxEntry.entity_id,
+                func.count(MemoryOutboxEntry.id),
+                func.sum(case((MemoryOutboxEntry.attempts > 0, 1), else_=0)),
+                func.min(MemoryOutboxEntry.created_at),
+            ).group_by(MemoryOutboxEntry.entity_id)
+        )
+        entities = []
+        oldest = None
+        for entity_id, pending, retrying, entity_oldest in result.fetchall():
+            entities.append({
+                "entity_id": entity_id,
+                "pending": pending,
+                "retrying": int(retrying or 0),
+            })
+            if entity_oldest is not None and (oldest is None or entity_oldest < oldest):
+                oldest = entity_oldest
+
+        return {
+            "pending": sum(e["pending"] for e in entities),
+            "retrying": sum(e["retrying"] for e in entities),
+            "oldest_pending_at": oldest.isoformat() if oldest else None,
+            "entities": entities,
+            "worker_running": self._worker is not None and not self._worker.done(),
+            **self._stats,
+        }
+
+    async def _run(self) -> None:
+        interval = settings.memory_outbox_poll_interval_seconds
+        while True:
+            try:
+                await self.drain()
+            except Exception as e:
+                logger.error(f"[MEMORY] Outbox drain failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self) -> None:
+        """Start the background worker (called from the app lifespan)."""
+        if self._worker is not None and not self._worker.done():
+            return
+        self._wake = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background worker. Undrained rows stay queued for next start."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._wake = None
+
+
+# Singleton instance
+memory_outbox = MemoryOutbox()
+
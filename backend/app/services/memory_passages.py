@@ -0,0 +1,106 @@
+"""
+Passage-level memory records.
+
+A message is normally vectorized as one record whose ID is the message ID.
+Long messages embed poorly as a whole (one relevant paragraph is diluted by
+the rest) and cost their full length in context when retrieved, so messages
+that chunk_note_content would split are instead stored as one record per
+passage:
+
+    msg:{message_id}:{n}    n = 0 .. passage_count - 1
+
+Each passage record carries the usual memory metadata plus message_id,
+passage_index and passage_count. Search collapses passage hits back to their
+message (best passage wins), so deduplication, times_retrieved and memory
+links all stay per message; only the matching passage is injected into
+context, with a pointer to the full memory.
+
+Passages are re-derived from the SQL content when needed (retrieval, session
+reload) rather than stored, so they always come from the vectorized form of
+the message (see vectorized_text).
+"""
+
+from typing import List, Optional, Tuple
+
+PASSAGE_ID_PREFIX = "msg:"
+
+
+def vectorized_text(role: str, content: str) -> str:
+    """
+    The text a message was vectorized from. Human messages are vectorized
+    from the typed text only; extracted file content folded into the stored
+    message ([ATTACHED FILE] blocks) is stripped back out.
+    """
+    if role == "human":
+        from app.services.vector_rebuild_service import strip_attachment_blocks
+
+        return strip_attachment_blocks(content)
+    return content
+
+
+def split_passages(text: str) -> List[str]:
+    """
+    Passages for a message's vectorized text, using the notes chunker
+    (paragraph, then line, then hard breaks). A single-element list means
+    the message is stored as one whole record.
+    """
+    from app.services.notes_vector_service import chunk_note_content
+
+    passages = chunk_note_content(text)
+    return passages if len(passages) > 1 else [text]
+
+
+def passage_id_prefix(message_id: str) -> str:
+    """Record-ID prefix shared by all of a message's passage records."""
+    return f"{PASSAGE_ID_PREFIX}{message_id}:"
+
+
+def passage_record_id(message_id: str, passage_index: int) -> str:
+    return f"{passage_id_prefix(message_id)}{passage_index}"
+
+
+def parse_memory_record_id(record_id: str) -> Tuple[str, Optional[int]]:
+    """
+    Split a vector record ID into (message_id, passage_index). Whole-message
+    records have no passage index.
+    """
+    if record_id.startswith(PASSAGE_ID_PREFIX):
+        message_id, sep, index = record_id[len(PASSAGE_ID_PREFIX):].rpartition(":")
+        if sep and message_id and index.isdigit():
+            return message_id, int(index)
+    return record_id, None
+
+
+def memory_passage(role: str, content: str, passage_index: Optional[int]) -> Optional[Tuple[str, int]]:
+    """
+    The (passage text, passage count) for a passage of a stored message, or
+    None when the message isn't split (or no longer has that passage, e.g.
+    after an edit) and should be used whole.
+    """
+    if passage_index is None:
+        return None
+    passages = split_passages(vectorized_text(role, content))
+    if len(passages) < 2 or not 0 <= passage_index < len(passages):
+        return None
+    return passages[passage_index], len(passages)
+
+
+def memory_context_content(
+    role: str,
+    content: str,
+    memory_id: str,
+    passage_index: Optional[int],
+) -> Tuple[str, Optional[int]]:
+    """
+    Content to inject for a retrieved memory, and the passage it came from:
+    the matching passage with a pointer to the full memory for passage hits,
+    or the whole message (passage None) otherwise.
+    """
+    passage = memory_passage(role, content, passage_index)
+    if passage is None:
+        return content, None
+    text, count = passage
+    return (
+        f"(Excerpt: passage {passage_index + 1} of {count} from memory {memory_id[:8]}; "
+        f"the full message is longer.)\n{text}"
+    ), passage_index
@@ -1,11 +1,10 @@
 import asyncio
 import logging
-import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
 
 from pinecone import Pinecone
-from sqlalchemy import or_, select, update
+from sqlalchemy import delete, distinct, exists, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
@@ -13,12 +12,37 @@ from app.models import (
     Conversation,
     ConversationEntity,
     ConversationMemoryLink,
+    MemoryQueryResult,
     Message,
     MessageRole,
 )
+from app.services.memory_passages import (
+    parse_memory_record_id,
+    passage_id_prefix,
+    passage_record_id,
+    split_passages,
+)
+from app.services.memory_significance import refresh_significance
+from app.services.retrieval_count_queue import RetrievalCountQueue
+from app.services.vector_store import (
+    LocalVectorStore,
+    uses_local_backend,
+    vector_store_configured,
+)
 
 logger = logging.getLogger(__name__)
 
+# Max IDs per IN (...) select in get_full_memory_contents; keeps each query
+# under SQLite's bound-parameter limit
+CONTENT_FETCH_BATCH_SIZE = 500
+
+# Record IDs per index listing page (Pinecone's list_paginated maximum); also
+# bounds the IN select and the fetch/delete calls per reconciliation page
+RECORD_PAGE_SIZE = 100
+
+# Returned for entities with no archived conversations; never mutated
+_EMPTY_ID_SET: Set[str] = frozenset()
+
 
 # Role filters accepted by search_memories. Memories carry a "role" metadata
 # field: "human" for the human's messages, and "assistant", "reflection", or
@@ -62,6 +86,9 @@ async def run_pinecone(fn, *args, **kwargs):
     """
     Run a blocking Pinecone SDK call off the event loop.
 
+    Also used for LocalVectorStore calls, which are CPU-bound (embedding and
+    scoring) and equally shouldn't run on the event loop.
+
     The Pinecone client is synchronous. Called directly from an async function
     it blocks the entire event loop for the duration of the network round trip,
     so a slow or stalled Pinecone request freezes every other request the
@@ -82,6 +109,8 @@ class MemoryService:
 
     Pinecone handles embedding generation internally - we pass raw text and
     Pinecone generates embeddings using the model configured on the index.
+    Entities on the local backend get an in-process LocalVectorStore with the
+    same interface instead (see vector_store.py).
 
     Includes caching for:
     - Memory search results (short TTL to reduce Pinecone API calls)
@@ -91,6 +120,14 @@ class MemoryService:
         self._pc = None
         self._indexes: Dict[str, Any] = {}  # Cache for multiple indexes
         self._cache_service = None
+        self.retrieval_count_queue = RetrievalCountQueue(self.get_index, self.get_retrieval_counts)
+        # In-memory archived-conversation index (get_archived_conversation_ids):
+        # entity index name -> archived conversation IDs whose memories it holds
+        self._archived_by_entity: Optional[Dict[str, Set[str]]] = None
+        self._archived_all: Set[str] = set()
+        self._archived_load_lock: Optional[asyncio.Lock] = None
+        # Start of the last non-dry cleanup_memory_query_links run
+        self._query_link_cleanup_at: Optional[datetime] = None
 
     @property
     def cache(self):
@@ -108,17 +145,18 @@ class MemoryService:
 
     def get_index(self, entity_id: Optional[str] = None):
         """
-        Get a Pinecone index by entity_id (index name).
+        Get the vector index for an entity.
+
+        Entities configured with "vector_backend": "local" get an in-process
+        LocalVectorStore; everything else gets a Pinecone Index. Both expose
+        the same operations (see vector_store.VectorStore).
 
         Args:
             entity_id: The Pinecone index name. If None, uses the default entity.
 
         Returns:
-            Pinecone Index object or None if not configured.
+            Index object or None if not configured.
         """
-        if not self.pc:
-            return None
-
         # Use default entity if not specified
         if entity_id is None:
             entity = settings.get_default_entity()
@@ -130,6 +168,18 @@ class MemoryService:
         if entity_id in self._indexes:
             return self._indexes[entity_id]
 
+        if uses_local_backend(entity):
+            try:
+                index = LocalVectorStore(entity_id)
+                self._indexes[entity_id] = index
+                return index
+            except Exception as e:
+                logger.error(f"Error opening local vector store '{entity_id}': {e}")
+                return None
+
+        if not self.pc:
+            return None
+
         # Create and cache new index connection
         try:
             # Use host if provided in entity config (required for serverless indexes)
@@ -150,19 +200,87 @@ class MemoryService:
 
     def is_configured(self, entity_id: Optional[str] = None) -> bool:
         """
-        Check if Pinecone is configured and the specified entity's index is available.
+        Check if a vector store is configured and the specified entity's index is available.
+
+        Pinecone entities need PINECONE_API_KEY; entities on the local backend
+        need nothing beyond their PINECONE_INDEXES entry.
 
         Args:
-            entity_id: The entity to check. If None, checks if Pinecone is configured at all.
+            entity_id: The entity to check. If None, checks if any vector
+                store is configured at all.
         """
-        if not settings.pinecone_api_key:
-            return False
-
         if entity_id is None:
-            return True
+            return vector_store_configured(settings)
 
         # Verify the entity exists in configuration
-        return settings.get_entity_by_index(entity_id) is not None
+        entity = settings.get_entity_by_index(entity_id)
+        if entity is None:
+            return False
+        return uses_local_backend(entity) or bool(settings.pinecone_api_key)
+
+    @staticmethod
+    def memory_records(
+        message_id: str,
+        conversation_id: str,
+        role: str,
+        content: str,
+        created_at: datetime,
+        times_retrieved: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """
+        The upsert_records records for a memory (see store_memory): one
+        record keyed by the message ID, or for long messages one record per
+        passage (msg:{id}:{n}, see memory_passages).
+        """
+        passages = split_passages(content)
+        base = {
+            "conversation_id": conversation_id,
+            "created_at": created_at.isoformat(),
+            "role": role,
+            "times_retrieved": times_retrieved,
+        }
+        if len(passages) == 1:
+            return [{
+                "_id": message_id,
+                "text": content,  # Pinecone will embed this using llama-text-embed-v2
+                "content_preview": content[:200],
+                **base,
+            }]
+        return [
+            {
+                "_id": passage_record_id(message_id, n),
+                "text": passage,
+                "content_preview": passage[:200],
+                "message_id": message_id,
+                "passage_index": n,
+                "passage_count": len(passages),
+                **base,
+            }
+            for n, passage in enumerate(passages)
+        ]
+
+    def invalidate_search_results(self, entity_id: Optional[str]) -> None:
+        """
+        Drop cached search results for an entity whose memory set changed, so
+        a memory stored (or deleted, or released) moments ago can't be hidden
+        behind a stale cache hit. Searches that didn't name an entity are
+        cached under None and belong to the default entity. The entity's
+        memory statistics are dropped too.
+        """
+        self.invalidate_memory_stats(entity_id)
+        default_entity = settings.get_default_entity()
+        default_id = default_entity.index_name if default_entity else None
+        entity_id = entity_id or default_id
+        self.cache.invalidate_search_cache_for_entity(entity_id)
+        if entity_id == default_id:
+            self.cache.invalidate_search_cache_for_entity(None)
+
+    def invalidate_memory_stats(self, entity_id: Optional[str]) -> None:
+        """
+        Drop cached memory statistics (GET /api/memories/stats) for an entity
+        whose memories were written. None (entity unknown) drops them all.
+        """
+        self.cache.invalidate_memory_stats(entity_id)
 
     async def store_memory(
         self,
@@ -202,25 +320,15 @@ class MemoryService:
 
         logger.debug("store_memory: Got index, upserting with integrated inference...")
 
-        # Create content preview for metadata
-        content_preview = content[:200] if len(content) > 200 else content
-
         try:
             # Use Pinecone's integrated inference - upsert_records passes raw text
             # and Pinecone generates embeddings using the index's configured model
             await run_pinecone(
                 index.upsert_records,
                 namespace="",
-                records=[{
-                    "_id": message_id,
-                    "text": content,  # Pinecone will embed this using llama-text-embed-v2
-                    "conversation_id": conversation_id,
-                    "created_at": created_at.isoformat(),
-                    "role": role,
-                    "content_preview": content_preview,
-                    "times_retrieved": 0,
-                }]
+                records=self.memory_records(message_id, conversation_id, role, content, created_at),
             )
+            self.invalidate_search_results(entity_id)
             logger.debug("store_memory: Successfully upserted to Pinecone")
             return True
         except Exception as e:
@@ -286,6 +394,18 @@ class MemoryService:
         # Normalize exclude_conversation_id to string for consistent comparison
         exclude_conv_id_normalized = str(exclude_conversation_id) if exclude_conversation_id else None
 
+        # On the local backend the query embedding is computed in-process and
+        # cheaply, so it also drives a similarity lookup in the search cache
+        # (near-duplicate queries reuse results) and is handed to the search
+        # instead of being recomputed there
+        query_vector = None
+        if (
+            use_cache
+            and isinstance(index, LocalVectorStore)
+            and settings.search_cache_similarity_threshold > 0
+        ):
+            query_vector = await run_pinecone(index.embed_query, query)
+
         # Check cache first (before exclude_ids filtering, which happens post-query)
         # Cache key doesn't include exclude_ids since we filter after retrieval
         if use_cache:
@@ -295,6 +415,8 @@ class MemoryService:
                 top_k=top_k * 2,  # Cache the larger fetch_k results
                 exclude_conversation_id=exclude_conv_id_normalized,
                 role_filter=role_filter,
+                query_vector=query_vector,
+                similarity_threshold=settings.search_cache_similarity_threshold,
             )
             if cached_results is not None:
                 logger.info(f"[MEMORY] Cache HIT for entity={entity_id}")
@@ -327,6 +449,8 @@ class MemoryService:
                 "inputs": {"text": query},  # Pinecone will embed this
                 "top_k": fetch_k,
             }
+            if query_vector is not None:
+                search_query = {"vector": {"values": query_vector}, "top_k": fetch_k}
 
             # Add metadata filters at Pinecone level (multiple keys are ANDed).
             # This is more efficient than filtering in Python after retrieval,
@@ -363,10 +487,16 @@ class MemoryService:
             hits = results.result.hits if hasattr(results, 'result') and hasattr(results.result, 'hits') else []
             logger.info(f"[MEMORY] Pinecone returned {len(hits)} candidate memories")
 
+            seen_message_ids: Set[str] = set()
             for hit in hits:
                 # Get hit properties via to_dict()
                 hit_dict = hit.to_dict() if hasattr(hit, 'to_dict') else hit
-                match_id = hit_dict.get('_id')
+                # Passage records collapse to their message; hits are in score
+                # order, so the first (best) passage of each message is kept
+                match_id, passage_index = parse_memory_record_id(hit_dict.get('_id'))
+                if match_id in seen_message_ids:
+                    continue
+                seen_message_ids.add(match_id)
                 match_score = hit_dict.get('_score', 0)
                 fields = hit_dict.get('fields', {})
                 conv_id = fields.get("conversation_id")
@@ -398,6 +528,7 @@ class MemoryService:
                     "role": role,
                     "content_preview": fields.get("content_preview"),
                     "times_retrieved": fields.get("times_retrieved", 0),
+                    "passage_index": passage_index,
                 })
 
             # Cache the raw results (before exclude_ids and threshold filtering)
@@ -409,6 +540,7 @@ class MemoryService:
                     exclude_conversation_id=exclude_conv_id_normalized,
                     results=all_memories,
                     role_filter=role_filter,
+                    query_vector=query_vector,
                 )
 
             # Now apply exclude_ids and threshold filtering
@@ -507,24 +639,26 @@ class MemoryService:
         result = await db.execute(query)
         messages = result.scalars().all()
 
-        reflections = [
-            {
-                "id": str(m.id),
-                "conversation_id": str(m.conversation_id),
-                "role": m.role.value,
-                "content": m.content,
-                "created_at": m.created_at.isoformat(),
-                "times_retrieved": m.times_retrieved,
-                "last_retrieved_at": m.last_retrieved_at.isoformat() if m.last_retrieved_at else None,
-                "memory_status": m.memory_status,
-            }
-            for m in messages
-        ]
+        reflections = [self._memory_content_dict(m) for m in messages]
         logger.info(
             f"[MEMORY] Recent reflections: found {len(reflections)} for entity={entity_id} (limit={limit})"
         )
         return reflections
 
+    @staticmethod
+    def _memory_content_dict(message: Message) -> Dict[str, Any]:
+        """Serialize a Message row into the memory-content dict shape."""
+        return {
+            "id": str(message.id),
+            "conversation_id": str(message.conversation_id),
+            "role": message.role.value,
+            "content": message.content,
+            "created_at": message.created_at.isoformat(),
+            "times_retrieved": message.times_retrieved,
+            "last_retrieved_at": message.last_retrieved_at.isoformat() if message.last_retrieved_at else None,
+            "memory_status": message.memory_status,
+        }
+
     async def get_full_memory_content(
         self,
         message_id: str,
@@ -560,16 +694,7 @@ class MemoryService:
         message = result.scalar_one_or_none()
 
         if message:
-            content_dict = {
-                "id": str(message.id),
-                "conversation_id": str(message.conversation_id),
-                "role": message.role.value,
-                "content": message.content,
-                "created_at": message.created_at.isoformat(),
-                "times_retrieved": message.times_retrieved,
-                "last_retrieved_at": message.last_retrieved_at.isoformat() if message.last_retrieved_at else None,
-                "memory_status": message.memory_status,
-            }
+            content_dict = self._memory_content_dict(message)
             # Cache the result
             if use_cache:
                 self.cache.set_memory_content(message_id, content_dict)
@@ -579,6 +704,63 @@ class MemoryService:
             logger.warning(f"[MEMORY] Message ID '{message_id}' not found in SQL database (may be orphaned in Pinecone)")
         return None
 
+    async def get_full_memory_contents(
+        self,
+        message_ids: List[str],
+        db: AsyncSession,
+        use_cache: bool = True,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Bulk version of get_full_memory_content.
+
+        Serves what it can from the content cache and fetches every miss with
+        a single IN (...) select (chunked to stay under SQLite's bound
+        parameter limit), instead of one query per memory.
+
+        Args:
+            message_ids: The message/memory IDs to fetch
+            db: Database session
+            use_cache: Whether to use cached results (default True)
+
+        Returns:
+            Dict of message_id -> memory content dict. IDs not found in the
+            database are omitted.
+        """
+        # Normalize IDs to strings, dropping duplicates but keeping order
+        ids = list(dict.fromkeys(str(mid) for mid in message_ids))
+        contents: Dict[str, Dict[str, Any]] = {}
+
+        misses = []
+        for message_id in ids:
+            cached_content = self.cache.get_memory_content(message_id) if use_cache else None
+            if cached_content is not None:
+                contents[message_id] = cached_content
+            else:
+                misses.append(message_id)
+
+        for i in range(0, len(misses), CONTENT_FETCH_BATCH_SIZE):
+            batch = misses[i:i + CONTENT_FETCH_BATCH_SIZE]
+            result = await db.execute(select(Message).where(Message.id.in_(batch)))
+            for message in result.scalars().all():
+                content_dict = self._memory_content_dict(message)
+                contents[content_dict["id"]] = content_dict
+                if use_cache:
+                    self.cache.set_memory_content(content_dict["id"], content_dict)
+
+        missing = [mid for mid in misses if mid not in contents]
+        if missing:
+            # Log details for debugging orphaned Pinecone records
+            logger.warning(
+                f"[MEMORY] {len(missing)} message ID(s) not found in SQL database "
+                f"(may be orphaned in Pinecone): {', '.join(missing)}"
+            )
+        if ids:
+            logger.debug(
+                f"[MEMORY] Hydrated {len(contents)}/{len(ids)} memories "
+                f"({len(ids) - len(misses)} from cache)"
+            )
+        return contents
+
     async def update_retrieval_count(
         self,
         message_id: str,
@@ -594,7 +776,7 @@ class MemoryService:
         - Increments times_retrieved in SQL database
         - Updates last_retrieved_at timestamp
         - Creates ConversationMemoryLink for tracking (unless create_link=False)
-        - Updates Pinecone metadata
+        - Queues the vector metadata update (see retrieval_count_queue)
 
         Args:
             message_id: The message/memory ID
@@ -616,53 +798,104 @@ class MemoryService:
                 to reproduce the live insertion position (memories precede the
                 message that triggered them). Defaults to now.
         """
+        return await self.update_retrieval_counts(
+            [message_id],
+            conversation_id,
+            db,
+            entity_id=entity_id,
+            create_link=create_link,
+            link_retrieved_at={message_id: link_retrieved_at} if link_retrieved_at else None,
+        )
+
+    async def update_retrieval_counts(
+        self,
+        message_ids: List[str],
+        conversation_id: str,
+        db: AsyncSession,
+        entity_id: Optional[str] = None,
+        create_link: bool = True,
+        link_retrieved_at: Optional[Dict[str, Optional[datetime]]] = None,
+        link_passage_index: Optional[Dict[str, Optional[int]]] = None,
+    ) -> bool:
+        """
+        Bulk variant of update_retrieval_count for all memories a turn selected.
+
+        One UPDATE covers every ID and all ConversationMemoryLink rows are
+        added in the same transaction, so the turn commits once instead of once
+        per memory. Vector metadata is not touched inline: the increments go
+        to the write-behind retrieval_count_queue, which coalesces them and
+        flushes in batches.
+
+        Args:
+            message_ids: The memory IDs (each counted once)
+            conversation_id: The conversation this retrieval is for
+            db: Database session
+            entity_id: The Pinecone index name. If None, uses default entity.
+            create_link: See update_retrieval_count.
+            link_retrieved_at: Per-ID link timestamps (see
+                update_retrieval_count.link_retrieved_at). IDs without an
+                entry default to now.
+            link_passage_index: Per-ID passage injected for memories stored
+                as passages, so a session reload re-injects the same passage.
+                IDs without an entry were injected whole.
+        """
+        message_ids = list(dict.fromkeys(message_ids))
+        if not message_ids:
+            return True
+        link_retrieved_at = link_retrieved_at or {}
+        link_passage_index = link_passage_index or {}
         try:
-            # Update SQL record
+            now = datetime.utcnow()
             await db.execute(
                 update(Message)
-                .where(Message.id == message_id)
+                .where(Message.id.in_(message_ids))
                 .values(
                     times_retrieved=Message.times_retrieved + 1,
-                    last_retrieved_at=datetime.utcnow()
+                    last_retrieved_at=now,
                 )
             )
+            await refresh_significance(db, message_ids)
 
-            # Create link record for deduplication tracking
+            # Create link records for deduplication tracking
             # Include entity_id for multi-entity conversation isolation
             if create_link:
-                link = ConversationMemoryLink(
-                    conversation_id=conversation_id,
-                    message_id=message_id,
-                    entity_id=entity_id,
-                    retrieved_at=link_retrieved_at or datetime.utcnow(),
-                )
-                db.add(link)
+                db.add_all([
+                    ConversationMemoryLink(
+                        conversation_id=conversation_id,
+                        message_id=message_id,
+                        entity_id=entity_id,
+                        retrieved_at=link_retrieved_at.get(message_id) or now,
+                        passage_index=link_passage_index.get(message_id),
+                    )
+                    for message_id in message_ids
+                ])
             await db.commit()
-
-            # Update Pinecone metadata (get current count and increment)
-            if self.is_configured():
-                index = self.get_index(entity_id)
-                if index:
-                    try:
-                        # Fetch current vector to get metadata
-                        fetch_result = await run_pinecone(index.fetch, ids=[message_id])
-                        if message_id in fetch_result.vectors:
-                            current_count = fetch_result.vectors[message_id].metadata.get("times_retrieved", 0)
-                            # Update with incremented count
-                            await run_pinecone(
-                                index.update,
-                                id=message_id,
-                                set_metadata={"times_retrieved": current_count + 1}
-                            )
-                    except Exception as e:
-                        logger.warning(f"Could not update Pinecone metadata: {e}")
-
-            return True
         except Exception as e:
             logger.error(f"Error updating retrieval count: {e}")
             await db.rollback()
             return False
 
+        self.invalidate_memory_stats(entity_id)
+
+        # SQL is committed; the metadata copy catches up in the background
+        if self.is_configured(entity_id):
+            self.retrieval_count_queue.enqueue(message_ids, entity_id)
+        return True
+
+    async def get_retrieval_counts(self, message_ids: List[str]) -> Dict[str, int]:
+        """
+        SQL times_retrieved of the given messages (missing IDs left out), on
+        its own read session. The retrieval count queue writes these to vector
+        metadata.
+        """
+        from app.database import read_session_maker
+
+        async with read_session_maker() as db:
+            result = await db.execute(
+                select(Message.id, Message.times_retrieved).where(Message.id.in_(message_ids))
+            )
+            return {message_id: count or 0 for message_id, count in result.all()}
+
     async def record_memory_link(
         self,
         message_id: str,
@@ -718,7 +951,7 @@ class MemoryService:
         for prefix in dict.fromkeys(prefixes):  # dedupe, preserve order
             try:
                 result = await db.execute(
-                    select(Message.id).where(Message.id.like(f"{prefix}%")).limit(2)
+                    select(Message.id).where(Message.id_prefix_clause(prefix)).limit(2)
                 )
                 matches = result.scalars().all()
                 if len(matches) == 1:
@@ -776,11 +1009,13 @@ class MemoryService:
             entity_id: Optional entity filter for multi-entity conversations
 
         Returns:
-            List of dicts with 'message_id' and 'retrieved_at' for each retrieved memory
+            List of dicts with 'message_id', 'retrieved_at' and 'passage_index'
+            (None for memories injected whole) for each retrieved memory
         """
         query = select(
             ConversationMemoryLink.message_id,
-            ConversationMemoryLink.retrieved_at
+            ConversationMemoryLink.retrieved_at,
+            ConversationMemoryLink.passage_index,
         ).where(
             ConversationMemoryLink.conversation_id == conversation_id
         ).order_by(ConversationMemoryLink.retrieved_at)
@@ -790,14 +1025,44 @@ class MemoryService:
 
         result = await db.execute(query)
         return [
-            {"message_id": str(row[0]), "retrieved_at": row[1]}
+            {"message_id": str(row[0]), "retrieved_at": row[1], "passage_index": row[2]}
             for row in result.fetchall()
         ]
 
+    @staticmethod
+    def record_query_results(
+        db: AsyncSession,
+        conversation_id: str,
+        exchange: Dict[str, Any],
+        tool_result: Message,
+        entity_id: Optional[str] = None,
+    ) -> None:
+        """
+        Record the memories memory_query surfaced in one tool exchange (its
+        "memory_query_ids"), for cleanup_memory_query_links.
+
+        The rows are only added to the session; they are written by the
+        caller's commit, alongside the tool exchange messages.
+
+        Args:
+            tool_result: The exchange's tool_result message; the rows are
+                deleted with it.
+            entity_id: The querying entity in multi-entity conversations (as
+                stored on the tool_use rows); None for single-entity ones.
+        """
+        for memory_id in dict.fromkeys(exchange.get("memory_query_ids") or ()):
+            db.add(MemoryQueryResult(
+                conversation_id=conversation_id,
+                entity_id=entity_id,
+                message_id=memory_id,
+                tool_result=tool_result,
+            ))
+
     async def cleanup_memory_query_links(
         self,
         db: AsyncSession,
         dry_run: bool = True,
+        incremental: bool = False,
     ) -> Dict[str, Any]:
         """
         Delete stale ConversationMemoryLinks created by memory_query calls.
@@ -809,12 +1074,17 @@ class MemoryService:
         which duplicates them and breaks prompt-cache stability on the first
         turn after any reload.
 
-        Query results are identified from the persisted tool exchanges: the
-        memory-ID prefixes in "--- Memory <id[:8]> (...)" markers inside
-        tool_result blocks answering a memory_query tool_use. A link is
-        deleted when its message_id matches a prefix from the same
-        conversation (scoped to the querying entity when the tool_use has a
-        speaker_entity_id, so multi-entity participants' own links survive).
+        Query results are recorded in MemoryQueryResult when the tool
+        exchanges are persisted (and were backfilled from older tool results
+        by the schema migration). A link is stale when its memory was a query
+        result in the same conversation, scoped to the querying entity when
+        one is recorded so multi-entity participants' own links survive. All
+        stale links are deleted with one DELETE ... WHERE EXISTS.
+
+        With incremental=True only conversations updated since the last
+        non-dry run in this process are checked. That watermark is kept in
+        memory, so the first incremental run after a restart checks every
+        conversation: slower, never wrong.
 
         Known limitation: if a memory surfaced in memory_query output AND was
         legitimately auto-retrieved in the same conversation (possible only
@@ -824,79 +1094,39 @@ class MemoryService:
 
         SQL-only — works even when Pinecone is not configured.
         """
-        marker_re = re.compile(r"--- Memory ([0-9a-fA-F]{8}) \(")
-
-        # Map memory_query tool_use ids to their conversation and speaker
-        result = await db.execute(
-            select(Message).where(Message.role == MessageRole.TOOL_USE)
+        link = ConversationMemoryLink.__table__
+        stale = exists().where(
+            MemoryQueryResult.conversation_id == link.c.conversation_id,
+            MemoryQueryResult.message_id == link.c.message_id,
+            or_(
+                MemoryQueryResult.entity_id.is_(None),
+                MemoryQueryResult.entity_id == link.c.entity_id,
+            ),
         )
-        query_tool_use: Dict[str, tuple] = {}
-        for msg in result.scalars().all():
-            blocks = msg.content_blocks
-            if not isinstance(blocks, list):
-                continue
-            for block in blocks:
-                if block.get("type") == "tool_use" and block.get("name") == "memory_query":
-                    query_tool_use[block.get("id")] = (
-                        str(msg.conversation_id),
-                        msg.speaker_entity_id,
-                    )
-
-        # Collect memory-ID prefixes from the matching tool_result blocks,
-        # grouped by (conversation, querying entity)
-        prefixes_by_scope: Dict[tuple, Set[str]] = {}
-        if query_tool_use:
-            result = await db.execute(
-                select(Message).where(Message.role == MessageRole.TOOL_RESULT)
-            )
-            for msg in result.scalars().all():
-                blocks = msg.content_blocks
-                if not isinstance(blocks, list):
-                    continue
-                for block in blocks:
-                    if block.get("type") != "tool_result":
-                        continue
-                    scope = query_tool_use.get(block.get("tool_use_id"))
-                    if scope is None:
-                        continue
-                    content = block.get("content")
-                    if not isinstance(content, str):
-                        continue
-                    found = marker_re.findall(content)
-                    if found:
-                        prefixes_by_scope.setdefault(scope, set()).update(found)
-
-        # Delete links whose memory matches a query-result prefix
-        links_matched = 0
+        conditions = [stale]
+        queried = select(func.count(distinct(MemoryQueryResult.conversation_id)))
+        since = self._query_link_cleanup_at if incremental else None
+        if since is not None:
+            updated = select(Conversation.id).where(Conversation.updated_at >= since)
+            conditions.append(link.c.conversation_id.in_(updated))
+            queried = queried.where(MemoryQueryResult.conversation_id.in_(updated))
+        started_at = datetime.utcnow()
+
+        conversations = (await db.execute(queried)).scalar()
+        links_matched = (await db.execute(
+            select(func.count()).select_from(link).where(*conditions)
+        )).scalar()
         links_deleted = 0
-        for (conversation_id, speaker_entity_id), prefixes in prefixes_by_scope.items():
-            link_query = select(ConversationMemoryLink).where(
-                ConversationMemoryLink.conversation_id == conversation_id
-            )
-            # Multi-entity tool_use rows carry the querying entity; scope the
-            # deletion to its links so other participants' links for the same
-            # memory survive. Single-entity rows have no speaker — the whole
-            # conversation belongs to one entity, so no extra filter.
-            if speaker_entity_id is not None:
-                link_query = link_query.where(
-                    ConversationMemoryLink.entity_id == speaker_entity_id
-                )
-            result = await db.execute(link_query)
-            for link in result.scalars().all():
-                if any(str(link.message_id).startswith(p) for p in prefixes):
-                    links_matched += 1
-                    if not dry_run:
-                        await db.delete(link)
-                        links_deleted += 1
-
         if not dry_run:
+            result = await db.execute(delete(link).where(*conditions))
             await db.commit()
+            links_deleted = result.rowcount
+            self._query_link_cleanup_at = started_at
 
         summary = {
             "dry_run": dry_run,
-            "conversations_with_query_results": len(
-                {conv for (conv, _entity) in prefixes_by_scope}
-            ),
+            "incremental": since is not None,
+            "conversations_with_query_results": conversations,
             "links_matched": links_matched,
             "links_deleted": links_deleted,
         }
@@ -913,58 +1143,144 @@ class MemoryService:
 
         Used to filter out memories from archived conversations during retrieval.
 
-        This method handles three cases:
+        The sets are held in memory: loaded from the database once (at startup,
+        or on first use) and kept current by the conversation routes through
+        note_conversation_archived / note_conversation_unarchived. Lookups do
+        no DB access, and the returned set is the live index - callers must
+        treat it as read-only.
+
+        An entity's set covers three cases:
         1. Single-entity conversations where entity_id matches
         2. Multi-entity conversations where the entity is a participant
         3. Legacy conversations with NULL entity_id (only for the default entity)
 
         Args:
-            db: Database session
+            db: Database session (used only if the index isn't loaded yet)
             entity_id: Optional entity filter. If provided, returns archived
                        conversations where this entity's memories would be stored.
         """
-        archived_ids: Set[str] = set()
+        if self._archived_by_entity is None:
+            await self.load_archived_conversation_ids(db)
 
         if entity_id is None:
             # No filter - return all archived conversations
-            query = select(Conversation.id).where(Conversation.is_archived == True)
-            result = await db.execute(query)
-            return set(row[0] for row in result.fetchall())
-
-        # Case 1: Single-entity conversations with matching entity_id
-        single_entity_query = select(Conversation.id).where(
-            Conversation.is_archived == True,
-            Conversation.entity_id == entity_id
+            return self._archived_all
+        return self._archived_by_entity.get(entity_id, _EMPTY_ID_SET)
+
+    async def load_archived_conversation_ids(self, db: AsyncSession) -> None:
+        """
+        (Re)build the in-memory archived-conversation index from the database.
+
+        Two queries: every archived conversation with its entity_id, and the
+        participants of archived multi-entity conversations.
+        """
+        if self._archived_load_lock is None:
+            self._archived_load_lock = asyncio.Lock()
+        async with self._archived_load_lock:
+            result = await db.execute(
+                select(Conversation.id, Conversation.entity_id).where(
+                    Conversation.is_archived == True
+                )
+            )
+            archived = result.fetchall()
+
+            # Multi-entity conversations have entity_id = "multi-entity" but store
+            # memories in each participant's index
+            result = await db.execute(
+                select(ConversationEntity.conversation_id, ConversationEntity.entity_id)
+                .join(Conversation, ConversationEntity.conversation_id == Conversation.id)
+                .where(
+                    Conversation.is_archived == True,
+                    Conversation.entity_id == "multi-entity",
+                )
+            )
+            participants: Dict[str, List[str]] = {}
+            for conversation_id, participant_id in result.fetchall():
+                participants.setdefault(conversation_id, []).append(participant_id)
+
+            self._archived_all = set()
+            self._archived_by_entity = {}
+            for conversation_id, conversation_entity_id in archived:
+                self._add_archived(
+                    conversation_id,
+                    self._archive_owner_ids(
+                        conversation_entity_id, participants.get(conversation_id, [])
+                    ),
+                )
+        logger.info(
+            f"[MEMORY] Loaded {len(self._archived_all)} archived conversation IDs "
+            f"across {len(self._archived_by_entity)} entities"
         )
-        result = await db.execute(single_entity_query)
-        archived_ids.update(row[0] for row in result.fetchall())
-
-        # Case 2: Multi-entity conversations where this entity is a participant
-        # These have entity_id = "multi-entity" but store memories in each participant's index
-        multi_entity_query = select(Conversation.id).where(
-            Conversation.is_archived == True,
-            Conversation.entity_id == "multi-entity"
-        ).join(
-            ConversationEntity,
-            ConversationEntity.conversation_id == Conversation.id
-        ).where(
-            ConversationEntity.entity_id == entity_id
+
+    @staticmethod
+    def _archive_owner_ids(
+        conversation_entity_id: Optional[str],
+        participant_ids: List[str],
+    ) -> List[str]:
+        """Entity indexes holding a conversation's memories."""
+        if conversation_entity_id == "multi-entity":
+            return participant_ids
+        if conversation_entity_id is None:
+            # Legacy conversations: memories are in the default entity's index
+            default_entity = settings.get_default_entity()
+            return [default_entity.index_name] if default_entity else []
+        return [conversation_entity_id]
+
+    async def _memory_owner_ids(self, message_id: str, db: AsyncSession) -> List[str]:
+        """Entity indexes holding a memory, from its conversation."""
+        result = await db.execute(
+            select(Conversation.id, Conversation.entity_id)
+            .join(Message, Message.conversation_id == Conversation.id)
+            .where(Message.id == message_id)
         )
-        result = await db.execute(multi_entity_query)
-        archived_ids.update(row[0] for row in result.fetchall())
+        row = result.first()
+        if row is None:
+            return []
+        return await self._conversation_owner_ids(row[0], row[1], db)
 
-        # Case 3: Legacy conversations with NULL entity_id (for default entity only)
-        # These have their memories stored in the default entity's Pinecone index
-        default_entity = settings.get_default_entity()
-        if default_entity and default_entity.index_name == entity_id:
-            null_entity_query = select(Conversation.id).where(
-                Conversation.is_archived == True,
-                Conversation.entity_id.is_(None)
+    async def _conversation_owner_ids(
+        self,
+        conversation_id: str,
+        conversation_entity_id: Optional[str],
+        db: AsyncSession,
+    ) -> List[str]:
+        """Entity indexes holding a conversation's memories (queries participants)."""
+        participant_ids: List[str] = []
+        if conversation_entity_id == "multi-entity":
+            result = await db.execute(
+                select(ConversationEntity.entity_id).where(
+                    ConversationEntity.conversation_id == conversation_id
+                )
             )
-            result = await db.execute(null_entity_query)
-            archived_ids.update(row[0] for row in result.fetchall())
+            participant_ids = [r[0] for r in result.fetchall()]
+        return self._archive_owner_ids(conversation_entity_id, participant_ids)
 
-        return archived_ids
+    def _add_archived(self, conversation_id: str, owner_ids: List[str]) -> None:
+        self._archived_all.add(conversation_id)
+        for owner_id in owner_ids:
+            self._archived_by_entity.setdefault(owner_id, set()).add(conversation_id)
+
+    async def note_conversation_archived(
+        self,
+        conversation: Conversation,
+        db: AsyncSession,
+    ) -> None:
+        """Add a just-archived conversation to the in-memory archived index."""
+        if self._archived_by_entity is None:
+            # Not loaded yet; the first lookup reads the committed state
+            return
+        self._add_archived(
+            conversation.id,
+            await self._conversation_owner_ids(conversation.id, conversation.entity_id, db),
+        )
+
+    def note_conversation_unarchived(self, conversation_id: str) -> None:
+        """Drop an unarchived (or deleted) conversation from the archived index."""
+        if self._archived_by_entity is None:
+            return
+        self._archived_all.discard(conversation_id)
+        for archived_ids in self._archived_by_entity.values():
+            archived_ids.discard(conversation_id)
 
     async def set_memory_status(
         self,
@@ -991,8 +1307,11 @@ class MemoryService:
                 .where(Message.id == message_id)
                 .values(memory_status=status)
             )
+            await refresh_significance(db, [message_id])
             await db.commit()
             self.cache.invalidate_memory_content(str(message_id))
+            for owner_id in await self._memory_owner_ids(message_id, db):
+                self.invalidate_search_results(owner_id)
             logger.info(f"[MEMORY] Set memory_status={status} for {str(message_id)[:8]}...")
             return True
         except Exception as e:
@@ -1016,12 +1335,88 @@ class MemoryService:
             return False
 
         try:
-            await run_pinecone(index.delete, ids=[message_id])
+            record_ids = [message_id] + await run_pinecone(
+                self.list_passage_ids, index, message_id
+            )
+            await run_pinecone(index.delete, ids=record_ids)
+            self.invalidate_search_results(entity_id)
             return True
         except Exception as e:
             logger.error(f"Error deleting memory: {e}")
             return False
 
+    @staticmethod
+    def list_passage_ids(index, message_id: str) -> List[str]:
+        """
+        IDs of a message's passage records (none for whole-message records),
+        by ID-prefix listing. Falls back to a generous fixed range if listing
+        is unavailable; deleting IDs that don't exist is harmless.
+        """
+        prefix = passage_id_prefix(message_id)
+        try:
+            ids: List[str] = []
+            pagination_token = None
+            while True:
+                kwargs = {"namespace": "", "limit": 100, "prefix": prefix}
+                if pagination_token:
+                    kwargs["pagination_token"] = pagination_token
+                response = index.list_paginated(**kwargs)
+                page = [
+                    v.id if hasattr(v, "id") else v
+                    for v in getattr(response, "vectors", None) or []
+                ]
+                ids.extend(page)
+                # An empty page ends the listing even if a token comes back
+                if page and getattr(response, "pagination", None) and response.pagination.next:
+                    pagination_token = response.pagination.next
+                else:
+                    return ids
+        except Exception as e:
+            logger.warning(f"[MEMORY] Passage listing failed ({e}); deleting a fixed range of passage IDs")
+            return [f"{prefix}{n}" for n in range(64)]
+
+    async def iter_record_id_pages(
+        self,
+        entity_id: Optional[str] = None,
+    ) -> AsyncIterator[List[str]]:
+        """
+        Yield the record IDs stored in an entity's index, one listing page
+        (up to RECORD_PAGE_SIZE IDs) at a time, so callers can work through
+        large indexes in bounded memory.
+
+        Args:
+            entity_id: The Pinecone index name. If None, uses default entity.
+        """
+        if not self.is_configured():
+            return
+
+        index = self.get_index(entity_id)
+        if index is None:
+            return
+
+        # Use list_paginated() for explicit pagination control
+        # This works better with serverless indexes using integrated inference
+        pagination_token = None
+        while True:
+            kwargs = {"namespace": "", "limit": RECORD_PAGE_SIZE}
+            if pagination_token:
+                kwargs["pagination_token"] = pagination_token
+            response = await run_pinecone(index.list_paginated, **kwargs)
+
+            page = [
+                v.id if hasattr(v, "id") else v
+                for v in getattr(response, "vectors", None) or []
+                if hasattr(v, "id") or isinstance(v, str)
+            ]
+            if page:
+                yield page
+
+            # An empty page ends the listing even if a token comes back
+            if page and getattr(response, "pagination", None) and response.pagination.next:
+                pagination_token = response.pagination.next
+            else:
+                return
+
     async def list_all_pinecone_ids(
         self,
         entity_id: Optional[str] = None,
@@ -1029,7 +1424,8 @@ class MemoryService:
         """
         List all record IDs stored in a Pinecone index.
 
-        Uses pagination to handle large indexes.
+        Holds every ID in memory; prefer iter_record_id_pages for large
+        indexes.
 
         Args:
             entity_id: The Pinecone index name. If None, uses default entity.
@@ -1037,48 +1433,10 @@ class MemoryService:
         Returns:
             List of all record IDs in the index.
         """
-        if not self.is_configured():
-            return []
-
-        index = self.get_index(entity_id)
-        if index is None:
-            return []
-
         all_ids = []
         try:
-            # Use list_paginated() for explicit pagination control
-            # This works better with serverless indexes using integrated inference
-            pagination_token = None
-
-            while True:
-                if pagination_token:
-                    response = await run_pinecone(
-                        index.list_paginated,
-                        namespace="",
-                        limit=100,
-                        pagination_token=pagination_token
-                    )
-                else:
-                    response = await run_pinecone(
-                        index.list_paginated,
-                        namespace="",
-                        limit=100
-                    )
-
-                # Extract IDs from the response
-                if hasattr(response, 'vectors') and response.vectors:
-                    for v in response.vectors:
-                        if hasattr(v, 'id'):
-                            all_ids.append(v.id)
-                        elif isinstance(v, str):
-                            all_ids.append(v)
-
-                # Check for more pages
-                if hasattr(response, 'pagination') and response.pagination and response.pagination.next:
-                    pagination_token = response.pagination.next
-                else:
-                    break
-
+            async for page in self.iter_record_id_pages(entity_id):
+                all_ids.extend(page)
             logger.info(f"[MEMORY] Listed {len(all_ids)} records from Pinecone entity={entity_id}")
             return all_ids
         except Exception as e:
@@ -1087,71 +1445,118 @@ class MemoryService:
             logger.error(f"[MEMORY] Traceback: {traceback.format_exc()}")
             return []
 
-    async def find_orphaned_records(
+    async def reconcile_orphaned_records(
         self,
         db: AsyncSession,
         entity_id: Optional[str] = None,
-    ) -> List[Dict[str, Any]]:
+        delete: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
-        Find records that exist in Pinecone but not in the SQL database.
+        Stream an entity's index against the SQL database, one listing page
+        at a time, yielding a progress report per page.
 
-        These orphans typically occur when:
+        Each page of record IDs is checked with one bounded IN select; records
+        whose message is not in SQL are orphans. They typically occur when:
         - A conversation or message was deleted but Pinecone deletion failed
         - Database was restored from an older backup
         - Records were created during development/testing
 
-        Args:
-            db: Database session
-            entity_id: The Pinecone index name. If None, uses default entity.
-
-        Returns:
-            List of dicts with orphaned record info (id, metadata if available)
+        Memory use is bounded by the page size whatever the index size, and
+        with delete=True each page's orphans are deleted before the next page
+        is listed (deleting listed IDs doesn't disturb the listing, which
+        continues after the last ID returned).
+
+        Yields dicts with:
+            page: 1-based page number
+            records_scanned: records checked so far, this page included
+            orphans: this page's orphans ({"id", "metadata"}; metadata None
+                when it couldn't be fetched)
+            orphans_deleted: how many of them were deleted
+            errors: errors on this page (a failed delete doesn't stop the scan)
         """
         if not self.is_configured():
-            return []
+            return
 
         index = self.get_index(entity_id)
         if index is None:
-            return []
-
-        # Get all IDs from Pinecone
-        pinecone_ids = await self.list_all_pinecone_ids(entity_id)
-        if not pinecone_ids:
-            return []
-
-        # Get all message IDs from SQL
-        result = await db.execute(select(Message.id))
-        sql_ids = set(str(row[0]) for row in result.fetchall())
-
-        # Find orphans (in Pinecone but not in SQL)
-        orphan_ids = [pid for pid in pinecone_ids if pid not in sql_ids]
-        logger.info(f"[MEMORY] Found {len(orphan_ids)} orphaned records (Pinecone: {len(pinecone_ids)}, SQL: {len(sql_ids)})")
-
-        # Fetch metadata for orphans if there aren't too many
-        orphans = []
-        if orphan_ids:
-            try:
-                # Fetch in batches of 100 to get metadata
-                for i in range(0, len(orphan_ids), 100):
-                    batch_ids = orphan_ids[i:i+100]
-                    fetch_result = await run_pinecone(index.fetch, ids=batch_ids)
-
-                    for oid in batch_ids:
-                        orphan_info = {"id": oid, "metadata": None}
-                        if oid in fetch_result.vectors:
-                            metadata = fetch_result.vectors[oid].metadata
-                            orphan_info["metadata"] = {
+            return
+
+        scanned = 0
+        page_number = 0
+        async for page in self.iter_record_id_pages(entity_id):
+            page_number += 1
+            scanned += len(page)
+            errors: List[str] = []
+
+            # Passage records belong to the message their ID names
+            message_ids = {parse_memory_record_id(pid)[0] for pid in page}
+            result = await db.execute(select(Message.id).where(Message.id.in_(message_ids)))
+            existing = {str(row[0]) for row in result.fetchall()}
+            orphan_ids = [pid for pid in page if parse_memory_record_id(pid)[0] not in existing]
+
+            orphans = [{"id": oid, "metadata": None} for oid in orphan_ids]
+            if orphan_ids:
+                try:
+                    fetch_result = await run_pinecone(index.fetch, ids=orphan_ids)
+                    for orphan in orphans:
+                        if orphan["id"] in fetch_result.vectors:
+                            metadata = fetch_result.vectors[orphan["id"]].metadata
+                            orphan["metadata"] = {
                                 "conversation_id": metadata.get("conversation_id"),
                                 "role": metadata.get("role"),
                                 "created_at": metadata.get("created_at"),
                                 "content_preview": metadata.get("content_preview", "")[:100],
                             }
-                        orphans.append(orphan_info)
-            except Exception as e:
-                logger.warning(f"Could not fetch metadata for orphans: {e}")
-                # Fall back to just IDs
-                orphans = [{"id": oid, "metadata": None} for oid in orphan_ids]
+                except Exception as e:
+                    logger.warning(f"Could not fetch metadata for orphans: {e}")
+
+            deleted = 0
+            if delete and orphan_ids:
+                try:
+                    await run_pinecone(index.delete, ids=orphan_ids)
+                    deleted = len(orphan_ids)
+                except Exception as e:
+                    error_msg = f"Error deleting orphans on page {page_number}: {e}"
+                    logger.error(f"[MEMORY] {error_msg}")
+                    errors.append(error_msg)
+
+            yield {
+                "page": page_number,
+                "records_scanned": scanned,
+                "orphans": orphans,
+                "orphans_deleted": deleted,
+                "errors": errors,
+            }
+
+        if delete:
+            self.invalidate_search_results(entity_id)
+        logger.info(f"[MEMORY] Reconciled {scanned} records in {page_number} pages for entity={entity_id}")
+
+    async def find_orphaned_records(
+        self,
+        db: AsyncSession,
+        entity_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find records that exist in Pinecone but not in the SQL database
+        (see reconcile_orphaned_records, which this collects).
+
+        Args:
+            db: Database session
+            entity_id: The Pinecone index name. If None, uses default entity.
 
+        Returns:
+            List of dicts with orphaned record info (id, metadata if available)
+        """
+        orphans: List[Dict[str, Any]] = []
+        scanned = 0
+        try:
+            async for page in self.reconcile_orphaned_records(db, entity_id):
+                orphans.extend(page["orphans"])
+                scanned = page["records_scanned"]
+        except Exception as e:
+            logger.error(f"Error finding orphaned records for entity={entity_id}: {e}")
+        logger.info(f"[MEMORY] Found {len(orphans)} orphaned records (Pinecone: {scanned})")
         return orphans
 
     async def cleanup_orphaned_records(
@@ -1161,7 +1566,8 @@ class MemoryService:
         dry_run: bool = True,
     ) -> Dict[str, Any]:
         """
-        Clean up orphaned Pinecone records that don't exist in SQL.
+        Clean up orphaned Pinecone records that don't exist in SQL, page by
+        page (see reconcile_orphaned_records).
 
         Args:
             db: Database session
@@ -1189,42 +1595,29 @@ class MemoryService:
             result["errors"].append(f"Could not connect to index for entity={entity_id}")
             return result
 
-        # Find orphaned records
-        orphans = await self.find_orphaned_records(db, entity_id)
-        result["orphans_found"] = len(orphans)
-        result["orphan_ids"] = [o["id"] for o in orphans]
-
-        if not orphans:
-            logger.info(f"[MEMORY] No orphaned records found for entity={entity_id}")
-            return result
-
-        if dry_run:
-            logger.info(f"[MEMORY] Dry run: would delete {len(orphans)} orphaned records")
-            return result
-
-        # Actually delete the orphans
-        orphan_ids = [o["id"] for o in orphans]
         try:
-            # Delete in batches of 100
-            for i in range(0, len(orphan_ids), 100):
-                batch_ids = orphan_ids[i:i+100]
-                await run_pinecone(index.delete, ids=batch_ids)
-                result["orphans_deleted"] += len(batch_ids)
-
-            logger.info(f"[MEMORY] Deleted {result['orphans_deleted']} orphaned records from entity={entity_id}")
+            async for page in self.reconcile_orphaned_records(db, entity_id, delete=not dry_run):
+                result["orphans_found"] += len(page["orphans"])
+                result["orphans_deleted"] += page["orphans_deleted"]
+                result["orphan_ids"].extend(o["id"] for o in page["orphans"])
+                result["errors"].extend(page["errors"])
         except Exception as e:
-            error_msg = f"Error deleting orphans: {e}"
+            error_msg = f"Error reconciling orphans: {e}"
             logger.error(f"[MEMORY] {error_msg}")
             result["errors"].append(error_msg)
 
+        if dry_run:
+            logger.info(f"[MEMORY] Dry run: would delete {result['orphans_found']} orphaned records")
+        else:
+            logger.info(f"[MEMORY] Deleted {result['orphans_deleted']} orphaned records from entity={entity_id}")
         return result
 
     def test_connection(self) -> Dict[str, Any]:
         """
-        Test Pinecone connection for all configured entities.
+        Test the vector store connection for all configured entities.
 
         Returns a dict with:
-            - configured: bool - whether Pinecone is configured at all
+            - configured: bool - whether any vector store is configured at all
             - entities: list of dicts with entity_id, success, message, and stats
         """
         result = {
@@ -1232,8 +1625,8 @@ class MemoryService:
             "entities": []
         }
 
-        # Check if Pinecone is configured
-        if not settings.pinecone_api_key:
+        # Check if any vector store is configured
+        if not self.is_configured():
             return result
 
         result["configured"] = True
@@ -1255,11 +1648,17 @@ class MemoryService:
                 "entity_id": entity.index_name,
                 "label": entity.label,
                 "host": entity.host,
+                "backend": entity.vector_backend,
                 "success": False,
                 "message": "",
                 "stats": None
             }
 
+            if not self.is_configured(entity.index_name):
+                entity_result["message"] = "PINECONE_API_KEY not configured"
+                result["entities"].append(entity_result)
+                continue
+
             try:
                 # Clear cached index to force fresh connection
                 if entity.index_name in self._indexes:
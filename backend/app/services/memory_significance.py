@@ -0,0 +1,229 @@
+"""
+Stored memory significance.
+
+The memory browser sorts by significance, which depends on retrieval history
+and on age. Computing it per request meant loading every memory (with its
+content) to sort in Python and keep one page. Instead each memory-role message
+carries a precomputed messages.significance, so sorting and paging happen in
+SQL and only the page is loaded.
+
+The stored value is kept current by:
+- Insert: the column default computes it from the new row (models/message.py).
+- Retrieval and status changes: memory_service refreshes the affected rows in
+  the same transaction.
+- Time: significance decays with age and with time since the last retrieval,
+  so SignificanceRefresher recomputes every memory periodically (and once at
+  startup, which also fills rows that predate the column).
+
+Age decay multiplies every unpinned memory by the same factor, so the order
+barely drifts between refreshes; only the recency boost and the floor move
+memories relative to each other.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Message, MessageRole
+from app.services.cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+# Only these roles are vectorized into Pinecone; tool exchanges and system
+# messages live in SQL for conversation replay but are never memories, so the
+# memory browser must not show them.
+MEMORY_ROLES = (MessageRole.HUMAN, MessageRole.ASSISTANT, MessageRole.REFLECTION)
+
+# Rows recomputed per query/update round trip
+REFRESH_BATCH_SIZE = 1000
+
+
+def calculate_significance(
+    times_retrieved: int,
+    created_at: datetime,
+    last_retrieved_at: Optional[datetime],
+    memory_status: Optional[str] = None,
+    role: Optional[str] = None,
+) -> float:
+    """
+    Calculate dynamic significance based on retrieval patterns.
+
+    significance = (1 + 0.1 * times_retrieved) * recency_factor * half_life_modifier
+
+    Where:
+    - times_retrieved: How many times this memory has been retrieved (weighted at 10%)
+    - recency_factor: Boost based on how recently retrieved (decays over time)
+    - half_life_modifier: Decay based on memory age (halves every N days);
+      pinned memories (memory_status == "pinned") are exempt from age decay
+    - role: memories saved via memory_save (role == "reflection") are multiplied
+      by settings.reflection_significance_multiplier
+    """
+    now = datetime.utcnow()
+
+    # Half-life modifier - older memories decay in significance
+    # Starts at 1.0 and halves every significance_half_life_days
+    half_life_modifier = 1.0
+    if memory_status != "pinned":
+        days_since_creation = (now - created_at).days
+        half_life_modifier = 0.5 ** (days_since_creation / settings.significance_half_life_days)
+
+    # Recency factor - boosts recently retrieved memories
+    # Cap at 1 day minimum to prevent very recent retrievals from dominating
+    recency_factor = 1.0
+    if last_retrieved_at:
+        days_since_retrieval = max((now - last_retrieved_at).days, 1)
+        recency_factor = 1.0 + min(1.0 / days_since_retrieval, settings.recency_boost_strength)
+
+    # Calculate significance (0.1 weight on times_retrieved to prevent retrieval
+    # count from dominating; +1 base so never-retrieved memories aren't zeroed out)
+    significance = (1 + 0.1 * times_retrieved) * recency_factor * half_life_modifier
+
+    # Boost self-authored memories (saved via the memory_save tool)
+    if role == "reflection":
+        significance *= settings.reflection_significance_multiplier
+
+    # Apply floor
+    return max(significance, settings.significance_floor)
+
+
+def _role_value(role: Any) -> Optional[str]:
+    return role.value if isinstance(role, MessageRole) else role
+
+
+def initial_significance(params: Dict[str, Any]) -> float:
+    """Significance for a message about to be inserted (column default)."""
+    return calculate_significance(
+        params.get("times_retrieved") or 0,
+        params.get("created_at") or datetime.utcnow(),
+        params.get("last_retrieved_at"),
+        params.get("memory_status"),
+        _role_value(params.get("role")),
+    )
+
+
+def _significance_inputs():
+    """Narrow projection of the columns significance depends on."""
+    return select(
+        Message.id,
+        Message.times_retrieved,
+        Message.created_at,
+        Message.last_retrieved_at,
+        Message.memory_status,
+        Message.role,
+    ).where(Message.role.in_(MEMORY_ROLES))
+
+
+async def _write_significance(db: AsyncSession, rows) -> int:
+    if not rows:
+        return 0
+    await db.execute(
+        update(Message),
+        [
+            {
+                "id": row[0],
+                "significance": calculate_significance(
+                    row[1] or 0, row[2], row[3], row[4], _role_value(row[5])
+                ),
+            }
+            for row in rows
+        ],
+    )
+    return len(rows)
+
+
+async def refresh_significance(db: AsyncSession, message_ids: Iterable[str]) -> int:
+    """
+    Recompute stored significance for the given messages (non-memory roles are
+    skipped). The caller commits. Returns the number of rows updated.
+    """
+    ids = list(dict.fromkeys(message_ids))
+    updated = 0
+    for i in range(0, len(ids), REFRESH_BATCH_SIZE):
+        result = await db.execute(
+            _significance_inputs().where(Message.id.in_(ids[i : i + REFRESH_BATCH_SIZE]))
+        )
+        updated += await _write_significance(db, result.fetchall())
+    return updated
+
+
+async def refresh_all_significance(db: AsyncSession) -> int:
+    """
+    Recompute stored significance for every memory, in primary-key batches
+    committed one at a time so chat turns aren't held behind one long write.
+    Returns the number of rows updated.
+    """
+    updated = 0
+    last_id = ""
+    while True:
+        result = await db.execute(
+            _significance_inputs()
+            .where(Message.id > last_id)
+            .order_by(Message.id)
+            .limit(REFRESH_BATCH_SIZE)
+        )
+        rows = result.fetchall()
+        if not rows:
+            break
+        updated += await _write_significance(db, rows)
+        await db.commit()
+        last_id = rows[-1][0]
+    return updated
+
+
+class SignificanceRefresher:
+    """Background job recomputing stored significance as memories age."""
+
+    def __init__(self):
+        self._worker: Optional[asyncio.Task] = None
+        self._stats = {"refreshed": 0, "last_refresh_at": None}
+
+    async def refresh(self) -> int:
+        """Recompute every memory's significance now."""
+        from app.database import async_session_maker
+
+        async with async_session_maker() as db:
+            updated = await refresh_all_significance(db)
+        cache_service.invalidate_memory_stats()
+        self._stats["refreshed"] = updated
+        self._stats["last_refresh_at"] = datetime.utcnow().isoformat()
+        logger.info(f"[MEMORY] Refreshed significance for {updated} memories")
+        return updated
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Last refresh, for the memory health endpoint."""
+        return {
+            "worker_running": self._worker is not None and not self._worker.done(),
+            "interval_seconds": settings.memory_significance_refresh_interval_seconds,
+            **self._stats,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"[MEMORY] Significance refresh failed: {e}")
+            await asyncio.sleep(settings.memory_significance_refresh_interval_seconds)
+
+    def start(self) -> None:
+        """Start the background job (called from the app lifespan)."""
+        if self._worker is not None and not self._worker.done():
+            return
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+
+significance_refresher = SignificanceRefresher()
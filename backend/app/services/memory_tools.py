@@ -25,8 +25,15 @@ from sqlalchemy import select
 from app.config import settings
 from app.database import async_session_maker
 from app.models import Conversation, Message, MessageRole
-from app.services.memory_service import VALID_ROLE_FILTERS, memory_service
+from app.services.memory_service import (
+    ROLE_FILTER_AI,
+    ROLE_FILTER_HUMAN,
+    VALID_ROLE_FILTERS,
+    memory_service,
+)
+from app.services.message_search import match_expression, search_messages
 from app.services.tool_service import ToolCategory, ToolService
+from app.services.vector_store import vector_store_configured
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +50,21 @@ MIN_ID_PREFIX_LENGTH = 6
 SOURCE_ALL = "all"
 VALID_QUERY_SOURCES = (SOURCE_ALL,) + tuple(VALID_ROLE_FILTERS)
 
+# Accepted values for memory_query's `match` parameter: "semantic" (the
+# default) ranks by vector similarity; "exact" finds the query as an exact
+# phrase in the local full-text index (message_search.py)
+MATCH_SEMANTIC = "semantic"
+MATCH_EXACT = "exact"
+VALID_QUERY_MATCHES = (MATCH_SEMANTIC, MATCH_EXACT)
+
+# Roles searched by exact matching, per source filter (mirrors the metadata
+# filter memory_service applies to vector search)
+_EXACT_MATCH_ROLES = {
+    None: (MessageRole.HUMAN, MessageRole.ASSISTANT, MessageRole.REFLECTION),
+    ROLE_FILTER_HUMAN: (MessageRole.HUMAN,),
+    ROLE_FILTER_AI: (MessageRole.ASSISTANT, MessageRole.REFLECTION),
+}
+
 
 # Track entity context for memory queries (set by session manager before tool execution)
 _current_entity_id: Optional[str] = None
@@ -149,7 +171,7 @@ async def _resolve_memory_id(
 
     if not message:
         result = await db.execute(
-            select(Message).where(Message.id.like(f"{id_or_prefix}%")).limit(5)
+            select(Message).where(Message.id_prefix_clause(id_or_prefix)).limit(5)
         )
         matches = result.scalars().all()
         if len(matches) == 0:
@@ -174,10 +196,38 @@ async def _resolve_memory_id(
     return message, None
 
 
+async def _exact_match_candidates(
+    query: str,
+    top_k: int,
+    entity_id: str,
+    conversation_id: Optional[str],
+    exclude_ids: set,
+    role_filter: Optional[str],
+) -> list:
+    """memory_query candidates whose text contains query as an exact phrase."""
+    async with async_session_maker() as db:
+        results = await search_messages(
+            db,
+            query,
+            phrase=True,
+            entity_id=entity_id,
+            include_shared=True,
+            roles=_EXACT_MATCH_ROLES[role_filter],
+            exclude_conversation_id=conversation_id,
+            exclude_ids=exclude_ids,
+            limit=top_k,
+        )
+    return [
+        {"id": r["message_id"], "conversation_id": r["conversation_id"], "score": None}
+        for r in results
+    ]
+
+
 async def _memory_query(
     query: str,
     num_results: int = 5,
     source: Optional[str] = None,
+    match: Optional[str] = None,
 ) -> str:
     """
     Query your experiential memories with chosen text.
@@ -198,6 +248,9 @@ async def _memory_query(
         num_results: Number of memories to retrieve (default 5, max 10)
         source: Who authored the memories to search — "human", "ai", or
                "all" (the default when omitted).
+        match: "semantic" (the default) ranks by similarity; "exact" finds
+               memories containing the query as an exact phrase (word
+               sequence, ignoring case and punctuation).
 
     Returns:
         Formatted list of relevant memories with content and metadata
@@ -222,6 +275,15 @@ async def _memory_query(
     if role_filter == SOURCE_ALL:
         role_filter = None
 
+    match_mode = str(match if match is not None else "").strip().lower() or MATCH_SEMANTIC
+    if match_mode not in VALID_QUERY_MATCHES:
+        return (
+            f"Error: Unknown match '{match}'. "
+            f"Valid values: {', '.join(VALID_QUERY_MATCHES)}."
+        )
+    if match_mode == MATCH_EXACT and match_expression(query) is None:
+        return "Error: Exact matching needs at least one word to search for"
+
     # Echoed in the result text so a narrowed search is never mistaken for
     # "there is nothing here at all"
     source_suffix = ""
@@ -229,6 +291,8 @@ async def _memory_query(
         source_suffix = " (searching the human's messages only)"
     elif role_filter == "ai":
         source_suffix = " (searching AI-authored memories only)"
+    if match_mode == MATCH_EXACT:
+        source_suffix += " (exact phrase)"
 
     # Clamp num_results to reasonable range
     num_results = max(1, min(10, num_results))
@@ -241,18 +305,28 @@ async def _memory_query(
     try:
         # Fetch more candidates than requested so archived-conversation and
         # released-memory filtering below does not silently shrink the result set.
-        candidates = await memory_service.search_memories(
-            query=query,
-            top_k=num_results * 2,
-            exclude_conversation_id=conversation_id,  # Exclude current conversation
-            exclude_ids=in_context_ids,  # Exclude memories already in context
-            entity_id=entity_id,
-            use_cache=True,
-            # Deliberate queries are short, semantically sparse strings, so they
-            # use a lower similarity floor than automatic chat-context retrieval
-            similarity_threshold=settings.query_similarity_threshold,
-            role_filter=role_filter,
-        )
+        if match_mode == MATCH_EXACT:
+            candidates = await _exact_match_candidates(
+                query,
+                top_k=num_results * 2,
+                entity_id=entity_id,
+                conversation_id=conversation_id,
+                exclude_ids=in_context_ids,
+                role_filter=role_filter,
+            )
+        else:
+            candidates = await memory_service.search_memories(
+                query=query,
+                top_k=num_results * 2,
+                exclude_conversation_id=conversation_id,  # Exclude current conversation
+                exclude_ids=in_context_ids,  # Exclude memories already in context
+                entity_id=entity_id,
+                use_cache=True,
+                # Deliberate queries are short, semantically sparse strings, so they
+                # use a lower similarity floor than automatic chat-context retrieval
+                similarity_threshold=settings.query_similarity_threshold,
+                role_filter=role_filter,
+            )
 
         if not candidates:
             return f"No memories found matching: \"{query}\"{source_suffix}"
@@ -353,9 +427,12 @@ async def _memory_query(
             age_str = f"{mem['days_ago']:.1f} days ago" if mem['days_ago'] >= 1 else "today"
             status_str = f", {mem['memory_status']}" if mem.get("memory_status") else ""
 
+            match_str = (
+                "exact match" if mem["score"] is None else f"similarity: {mem['score']:.3f}"
+            )
             lines.append(
                 f"--- Memory {mem['id'][:8]} ({role_label}, {age_str}, "
-                f"similarity: {mem['score']:.3f}{status_str}) ---"
+                f"{match_str}{status_str}) ---"
             )
             lines.append(mem["content"])
             lines.append("")
@@ -512,8 +589,8 @@ def register_memory_tools(tool_service: ToolService) -> None:
     """Register all memory tools with the tool service."""
 
     # Only register if memory system is configured
-    if not settings.pinecone_api_key:
-        logger.info("Memory tools not registered (Pinecone not configured)")
+    if not vector_store_configured(settings):
+        logger.info("Memory tools not registered (no vector store configured)")
         return
 
     # memory_query
@@ -524,7 +601,8 @@ def register_memory_tools(tool_service: ToolService) -> None:
             "This allows you to intentionally recall memories related to a concept, "
             "topic, or phrase—unlike automatic memory retrieval which happens based "
             "on conversation context. Returns memories ranked purely by semantic "
-            "similarity to your query, each with a short memory ID usable with "
+            "similarity to your query, or with match='exact' memories containing "
+            "the query word-for-word, each with a short memory ID usable with "
             "memory_mark and memory_release. You can optionally restrict the "
             "search to what the human said or to what was AI-authored (your own "
             "messages and reflections). Memories already in the current "
@@ -561,6 +639,18 @@ def register_memory_tools(tool_service: ToolService) -> None:
                         "memories."
                     ),
                     "default": SOURCE_ALL
+                },
+                "match": {
+                    "type": "string",
+                    "enum": list(VALID_QUERY_MATCHES),
+                    "description": (
+                        "'semantic' finds memories related in meaning, ranked by "
+                        "similarity; 'exact' finds memories containing the query "
+                        "as an exact phrase (same words in the same order, ignoring "
+                        "case and punctuation), e.g. to find where a particular "
+                        "name or quote came up. Optional—omit it for semantic search."
+                    ),
+                    "default": MATCH_SEMANTIC
                 }
             },
             "required": ["query"]
@@ -14,10 +14,10 @@ import logging
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import and_, select
+from sqlalchemy import and_, delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Message, MessageRole
+from app.models import MemoryQueryResult, Message, MessageRole
 
 logger = logging.getLogger(__name__)
 
@@ -47,7 +47,9 @@ async def delete_tool_exchange_messages(
     conversation".
 
     Returns the IDs of the deleted rows. Tool exchanges are never
-    vectorized, so there is nothing to remove from the vector store.
+    vectorized, so there is nothing to remove from the vector store. The
+    memory_query results recorded for the deleted tool_result rows go with
+    them.
     """
     conditions = [
         Message.conversation_id == str(conversation_id),
@@ -69,6 +71,9 @@ async def delete_tool_exchange_messages(
         await db.delete(message)
 
     if deleted_ids:
+        await db.execute(
+            delete(MemoryQueryResult).where(MemoryQueryResult.tool_result_id.in_(deleted_ids))
+        )
         logger.info(
             f"[HISTORY] Removed {len(deleted_ids)} tool exchange messages from "
             f"conversation {str(conversation_id)[:8]}... with the response they belonged to"
@@ -0,0 +1,239 @@
+"""
+Full-text search over message content.
+
+Backed by the SQLite FTS5 index declared in models/message.py, so it runs
+locally without a vector-store round trip and can match exact phrases, which
+semantic search cannot. Used by GET /api/conversations/search, by
+memory_query's exact matching and as the lexical leg of hybrid retrieval
+(services/hybrid_retrieval.py).
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import and_, column, func, literal_column, or_, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Conversation, ConversationEntity, Message, MessageRole
+from app.models.message import MESSAGE_SEARCH_TABLE, MESSAGE_SEARCH_VOCAB_TABLE
+
+# Words of context around the matches in a snippet, and the match markers
+SNIPPET_TOKENS = 16
+SNIPPET_MATCH_START = "["
+SNIPPET_MATCH_END = "]"
+SNIPPET_ELLIPSIS = "…"
+
+_WORD_RE = re.compile(r"\w+")
+# A token as the unicode61 tokenizer sees it (underscores separate tokens)
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Conversation.entity_id of multi-entity conversations; the participants are
+# ConversationEntity rows
+MULTI_ENTITY_CONVERSATION = "multi-entity"
+
+_search_index = table(MESSAGE_SEARCH_TABLE, column("rowid"), column("rank"))
+_search_vocab = table(MESSAGE_SEARCH_VOCAB_TABLE, column("term"), column("doc"))
+
+
+def match_expression(text: str, phrase: bool = False, any_word: bool = False) -> Optional[str]:
+    """
+    FTS5 MATCH expression for free text: every word must appear, or with
+    phrase=True the words must appear consecutively in this order, or with
+    any_word=True at least one of them must appear. Words are quoted, so FTS5
+    operators in the text are searched for, not applied. Returns None when
+    the text has no searchable words.
+    """
+    words = _WORD_RE.findall(text or "")
+    if not words:
+        return None
+    if phrase:
+        return '"' + " ".join(words) + '"'
+    return (" OR " if any_word else " ").join(f'"{word}"' for word in words)
+
+
+def index_terms(text: str) -> List[str]:
+    """
+    The distinct terms the full-text index stores for text: unicode61 tokens,
+    case-folded and with diacritics removed, in order of first appearance.
+    """
+    folded = unicodedata.normalize("NFKD", (text or "").casefold())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return list(dict.fromkeys(_TOKEN_RE.findall(folded)))
+
+
+async def rare_terms(db: AsyncSession, text: str, max_doc_fraction: float) -> List[str]:
+    """
+    Terms of text found in at most max_doc_fraction of all messages (and at
+    least one). Dropping the common ones leaves what a lexical search adds
+    over a semantic one: names, identifiers, numbers and dates.
+    """
+    terms = index_terms(text)
+    if not terms:
+        return []
+    total = (await db.execute(select(func.count()).select_from(Message))).scalar() or 0
+    limit = max(1, int(total * max_doc_fraction))
+    result = await db.execute(
+        select(_search_vocab.c.term, _search_vocab.c.doc).where(_search_vocab.c.term.in_(terms))
+    )
+    doc_counts = dict(result.all())
+    return [term for term in terms if 0 < doc_counts.get(term, 0) <= limit]
+
+
+def memory_scope(entity_id: str):
+    """
+    Condition selecting the messages stored in entity_id's vector index, as
+    vector_rebuild_service._memory_targets assigns them:
+
+    - human and assistant messages of the entity's own conversations, of the
+      multi-entity conversations it takes part in (assistant messages only
+      when their speaker is recorded) and, for the default entity only, of
+      legacy conversations without an entity;
+    - reflections saved by the entity, plus legacy reflections without a
+      speaker in its single-entity conversations.
+    """
+    participating = select(ConversationEntity.conversation_id).where(
+        ConversationEntity.entity_id == entity_id
+    )
+    single_entity = or_(
+        Conversation.entity_id.is_(None),
+        Conversation.entity_id != MULTI_ENTITY_CONVERSATION,
+    )
+    conversations = [
+        Conversation.entity_id == entity_id,
+        and_(
+            Conversation.entity_id == MULTI_ENTITY_CONVERSATION,
+            Conversation.id.in_(participating),
+        ),
+    ]
+    default_entity = settings.get_default_entity()
+    if default_entity is not None and default_entity.index_name == entity_id:
+        conversations.append(Conversation.entity_id.is_(None))
+    in_conversation = or_(*conversations)
+
+    return or_(
+        and_(Message.role == MessageRole.HUMAN, in_conversation),
+        and_(
+            Message.role == MessageRole.ASSISTANT,
+            in_conversation,
+            or_(single_entity, Message.speaker_entity_id.is_not(None)),
+        ),
+        and_(
+            Message.role == MessageRole.REFLECTION,
+            or_(
+                Message.speaker_entity_id == entity_id,
+                and_(Message.speaker_entity_id.is_(None), in_conversation, single_entity),
+            ),
+        ),
+    )
+
+
+def memory_role(
+    role: MessageRole,
+    conversation_entity_id: Optional[str],
+    speaker_entity_id: Optional[str],
+    entity_id: str,
+) -> str:
+    """
+    Role of a message as stored in entity_id's index: in a multi-entity
+    conversation, another entity's assistant message carries that entity's
+    label, as in live chat.
+    """
+    if (
+        role != MessageRole.ASSISTANT
+        or conversation_entity_id != MULTI_ENTITY_CONVERSATION
+        or not speaker_entity_id
+        or speaker_entity_id == entity_id
+    ):
+        return role.value
+    speaker = settings.get_entity_by_index(speaker_entity_id)
+    return (speaker.label if speaker else None) or "other_entity"
+
+
+async def search_messages(
+    db: AsyncSession,
+    text: str,
+    phrase: bool = False,
+    any_word: bool = False,
+    entity_id: Optional[str] = None,
+    include_shared: bool = False,
+    roles: Optional[Sequence[MessageRole]] = None,
+    exclude_conversation_id: Optional[str] = None,
+    exclude_ids: Optional[Iterable[str]] = None,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    Messages matching text, best match first (FTS5 bm25 rank).
+
+    Args:
+        phrase: Match the words as one exact phrase instead of all words anywhere.
+        any_word: Match messages containing any of the words (ranked by how
+            many, and how rare, they are) instead of all of them.
+        entity_id: Only messages in this entity's conversations.
+        include_shared: With entity_id, search exactly the messages stored as
+            the entity's memories (memory_scope) instead: shared and legacy
+            conversations too, with reflections and other entities' words
+            scoped as its vector index scopes them. Other entities' assistant
+            messages come back with their speaker's label as role.
+        roles: Only messages with these roles.
+        exclude_conversation_id: Skip messages in this conversation.
+        exclude_ids: Skip these message IDs.
+    """
+    expression = match_expression(text, phrase, any_word)
+    if expression is None:
+        return []
+
+    query = (
+        select(
+            Message.id,
+            Message.conversation_id,
+            Message.role,
+            Message.created_at,
+            Message.memory_status,
+            Message.speaker_entity_id,
+            Conversation.title,
+            Conversation.entity_id,
+            Conversation.is_archived,
+            func.snippet(
+                literal_column(MESSAGE_SEARCH_TABLE), 0,
+                SNIPPET_MATCH_START, SNIPPET_MATCH_END, SNIPPET_ELLIPSIS, SNIPPET_TOKENS,
+            ).label("snippet"),
+        )
+        .select_from(_search_index)
+        .join(Message, literal_column("messages.rowid") == _search_index.c.rowid)
+        .join(Conversation, Message.conversation_id == Conversation.id)
+        .where(literal_column(MESSAGE_SEARCH_TABLE).op("MATCH")(expression))
+    )
+    if entity_id is not None:
+        if include_shared:
+            query = query.where(memory_scope(entity_id))
+        else:
+            query = query.where(Conversation.entity_id == entity_id)
+    if roles is not None:
+        query = query.where(Message.role.in_(roles))
+    if exclude_conversation_id is not None:
+        query = query.where(Message.conversation_id != exclude_conversation_id)
+    exclude_ids = list(exclude_ids or ())
+    if exclude_ids:
+        query = query.where(Message.id.not_in(exclude_ids))
+
+    result = await db.execute(query.order_by(_search_index.c.rank).limit(limit))
+    return [
+        {
+            "message_id": row.id,
+            "conversation_id": row.conversation_id,
+            "conversation_title": row.title,
+            "entity_id": row.entity_id,
+            "is_archived": bool(row.is_archived),
+            "role": (
+                memory_role(row.role, row.entity_id, row.speaker_entity_id, entity_id)
+                if entity_id is not None and include_shared
+                else row.role.value
+            ),
+            "created_at": row.created_at,
+            "memory_status": row.memory_status,
+            "snippet": row.snippet,
+        }
+        for row in result.all()
+    ]
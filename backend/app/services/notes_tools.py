@@ -15,6 +15,7 @@ from app.config import settings
 from app.services.notes_service import notes_service
 from app.services.notes_vector_service import notes_vector_service
 from app.services.tool_service import ToolCategory, ToolService
+from app.services.vector_store import vector_store_configured
 
 logger = logging.getLogger(__name__)
 
@@ -686,7 +687,7 @@ def register_notes_tools(tool_service: ToolService) -> None:
     )
 
     # notes_search (requires the vector store; registered only when configured)
-    if settings.pinecone_api_key:
+    if vector_store_configured(settings):
         tool_service.register_tool(
             name="notes_search",
             description=(
@@ -2,8 +2,10 @@
 Notes Vector Service - semantic indexing and search for entity notes.
 
 Notes live on the filesystem (NotesService); this service mirrors their
-content into Pinecone so entities can search notes semantically via the
-notes_search tool, instead of having to remember filenames.
+content into each entity's vector index (Pinecone, or the in-process store for
+entities on the local backend - see vector_store.py) so entities can search
+notes semantically via the notes_search tool, instead of having to remember
+filenames.
 
 Storage layout:
 - Vectors live in the "notes" namespace of each entity's existing Pinecone
@@ -0,0 +1,209 @@
+"""
+Retrieval Count Queue - write-behind sync of times_retrieved to vector metadata.
+
+SQL is the authoritative record of how often a memory has been retrieved
+(Message.times_retrieved); the vector index carries a copy in each record's
+"times_retrieved" metadata. Pushing that copy inline cost a fetch plus an
+update round trip per memory on the hot path of every chat turn.
+
+Instead, retrieval increments are queued here and flushed in the background:
+- Increments are coalesced per (entity, memory ID), so a memory retrieved
+  several times between flushes costs one update, not several.
+- A flush takes up to a batch of IDs per entity, finds their records with a
+  single fetch, reads their counts from SQL in one query, and writes each
+  count as an absolute value. Messages stored as passages (memory_passages)
+  are found by their first passage record, and every passage gets the count.
+- Failed writes are merged back into the queue and retried on the next flush.
+  Since the value written is SQL's count rather than the metadata plus the
+  queued increments, rewriting the records of a partly updated message
+  can't count an increment twice.
+
+Durability: SQL is committed before an increment is queued, so a crash loses
+at most the increments still pending here - the vector metadata lags SQL by
+that much, and the index rebuild restores it from SQL (see
+vector_rebuild_service). Shutdown flushes whatever is pending.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from app.config import settings
+from app.services.memory_passages import passage_record_id
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalCountQueue:
+    """Coalescing write-behind queue for times_retrieved metadata updates."""
+
+    def __init__(
+        self,
+        index_resolver: Callable[[Optional[str]], Any],
+        count_reader: Callable[[List[str]], Awaitable[Dict[str, int]]],
+    ):
+        """
+        Args:
+            index_resolver: Returns the vector index for an entity ID (None for
+                the default entity), e.g. MemoryService.get_index.
+            count_reader: Returns the SQL times_retrieved of message IDs (IDs
+                without a row left out), e.g. MemoryService.get_retrieval_counts.
+        """
+        self._resolve_index = index_resolver
+        self._read_counts = count_reader
+        # entity_id -> {message_id: pending increment}
+        self._pending: Dict[Optional[str], Dict[str, int]] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stats = {
+            "flushed_ids": 0,
+            "flushed_increments": 0,
+            "failed_updates": 0,
+            "last_flush_at": None,
+        }
+
+    def enqueue(self, message_ids: Iterable[str], entity_id: Optional[str] = None) -> None:
+        """Queue one retrieval increment for each message ID."""
+        pending = self._pending.setdefault(entity_id, {})
+        for message_id in message_ids:
+            pending[message_id] = pending.get(message_id, 0) + 1
+        if self._wake is not None and self.depth() >= settings.retrieval_count_flush_batch_size:
+            self._wake.set()
+
+    def depth(self) -> int:
+        """Number of (entity, memory) pairs waiting to be flushed."""
+        return sum(len(pending) for pending in self._pending.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and flush counters, for the memory health endpoint."""
+        return {
+            "pending_ids": self.depth(),
+            "pending_increments": sum(
+                sum(pending.values()) for pending in self._pending.values()
+            ),
+            "worker_running": self._worker is not None and not self._worker.done(),
+            **self._stats,
+        }
+
+    def _requeue(self, entity_id: Optional[str], increments: Dict[str, int]) -> None:
+        pending = self._pending.setdefault(entity_id, {})
+        for message_id, delta in increments.items():
+            pending[message_id] = pending.get(message_id, 0) + delta
+
+    async def flush(self) -> int:
+        """
+        Push all pending increments to the vector indexes.
+
+        Returns the number of memory IDs whose metadata was updated.
+        """
+        from app.services.memory_service import run_pinecone
+
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        flushed = 0
+        batch_size = max(1, settings.retrieval_count_flush_batch_size)
+        async with self._flush_lock:
+            for entity_id in list(self._pending.keys()):
+                while self._pending.get(entity_id):
+                    pending = self._pending[entity_id]
+                    batch = dict(list(pending.items())[:batch_size])
+                    for message_id in batch:
+                        del pending[message_id]
+
+                    index = self._resolve_index(entity_id)
+                    if index is None:
+                        # Entity no longer configured: nothing to sync to
+                        continue
+
+                    # Fetch each message's whole record and its first passage
+                    # record; whichever exists tells us the layout
+                    fetch_ids = [
+                        record_id
+                        for message_id in batch
+                        for record_id in (message_id, passage_record_id(message_id, 0))
+                    ]
+                    try:
+                        fetch_result = await run_pinecone(index.fetch, ids=fetch_ids)
+                        counts = await self._read_counts(list(batch))
+                    except Exception as e:
+                        logger.warning(f"[MEMORY] Retrieval count flush fetch failed: {e}")
+                        self._requeue(entity_id, batch)
+                        self._stats["failed_updates"] += len(batch)
+                        break
+
+                    failed: Dict[str, int] = {}
+                    for message_id, delta in batch.items():
+                        record_ids = [message_id]
+                        vector = fetch_result.vectors.get(message_id)
+                        if vector is None:
+                            vector = fetch_result.vectors.get(passage_record_id(message_id, 0))
+                            if vector is not None:
+                                count = int((vector.metadata or {}).get("passage_count", 1))
+                                record_ids = [passage_record_id(message_id, n) for n in range(count)]
+                        count = counts.get(message_id)
+                        if vector is None or count is None:
+                            # Not vectorized, or deleted: nothing to sync
+                            continue
+                        try:
+                            for record_id in record_ids:
+                                await run_pinecone(
+                                    index.update,
+                                    id=record_id,
+                                    set_metadata={"times_retrieved": int(count)},
+                                )
+                            flushed += 1
+                            self._stats["flushed_increments"] += delta
+                        except Exception as e:
+                            logger.warning(
+                                f"[MEMORY] Could not update metadata for {message_id[:8]}...: {e}"
+                            )
+                            failed[message_id] = delta
+
+                    if failed:
+                        self._requeue(entity_id, failed)
+                        self._stats["failed_updates"] += len(failed)
+                        break
+
+                if entity_id in self._pending and not self._pending[entity_id]:
+                    del self._pending[entity_id]
+
+        if flushed:
+            self._stats["flushed_ids"] += flushed
+            self._stats["last_flush_at"] = datetime.utcnow().isoformat()
+            logger.info(f"[MEMORY] Flushed retrieval counts for {flushed} memories")
+        return flushed
+
+    async def _run(self) -> None:
+        interval = settings.retrieval_count_flush_interval_seconds
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"[MEMORY] Retrieval count flush failed: {e}")
+
+    def start(self) -> None:
+        """Start the background flush worker (called from the app lifespan)."""
+        if self._worker is not None and not self._worker.done():
+            return
+        self._wake = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background worker and flush anything still pending."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._wake = None
+        await self.flush()
@@ -7,6 +7,7 @@ significance calculation, caching, and token estimation.
 Split from session_manager.py to reduce file size and improve maintainability.
 """
 
+import difflib
 import itertools
 import json
 import logging
@@ -14,6 +15,7 @@ from datetime import datetime, timedelta, timezone
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from app.config import settings
+from app.services.cache_service import normalize_search_query
 
 logger = logging.getLogger(__name__)
 
@@ -87,6 +89,31 @@ def build_memory_queries(
     return (current_message, last_assistant_content)
 
 
+def draft_matches_message(draft: str, message: Optional[str]) -> bool:
+    """
+    Whether a prefetched draft is close enough to the sent message to reuse
+    its memory candidates.
+
+    Both texts are normalized as for search-cache keys (whitespace, case),
+    then compared with difflib; the ratio must reach
+    settings.memory_prefetch_min_similarity. The cheap upper bounds are
+    checked first so very different lengths are rejected without a full diff.
+    """
+    if not draft or not message:
+        return False
+    a = normalize_search_query(draft)
+    b = normalize_search_query(message)
+    if a == b:
+        return True
+    threshold = settings.memory_prefetch_min_similarity
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    return (
+        matcher.real_quick_ratio() >= threshold
+        and matcher.quick_ratio() >= threshold
+        and matcher.ratio() >= threshold
+    )
+
+
 def calculate_significance(
     times_retrieved: int,
     created_at: Optional[datetime],
@@ -221,6 +248,127 @@ def ensure_role_balance(
     return top_candidates
 
 
+# Token-budgeted selection solves the knapsack over at most this many weight
+# units; token costs are rounded up to units of budget / KNAPSACK_MAX_UNITS
+KNAPSACK_MAX_UNITS = 500
+
+
+def retrieval_token_budget(is_first_retrieval: bool) -> int:
+    """
+    Per-turn token budget for retrieved memories (0 = select by count).
+
+    Like the top_k settings, the first retrieval in a conversation has its
+    own, usually larger, budget.
+    """
+    if is_first_retrieval:
+        return settings.initial_retrieval_token_budget
+    return settings.retrieval_token_budget
+
+
+def _knapsack(
+    indices: List[int],
+    weights: Dict[int, int],
+    values: Dict[int, float],
+    capacity: int,
+) -> List[int]:
+    """0/1 knapsack: the subset of indices with the highest summed value
+    whose weights fit in capacity."""
+    best = [0.0] * (capacity + 1)
+    took: List[List[bool]] = []
+    for i in indices:
+        w, v = weights[i], values[i]
+        row = [False] * (capacity + 1)
+        for c in range(capacity, w - 1, -1):
+            if best[c - w] + v > best[c]:
+                best[c] = best[c - w] + v
+                row[c] = True
+        took.append(row)
+
+    chosen = []
+    c = capacity
+    for n in range(len(indices) - 1, -1, -1):
+        if took[n][c]:
+            chosen.append(indices[n])
+            c -= weights[indices[n]]
+    return chosen
+
+
+def select_within_token_budget(
+    enriched_candidates: List[Dict[str, Any]],
+    token_budget: int,
+    token_cost: Callable[[Dict[str, Any]], int],
+    role_balance: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Select memories to fill a token budget rather than a fixed count.
+
+    Picks the subset of candidates with the highest summed combined_score
+    whose token costs fit in token_budget (a 0/1 knapsack), so one very long
+    memory no longer costs the same slot as a short one. Candidates larger
+    than the whole budget are never selected.
+
+    With role_balance, the selection includes at least one human and one
+    assistant message when possible: if the best subset is all one role, the
+    highest scoring candidate of the other role is forced in and the rest of
+    the budget is re-solved around it (kept only if the result has both).
+
+    Args:
+        enriched_candidates: Candidates sorted by combined_score descending,
+                            each containing {"mem_data": {"role": ...},
+                            "combined_score": ...}
+        token_budget: Maximum total tokens of the selected memories
+        token_cost: Returns a candidate's token count in context
+        role_balance: Whether to ensure both roles are represented
+
+    Returns:
+        Selected candidates, in combined_score order
+    """
+    if not enriched_candidates or token_budget <= 0:
+        return []
+
+    unit = max(1, -(-token_budget // KNAPSACK_MAX_UNITS))
+    capacity = token_budget // unit
+    weights: Dict[int, int] = {}
+    values: Dict[int, float] = {}
+    for i, item in enumerate(enriched_candidates):
+        cost = token_cost(item)
+        if cost <= token_budget:
+            # Round up, so the quantized solution never exceeds the budget
+            weights[i] = max(1, -(-cost // unit))
+            values[i] = max(0.0, item["combined_score"])
+    fitting = [i for i in weights if weights[i] <= capacity]
+
+    chosen = _knapsack(fitting, weights, values, capacity)
+
+    def roles(indices: List[int]) -> set:
+        return {enriched_candidates[i]["mem_data"]["role"] for i in indices}
+
+    selected_roles = roles(chosen)
+    if role_balance and chosen and len({"human", "assistant"} & selected_roles) == 1:
+        needed_role = "assistant" if "human" in selected_roles else "human"
+        forced = next(
+            (i for i in fitting if enriched_candidates[i]["mem_data"]["role"] == needed_role),
+            None,
+        )
+        if forced is None:
+            logger.info(f"[MEMORY] Role balance: needed {needed_role} but none fits the token budget")
+        else:
+            rest = _knapsack(
+                [i for i in fitting if i != forced],
+                weights,
+                values,
+                capacity - weights[forced],
+            )
+            if {"human", "assistant"} <= roles(rest + [forced]):
+                logger.info(
+                    f"[MEMORY] Role balance: forcing {needed_role} message "
+                    f"{enriched_candidates[forced]['mem_data']['id'][:8]}... into the token budget"
+                )
+                chosen = rest + [forced]
+
+    return [enriched_candidates[i] for i in sorted(chosen)]
+
+
 def get_message_content_text(content: Any) -> str:
     """
     Extract text representation from message content (string or content blocks).
@@ -279,10 +427,33 @@ def total_prompt_tokens_from_usage(usage: Optional[Dict[str, Any]]) -> int:
     return total
 
 
+def message_token_count(
+    message: Dict[str, Any],
+    count_tokens_fn: Callable[[str], int],
+) -> int:
+    """
+    Tokens a conversation-context message adds to the context count: its
+    "role: text" line plus the newline joining it to the next.
+
+    Counted once and cached on the message ("token_count"), so trimming and
+    context_status only ever tokenize messages added since they last ran.
+    Context messages are never edited in place (edits and regeneration
+    reload or truncate the session), so the cached count cannot go stale.
+    """
+    count = message.get("token_count")
+    if count is None:
+        text = f"{message['role']}: {get_message_content_text(message.get('content', ''))}"
+        count = count_tokens_fn(text) + 1
+        message["token_count"] = count
+    return count
+
+
 def estimate_prompt_tokens(
     messages: List[Dict[str, Any]],
     count_tokens_fn: Callable[[str], int],
     system_prompt: Optional[str] = None,
+    context_tokens: Optional[int] = None,
+    context_messages: int = 0,
 ) -> int:
     """
     Local estimate of a full API prompt's token size, using the same text
@@ -291,14 +462,23 @@ def estimate_prompt_tokens(
     Paired with the provider-reported total for the same request
     (total_prompt_tokens_from_usage), this yields a calibration ratio for
     the local counter, which is approximate for non-OpenAI tokenizers.
+
+    build_messages renders one API message per context message, so a caller
+    that already knows the context's count (ConversationSession.
+    context_token_count) passes it as context_tokens for the first
+    context_messages messages, and only the rest are tokenized.
     """
+    tokens = 0
+    if context_tokens is not None:
+        tokens = context_tokens
+        messages = messages[context_messages:]
     parts = []
     if system_prompt:
         parts.append(system_prompt)
     for msg in messages:
         parts.append(f"{msg.get('role', '')}: {get_message_content_text(msg.get('content', ''))}")
     text = "\n".join(parts)
-    return count_tokens_fn(text) if text else 0
+    return tokens + (count_tokens_fn(text) if text else 0)
 
 
 def add_cache_control_to_tool_result(user_msg: Dict[str, Any]) -> Dict[str, Any]:
@@ -12,10 +12,12 @@ The data structures (ConversationSession, MemoryEntry) are now in
 conversation_session.py. Helper functions are in session_helpers.py.
 """
 
+import asyncio
 import logging
 import re
+import time
 from datetime import datetime
-from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -34,8 +36,20 @@ from app.services import llm_service, memory_service
 # Import from split modules
 from app.services.attachment_service import build_persistable_content
 from app.services.context_tools import set_context_tool_session
-from app.services.conversation_session import ConversationSession, MemoryEntry
+from app.services.conversation_session import (
+    ConversationSession,
+    EntityViews,
+    MemoryEntry,
+    MemoryPrefetch,
+)
+from app.services.hybrid_retrieval import (
+    describe_scores,
+    fuse_candidates,
+    lexical_candidates,
+    ranking_score,
+)
 from app.services.memory_context import format_memory_as_context_message
+from app.services.memory_passages import memory_context_content
 from app.services.memory_tools import consume_last_query_memory_ids, set_memory_tool_context
 from app.services.notes_tools import (
     NOTE_IN_CONTEXT_MARKER,
@@ -50,11 +64,16 @@ from app.services.session_helpers import (
     _build_memory_queries,
     _calculate_significance,
     _ensure_role_balance,
+    draft_matches_message,
     estimate_prompt_tokens,
     make_link_timestamper,
+    retrieval_token_budget,
+    select_within_token_budget,
     stamp_human_message,
     total_prompt_tokens_from_usage,
 )
+from app.services.session_snapshots import session_snapshots
+from app.services.session_store import SessionStore
 from app.services.tool_service import tool_service
 
 logger = logging.getLogger(__name__)
@@ -65,18 +84,65 @@ logger = logging.getLogger(__name__)
 # context messages) when a session is reloaded from the DB.
 _MEMORY_QUERY_RESULT_ID_RE = re.compile(r"^--- Memory ([0-9a-f]{8}) \(", re.MULTILINE)
 
+# Candidates fetched per retrieval query (user and assistant side) before
+# they are combined and re-ranked by significance
+MEMORY_CANDIDATES_PER_QUERY = 10
+
+
+def _elapsed_ms(start: float) -> float:
+    """Milliseconds since a time.perf_counter() reading."""
+    return (time.perf_counter() - start) * 1000
+
+
 class SessionManager:
     """
     Manages conversation sessions and message processing.
     """
 
     def __init__(self):
-        self._sessions: Dict[str, ConversationSession] = {}
+        # Bounded LRU store; evicted sessions are rebuilt by load_session_from_db
+        self._sessions = SessionStore()
+        self._view_switches = 0
 
     def get_session(self, conversation_id: str) -> Optional[ConversationSession]:
-        """Get an existing session."""
+        """Get an existing session (None if never loaded or evicted)."""
         return self._sessions.get(conversation_id)
 
+    def get_entity_session(
+        self,
+        conversation_id: str,
+        responding_entity_id: Optional[str],
+    ) -> Optional[ConversationSession]:
+        """
+        Get the session a turn by responding_entity_id should use.
+
+        For a loaded multi-entity conversation this switches to the entity's
+        view (see EntityViews): its own memories, prompt and cache breakpoint,
+        caught up with the exchanges other entities added since it last
+        responded. The switch replaces the close-and-reload that entity
+        changes used to cost. Returns None if the conversation isn't loaded or
+        the entity has no view yet; load_session_from_db then builds one and
+        joins it to the others. Other sessions, and any session when no
+        responding entity is given, are returned as get_session returns them.
+        """
+        session = self._sessions.get(conversation_id)
+        if session is None or not session.is_multi_entity or responding_entity_id is None:
+            return session
+
+        views = session.entity_views
+        view = views.sessions.get(responding_entity_id) if views else None
+        if view is None:
+            return None
+        caught_up = views.catch_up(view)
+        if view is not session:
+            self._sessions.put(conversation_id, view)
+            self._view_switches += 1
+            logger.info(
+                f"[SESSION] Switched {conversation_id[:8]}... to {responding_entity_id}'s view "
+                f"({caught_up} messages caught up)"
+            )
+        return view
+
     def create_session(
         self,
         conversation_id: str,
@@ -111,7 +177,7 @@ class SessionManager:
             conversation_start_date=conversation_start_date,
             provider_hint=provider_hint,
         )
-        self._sessions[conversation_id] = session
+        self._sessions.put(conversation_id, session)
         return session
 
     async def refresh_thinking_effort(
@@ -208,8 +274,10 @@ class SessionManager:
                                   This determines which entity's model/provider to use.
             preserve_context_cache_length: If provided, use this value for last_cached_context_length
                                            instead of resetting to len(conversation_context).
-                                           This preserves cache breakpoint stability across
-                                           entity switches in multi-entity conversations.
+
+        For a multi-entity conversation loaded for a responding entity, the
+        session joins the views of the other entities already loaded (see
+        get_entity_session).
         """
         # Get conversation
         result = await db.execute(
@@ -283,6 +351,14 @@ class SessionManager:
                     system_prompt = entity_prompt
                     logger.info(f"[SESSION] Using entity-specific system prompt for {prompt_entity_id}")
 
+        # Views of the other entities already loaded, which this one joins
+        # (create_session replaces whichever of them is current in the store)
+        entity_views: Optional[EntityViews] = None
+        if is_multi_entity and responding_entity_id:
+            loaded = self._sessions.get(conversation_id)
+            entity_views = loaded.entity_views if loaded is not None else None
+            entity_views = entity_views or EntityViews()
+
         # Create session with conversation settings
         session = self.create_session(
             conversation_id=conversation_id,
@@ -301,6 +377,107 @@ class SessionManager:
         # Per-entity thinking effort (refreshed again at the start of each turn)
         await self.refresh_thinking_effort(session, db)
 
+        # History: the context, memories and tracker state built from the
+        # messages and memory links, restored from a snapshot when nothing
+        # they depend on has changed since it was taken
+        snapshot_version = None
+        restored = False
+        if settings.session_snapshots_enabled:
+            snapshot_version = await self._history_version(session, conversation, db)
+            restored = await session_snapshots.restore(
+                session, responding_entity_id, snapshot_version
+            )
+        if not restored:
+            await self._build_history(
+                session, conversation, conversation_id, db, responding_entity_label
+            )
+            if snapshot_version is not None:
+                await session_snapshots.save(session, responding_entity_id, snapshot_version)
+
+        # For context cache length: preserve if provided (for multi-entity entity switches),
+        # otherwise bootstrap with all existing content
+        if preserve_context_cache_length is not None:
+            # Preserve the cache breakpoint location for stable cache hits
+            # Cap at actual context length to avoid out-of-bounds issues
+            session.last_cached_context_length = min(
+                preserve_context_cache_length,
+                len(session.conversation_context)
+            )
+            logger.info(f"[CACHE] Preserved context cache length: {session.last_cached_context_length} (requested: {preserve_context_cache_length})")
+        else:
+            # Bootstrap: treat all existing content as cached
+            session.last_cached_context_length = len(session.conversation_context)
+            logger.info(f"[CACHE] Bootstrap context cache length: {session.last_cached_context_length}")
+
+        if entity_views is not None:
+            entity_views.join(responding_entity_id, session)
+
+        # Count the load and the filled session's size against the store limits
+        self._sessions.record_load(session.conversation_id)
+        self._sessions.measure(session.conversation_id)
+        return session
+
+    @staticmethod
+    async def _history_version(
+        session: ConversationSession,
+        conversation: Conversation,
+        db: AsyncSession,
+    ) -> str:
+        """Snapshot version of the history a rebuild of this session would read."""
+        return await session_snapshots.history_version(
+            db,
+            conversation,
+            link_entity_id=session.entity_id if session.is_multi_entity else None,
+            key={
+                "entity_id": session.entity_id,
+                "entity_labels": session.entity_labels,
+                "responding_entity_label": session.responding_entity_label,
+                "notes_enabled": settings.notes_enabled,
+                "archive_filter": memory_service.is_configured(entity_id=session.entity_id),
+            },
+        )
+
+    async def save_snapshot(self, session: ConversationSession, db: AsyncSession) -> None:
+        """
+        Snapshot a live session's history once its turn is committed, so the
+        next load (after a restart or eviction) restores it instead of
+        rebuilding: without this, the first load after any turn misses,
+        since the turn changed the version. Errors are logged, not raised.
+        """
+        if not settings.session_snapshots_enabled:
+            return
+        try:
+            # Fresh from the database: the turn may have updated it in SQL
+            conversation = await db.get(
+                Conversation, session.conversation_id, populate_existing=True
+            )
+            if conversation is None:
+                return
+            version = await self._history_version(session, conversation, db)
+        except Exception as e:
+            logger.warning(f"[SESSION] Could not version snapshot for {session.conversation_id[:8]}...: {e}")
+            return
+        responding_entity_id = session.entity_id if session.is_multi_entity else None
+        await session_snapshots.save(session, responding_entity_id, version)
+
+    async def _build_history(
+        self,
+        session: ConversationSession,
+        conversation: Conversation,
+        conversation_id: str,
+        db: AsyncSession,
+        responding_entity_label: Optional[str],
+    ) -> None:
+        """
+        Rebuild a freshly created session's history from the database: the
+        conversation context (notes seed, messages, tool exchanges with their
+        dedup stamps, memories at their original positions), session_memories,
+        retrieved_ids and the memory tracker.
+        """
+        entity_id = session.entity_id
+        is_multi_entity = session.is_multi_entity
+        entity_labels = session.entity_labels
+
         # Load message history
         result = await db.execute(
             select(Message)
@@ -338,9 +515,18 @@ class SessionManager:
         retrieved_ids = set()
         skipped_archived = 0
 
+        # One bulk fetch (cache + a single IN select) rather than a query per link
+        memory_contents = (
+            await memory_service.get_full_memory_contents(
+                [mem_info["message_id"] for mem_info in memories_with_timestamps], db
+            )
+            if memories_with_timestamps
+            else {}
+        )
+
         for mem_info in memories_with_timestamps:
             mem_id = mem_info["message_id"]
-            mem_data = await memory_service.get_full_memory_content(mem_id, db)
+            mem_data = memory_contents.get(str(mem_id))
             if mem_data:
                 if mem_data["conversation_id"] in archived_source_ids:
                     skipped_archived += 1
@@ -354,13 +540,18 @@ class SessionManager:
                     "data": mem_data,
                     "retrieved_at": mem_info["retrieved_at"],
                 }
+                # Passage memories re-inject the passage recorded on the link
+                content, passage_index = memory_context_content(
+                    mem_data["role"], mem_data["content"], str_id, mem_info.get("passage_index")
+                )
                 session.session_memories[str_id] = MemoryEntry(
                     id=str_id,
                     conversation_id=mem_data["conversation_id"],
                     role=mem_data["role"],
-                    content=mem_data["content"],
+                    content=content,
                     created_at=mem_data["created_at"],
                     times_retrieved=mem_data["times_retrieved"],
+                    passage_index=passage_index,
                 )
 
         session.retrieved_ids = retrieved_ids
@@ -557,23 +748,6 @@ class SessionManager:
                 f"[MEMORY] Re-inserted {memory_insert_count} previously retrieved memories into context at their original positions"
             )
 
-        # For context cache length: preserve if provided (for multi-entity entity switches),
-        # otherwise bootstrap with all existing content
-        if preserve_context_cache_length is not None:
-            # Preserve the cache breakpoint location for stable cache hits
-            # Cap at actual context length to avoid out-of-bounds issues
-            session.last_cached_context_length = min(
-                preserve_context_cache_length,
-                len(session.conversation_context)
-            )
-            logger.info(f"[CACHE] Preserved context cache length: {session.last_cached_context_length} (requested: {preserve_context_cache_length})")
-        else:
-            # Bootstrap: treat all existing content as cached
-            session.last_cached_context_length = len(session.conversation_context)
-            logger.info(f"[CACHE] Bootstrap context cache length: {session.last_cached_context_length}")
-
-        return session
-
     async def _extract_memory_query_result_ids(
         self,
         content_blocks: Any,
@@ -883,41 +1057,144 @@ class SessionManager:
         else:
             logger.info(f"[MEMORY] Recent reflections: injected {injected} of {requested} requested")
 
-    async def process_message(
+    async def _search_candidates(
         self,
         session: ConversationSession,
-        user_message: str,
+        query: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch up to MEMORY_CANDIDATES_PER_QUERY candidates for one retrieval
+        query (empty for no query); they are combined and re-ranked by
+        significance afterwards.
+
+        Note: we intentionally do NOT pass in-context memory IDs as exclude_ids
+        to search_memories. If we did, the search would backfill excluded slots
+        with lower-ranked candidates. Instead, we let the search return the most
+        relevant results (which may include in-context memories), select the top-k,
+        and then skip in-context memories at the session level without replacing
+        them with lower-ranked candidates.
+
+        With hybrid retrieval on, a local BM25 search on the query's rare terms
+        runs alongside the vector search and the two rankings are fused
+        (services/hybrid_retrieval.py).
+        """
+        if not query:
+            return []
+        semantic_search = memory_service.search_memories(
+            query=query,
+            top_k=MEMORY_CANDIDATES_PER_QUERY,
+            exclude_conversation_id=session.conversation_id,
+            entity_id=session.entity_id,
+        )
+        if not settings.hybrid_retrieval_enabled:
+            return await semantic_search
+        semantic, lexical = await asyncio.gather(
+            semantic_search,
+            lexical_candidates(
+                query,
+                entity_id=session.entity_id,
+                exclude_conversation_id=session.conversation_id,
+                limit=MEMORY_CANDIDATES_PER_QUERY,
+            ),
+        )
+        return fuse_candidates(semantic, lexical, MEMORY_CANDIDATES_PER_QUERY)
+
+    async def prefetch_memories(
+        self,
+        session: ConversationSession,
+        draft: str,
         db: AsyncSession,
-        user_message_timestamp: Optional[datetime] = None,
-    ) -> Dict[str, Any]:
+    ) -> int:
         """
-        Process a user message through the full pipeline.
+        Speculatively retrieve memories for a draft message.
 
-        1. Retrieve relevant memories
-        2. Filter and deduplicate (also excluding archived conversations)
-        3. Update retrieval tracking
-        4. Build API request with memories
-        5. Call LLM provider API
-        6. Update conversation context
-        7. Store new messages as memories
+        Runs the same searches and content hydration as a real turn and parks
+        the results in session.memory_prefetch, replacing any earlier prefetch.
+        The next turn reuses them if the sent message is close enough to the
+        draft (see _prefetch_matches); nothing is inserted into the context
+        and no retrieval counts change here.
 
-        Returns response data including content, usage, and retrieved memories.
+        Returns the number of unique candidates prefetched.
         """
-        new_memories = []
-        truly_new_memory_ids = set()  # Only memories never seen before (for cache stability)
+        if not draft or not draft.strip():
+            return 0
+        if not memory_service.is_configured(entity_id=session.entity_id):
+            return 0
+
+        start = time.perf_counter()
+        user_query, assistant_query = _build_memory_queries(session.conversation_context, draft)
+        user_candidates, assistant_candidates = await asyncio.gather(
+            self._search_candidates(session, user_query),
+            self._search_candidates(session, assistant_query),
+        )
+        candidate_ids = list(dict.fromkeys(c["id"] for c in user_candidates + assistant_candidates))
+        memory_contents = (
+            await memory_service.get_full_memory_contents(candidate_ids, db)
+            if candidate_ids
+            else {}
+        )
 
-        logger.info(f"[MEMORY] Processing message for conversation {session.conversation_id[:8]}...")
+        session.memory_prefetch = MemoryPrefetch(
+            draft=draft,
+            assistant_query=assistant_query,
+            entity_id=session.entity_id,
+            user_candidates=user_candidates,
+            assistant_candidates=assistant_candidates,
+            memory_contents=memory_contents,
+            created_at=time.monotonic(),
+        )
+        logger.info(
+            f"[MEMORY] Prefetched {len(candidate_ids)} candidates for draft "
+            f"in {_elapsed_ms(start):.0f}ms"
+        )
+        return len(candidate_ids)
 
-        # Pick up the responding entity's current thinking effort for this turn
-        await self.refresh_thinking_effort(session, db)
+    @staticmethod
+    def _prefetch_matches(
+        prefetch: MemoryPrefetch,
+        session: ConversationSession,
+        user_query: Optional[str],
+        assistant_query: Optional[str],
+    ) -> bool:
+        """
+        Whether a prefetch can stand in for this turn's searches: still fresh,
+        for the same entity and assistant-side query (no turn has happened
+        since), and the sent message is close enough to the draft.
+        """
+        if time.monotonic() - prefetch.created_at > settings.memory_prefetch_ttl_seconds:
+            return False
+        if prefetch.entity_id != session.entity_id:
+            return False
+        if prefetch.assistant_query != assistant_query:
+            return False
+        return draft_matches_message(prefetch.draft, user_query)
+
+    async def _retrieve_memories(
+        self,
+        session: ConversationSession,
+        user_message: Optional[str],
+        db: AsyncSession,
+        user_message_timestamp: Optional[datetime] = None,
+    ) -> Tuple[List[MemoryEntry], Set[str]]:
+        """
+        Retrieve, re-rank by significance, and deduplicate memories for a
+        turn, inserting the selected ones into the session context.
+
+        Shared by process_message and process_message_stream. Returns
+        (new_memories, truly_new_memory_ids): every memory inserted this
+        turn, and the subset never retrieved in this conversation before
+        (restored memories are excluded, for cache stability).
 
-        # Step 1-2: Retrieve, re-rank by significance, and deduplicate memories
-        # Validate both that Pinecone is configured AND the entity_id is valid
+        Logs per-stage timings (search, hydrate, rank, insert, reflections)
+        under [MEMORY] so retrieval latency can be tracked per turn.
+        """
+        new_memories: List[MemoryEntry] = []
+        truly_new_memory_ids: Set[str] = set()
+
+        # Validate both that a vector store is configured AND the entity_id is valid
         if memory_service.is_configured(entity_id=session.entity_id):
-            # Get archived conversation IDs to exclude from retrieval
-            archived_ids = await memory_service.get_archived_conversation_ids(
-                db, entity_id=session.entity_id
-            )
+            stage_start = retrieval_start = time.perf_counter()
+            timings: Dict[str, float] = {}
 
             # Build separate queries for user message and AI response
             user_query, assistant_query = _build_memory_queries(
@@ -929,50 +1206,62 @@ class SessionManager:
             is_first_retrieval = len(session.retrieved_ids) == 0
             top_k = settings.initial_retrieval_top_k if is_first_retrieval else settings.retrieval_top_k
 
-            # The responding entity's first turn: single-entity means the
-            # conversation's first turn (no conversational messages in
-            # context yet); multi-entity means the first turn *this entity*
-            # speaks, so each participant gets its own recent reflections
-            # when it first responds. Checked before any memory insertion
-            # mutates the context, and used only to gate recent-reflection
-            # injection below (skip the check — it can hit the DB — when the
-            # feature is off); later turns are unaffected.
-            is_first_turn = (
-                settings.recent_reflections_enabled
-                and await self._is_entity_first_turn(session, db)
-            )
-
-            # Fetch 10 candidates per query, then combine and re-rank by significance
-            fetch_k_per_query = 10
-
-            # Perform separate searches for user message and assistant response
-            user_candidates = []
-            assistant_candidates = []
-
-            # Note: we intentionally do NOT pass in-context memory IDs as exclude_ids
-            # to search_memories. If we did, the search would backfill excluded slots
-            # with lower-ranked candidates. Instead, we let the search return the most
-            # relevant results (which may include in-context memories), select the top-k,
-            # and then skip in-context memories at the session.add_memory level without
-            # replacing them with lower-ranked candidates.
-
-            if user_query:
-                user_candidates = await memory_service.search_memories(
-                    query=user_query,
-                    top_k=fetch_k_per_query,
-                    exclude_conversation_id=session.conversation_id,
-                    entity_id=session.entity_id,
+            async def load_db_state():
+                # The archived set is an in-memory lookup once loaded; the
+                # first-turn check may query. Both share the request's
+                # AsyncSession, which does not allow concurrent operations, so
+                # they run back to back here while the vector searches are in
+                # flight.
+                archived = await memory_service.get_archived_conversation_ids(
+                    db, entity_id=session.entity_id
+                )
+                # The responding entity's first turn: single-entity means the
+                # conversation's first turn (no conversational messages in
+                # context yet); multi-entity means the first turn *this entity*
+                # speaks, so each participant gets its own recent reflections
+                # when it first responds. Checked before any memory insertion
+                # mutates the context, and used only to gate recent-reflection
+                # injection below (skip the check — it can hit the DB — when the
+                # feature is off); later turns are unaffected.
+                first_turn = (
+                    settings.recent_reflections_enabled
+                    and await self._is_entity_first_turn(session, db)
+                )
+                return archived, first_turn
+
+            # A prefetch for this message's draft saves both searches and most
+            # of the hydration. It is single-use: taken here whether it matches
+            # or not.
+            prefetch = session.memory_prefetch
+            session.memory_prefetch = None
+            if prefetch is not None and not self._prefetch_matches(
+                prefetch, session, user_query, assistant_query
+            ):
+                logger.info("[MEMORY] Prefetch miss: draft does not match the sent message")
+                prefetch = None
+
+            if prefetch is not None:
+                logger.info("[MEMORY] Prefetch hit: reusing candidates retrieved for the draft")
+                user_candidates = prefetch.user_candidates
+                assistant_candidates = prefetch.assistant_candidates
+                archived_ids, is_first_turn = await load_db_state()
+            else:
+                # The two searches and the archived/first-turn lookups are
+                # independent, so they run concurrently: retrieval costs the
+                # slowest round trip rather than the sum of all of them.
+                user_candidates, assistant_candidates, (archived_ids, is_first_turn) = (
+                    await asyncio.gather(
+                        self._search_candidates(session, user_query),
+                        self._search_candidates(session, assistant_query),
+                        load_db_state(),
+                    )
                 )
+            if user_query:
                 logger.info(f"[MEMORY] User query retrieved {len(user_candidates)} candidates")
-
             if assistant_query:
-                assistant_candidates = await memory_service.search_memories(
-                    query=assistant_query,
-                    top_k=fetch_k_per_query,
-                    exclude_conversation_id=session.conversation_id,
-                    entity_id=session.entity_id,
-                )
                 logger.info(f"[MEMORY] Assistant query retrieved {len(assistant_candidates)} candidates")
+            timings["search"] = _elapsed_ms(stage_start)
+            stage_start = time.perf_counter()
 
             # Combine candidates, tracking source and keeping higher score for duplicates
             candidates_by_id = {}
@@ -981,7 +1270,7 @@ class SessionManager:
 
             for candidate in user_candidates + assistant_candidates:
                 cid = candidate["id"]
-                if cid not in candidates_by_id or candidate["score"] > candidates_by_id[cid]["score"]:
+                if cid not in candidates_by_id or ranking_score(candidate) > ranking_score(candidates_by_id[cid]):
                     candidates_by_id[cid] = candidate
 
             # Determine source for each candidate
@@ -998,16 +1287,29 @@ class SessionManager:
             candidates = list(candidates_by_id.values())
             logger.info(f"[MEMORY] Combined {len(candidates)} unique candidates from both queries")
 
-            # Step 2: Get full content and calculate combined scores for re-ranking
+            # Step 2: Get full content and calculate combined scores for re-ranking.
+            # Memories from archived conversations are dropped before hydration;
+            # the rest are fetched in one bulk call (cache + a single IN select).
+            # A prefetch already hydrated its candidates; only IDs it lacks are
+            # fetched.
+            candidates = [c for c in candidates if c.get("conversation_id") not in archived_ids]
+            memory_contents = {}
+            if prefetch is not None:
+                memory_contents = {
+                    str(c["id"]): prefetch.memory_contents[str(c["id"])]
+                    for c in candidates
+                    if str(c["id"]) in prefetch.memory_contents
+                }
+            missing_ids = [c["id"] for c in candidates if str(c["id"]) not in memory_contents]
+            if missing_ids:
+                memory_contents.update(
+                    await memory_service.get_full_memory_contents(missing_ids, db)
+                )
             enriched_candidates = []
             now = datetime.utcnow()
             for candidate in candidates:
                 try:
-                    # Skip memories from archived conversations
-                    if candidate.get("conversation_id") in archived_ids:
-                        continue
-                    # Get full content from database
-                    mem_data = await memory_service.get_full_memory_content(candidate["id"], db)
+                    mem_data = memory_contents.get(str(candidate["id"]))
                     if not mem_data:
                         # Full ID already logged in memory_service, just note we're skipping
                         logger.debug(f"[MEMORY] Skipping orphaned memory {candidate['id'][:8]}...")
@@ -1025,9 +1327,10 @@ class SessionManager:
                         memory_status=mem_data.get("memory_status"),
                         role=mem_data.get("role"),
                     )
-                    # Combined score: similarity boosted by significance
-                    # Memories with higher significance get priority among similar matches
-                    combined_score = candidate["score"] * (1 + significance)
+                    # Combined score: similarity (or hybrid fused score) boosted by
+                    # significance. Memories with higher significance get priority
+                    # among similar matches
+                    combined_score = ranking_score(candidate) * (1 + significance)
 
                     # Calculate days since creation and last retrieval for logging
                     created_at = mem_data["created_at"]
@@ -1043,9 +1346,19 @@ class SessionManager:
                     else:
                         days_since_retrieval = -1  # Never retrieved
 
+                    # Passage hits inject only the matching passage
+                    content, passage_index = memory_context_content(
+                        mem_data["role"],
+                        mem_data["content"],
+                        mem_data["id"],
+                        candidate.get("passage_index"),
+                    )
+
                     enriched_candidates.append({
                         "candidate": candidate,
                         "mem_data": mem_data,
+                        "content": content,
+                        "passage_index": passage_index,
                         "significance": significance,
                         "combined_score": combined_score,
                         "days_since_creation": days_since_creation,
@@ -1056,16 +1369,44 @@ class SessionManager:
                     logger.error(f"[MEMORY] Error processing candidate {candidate.get('id', 'unknown')}: {e}")
                     continue
 
-            # Re-rank by combined score and keep top_k
+            timings["hydrate"] = _elapsed_ms(stage_start)
+            stage_start = time.perf_counter()
+
+            # Re-rank by combined score and keep top_k (or fill the token budget)
             enriched_candidates.sort(key=lambda x: x["combined_score"], reverse=True)
 
-            # Apply role balance if enabled (ensures at least one human and one assistant message)
-            if settings.memory_role_balance_enabled:
-                top_candidates = _ensure_role_balance(enriched_candidates, top_k)
+            token_budget = retrieval_token_budget(is_first_retrieval)
+            if token_budget > 0:
+                # Cost of each memory as it will appear in context; counts are
+                # cached by text, so repeat candidates are not re-tokenized
+                def memory_tokens(item: Dict[str, Any]) -> int:
+                    mem_data = item["mem_data"]
+                    return llm_service.count_tokens(format_memory_as_context_message(
+                        memory_id=mem_data["id"],
+                        content=item["content"],
+                        created_at=mem_data["created_at"],
+                        role=mem_data["role"],
+                    )["content"])
+
+                top_candidates = select_within_token_budget(
+                    enriched_candidates,
+                    token_budget,
+                    memory_tokens,
+                    role_balance=settings.memory_role_balance_enabled,
+                )
+                selected_tokens = sum(memory_tokens(item) for item in top_candidates)
+                logger.info(f"[MEMORY] Re-ranked {len(enriched_candidates)} candidates by significance, keeping {len(top_candidates)} within token budget ({selected_tokens}/{token_budget} tokens, role_balance={'on' if settings.memory_role_balance_enabled else 'off'})")
             else:
-                top_candidates = enriched_candidates[:top_k]
+                # Apply role balance if enabled (ensures at least one human and one assistant message)
+                if settings.memory_role_balance_enabled:
+                    top_candidates = _ensure_role_balance(enriched_candidates, top_k)
+                else:
+                    top_candidates = enriched_candidates[:top_k]
 
-            logger.info(f"[MEMORY] Re-ranked {len(enriched_candidates)} candidates by significance, keeping top {len(top_candidates)} (role_balance={'on' if settings.memory_role_balance_enabled else 'off'})")
+                logger.info(f"[MEMORY] Re-ranked {len(enriched_candidates)} candidates by significance, keeping top {len(top_candidates)} (role_balance={'on' if settings.memory_role_balance_enabled else 'off'})")
+
+            timings["rank"] = _elapsed_ms(stage_start)
+            stage_start = time.perf_counter()
 
             # Step 3: Process top candidates
             # Memories already in context will be skipped without backfilling from
@@ -1078,6 +1419,8 @@ class SessionManager:
             # Memories the entity can already see in memory_query tool results
             # are skipped like in-context [MEMORY] messages — no backfill.
             query_surfaced_ids = session.get_query_surfaced_memory_ids()
+            link_times: Dict[str, Optional[datetime]] = {}
+            link_passages: Dict[str, int] = {}
             for item in top_candidates:
                 candidate = item["candidate"]
                 mem_data = item["mem_data"]
@@ -1086,7 +1429,8 @@ class SessionManager:
                     skipped_in_context += 1
                     logger.info(
                         f"[MEMORY]   [ALREADY IN CONTEXT - memory_query result] "
-                        f"id={mem_data['id'][:8]}... similarity={candidate['score']:.3f}"
+                        f"id={mem_data['id'][:8]}... "
+                        f"{describe_scores(candidate['score'], candidate.get('fused_score'))}"
                     )
                     continue
 
@@ -1094,15 +1438,17 @@ class SessionManager:
                     id=mem_data["id"],
                     conversation_id=mem_data["conversation_id"],
                     role=mem_data["role"],
-                    content=mem_data["content"],
+                    content=item["content"],
                     created_at=mem_data["created_at"],
                     times_retrieved=mem_data["times_retrieved"],
                     score=candidate["score"],
+                    fused_score=candidate.get("fused_score"),
                     significance=item["significance"],
                     combined_score=item["combined_score"],
                     days_since_creation=item["days_since_creation"],
                     days_since_retrieval=item["days_since_retrieval"],
                     source=item["source"],
+                    passage_index=item["passage_index"],
                 )
 
                 added, is_new_retrieval = session.insert_memory_into_context(memory)
@@ -1112,18 +1458,29 @@ class SessionManager:
                     # Restored memories (rolled out then re-retrieved) should be treated as "old"
                     if is_new_retrieval:
                         truly_new_memory_ids.add(memory.id)
-                        # Update retrieval tracking only for truly new retrievals
-                        await memory_service.update_retrieval_count(
-                            memory.id,
-                            session.conversation_id,
-                            db,
-                            entity_id=session.entity_id,
-                            link_retrieved_at=next_link_time(),
-                        )
+                        # Update retrieval tracking only for truly new retrievals.
+                        # Timestamps are taken now, in insertion order, and
+                        # written below in one transaction.
+                        link_times[memory.id] = next_link_time()
+                        if memory.passage_index is not None:
+                            link_passages[memory.id] = memory.passage_index
                 else:
                     skipped_in_context += 1
                     recency_str = f"{memory.days_since_retrieval:.1f}" if memory.days_since_retrieval >= 0 else "never"
-                    logger.info(f"[MEMORY]   [ALREADY IN CONTEXT] combined={memory.combined_score:.3f} similarity={memory.score:.3f} significance={memory.significance:.3f} times_retrieved={memory.times_retrieved} age_days={memory.days_since_creation:.1f} recency_days={recency_str} source={memory.source}")
+                    logger.info(f"[MEMORY]   [ALREADY IN CONTEXT] combined={memory.combined_score:.3f} {describe_scores(memory.score, memory.fused_score)} significance={memory.significance:.3f} times_retrieved={memory.times_retrieved} age_days={memory.days_since_creation:.1f} recency_days={recency_str} source={memory.source}")
+
+            if link_times:
+                await memory_service.update_retrieval_counts(
+                    list(link_times),
+                    session.conversation_id,
+                    db,
+                    entity_id=session.entity_id,
+                    link_retrieved_at=link_times,
+                    link_passage_index=link_passages,
+                )
+
+            timings["insert"] = _elapsed_ms(stage_start)
+            stage_start = time.perf_counter()
 
             # On the first turn only, additionally pull in the most recently
             # created reflections (purely recency-based, deduplicated against
@@ -1140,33 +1497,77 @@ class SessionManager:
                 else:
                     logger.info("[MEMORY] Recent reflections: skipped (not the responding entity's first turn)")
 
+            timings["reflections"] = _elapsed_ms(stage_start)
+            timings["total"] = _elapsed_ms(retrieval_start)
+            logger.info(
+                "[MEMORY] Retrieval timings: "
+                + " ".join(f"{stage}={ms:.1f}ms" for stage, ms in timings.items())
+            )
+
             # Log memory retrieval summary
             if new_memories:
                 logger.info(f"[MEMORY] Retrieved {len(new_memories)} new memories ({len(truly_new_memory_ids)} first-time retrievals, {skipped_in_context} already in context)")
                 for mem in new_memories:
                     retrieval_type = "NEW" if mem.id in truly_new_memory_ids else "RESTORED"
                     recency_str = f"{mem.days_since_retrieval:.1f}" if mem.days_since_retrieval >= 0 else "never"
-                    logger.info(f"[MEMORY]   [{retrieval_type}] combined={mem.combined_score:.3f} similarity={mem.score:.3f} significance={mem.significance:.3f} times_retrieved={mem.times_retrieved} age_days={mem.days_since_creation:.1f} recency_days={recency_str} source={mem.source}")
+                    logger.info(f"[MEMORY]   [{retrieval_type}] combined={mem.combined_score:.3f} {describe_scores(mem.score, mem.fused_score)} significance={mem.significance:.3f} times_retrieved={mem.times_retrieved} age_days={mem.days_since_creation:.1f} recency_days={recency_str} source={mem.source}")
             else:
                 logger.info(f"[MEMORY] No new memories retrieved ({skipped_in_context} already in context, total in context: {session.get_in_context_memory_count()})")
 
             # Log candidates that were not selected after re-ranking (show next 5)
-            unselected_candidates = enriched_candidates[top_k:top_k + 5]
+            selected_ids = {item["mem_data"]["id"] for item in top_candidates}
+            all_unselected = [
+                item for item in enriched_candidates if item["mem_data"]["id"] not in selected_ids
+            ]
+            unselected_candidates = all_unselected[:5]
             if unselected_candidates:
-                total_unselected = len(enriched_candidates) - top_k
+                total_unselected = len(all_unselected)
                 logger.info(f"[MEMORY] {total_unselected} candidates not selected after re-ranking (showing next 5):")
                 for item in unselected_candidates:
                     recency_str = f"{item['days_since_retrieval']:.1f}" if item['days_since_retrieval'] >= 0 else "never"
-                    logger.info(f"[MEMORY]   [NOT SELECTED] combined={item['combined_score']:.3f} similarity={item['candidate']['score']:.3f} significance={item['significance']:.3f} times_retrieved={item['mem_data']['times_retrieved']} age_days={item['days_since_creation']:.1f} recency_days={recency_str} source={item['source']}")
+                    logger.info(f"[MEMORY]   [NOT SELECTED] combined={item['combined_score']:.3f} {describe_scores(item['candidate']['score'], item['candidate'].get('fused_score'))} significance={item['significance']:.3f} times_retrieved={item['mem_data']['times_retrieved']} age_days={item['days_since_creation']:.1f} recency_days={recency_str} source={item['source']}")
         else:
             # Memory retrieval skipped - log reason
-            if not settings.pinecone_api_key:
-                logger.info("[MEMORY] Memory retrieval skipped: Pinecone not configured (no API key)")
+            if not memory_service.is_configured():
+                logger.info("[MEMORY] Memory retrieval skipped: no vector store configured")
             elif session.entity_id and not settings.get_entity_by_index(session.entity_id):
                 logger.warning(f"[MEMORY] Memory retrieval skipped: Invalid entity_id '{session.entity_id}' not found in configuration")
             else:
                 logger.info(f"[MEMORY] Memory retrieval skipped: entity_id={session.entity_id}")
 
+        return new_memories, truly_new_memory_ids
+
+    async def process_message(
+        self,
+        session: ConversationSession,
+        user_message: str,
+        db: AsyncSession,
+        user_message_timestamp: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        Process a user message through the full pipeline.
+
+        1. Retrieve relevant memories
+        2. Filter and deduplicate (also excluding archived conversations)
+        3. Update retrieval tracking
+        4. Build API request with memories
+        5. Call LLM provider API
+        6. Update conversation context
+        7. Store new messages as memories
+
+        Returns response data including content, usage, and retrieved memories.
+        """
+        logger.info(f"[MEMORY] Processing message for conversation {session.conversation_id[:8]}...")
+
+        # Pick up the responding entity's current thinking effort for this turn
+        await self.refresh_thinking_effort(session, db)
+
+        # Step 1-2: Retrieve, re-rank by significance, and deduplicate memories.
+        # truly_new_memory_ids holds only memories never seen before (cache stability)
+        new_memories, truly_new_memory_ids = await self._retrieve_memories(
+            session, user_message, db, user_message_timestamp
+        )
+
         # Timestamp the current message for LLM context (memory queries above
         # used the raw text; the DB row persisted by the route stays unstamped).
         # The route passes the same timestamp it sets as the DB row's
@@ -1199,6 +1600,12 @@ class SessionManager:
         new_asst = sum(1 for m in new_ctx if m.get('role') == 'assistant')
         logger.info(f"[CACHE] Context: {len(cached_ctx)} cached msgs ({cached_user} user, {cached_asst} assistant), {len(new_ctx)} new msgs ({new_user} user, {new_asst} assistant)")
 
+        # Token counts of the context, memoized on the session so they don't
+        # grow with the conversation: the cached prefix decides whether the
+        # history clears the cache minimum, the whole context feeds calibration
+        context_messages = len(session.conversation_context)
+        context_tokens = session.context_token_count(llm_service.count_tokens)
+
         messages = llm_service.build_messages(
             conversation_context=session.conversation_context,
             current_message=stamped_user_message,
@@ -1212,6 +1619,7 @@ class SessionManager:
             responding_entity_label=session.responding_entity_label,
             user_display_name=session.user_display_name,
             provider_hint=session.provider_hint,
+            cached_history_tokens=session.cached_prefix_token_count(llm_service.count_tokens),
         )
 
         # Step 6: Call LLM API (routes to appropriate provider based on model)
@@ -1232,7 +1640,8 @@ class SessionManager:
         session.record_prompt_usage(
             actual_tokens=total_prompt_tokens_from_usage(response.get("usage")),
             estimated_tokens=estimate_prompt_tokens(
-                messages, llm_service.count_tokens, session.system_prompt
+                messages, llm_service.count_tokens, session.system_prompt,
+                context_tokens=context_tokens, context_messages=context_messages,
             ),
         )
 
@@ -1312,9 +1721,6 @@ class SessionManager:
         - {"type": "done", "content": str, "model": str, "usage": dict, "stop_reason": str, "tool_uses": list|None}
         - {"type": "error", "error": str}
         """
-        new_memories = []
-        truly_new_memory_ids = set()  # Only memories never seen before (for cache stability)
-
         logger.info(f"[MEMORY] Processing message (stream) for conversation {session.conversation_id[:8]}... entity_id={session.entity_id}, model={session.model}")
 
         # Pick up the responding entity's current thinking effort for this turn
@@ -1344,259 +1750,11 @@ class SessionManager:
         # Set session for the context_status tool
         set_context_tool_session(session)
 
-        # Step 1-2: Retrieve, re-rank by significance, and deduplicate memories
-        # Validate both that Pinecone is configured AND the entity_id is valid
-        if memory_service.is_configured(entity_id=session.entity_id):
-            # Get archived conversation IDs to exclude from retrieval
-            archived_ids = await memory_service.get_archived_conversation_ids(
-                db, entity_id=session.entity_id
-            )
-
-            # Build separate queries for user message and AI response
-            user_query, assistant_query = _build_memory_queries(
-                session.conversation_context,
-                user_message,
-            )
-
-            # Use higher limit for first retrieval in a conversation
-            is_first_retrieval = len(session.retrieved_ids) == 0
-            top_k = settings.initial_retrieval_top_k if is_first_retrieval else settings.retrieval_top_k
-
-            # The responding entity's first turn: single-entity means the
-            # conversation's first turn (no conversational messages in
-            # context yet); multi-entity means the first turn *this entity*
-            # speaks, so each participant gets its own recent reflections
-            # when it first responds. Checked before any memory insertion
-            # mutates the context, and used only to gate recent-reflection
-            # injection below (skip the check — it can hit the DB — when the
-            # feature is off); later turns are unaffected.
-            is_first_turn = (
-                settings.recent_reflections_enabled
-                and await self._is_entity_first_turn(session, db)
-            )
-
-            # Fetch 10 candidates per query, then combine and re-rank by significance
-            fetch_k_per_query = 10
-
-            # Perform separate searches for user message and assistant response
-            user_candidates = []
-            assistant_candidates = []
-
-            # Note: we intentionally do NOT pass in-context memory IDs as exclude_ids
-            # to search_memories. If we did, the search would backfill excluded slots
-            # with lower-ranked candidates. Instead, we let the search return the most
-            # relevant results (which may include in-context memories), select the top-k,
-            # and then skip in-context memories at the session level without replacing
-            # them with lower-ranked candidates.
-
-            if user_query:
-                user_candidates = await memory_service.search_memories(
-                    query=user_query,
-                    top_k=fetch_k_per_query,
-                    exclude_conversation_id=session.conversation_id,
-                    entity_id=session.entity_id,
-                )
-                logger.info(f"[MEMORY] User query retrieved {len(user_candidates)} candidates")
-
-            if assistant_query:
-                assistant_candidates = await memory_service.search_memories(
-                    query=assistant_query,
-                    top_k=fetch_k_per_query,
-                    exclude_conversation_id=session.conversation_id,
-                    entity_id=session.entity_id,
-                )
-                logger.info(f"[MEMORY] Assistant query retrieved {len(assistant_candidates)} candidates")
-
-            # Combine candidates, tracking source and keeping higher score for duplicates
-            candidates_by_id = {}
-            user_candidate_ids = set(c["id"] for c in user_candidates)
-            assistant_candidate_ids = set(c["id"] for c in assistant_candidates)
-
-            for candidate in user_candidates + assistant_candidates:
-                cid = candidate["id"]
-                if cid not in candidates_by_id or candidate["score"] > candidates_by_id[cid]["score"]:
-                    candidates_by_id[cid] = candidate
-
-            # Determine source for each candidate
-            for cid in candidates_by_id:
-                in_user = cid in user_candidate_ids
-                in_assistant = cid in assistant_candidate_ids
-                if in_user and in_assistant:
-                    candidates_by_id[cid]["_source"] = "both"
-                elif in_user:
-                    candidates_by_id[cid]["_source"] = "user"
-                else:
-                    candidates_by_id[cid]["_source"] = "assistant"
-
-            candidates = list(candidates_by_id.values())
-            logger.info(f"[MEMORY] Combined {len(candidates)} unique candidates from both queries")
-
-            # Step 2: Get full content and calculate combined scores for re-ranking
-            enriched_candidates = []
-            now = datetime.utcnow()
-            for candidate in candidates:
-                try:
-                    # Skip memories from archived conversations
-                    if candidate.get("conversation_id") in archived_ids:
-                        continue
-                    mem_data = await memory_service.get_full_memory_content(candidate["id"], db)
-                    if not mem_data:
-                        # Full ID already logged in memory_service, just note we're skipping
-                        logger.debug(f"[MEMORY] Skipping orphaned memory {candidate['id'][:8]}...")
-                        continue
-
-                    # Released memories are excluded from retrieval
-                    if mem_data.get("memory_status") == "released":
-                        continue
-
-                    # Calculate significance for re-ranking
-                    significance = _calculate_significance(
-                        mem_data["times_retrieved"],
-                        mem_data["created_at"],
-                        mem_data["last_retrieved_at"],
-                        memory_status=mem_data.get("memory_status"),
-                        role=mem_data.get("role"),
-                    )
-                    # Combined score: similarity boosted by significance
-                    combined_score = candidate["score"] * (1 + significance)
-
-                    # Calculate days since creation and last retrieval for logging
-                    created_at = mem_data["created_at"]
-                    if isinstance(created_at, str):
-                        created_at = datetime.fromisoformat(created_at)
-                    days_since_creation = (now - created_at).total_seconds() / 86400
-
-                    last_retrieved_at = mem_data["last_retrieved_at"]
-                    if last_retrieved_at:
-                        if isinstance(last_retrieved_at, str):
-                            last_retrieved_at = datetime.fromisoformat(last_retrieved_at)
-                        days_since_retrieval = (now - last_retrieved_at).total_seconds() / 86400
-                    else:
-                        days_since_retrieval = -1  # Never retrieved
-
-                    enriched_candidates.append({
-                        "candidate": candidate,
-                        "mem_data": mem_data,
-                        "significance": significance,
-                        "combined_score": combined_score,
-                        "days_since_creation": days_since_creation,
-                        "days_since_retrieval": days_since_retrieval,
-                        "source": candidate.get("_source", "unknown"),
-                    })
-                except Exception as e:
-                    logger.error(f"[MEMORY] Error processing candidate {candidate.get('id', 'unknown')}: {e}")
-                    continue
-
-            # Re-rank by combined score and keep top_k
-            enriched_candidates.sort(key=lambda x: x["combined_score"], reverse=True)
-
-            # Apply role balance if enabled (ensures at least one human and one assistant message)
-            if settings.memory_role_balance_enabled:
-                top_candidates = _ensure_role_balance(enriched_candidates, top_k)
-            else:
-                top_candidates = enriched_candidates[:top_k]
-
-            logger.info(f"[MEMORY] Re-ranked {len(enriched_candidates)} candidates by significance, keeping top {len(top_candidates)} (role_balance={'on' if settings.memory_role_balance_enabled else 'off'})")
-
-            # Step 3: Process top candidates
-            # Memories already in context will be skipped without backfilling from
-            # lower-ranked candidates. This preserves the integrity of the top-k selection.
-            # Link timestamps are anchored just before the human message row so a
-            # session reload re-inserts these memories at the live position
-            # (before the message that triggered them) — prompt-cache stable.
-            next_link_time = make_link_timestamper(user_message_timestamp)
-            skipped_in_context = 0
-            # Memories the entity can already see in memory_query tool results
-            # are skipped like in-context [MEMORY] messages — no backfill.
-            query_surfaced_ids = session.get_query_surfaced_memory_ids()
-            for item in top_candidates:
-                candidate = item["candidate"]
-                mem_data = item["mem_data"]
-
-                if mem_data["id"] in query_surfaced_ids:
-                    skipped_in_context += 1
-                    logger.info(
-                        f"[MEMORY]   [ALREADY IN CONTEXT - memory_query result] "
-                        f"id={mem_data['id'][:8]}... similarity={candidate['score']:.3f}"
-                    )
-                    continue
-
-                memory = MemoryEntry(
-                    id=mem_data["id"],
-                    conversation_id=mem_data["conversation_id"],
-                    role=mem_data["role"],
-                    content=mem_data["content"],
-                    created_at=mem_data["created_at"],
-                    times_retrieved=mem_data["times_retrieved"],
-                    score=candidate["score"],
-                    significance=item["significance"],
-                    combined_score=item["combined_score"],
-                    days_since_creation=item["days_since_creation"],
-                    days_since_retrieval=item["days_since_retrieval"],
-                    source=item["source"],
-                )
-
-                added, is_new_retrieval = session.insert_memory_into_context(memory)
-                if added:
-                    new_memories.append(memory)
-                    # Track truly new memories separately for cache stability
-                    # Restored memories (rolled out then re-retrieved) should be treated as "old"
-                    if is_new_retrieval:
-                        truly_new_memory_ids.add(memory.id)
-                        # Only update retrieval count for truly new retrievals
-                        await memory_service.update_retrieval_count(
-                            memory.id,
-                            session.conversation_id,
-                            db,
-                            entity_id=session.entity_id,
-                            link_retrieved_at=next_link_time(),
-                        )
-                else:
-                    skipped_in_context += 1
-                    recency_str = f"{memory.days_since_retrieval:.1f}" if memory.days_since_retrieval >= 0 else "never"
-                    logger.info(f"[MEMORY]   [ALREADY IN CONTEXT] combined={memory.combined_score:.3f} similarity={memory.score:.3f} significance={memory.significance:.3f} times_retrieved={memory.times_retrieved} age_days={memory.days_since_creation:.1f} recency_days={recency_str} source={memory.source}")
-
-            # On the first turn only, additionally pull in the most recently
-            # created reflections (purely recency-based, deduplicated against
-            # the semantic retrievals above with recency backfill)
-            if settings.recent_reflections_enabled:
-                if is_first_turn:
-                    await self._inject_recent_reflections(
-                        session,
-                        db,
-                        new_memories,
-                        truly_new_memory_ids,
-                        next_link_time,
-                    )
-                else:
-                    logger.info("[MEMORY] Recent reflections: skipped (not the responding entity's first turn)")
-
-            # Log memory retrieval summary
-            if new_memories:
-                logger.info(f"[MEMORY] Retrieved {len(new_memories)} new memories ({len(truly_new_memory_ids)} first-time retrievals, {skipped_in_context} already in context)")
-                for mem in new_memories:
-                    retrieval_type = "NEW" if mem.id in truly_new_memory_ids else "RESTORED"
-                    recency_str = f"{mem.days_since_retrieval:.1f}" if mem.days_since_retrieval >= 0 else "never"
-                    logger.info(f"[MEMORY]   [{retrieval_type}] combined={mem.combined_score:.3f} similarity={mem.score:.3f} significance={mem.significance:.3f} times_retrieved={mem.times_retrieved} age_days={mem.days_since_creation:.1f} recency_days={recency_str} source={mem.source}")
-            else:
-                logger.info(f"[MEMORY] No new memories retrieved ({skipped_in_context} already in context, total in context: {session.get_in_context_memory_count()})")
-
-            # Log candidates that were not selected after re-ranking (show next 5)
-            unselected_candidates = enriched_candidates[top_k:top_k + 5]
-            if unselected_candidates:
-                total_unselected = len(enriched_candidates) - top_k
-                logger.info(f"[MEMORY] {total_unselected} candidates not selected after re-ranking (showing next 5):")
-                for item in unselected_candidates:
-                    recency_str = f"{item['days_since_retrieval']:.1f}" if item['days_since_retrieval'] >= 0 else "never"
-                    logger.info(f"[MEMORY]   [NOT SELECTED] combined={item['combined_score']:.3f} similarity={item['candidate']['score']:.3f} significance={item['significance']:.3f} times_retrieved={item['mem_data']['times_retrieved']} age_days={item['days_since_creation']:.1f} recency_days={recency_str} source={item['source']}")
-        else:
-            # Memory retrieval skipped - log reason
-            if not settings.pinecone_api_key:
-                logger.info("[MEMORY] Memory retrieval skipped: Pinecone not configured (no API key)")
-            elif session.entity_id and not settings.get_entity_by_index(session.entity_id):
-                logger.warning(f"[MEMORY] Memory retrieval skipped: Invalid entity_id '{session.entity_id}' not found in configuration")
-            else:
-                logger.info(f"[MEMORY] Memory retrieval skipped: entity_id={session.entity_id}")
+        # Step 1-2: Retrieve, re-rank by significance, and deduplicate memories.
+        # truly_new_memory_ids holds only memories never seen before (cache stability)
+        new_memories, truly_new_memory_ids = await self._retrieve_memories(
+            session, user_message, db, user_message_timestamp
+        )
 
         # Step 3: Apply token limits before building API messages
         # Memories live inside the conversation context, so context trimming
@@ -1696,6 +1854,10 @@ class SessionManager:
             if images or files:
                 logger.info(f"[ATTACHMENTS] Processing {len(images)} images, {len(files)} files")
 
+        # Memoized context token counts (see process_message)
+        context_messages = len(session.conversation_context)
+        context_tokens = session.context_token_count(llm_service.count_tokens)
+
         messages = llm_service.build_messages(
             conversation_context=session.conversation_context,
             current_message=stamped_user_message,
@@ -1710,6 +1872,7 @@ class SessionManager:
             user_display_name=session.user_display_name,
             attachments=llm_attachments,  # Images only - file text is in the message
             provider_hint=session.provider_hint,
+            cached_history_tokens=session.cached_prefix_token_count(llm_service.count_tokens),
         )
 
         # Step 5: Stream LLM response with caching enabled
@@ -1831,7 +1994,8 @@ class SessionManager:
                         session.record_prompt_usage(
                             actual_tokens=total_prompt_tokens_from_usage(event.get("usage")),
                             estimated_tokens=estimate_prompt_tokens(
-                                working_messages, llm_service.count_tokens, session.system_prompt
+                                working_messages, llm_service.count_tokens, session.system_prompt,
+                                context_tokens=context_tokens, context_messages=context_messages,
                             ),
                         )
 
@@ -2000,8 +2164,15 @@ class SessionManager:
 
     def close_session(self, conversation_id: str):
         """Remove a session from active sessions."""
-        if conversation_id in self._sessions:
-            del self._sessions[conversation_id]
+        self._sessions.pop(conversation_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Session store occupancy and eviction counters, view switches and snapshot counters."""
+        return {
+            **self._sessions.get_stats(),
+            "view_switches": self._view_switches,
+            "snapshots": session_snapshots.get_stats(),
+        }
 
 
 # Singleton instance
@@ -0,0 +1,228 @@
+"""
+Session Snapshots - persisted session history for fast reloads.
+
+Rebuilding a session (SessionManager.load_session_from_db) reads every
+message and memory link, fetches each memory's content, and re-parses
+the tool exchanges to restore the memory_query and notes dedup stamps.
+Every restart, entity switch, eviction (session_store.py) and error-path
+close pays that cost again, even when nothing changed.
+
+After a full rebuild, and again after every turn is committed
+(SessionManager.save_snapshot), the session's history is written to a file
+per (conversation, responding entity). The history is the conversation context,
+session_memories, retrieved_ids and the memory tracker. The file holds a
+version line, then zlib-compressed JSON. The next load restores the history
+from the file if the version still matches and falls back to the full
+rebuild otherwise. Everything else (model, system prompt, labels, thinking
+effort) is still resolved fresh on every load.
+
+The version is a digest of:
+- the conversation's message count, last message ID and updated_at
+  (bumped by turns and edits)
+- every memory link with its memory's status, content hash and source
+  conversation's archive flag
+- the load inputs that shape the context (entity, labels, notes on/off)
+- SNAPSHOT_FORMAT
+
+Snapshots are a cache. A missing, stale or unreadable file just means a
+full rebuild, and the directory can be deleted at any time.
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Conversation, ConversationMemoryLink, Message
+from app.services.conversation_session import ConversationSession, MemoryEntry
+
+logger = logging.getLogger(__name__)
+
+# Bump when the rebuilt context's shape changes, to invalidate old snapshots
+SNAPSHOT_FORMAT = 1
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _safe(part: str) -> str:
+    return _UNSAFE_FILENAME_RE.sub("_", part)
+
+
+class SessionSnapshotStore:
+    """Version-checked session history files, one per (conversation, responding entity)."""
+
+    def __init__(self, directory: Optional[str] = None):
+        # Defaults to settings.session_snapshot_dir, read on every access
+        self._directory = directory
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    @property
+    def directory(self) -> Path:
+        return Path(self._directory or settings.session_snapshot_dir)
+
+    def _path(self, conversation_id: str, responding_entity_id: Optional[str]) -> Path:
+        return self.directory / (
+            f"{_safe(str(conversation_id))}--{_safe(responding_entity_id or 'default')}.snap"
+        )
+
+    async def history_version(
+        self,
+        db: AsyncSession,
+        conversation: Conversation,
+        link_entity_id: Optional[str],
+        key: Dict[str, Any],
+    ) -> str:
+        """
+        Digest of everything a history rebuild would read (see module
+        docstring). link_entity_id filters memory links as the rebuild does
+        (the responding entity in multi-entity conversations); key holds the
+        load's other inputs.
+        """
+        conversation_id = str(conversation.id)
+        message_count, last_created_at = (await db.execute(
+            select(func.count(Message.id), func.max(Message.created_at))
+            .where(Message.conversation_id == conversation_id)
+        )).one()
+        last_message_id = (await db.execute(
+            select(Message.id)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(1)
+        )).scalar()
+
+        source = Conversation.__table__.alias("source")
+        links = (
+            select(
+                ConversationMemoryLink.message_id,
+                ConversationMemoryLink.retrieved_at,
+                ConversationMemoryLink.passage_index,
+                Message.memory_status,
+                source.c.is_archived,
+                Message.content,
+            )
+            .join(Message, Message.id == ConversationMemoryLink.message_id)
+            .join(source, source.c.id == Message.conversation_id)
+            .where(ConversationMemoryLink.conversation_id == conversation_id)
+            .order_by(ConversationMemoryLink.retrieved_at, ConversationMemoryLink.message_id)
+        )
+        if link_entity_id is not None:
+            links = links.where(ConversationMemoryLink.entity_id == link_entity_id)
+
+        digest = hashlib.sha256()
+        digest.update(json.dumps([
+            SNAPSHOT_FORMAT,
+            message_count,
+            last_message_id,
+            last_created_at,
+            conversation.updated_at,
+            key,
+        ], default=str, sort_keys=True).encode())
+        for *fields, content in (await db.execute(links)).all():
+            # The content itself: a memory edited to the same length must
+            # still invalidate
+            fields.append(hashlib.sha256((content or "").encode()).hexdigest())
+            digest.update(json.dumps(fields, default=str).encode())
+        return digest.hexdigest()
+
+    async def restore(
+        self,
+        session: ConversationSession,
+        responding_entity_id: Optional[str],
+        version: str,
+    ) -> bool:
+        """Fill a fresh session's history from its snapshot; False if none matches version."""
+        path = self._path(session.conversation_id, responding_entity_id)
+        try:
+            payload = await asyncio.to_thread(self._read, path, version)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"[SESSION] Unreadable snapshot {path.name}: {e}")
+            payload = None
+        if payload is None:
+            self._stats["misses"] += 1
+            return False
+
+        session.conversation_context = payload["context"]
+        session.session_memories = {
+            memory["id"]: MemoryEntry(**memory) for memory in payload["memories"]
+        }
+        session.retrieved_ids = set(payload["retrieved_ids"])
+        session.memory_tracker.retrieved_ids = set(payload["tracker_retrieved_ids"])
+        session.memory_tracker.memory_positions = payload["memory_positions"]
+        self._stats["hits"] += 1
+        logger.info(
+            f"[SESSION] Restored {len(session.conversation_context)} context messages "
+            f"from snapshot for {session.conversation_id[:8]}..."
+        )
+        return True
+
+    async def save(
+        self,
+        session: ConversationSession,
+        responding_entity_id: Optional[str],
+        version: str,
+    ) -> None:
+        """Write a session's history under version (errors are logged, not raised)."""
+        payload = {
+            # Cached token counts depend on the session's tokenizer; a restore
+            # recounts them
+            "context": [
+                {k: v for k, v in message.items() if k != "token_count"}
+                for message in session.conversation_context
+            ],
+            "memories": [dataclasses.asdict(m) for m in session.session_memories.values()],
+            "retrieved_ids": sorted(session.retrieved_ids),
+            "tracker_retrieved_ids": sorted(session.memory_tracker.retrieved_ids),
+            "memory_positions": session.memory_tracker.memory_positions,
+        }
+        path = self._path(session.conversation_id, responding_entity_id)
+        try:
+            data = zlib.compress(json.dumps(payload, default=str).encode())
+            await asyncio.to_thread(self._write, path, version, data)
+            self._stats["writes"] += 1
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"[SESSION] Could not write snapshot {path.name}: {e}")
+
+    def discard(self, conversation_id: str) -> None:
+        """Delete a conversation's snapshots (all responding entities)."""
+        for path in self.directory.glob(f"{_safe(str(conversation_id))}--*.snap"):
+            path.unlink(missing_ok=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot hit/miss/write counters."""
+        return {"directory": str(self.directory), **self._stats}
+
+    @staticmethod
+    def _read(path: Path, version: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        stored_version, _, data = raw.partition(b"\n")
+        if stored_version.decode() != version:
+            return None
+        return json.loads(zlib.decompress(data))
+
+    @staticmethod
+    def _write(path: Path, version: str, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename, so a reader never sees a partial file
+        tmp_path = path.with_suffix(f".tmp{os.getpid()}-{threading.get_ident()}")
+        tmp_path.write_bytes(version.encode() + b"\n" + data)
+        os.replace(tmp_path, path)
+
+
+# Singleton instance
+session_snapshots = SessionSnapshotStore()
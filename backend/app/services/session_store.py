@@ -0,0 +1,210 @@
+"""
+Session Store - bounded, LRU-ordered home of the live ConversationSessions.
+
+A session holds a conversation's whole LLM context, its injected memories
+and their tracker state, so keeping every conversation ever opened grows the
+server without bound. The store caps resident sessions by count and by
+estimated size, and drops sessions left idle longer than a TTL. The least
+recently used session goes first.
+
+Eviction is always safe: the database is authoritative, and callers that
+find no session rebuild it with SessionManager.load_session_from_db, as they
+already do after a restart. A request that holds an evicted session keeps
+using its reference until it finishes; the next request reloads.
+
+Sizes are estimates of the text a session holds (context message content,
+memory content, system prompt, and the other entities' views of a
+multi-entity conversation), not of Python object overhead. A session is
+measured when it is loaded and again each time it is used, so growth from a
+turn is counted when the conversation is next used.
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+from app.services.conversation_session import ConversationSession
+
+logger = logging.getLogger(__name__)
+
+# Recently evicted conversation IDs remembered to count reloads
+EVICTED_HISTORY_SIZE = 1000
+
+
+def estimate_session_bytes(session: ConversationSession) -> int:
+    """Approximate bytes of text a session holds in memory."""
+    total = len(session.system_prompt or "")
+    for message in session.conversation_context:
+        content = message.get("content")
+        if isinstance(content, str):
+            total += len(content)
+        elif content is not None:
+            total += len(json.dumps(content, default=str))
+    for memory in session.session_memories.values():
+        total += len(memory.content or "")
+    # The other entities' views of a multi-entity conversation share its
+    # messages; their own memories and prompts come on top
+    if session.entity_views is not None:
+        for view in session.entity_views.sessions.values():
+            if view is not session:
+                total += len(view.system_prompt or "")
+                total += sum(len(memory.content or "") for memory in view.session_memories.values())
+    return total
+
+
+@dataclass
+class _Entry:
+    session: ConversationSession
+    size: int
+    last_used: float
+
+
+class SessionStore:
+    """LRU map of conversation ID -> ConversationSession with count, size and idle limits."""
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        idle_ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Limits default to the settings (read on every check); 0 disables a
+        limit.
+        """
+        self._max_sessions = max_sessions
+        self._max_bytes = max_bytes
+        self._idle_ttl_seconds = idle_ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._evicted: "OrderedDict[str, None]" = OrderedDict()
+        self._stats = {
+            "evictions_capacity": 0,
+            "evictions_bytes": 0,
+            "evictions_idle": 0,
+            "loads": 0,
+            "reloads": 0,
+        }
+
+    @property
+    def max_sessions(self) -> int:
+        if self._max_sessions is not None:
+            return self._max_sessions
+        return settings.session_store_max_sessions
+
+    @property
+    def max_bytes(self) -> int:
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return settings.session_store_max_mb * 1024 * 1024
+
+    @property
+    def idle_ttl_seconds(self) -> float:
+        if self._idle_ttl_seconds is not None:
+            return self._idle_ttl_seconds
+        return settings.session_idle_ttl_minutes * 60
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return conversation_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, conversation_id: str) -> Optional[ConversationSession]:
+        """The session, marked most recently used; None if absent or idle too long."""
+        now = self._clock()
+        self._expire_idle(now)
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            return None
+        entry.last_used = now
+        self._entries.move_to_end(conversation_id)
+        self._resize(entry, estimate_session_bytes(entry.session))
+        self._enforce_limits()
+        return entry.session
+
+    def put(self, conversation_id: str, session: ConversationSession) -> None:
+        """Add or replace a session as the most recently used."""
+        self.pop(conversation_id)
+        now = self._clock()
+        self._expire_idle(now)
+        size = estimate_session_bytes(session)
+        self._entries[conversation_id] = _Entry(session, size, now)
+        self._bytes += size
+        self._enforce_limits()
+
+    def pop(self, conversation_id: str) -> Optional[ConversationSession]:
+        """Remove a session (an explicit close, not counted as an eviction)."""
+        entry = self._entries.pop(conversation_id, None)
+        if entry is None:
+            return None
+        self._bytes -= entry.size
+        return entry.session
+
+    def measure(self, conversation_id: str) -> None:
+        """Re-estimate a session's size after it was filled, enforcing the limits."""
+        entry = self._entries.get(conversation_id)
+        if entry is not None:
+            self._resize(entry, estimate_session_bytes(entry.session))
+            self._enforce_limits()
+
+    def record_load(self, conversation_id: str) -> None:
+        """Count a load from the database; a reload if the store had evicted it."""
+        self._stats["loads"] += 1
+        if conversation_id in self._evicted:
+            del self._evicted[conversation_id]
+            self._stats["reloads"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Resident sessions and bytes, limits and eviction/reload counters."""
+        return {
+            "resident_sessions": len(self._entries),
+            "resident_bytes": self._bytes,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            **self._stats,
+        }
+
+    def _resize(self, entry: _Entry, size: int) -> None:
+        self._bytes += size - entry.size
+        entry.size = size
+
+    def _expire_idle(self, now: float) -> None:
+        ttl = self.idle_ttl_seconds
+        if ttl <= 0:
+            return
+        # Entries are in last-use order, so the idle ones are at the front
+        while self._entries:
+            conversation_id, entry = next(iter(self._entries.items()))
+            if now - entry.last_used <= ttl:
+                break
+            self._evict(conversation_id, "idle")
+
+    def _enforce_limits(self) -> None:
+        # The most recently used session always stays, even if it alone is
+        # over the byte limit
+        max_sessions, max_bytes = self.max_sessions, self.max_bytes
+        while len(self._entries) > 1:
+            if max_sessions > 0 and len(self._entries) > max_sessions:
+                reason = "capacity"
+            elif max_bytes > 0 and self._bytes > max_bytes:
+                reason = "bytes"
+            else:
+                break
+            self._evict(next(iter(self._entries)), reason)
+
+    def _evict(self, conversation_id: str, reason: str) -> None:
+        self.pop(conversation_id)
+        self._stats[f"evictions_{reason}"] += 1
+        self._evicted[conversation_id] = None
+        self._evicted.move_to_end(conversation_id)
+        if len(self._evicted) > EVICTED_HISTORY_SIZE:
+            self._evicted.popitem(last=False)
+        logger.info(f"[SESSION] Evicted session {conversation_id} ({reason})")
@@ -5,7 +5,9 @@ Two directions:
 
 - rebuild_vectors_from_database: regenerate an entity's Pinecone index from
   the SQL messages table (the SQL DB is the source of truth for content).
-  Guards against loss of the vector database.
+  Guards against loss of the vector database. Long messages are written as
+  passage records (memory_passages), replacing any older whole-message
+  record for them.
 
 - restore_database_from_vectors: reconstruct conversations and messages in
   the SQL database from Pinecone record metadata. Only vectorized data comes
@@ -16,13 +18,17 @@ Two directions:
 Both operations default to dry_run and are non-destructive by default:
 rebuild upserts by message ID (optionally wiping the index first), restore
 only creates rows that don't already exist.
+
+find_missing_vectors is the SQL-side half of an orphan reconciliation
+(MemoryService.reconcile_orphaned_records finds records without a message):
+it streams memories in SQL whose records are missing from the index.
 """
 import logging
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
@@ -33,7 +39,8 @@ from app.models import (
     Message,
     MessageRole,
 )
-from app.services.memory_service import run_pinecone
+from app.services.memory_passages import parse_memory_record_id
+from app.services.memory_service import MemoryService, run_pinecone
 
 logger = logging.getLogger(__name__)
 
@@ -99,6 +106,9 @@ class VectorRebuildService:
           and to other participants' indexes under the speaker's label.
         - Reflections go only to the saving entity's index (role="reflection").
         - times_retrieved metadata is restored from the SQL value.
+        - Long messages are split into passage records (msg:{id}:{n}) like
+          store_memory does; a whole-message record left over from before
+          the split is deleted.
 
         Args:
             db: Database session.
@@ -164,18 +174,13 @@ class VectorRebuildService:
             if not include_imported and conv.is_imported:
                 result["skipped"]["imported_conversations"] += 1
                 continue
-            if conv.entity_id == MULTI_ENTITY_SENTINEL:
-                participants = participants_by_conv.get(conv_id, [])
-            elif conv.entity_id:
-                participants = [conv.entity_id]
-            elif default_index:
-                # Legacy NULL entity_id → default entity's index
-                participants = [default_index]
-            else:
-                participants = []
-
-            known = [p for p in participants if p in configured_indexes]
-            if participants and not known:
+            known = self._resolve_participants(
+                conv.entity_id,
+                participants_by_conv.get(conv_id, []),
+                configured_indexes,
+                default_index,
+            )
+            if known is None:
                 result["skipped"]["unconfigured_entity_conversations"] += 1
                 continue
             conv_participants[conv_id] = known
@@ -199,64 +204,27 @@ class VectorRebuildService:
             if not participants:
                 continue
 
-            if msg.role == MessageRole.HUMAN:
-                content = strip_attachment_blocks(msg.content or "")
-                if not content:
-                    if msg.content and "[ATTACHED FILE:" in msg.content:
-                        result["skipped"]["attachment_only"] += 1
-                    else:
-                        result["skipped"]["empty_content"] += 1
-                    continue
-                if content.startswith(CLOSING_TURN_PREFIX):
-                    result["skipped"]["closing_turn"] += 1
-                    continue
-                for index_name in participants:
-                    self._plan_record(plans, index_name, msg, "human", content)
-
-            elif msg.role == MessageRole.ASSISTANT:
-                if not (msg.content or "").strip():
-                    result["skipped"]["empty_content"] += 1
-                    continue
-                if len(participants) == 1:
-                    self._plan_record(plans, participants[0], msg, "assistant", msg.content)
-                else:
-                    speaker = msg.speaker_entity_id
-                    if not speaker or speaker not in participants:
-                        # Can't attribute the speaker; storing it as
-                        # role="assistant" everywhere would let one entity's
-                        # words masquerade as another's. Skip and report.
-                        result["skipped"]["unattributed_assistant"] += 1
-                        continue
-                    speaker_entity = settings.get_entity_by_index(speaker)
-                    speaker_label = (
-                        speaker_entity.label if speaker_entity else None
-                    ) or "other_entity"
-                    for index_name in participants:
-                        role = "assistant" if index_name == speaker else speaker_label
-                        self._plan_record(plans, index_name, msg, role, msg.content)
-
-            elif msg.role == MessageRole.REFLECTION:
-                if not (msg.content or "").strip():
-                    result["skipped"]["empty_content"] += 1
-                    continue
-                # memory_save always stamps the saving entity; legacy rows
-                # without it fall back to the conversation's (single) entity.
-                target = msg.speaker_entity_id or (
-                    participants[0] if len(participants) == 1 else None
-                )
-                if target is None or target not in configured_indexes:
-                    result["skipped"]["unattributed_assistant"] += 1
-                    continue
-                self._plan_record(plans, target, msg, "reflection", msg.content)
+            targets, skip_reason = self._memory_targets(msg, participants, configured_indexes)
+            if skip_reason:
+                result["skipped"][skip_reason] += 1
+                continue
+            for index_name, role, content in targets:
+                self._plan_record(plans, index_name, msg, role, content)
 
         # Execute (or just report) per entity
         for entity in entities:
             index_name = entity.index_name
             records = plans.get(index_name, [])
+            # Messages now stored as passages may still have a whole-message
+            # record from before they were split
+            superseded_ids = list(dict.fromkeys(
+                r["message_id"] for r in records if "passage_index" in r
+            ))
             entity_result = {
                 "entity_id": index_name,
                 "records_planned": len(records),
                 "records_upserted": 0,
+                "passage_messages": len(superseded_ids),
                 "wiped": False,
                 "errors": [],
             }
@@ -280,6 +248,17 @@ class VectorRebuildService:
                         )
                         entity_result["errors"].append(f"Wipe failed: {e}")
 
+                if superseded_ids and not entity_result["wiped"]:
+                    for i in range(0, len(superseded_ids), FETCH_BATCH_SIZE):
+                        try:
+                            await run_pinecone(
+                                index.delete, ids=superseded_ids[i : i + FETCH_BATCH_SIZE]
+                            )
+                        except Exception as e:
+                            entity_result["errors"].append(
+                                f"Deleting whole-message records failed: {e}"
+                            )
+
                 for i in range(0, len(records), UPSERT_BATCH_SIZE):
                     batch = records[i : i + UPSERT_BATCH_SIZE]
                     try:
@@ -318,6 +297,232 @@ class VectorRebuildService:
         )
         return result
 
+    async def find_missing_vectors(
+        self,
+        db: AsyncSession,
+        entity_id: Optional[str] = None,
+        include_imported: bool = True,
+        batch_size: int = FETCH_BATCH_SIZE,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an entity's memories in SQL against its index, yielding a
+        progress report per batch: the reverse of
+        MemoryService.reconcile_orphaned_records.
+
+        Messages are read in message-ID order, batch_size at a time, limited
+        in SQL to the entity's conversations. Each batch's expected record IDs
+        (the rebuild's rules: fan-out, passages, skipped closing turns and
+        attachment-only messages) are fetched from the index; a message with
+        any record absent is reported missing. rebuild_vectors_from_database
+        writes the missing records back.
+
+        Yields dicts with:
+            batch: 1-based batch number
+            messages_checked: memories checked so far, this batch included
+            missing: this batch's memories lacking records ({"message_id",
+                "conversation_id", "role", "missing_records"})
+            errors: fetch errors on this batch (its messages aren't reported)
+        """
+        if not self.memory_service.is_configured():
+            return
+
+        default_entity = settings.get_default_entity()
+        default_index = default_entity.index_name if default_entity else None
+        entity_id = entity_id or default_index
+        index = self.memory_service.get_index(entity_id)
+        if entity_id is None or index is None:
+            return
+        configured_indexes = {e.index_name for e in settings.get_entities()}
+
+        membership = or_(
+            Conversation.entity_id == entity_id,
+            Conversation.id.in_(
+                select(ConversationEntity.conversation_id)
+                .where(ConversationEntity.entity_id == entity_id)
+            ),
+            # Reflections go to the saving entity wherever they were saved
+            Message.speaker_entity_id == entity_id,
+        )
+        if entity_id == default_index:
+            membership = or_(membership, Conversation.entity_id.is_(None))
+        query = (
+            select(Message, Conversation.entity_id)
+            .join(Conversation, Conversation.id == Message.conversation_id)
+            .where(
+                Message.role.in_(
+                    (MessageRole.HUMAN, MessageRole.ASSISTANT, MessageRole.REFLECTION)
+                ),
+                membership,
+            )
+            .order_by(Message.id)
+            .limit(batch_size)
+        )
+        if not include_imported:
+            query = query.where(Conversation.is_imported.is_(False))
+
+        checked = 0
+        batch_number = 0
+        last_id = None
+        while True:
+            page = query if last_id is None else query.where(Message.id > last_id)
+            rows = (await db.execute(page)).all()
+            if not rows:
+                break
+            batch_number += 1
+            checked += len(rows)
+            last_id = rows[-1][0].id
+
+            multi_conv_ids = {
+                str(msg.conversation_id)
+                for msg, conv_entity_id in rows
+                if conv_entity_id == MULTI_ENTITY_SENTINEL
+            }
+            participants_by_conv: Dict[str, List[str]] = {}
+            if multi_conv_ids:
+                participant_rows = await db.execute(
+                    select(ConversationEntity.conversation_id, ConversationEntity.entity_id)
+                    .where(ConversationEntity.conversation_id.in_(multi_conv_ids))
+                    .order_by(ConversationEntity.display_order)
+                )
+                for conv_id, part_entity in participant_rows:
+                    participants_by_conv.setdefault(str(conv_id), []).append(part_entity)
+
+            # Expected record IDs per message, for this entity's index only
+            expected: Dict[str, List[str]] = {}
+            messages_by_id: Dict[str, Message] = {}
+            for msg, conv_entity_id in rows:
+                participants = self._resolve_participants(
+                    conv_entity_id,
+                    participants_by_conv.get(str(msg.conversation_id), []),
+                    configured_indexes,
+                    default_index,
+                )
+                if not participants:
+                    continue
+                targets, _ = self._memory_targets(msg, participants, configured_indexes)
+                for index_name, role, content in targets:
+                    if index_name != entity_id:
+                        continue
+                    records = MemoryService.memory_records(
+                        str(msg.id), str(msg.conversation_id), role, content, msg.created_at,
+                    )
+                    expected[str(msg.id)] = [r["_id"] for r in records]
+                    messages_by_id[str(msg.id)] = msg
+
+            errors: List[str] = []
+            found: Set[str] = set()
+            failed: Set[str] = set()
+            record_ids = [rid for ids in expected.values() for rid in ids]
+            for i in range(0, len(record_ids), FETCH_BATCH_SIZE):
+                chunk = record_ids[i : i + FETCH_BATCH_SIZE]
+                try:
+                    fetch_result = await run_pinecone(index.fetch, ids=chunk)
+                    found.update(fetch_result.vectors.keys())
+                except Exception as e:
+                    errors.append(f"Fetching records on batch {batch_number} failed: {e}")
+                    failed.update(chunk)
+
+            missing = []
+            for message_id, ids in expected.items():
+                absent = [rid for rid in ids if rid not in found]
+                if not absent or any(rid in failed for rid in absent):
+                    continue
+                msg = messages_by_id[message_id]
+                missing.append({
+                    "message_id": message_id,
+                    "conversation_id": str(msg.conversation_id),
+                    "role": msg.role.value,
+                    "missing_records": absent,
+                })
+
+            yield {
+                "batch": batch_number,
+                "messages_checked": checked,
+                "missing": missing,
+                "errors": errors,
+            }
+
+        logger.info(
+            f"[REBUILD] Checked {checked} memories against index '{entity_id}' "
+            f"in {batch_number} batches"
+        )
+
+    @staticmethod
+    def _resolve_participants(
+        conv_entity_id: Optional[str],
+        multi_entity_participants: List[str],
+        configured_indexes: Set[str],
+        default_index: Optional[str],
+    ) -> Optional[List[str]]:
+        """
+        The configured indexes a conversation's memories go to, or None when
+        all of its participants are unconfigured entities.
+        """
+        if conv_entity_id == MULTI_ENTITY_SENTINEL:
+            participants = multi_entity_participants
+        elif conv_entity_id:
+            participants = [conv_entity_id]
+        elif default_index:
+            # Legacy NULL entity_id → default entity's index
+            participants = [default_index]
+        else:
+            participants = []
+
+        known = [p for p in participants if p in configured_indexes]
+        if participants and not known:
+            return None
+        return known
+
+    @staticmethod
+    def _memory_targets(
+        msg: Message,
+        participants: List[str],
+        configured_indexes: Set[str],
+    ) -> Tuple[List[Tuple[str, str, str]], Optional[str]]:
+        """
+        Where live chat vectorized a message: ([(index, role, content)], None),
+        or ([], skip reason) for a message it never vectorized.
+        """
+        if msg.role == MessageRole.HUMAN:
+            content = strip_attachment_blocks(msg.content or "")
+            if not content:
+                if msg.content and "[ATTACHED FILE:" in msg.content:
+                    return [], "attachment_only"
+                return [], "empty_content"
+            if content.startswith(CLOSING_TURN_PREFIX):
+                return [], "closing_turn"
+            return [(index_name, "human", content) for index_name in participants], None
+
+        if not (msg.content or "").strip():
+            return [], "empty_content"
+
+        if msg.role == MessageRole.ASSISTANT:
+            if len(participants) == 1:
+                return [(participants[0], "assistant", msg.content)], None
+            speaker = msg.speaker_entity_id
+            if not speaker or speaker not in participants:
+                # Can't attribute the speaker; storing it as
+                # role="assistant" everywhere would let one entity's
+                # words masquerade as another's. Skip and report.
+                return [], "unattributed_assistant"
+            speaker_entity = settings.get_entity_by_index(speaker)
+            speaker_label = (
+                speaker_entity.label if speaker_entity else None
+            ) or "other_entity"
+            return [
+                (index_name, "assistant" if index_name == speaker else speaker_label, msg.content)
+                for index_name in participants
+            ], None
+
+        # Reflection: memory_save always stamps the saving entity; legacy
+        # rows without it fall back to the conversation's (single) entity.
+        target = msg.speaker_entity_id or (
+            participants[0] if len(participants) == 1 else None
+        )
+        if target is None or target not in configured_indexes:
+            return [], "unattributed_assistant"
+        return [(target, "reflection", msg.content)], None
+
     @staticmethod
     def _plan_record(
         plans: Dict[str, List[Dict[str, Any]]],
@@ -326,18 +531,17 @@ class VectorRebuildService:
         role: str,
         content: str,
     ) -> None:
-        """Add one Pinecone record (store_memory's exact shape) to a plan."""
+        """Add a message's Pinecone records (store_memory's exact shape) to a plan."""
         if index_name not in plans:
             return  # Participant exists but isn't targeted by this rebuild
-        plans[index_name].append({
-            "_id": str(msg.id),
-            "text": content,
-            "conversation_id": str(msg.conversation_id),
-            "created_at": msg.created_at.isoformat(),
-            "role": role,
-            "content_preview": content[:200],
-            "times_retrieved": msg.times_retrieved or 0,
-        })
+        plans[index_name].extend(MemoryService.memory_records(
+            str(msg.id),
+            str(msg.conversation_id),
+            role,
+            content,
+            msg.created_at,
+            times_retrieved=msg.times_retrieved or 0,
+        ))
 
     # ------------------------------------------------------------------
     # Pinecone → SQL
@@ -413,6 +617,8 @@ class VectorRebuildService:
                 continue
 
             ids = await self.memory_service.list_all_pinecone_ids(index_name)
+            # message_id -> {passage_index: metadata} for passage records
+            passages: Dict[str, Dict[int, Dict[str, Any]]] = {}
             result["entities_scanned"].append(
                 {"entity_id": index_name, "records": len(ids)}
             )
@@ -433,6 +639,11 @@ class VectorRebuildService:
                         continue
                     metadata = getattr(vector, "metadata", None) or {}
                     result["records_scanned"] += 1
+                    message_id, passage_index = parse_memory_record_id(record_id)
+                    if passage_index is not None:
+                        # Reassembled once all of this index's records are read
+                        passages.setdefault(message_id, {})[passage_index] = metadata
+                        continue
                     self._merge_record(
                         recovered,
                         conv_indexes,
@@ -442,6 +653,16 @@ class VectorRebuildService:
                         label_to_index,
                     )
 
+            for message_id, parts in passages.items():
+                self._merge_record(
+                    recovered,
+                    conv_indexes,
+                    message_id,
+                    self._join_passages(parts),
+                    index_name,
+                    label_to_index,
+                )
+
         result["unique_messages"] = len(recovered)
         if not recovered:
             return result
@@ -537,6 +758,25 @@ class VectorRebuildService:
 
         return result
 
+    @staticmethod
+    def _join_passages(parts: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Metadata for a message stored as passage records: the first passage's
+        metadata with the passages' text joined back together. Passages were
+        split at paragraph (or line) breaks, so the join restores the text up
+        to whitespace at those breaks.
+        """
+        ordered = [parts[n] for n in sorted(parts)]
+        metadata = dict(ordered[0])
+        texts = [part.get("text") or "" for part in ordered]
+        metadata["text"] = "\n\n".join(t for t in texts if t)
+        if len(parts) < int(metadata.get("passage_count") or len(parts)):
+            logger.warning(
+                f"[RESTORE] Message {metadata.get('message_id', '?')[:8]}... has "
+                f"{len(parts)} of {metadata.get('passage_count')} passages; restoring what exists"
+            )
+        return metadata
+
     @staticmethod
     def _merge_record(
         recovered: Dict[str, Dict[str, Any]],
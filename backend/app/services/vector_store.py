@@ -0,0 +1,677 @@
+"""
+Vector store backends for entity memories and notes.
+
+MemoryService and NotesVectorService talk to each entity's vector index
+through a small subset of the Pinecone Index API: upsert_records, search,
+fetch, update, delete, list_paginated and describe_index_stats. VectorStore
+spells that subset out, and there are two backends behind it:
+
+- "pinecone" (the default): the Pinecone SDK's Index object itself. Embedding
+  happens server side through integrated inference.
+- "local": LocalVectorStore, an in-process store. Vectors live in a
+  memory-mapped NumPy matrix per namespace, record metadata in a SQLite
+  sidecar file, and search runs in-process - an exact scan for small
+  namespaces, an IVF (inverted file) index once a namespace grows past
+  settings.local_vector_ivf_min_records. There is no network round trip, and
+  the whole memory pipeline runs offline.
+
+The backend is chosen per entity with the "vector_backend" key of its
+PINECONE_INDEXES entry ("pinecone" or "local").
+
+LocalVectorStore returns the same response shapes callers already read from
+the Pinecone SDK (search().result.hits, fetch().vectors[id].metadata,
+list_paginated().vectors / .pagination.next), so no caller branches on the
+backend.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Protocol
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+VECTOR_BACKEND_PINECONE = "pinecone"
+VECTOR_BACKEND_LOCAL = "local"
+VALID_VECTOR_BACKENDS = (VECTOR_BACKEND_PINECONE, VECTOR_BACKEND_LOCAL)
+
+# Directory name used on disk for the default ("") namespace
+_DEFAULT_NAMESPACE_DIR = "__default__"
+# Rows allocated when a namespace's vector file is first created; the file
+# doubles in size whenever it fills up
+_INITIAL_CAPACITY = 1024
+# Iterations of spherical k-means when (re)training an IVF index
+_IVF_TRAIN_ITERATIONS = 10
+# Training sample size per IVF list
+_IVF_SAMPLE_PER_LIST = 64
+
+
+def uses_local_backend(entity) -> bool:
+    """Whether an entity config selects the in-process vector store."""
+    return entity is not None and getattr(entity, "vector_backend", None) == VECTOR_BACKEND_LOCAL
+
+
+def vector_store_configured(settings_obj=None) -> bool:
+    """
+    Whether any vector store is available: a Pinecone API key, or at least
+    one entity on the local backend (which needs no key).
+    """
+    settings_obj = settings_obj or settings
+    if settings_obj.pinecone_api_key:
+        return True
+    try:
+        return any(uses_local_backend(entity) for entity in settings_obj.get_entities())
+    except ValueError:
+        # Invalid PINECONE_INDEXES JSON; surfaced wherever entities are used
+        return False
+
+
+class VectorStore(Protocol):
+    """
+    The index operations the memory and notes services rely on.
+
+    Records are dicts with an "_id", a "text" field that the backend embeds,
+    and flat metadata fields. Metadata filters use Pinecone's syntax: a dict
+    of field -> value or field -> {"$eq" | "$ne" | "$in" | "$nin": operand},
+    with multiple fields ANDed.
+    """
+
+    def upsert_records(self, namespace: str, records: List[Dict[str, Any]]) -> Any: ...
+
+    def search(self, namespace: str, query: Dict[str, Any]) -> Any: ...
+
+    def fetch(self, ids: List[str], namespace: str = "") -> Any: ...
+
+    def update(
+        self,
+        id: str,
+        set_metadata: Optional[Dict[str, Any]] = None,
+        namespace: str = "",
+    ) -> Any: ...
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        delete_all: bool = False,
+        namespace: str = "",
+    ) -> Any: ...
+
+    def list_paginated(
+        self,
+        prefix: Optional[str] = None,
+        limit: int = 100,
+        pagination_token: Optional[str] = None,
+        namespace: str = "",
+    ) -> Any: ...
+
+    def describe_index_stats(self) -> Any: ...
+
+
+# ---------------------------------------------------------------------------
+# Embedding
+# ---------------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@lru_cache(maxsize=200_000)
+def _feature_slot(feature: str, dimension: int) -> tuple:
+    """Stable (bucket, sign) for a hashed feature. hash() is salted per process."""
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dimension, 1.0 if (value >> 63) & 1 else -1.0
+
+
+class HashingEmbedder:
+    """
+    Dependency-free embedder: feature hashing of words and character
+    trigrams into a fixed-width vector, L2-normalized.
+
+    Similarity is lexical rather than semantic, so scores run lower than a
+    neural model's and settings.similarity_threshold may need lowering for
+    local entities. Set settings.local_embedding_model to use a
+    sentence-transformers model instead.
+    """
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    def _features(self, text: str) -> Dict[str, float]:
+        counts: Dict[str, float] = {}
+        for word in _TOKEN_RE.findall(text.lower()):
+            counts[f"w:{word}"] = counts.get(f"w:{word}", 0.0) + 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                gram = f"c:{padded[i:i + 3]}"
+                counts[gram] = counts.get(gram, 0.0) + 0.5
+        return counts
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text or "").items():
+                slot, sign = _feature_slot(feature, self.dimension)
+                # Sublinear term frequency keeps long messages from being
+                # dominated by their most repeated words
+                matrix[row, slot] += sign * (1.0 + math.log(count)) if count >= 1 else sign * count
+        return _normalize_rows(matrix)
+
+
+class SentenceTransformerEmbedder:
+    """Embedder backed by a sentence-transformers model (optional dependency)."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name)
+        self.dimension = int(self._model.get_sentence_embedding_dimension())
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self._model.encode(list(texts), convert_to_numpy=True, show_progress_bar=False)
+        return _normalize_rows(np.asarray(vectors, dtype=np.float32))
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_local_embedder():
+    """The process-wide embedder for local vector stores (created on first use)."""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            if settings.local_embedding_model:
+                try:
+                    _embedder = SentenceTransformerEmbedder(settings.local_embedding_model)
+                    logger.info(
+                        f"[VECTOR] Local embeddings: {settings.local_embedding_model} "
+                        f"(dim={_embedder.dimension})"
+                    )
+                except ImportError:
+                    logger.warning(
+                        "sentence-transformers not installed - falling back to the "
+                        "hashing embedder for local vector stores"
+                    )
+            if _embedder is None:
+                _embedder = HashingEmbedder(settings.local_embedding_dim)
+        return _embedder
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# ---------------------------------------------------------------------------
+# Metadata filters
+# ---------------------------------------------------------------------------
+
+def metadata_matches(metadata: Dict[str, Any], metadata_filter: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Pinecone-style metadata filter against one record's metadata."""
+    if not metadata_filter:
+        return True
+    for key, condition in metadata_filter.items():
+        if key == "$and":
+            if not all(metadata_matches(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(metadata_matches(metadata, sub) for sub in condition):
+                return False
+            continue
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, operand in condition.items():
+            if op == "$eq":
+                ok = value == operand
+            elif op == "$ne":
+                ok = value != operand
+            elif op == "$in":
+                ok = value in operand
+            elif op == "$nin":
+                ok = value not in operand
+            elif op == "$exists":
+                ok = (key in metadata) == bool(operand)
+            else:
+                raise ValueError(f"Unsupported metadata filter operator: {op}")
+            if not ok:
+                return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Local store
+# ---------------------------------------------------------------------------
+
+class _LocalNamespace:
+    """
+    One namespace of a LocalVectorStore: a memory-mapped (capacity, dim)
+    float32 matrix plus a SQLite table mapping record IDs to matrix rows and
+    metadata. Metadata is also held in memory for filter evaluation.
+
+    Not thread-safe on its own; LocalVectorStore serializes access.
+    """
+
+    def __init__(self, path: Path, dimension: int):
+        path.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.dimension = dimension
+        self._vectors_path = path / "vectors.npy"
+
+        self._db = sqlite3.connect(str(path / "records.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records "
+            "(id TEXT PRIMARY KEY, row INTEGER NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        stored = self._db.execute("SELECT value FROM meta WHERE key = 'dimension'").fetchone()
+        if stored is None:
+            self._db.execute(
+                "INSERT INTO meta (key, value) VALUES ('dimension', ?)", (str(dimension),)
+            )
+            self._db.commit()
+        elif int(stored[0]) != dimension:
+            raise ValueError(
+                f"Local vector store at {path} has dimension {stored[0]}, but the configured "
+                f"embedder produces {dimension}. Delete the directory and rebuild vectors "
+                f"from the database."
+            )
+
+        if self._vectors_path.exists():
+            self._vectors = np.lib.format.open_memmap(self._vectors_path, mode="r+")
+        else:
+            self._vectors = np.lib.format.open_memmap(
+                self._vectors_path, mode="w+", dtype=np.float32,
+                shape=(_INITIAL_CAPACITY, dimension),
+            )
+
+        self.row_of: Dict[str, int] = {}
+        self.metadata: Dict[int, Dict[str, Any]] = {}
+        self.ids_by_row: Dict[int, str] = {}
+        for record_id, row, metadata_json in self._db.execute(
+            "SELECT id, row, metadata FROM records"
+        ):
+            self.row_of[record_id] = row
+            self.ids_by_row[row] = record_id
+            self.metadata[row] = json.loads(metadata_json)
+
+        capacity = self._vectors.shape[0]
+        self._live = np.zeros(capacity, dtype=bool)
+        if self.ids_by_row:
+            self._live[list(self.ids_by_row)] = True
+        self._high_water = max(self.ids_by_row, default=-1) + 1
+        self._free_rows = [r for r in range(self._high_water) if r not in self.ids_by_row]
+        self._sorted_ids: Optional[List[str]] = None
+
+        # IVF state: centroids (nlist, dim) and each row's list (-1 = none)
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.full(capacity, -1, dtype=np.int32)
+        self._trained_count = 0
+
+    # -- storage -----------------------------------------------------------
+
+    def _grow(self) -> None:
+        old_capacity = self._vectors.shape[0]
+        new_capacity = old_capacity * 2
+        tmp_path = self.path / "vectors.npy.tmp"
+        grown = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=(new_capacity, self.dimension)
+        )
+        grown[:old_capacity] = self._vectors[:old_capacity]
+        grown.flush()
+        del grown
+        # Drop the old mapping before replacing the file (required on Windows)
+        self._vectors.flush()
+        self._vectors = None
+        os.replace(tmp_path, self._vectors_path)
+        self._vectors = np.lib.format.open_memmap(self._vectors_path, mode="r+")
+
+        self._live = np.concatenate([self._live, np.zeros(old_capacity, dtype=bool)])
+        self._assignments = np.concatenate(
+            [self._assignments, np.full(old_capacity, -1, dtype=np.int32)]
+        )
+
+    def _allocate_row(self) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+        if self._high_water >= self._vectors.shape[0]:
+            self._grow()
+        row = self._high_water
+        self._high_water += 1
+        return row
+
+    def upsert(self, records: List[tuple]) -> None:
+        """records: (id, vector, metadata) tuples."""
+        rows_written = []
+        for record_id, vector, metadata in records:
+            row = self.row_of.get(record_id)
+            if row is None:
+                row = self._allocate_row()
+                self.row_of[record_id] = row
+                self.ids_by_row[row] = record_id
+                self._sorted_ids = None
+            self._vectors[row] = vector
+            self.metadata[row] = metadata
+            self._live[row] = True
+            rows_written.append(row)
+            self._db.execute(
+                "INSERT OR REPLACE INTO records (id, row, metadata) VALUES (?, ?, ?)",
+                (record_id, row, json.dumps(metadata)),
+            )
+        self._db.commit()
+        self._vectors.flush()
+        if self._centroids is not None and rows_written:
+            rows = np.asarray(rows_written)
+            self._assignments[rows] = np.argmax(self._vectors[rows] @ self._centroids.T, axis=1)
+
+    def update_metadata(self, record_id: str, set_metadata: Dict[str, Any]) -> bool:
+        row = self.row_of.get(record_id)
+        if row is None:
+            return False
+        self.metadata[row].update(set_metadata)
+        self._db.execute(
+            "UPDATE records SET metadata = ? WHERE id = ?",
+            (json.dumps(self.metadata[row]), record_id),
+        )
+        self._db.commit()
+        return True
+
+    def delete(self, record_ids: Iterable[str]) -> None:
+        deleted = []
+        for record_id in record_ids:
+            row = self.row_of.pop(record_id, None)
+            if row is None:
+                continue
+            self.ids_by_row.pop(row, None)
+            self.metadata.pop(row, None)
+            self._live[row] = False
+            self._assignments[row] = -1
+            self._free_rows.append(row)
+            deleted.append(record_id)
+        if deleted:
+            self._sorted_ids = None
+            self._db.executemany("DELETE FROM records WHERE id = ?", [(d,) for d in deleted])
+            self._db.commit()
+
+    def delete_all(self) -> None:
+        self.delete(list(self.row_of))
+
+    def sorted_ids(self) -> List[str]:
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted(self.row_of)
+        return self._sorted_ids
+
+    def close(self) -> None:
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._db.close()
+
+    # -- search ------------------------------------------------------------
+
+    @property
+    def count(self) -> int:
+        return len(self.row_of)
+
+    def _maybe_train_ivf(self) -> None:
+        """(Re)train the IVF index once the namespace is large enough, and
+        again whenever it has doubled since the last training. Runs inside
+        the search call, which callers already make on a worker thread
+        (run_pinecone), so training never blocks the event loop."""
+        n = self.count
+        if n < settings.local_vector_ivf_min_records:
+            self._centroids = None
+            return
+        if self._centroids is not None and n < 2 * self._trained_count:
+            return
+
+        live_rows = np.flatnonzero(self._live)
+        # Never more lists than records (local_vector_ivf_min_records may be
+        # set below the floor of 16)
+        nlist = int(min(4096, n, max(16, math.sqrt(n))))
+        rng = np.random.default_rng(0)
+        sample_size = min(n, nlist * _IVF_SAMPLE_PER_LIST)
+        sample = np.asarray(self._vectors[rng.choice(live_rows, size=sample_size, replace=False)])
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+        for _ in range(_IVF_TRAIN_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = _normalize_rows(centroids)
+
+        # Assign in blocks so a large namespace isn't materialized at once
+        assignments = np.full(self._live.shape[0], -1, dtype=np.int32)
+        for start in range(0, len(live_rows), 8192):
+            block = live_rows[start:start + 8192]
+            assignments[block] = np.argmax(self._vectors[block] @ centroids.T, axis=1)
+
+        self._centroids = centroids
+        self._assignments = assignments
+        self._trained_count = n
+        logger.info(f"[VECTOR] Trained IVF index for {self.path} ({n} records, {nlist} lists)")
+
+    def _ranked_hits(
+        self,
+        rows: np.ndarray,
+        query_vector: np.ndarray,
+        top_k: int,
+        metadata_filter: Optional[Dict[str, Any]],
+    ) -> List[tuple]:
+        """Score rows against the query and return the best top_k (row, score)
+        pairs that pass the filter."""
+        if len(rows) == 0:
+            return []
+        scores = self._vectors[rows] @ query_vector
+        # Partial sort first: most filters pass most records, so the best few
+        # multiples of top_k usually suffice without sorting everything
+        window = min(len(rows), max(top_k * 4, 32))
+        if window < len(rows):
+            candidates = np.argpartition(-scores, window - 1)[:window]
+            candidates = candidates[np.argsort(-scores[candidates])]
+        else:
+            candidates = np.argsort(-scores)
+
+        hits = []
+        seen = 0
+        while True:
+            for i in candidates[seen:]:
+                row = int(rows[i])
+                if metadata_matches(self.metadata[row], metadata_filter):
+                    hits.append((row, float(scores[i])))
+                    if len(hits) >= top_k:
+                        return hits
+            if len(candidates) == len(rows):
+                return hits
+            # The filter rejected too many; fall back to the full ordering
+            seen = len(candidates)
+            order = np.argsort(-scores)
+            picked = set(candidates.tolist())
+            candidates = np.concatenate(
+                [candidates, np.asarray([i for i in order if i not in picked], dtype=np.int64)]
+            )
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+    ) -> List[tuple]:
+        if top_k <= 0 or self.count == 0:
+            return []
+        self._maybe_train_ivf()
+        if self._centroids is not None:
+            nprobe = min(settings.local_vector_ivf_nprobe, len(self._centroids))
+            probe = np.argpartition(-(self._centroids @ query_vector), nprobe - 1)[:nprobe]
+            rows = np.flatnonzero(self._live & np.isin(self._assignments, probe))
+            hits = self._ranked_hits(rows, query_vector, top_k, metadata_filter)
+            if len(hits) >= top_k:
+                return hits
+            # Probed lists held too few matches (a selective filter, or a
+            # query far from everything); answer exactly instead
+        rows = np.flatnonzero(self._live)
+        return self._ranked_hits(rows, query_vector, top_k, metadata_filter)
+
+
+class LocalVectorStore:
+    """
+    In-process VectorStore for one entity, stored under
+    {settings.local_vector_store_dir}/{name}/{namespace}/.
+
+    Thread-safe: MemoryService runs index calls on worker threads
+    (run_pinecone), so every operation holds the store's lock.
+    """
+
+    def __init__(self, name: str, root_dir: Optional[str] = None, embedder=None):
+        self.name = name
+        self.root = Path(root_dir or settings.local_vector_store_dir) / _safe_dirname(name)
+        self._embedder = embedder
+        self._namespaces: Dict[str, _LocalNamespace] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = get_local_embedder()
+        return self._embedder
+
+    def _namespace(self, namespace: str) -> _LocalNamespace:
+        namespace = namespace or ""
+        ns = self._namespaces.get(namespace)
+        if ns is None:
+            dirname = _safe_dirname(namespace) if namespace else _DEFAULT_NAMESPACE_DIR
+            ns = _LocalNamespace(self.root / dirname, self.embedder.dimension)
+            self._namespaces[namespace] = ns
+        return ns
+
+    def upsert_records(self, namespace: str, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        vectors = self.embedder.embed([r.get("text", "") for r in records])
+        prepared = []
+        for record, vector in zip(records, vectors, strict=True):
+            record_id = str(record.get("_id") or record.get("id"))
+            metadata = {k: v for k, v in record.items() if k not in ("_id", "id")}
+            prepared.append((record_id, vector, metadata))
+        with self._lock:
+            self._namespace(namespace).upsert(prepared)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed a search query (normalized, like stored vectors)."""
+        return self.embedder.embed([text])[0]
+
+    def search(self, namespace: str, query: Dict[str, Any]):
+        top_k = int(query.get("top_k", 10))
+        # Pinecone's search accepts a precomputed {"vector": {"values": ...}}
+        # in place of {"inputs": {"text": ...}}; so does this store
+        if query.get("vector"):
+            query_vector = np.asarray(query["vector"]["values"], dtype=np.float32)
+        else:
+            query_vector = self.embed_query((query.get("inputs") or {}).get("text", ""))
+        with self._lock:
+            ns = self._namespace(namespace)
+            ranked = ns.search(query_vector, top_k, query.get("filter"))
+            hits = [
+                {"_id": ns.ids_by_row[row], "_score": score, "fields": dict(ns.metadata[row])}
+                for row, score in ranked
+            ]
+        return SimpleNamespace(result=SimpleNamespace(hits=hits))
+
+    def fetch(self, ids: List[str], namespace: str = ""):
+        with self._lock:
+            ns = self._namespace(namespace)
+            vectors = {}
+            for record_id in ids:
+                row = ns.row_of.get(record_id)
+                if row is not None:
+                    vectors[record_id] = SimpleNamespace(
+                        id=record_id, metadata=dict(ns.metadata[row])
+                    )
+        return SimpleNamespace(vectors=vectors, namespace=namespace)
+
+    def update(
+        self,
+        id: str,
+        set_metadata: Optional[Dict[str, Any]] = None,
+        namespace: str = "",
+    ) -> None:
+        if not set_metadata:
+            return
+        with self._lock:
+            self._namespace(namespace).update_metadata(id, set_metadata)
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        delete_all: bool = False,
+        namespace: str = "",
+    ) -> None:
+        with self._lock:
+            ns = self._namespace(namespace)
+            if delete_all:
+                ns.delete_all()
+            elif ids:
+                ns.delete(ids)
+
+    def list_paginated(
+        self,
+        prefix: Optional[str] = None,
+        limit: int = 100,
+        pagination_token: Optional[str] = None,
+        namespace: str = "",
+    ):
+        """IDs in sorted order; the pagination token is the last ID returned."""
+        with self._lock:
+            ids = self._namespace(namespace).sorted_ids()
+            start = bisect_left(ids, prefix) if prefix else 0
+            end = bisect_right(ids, prefix + "\U0010ffff") if prefix else len(ids)
+            if pagination_token:
+                start = max(start, bisect_right(ids, pagination_token))
+            page = ids[start:min(start + limit, end)]
+            has_more = start + limit < end
+        return SimpleNamespace(
+            vectors=[SimpleNamespace(id=record_id) for record_id in page],
+            pagination=SimpleNamespace(next=page[-1]) if has_more and page else None,
+            namespace=namespace,
+        )
+
+    def describe_index_stats(self):
+        with self._lock:
+            namespaces = {}
+            if self.root.exists():
+                for child in self.root.iterdir():
+                    if child.is_dir():
+                        name = "" if child.name == _DEFAULT_NAMESPACE_DIR else child.name
+                        namespaces[name] = SimpleNamespace(
+                            vector_count=self._namespace(name).count
+                        )
+        return SimpleNamespace(
+            total_vector_count=sum(ns.vector_count for ns in namespaces.values()),
+            dimension=self.embedder.dimension,
+            namespaces=namespaces,
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            for ns in self._namespaces.values():
+                ns.close()
+            self._namespaces.clear()
+
+
+def _safe_dirname(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
@@ -0,0 +1,110 @@
+"""
+Keyset (cursor) pagination for the listing endpoints.
+
+OFFSET pagination makes SQLite step over every skipped row, so deep pages get
+linearly slower. A keyset page instead starts strictly after the last row of
+the previous page: the WHERE clause compares the sort key, and the sort
+indexes take the query straight to the next row.
+
+A Keyset describes the ORDER BY (columns, direction, NULL placement, ending
+with a unique column as the tiebreak). The cursor is that key for the last row
+served, packed into an opaque URL-safe token. Endpoints return it in the
+X-Next-Cursor response header, so the JSON bodies keep their shape, and take
+it back as the `cursor` query parameter.
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import and_, false, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """A cursor that wasn't issued for this listing (or was tampered with)."""
+
+
+@dataclass(frozen=True)
+class KeyColumn:
+    column: Any
+    descending: bool = False
+    # SQLite puts NULLs first ascending and last descending unless told otherwise
+    nulls_first: Optional[bool] = None
+
+    @property
+    def sorts_nulls_first(self) -> bool:
+        return not self.descending if self.nulls_first is None else self.nulls_first
+
+    def order_by(self):
+        clause = self.column.desc() if self.descending else self.column.asc()
+        if self.nulls_first is None:
+            return clause
+        return clause.nulls_first() if self.nulls_first else clause.nulls_last()
+
+    def equal(self, value):
+        return self.column.is_(None) if value is None else self.column == value
+
+    def after(self, value):
+        """Rows that sort strictly after `value` in this column."""
+        if value is None:
+            return self.column.is_not(None) if self.sorts_nulls_first else false()
+        beyond = self.column < value if self.descending else self.column > value
+        return beyond if self.sorts_nulls_first else or_(beyond, self.column.is_(None))
+
+
+class Keyset:
+    """An ORDER BY whose last column is unique, and its cursors."""
+
+    def __init__(self, *columns: KeyColumn):
+        self.columns = columns
+
+    def order_by(self) -> List[Any]:
+        return [key.order_by() for key in self.columns]
+
+    def after(self, values: Sequence[Any]):
+        """WHERE clause for the rows following the row whose key is `values`."""
+        clauses = []
+        for i, key in enumerate(self.columns):
+            prefix = [self.columns[j].equal(values[j]) for j in range(i)]
+            clauses.append(and_(*prefix, key.after(values[i])))
+        return or_(*clauses)
+
+    def paginate(self, query, cursor: Optional[str]):
+        """Apply the ORDER BY and, given a cursor, start after it (raises InvalidCursor)."""
+        if cursor:
+            query = query.where(self.after(self.decode(cursor)))
+        return query.order_by(*self.order_by())
+
+    def key(self, row) -> List[Any]:
+        """Sort key of a loaded ORM row."""
+        return [getattr(row, key.column.key) for key in self.columns]
+
+    def encode(self, values: Sequence[Any]) -> str:
+        payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> List[Any]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            if not isinstance(payload, list) or len(payload) != len(self.columns):
+                raise ValueError("wrong key length")
+            values = []
+            for key, value in zip(self.columns, payload, strict=True):
+                if value is not None and key.column.type.python_type is datetime:
+                    value = datetime.fromisoformat(value)
+                values.append(value)
+            return values
+        except (ValueError, TypeError, NotImplementedError) as e:
+            raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+    def next_cursor(self, rows: Sequence[Any], limit: Optional[int]) -> Optional[str]:
+        """Cursor for the page after `rows`, or None when this was the last page."""
+        if not limit or len(rows) < limit:
+            return None
+        return self.encode(self.key(rows[-1]))
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark memory retrieval quality: semantic, lexical and hybrid (fused).
+
+Builds a throwaway SQLite database and local vector store holding synthetic
+memories. Each memory is one of a few templated situations tagged with a rare
+token (a ticket identifier, a made-up name or a date), so many memories are
+near-paraphrases of each other and only the token tells them apart. Queries
+describe one memory in different words but name its token. The script reports
+recall@k and MRR over those queries for the vector search alone, the BM25
+search on rare terms alone (services/hybrid_retrieval.py) and their
+reciprocal-rank fusion, plus the mean latency of the lexical leg.
+
+The vector search uses the configured local embedder (LOCAL_EMBEDDING_MODEL,
+or the hashing embedder when unset).
+
+Run from the backend directory:
+    python benchmark_hybrid_retrieval.py [--memories 3000] [--filler 6000] [--queries 300]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.database import Base
+from app.models import Conversation, Message
+from app.services.hybrid_retrieval import fuse_candidates, search_lexical
+from app.services.vector_store import LocalVectorStore, get_local_embedder
+
+ENTITY_ID = "benchmark"
+CANDIDATES = 10  # Per leg, as SessionManager fetches per query
+
+# (memory template, query template) pairs; {token} is the distinguishing token
+SITUATIONS = [
+    (
+        "The login page kept timing out for customers; we tracked it as {token}.",
+        "What was the story with {token}, the sign-in problem?",
+    ),
+    (
+        "I finally met {token} for coffee and we talked about moving to the coast.",
+        "Remind me what {token} and I discussed when we got coffee.",
+    ),
+    (
+        "Our anniversary dinner is booked for {token} at the Italian place downtown.",
+        "Which restaurant did we pick for the dinner on {token}?",
+    ),
+    (
+        "The nightly backup job {token} failed again because the disk filled up.",
+        "Why did backup job {token} stop working?",
+    ),
+    (
+        "{token} recommended a book about the history of maps and navigation.",
+        "What was the book {token} told me to read?",
+    ),
+]
+FILLER = [
+    "How was your day?",
+    "I think I'll make pasta tonight.",
+    "The weather has been lovely this week.",
+    "Thanks, that really helps.",
+    "Let's pick this up again tomorrow.",
+    "I've been sleeping badly lately.",
+]
+SYLLABLES = ["ka", "lo", "mir", "ven", "tal", "sor", "dun", "ela", "quin", "bar", "zet", "ori"]
+
+
+def make_token(rng: random.Random, situation: int) -> str:
+    if situation in (0, 3):
+        return f"{rng.choice('ABCDEFGHJKMNPQRSTVWXYZ')}{rng.choice('ABCDEFGHJKMNPQRSTVWXYZ')}-{rng.randint(1000, 9999)}"
+    if situation == 2:
+        return (datetime(2020, 1, 1) + timedelta(days=rng.randint(0, 3000))).strftime("%Y-%m-%d")
+    name = "".join(rng.choice(SYLLABLES) for _ in range(3))
+    return name.capitalize()
+
+
+def build_corpus(memory_count: int, filler_count: int, query_count: int, seed: int = 42):
+    """Returns (messages, queries); each query is (text, expected message ID)."""
+    rng = random.Random(seed)
+    messages, queries, used = [], [], set()
+    for i in range(memory_count):
+        situation = i % len(SITUATIONS)
+        token = make_token(rng, situation)
+        while token in used:
+            token = make_token(rng, situation)
+        used.add(token)
+        message_id = str(uuid.uuid4())
+        messages.append((message_id, SITUATIONS[situation][0].format(token=token)))
+        queries.append((SITUATIONS[situation][1].format(token=token), message_id))
+    for _ in range(filler_count):
+        messages.append((str(uuid.uuid4()), rng.choice(FILLER)))
+    rng.shuffle(messages)
+    return messages, rng.sample(queries, min(query_count, len(queries)))
+
+
+async def populate(engine, store: LocalVectorStore, messages: list) -> None:
+    start = datetime(2024, 1, 1)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Conversation.__table__), [{
+            "id": "conv-memories",
+            "created_at": start,
+            "title": "Memories",
+            "conversation_type": "NORMAL",
+            "llm_model_used": "benchmark",
+            "entity_id": ENTITY_ID,
+            "is_archived": False,
+            "is_imported": False,
+        }])
+        rows = [
+            {
+                "id": message_id,
+                "conversation_id": "conv-memories",
+                "role": "HUMAN" if i % 2 == 0 else "ASSISTANT",
+                "content": content,
+                "created_at": start + timedelta(minutes=i),
+                "times_retrieved": 0,
+            }
+            for i, (message_id, content) in enumerate(messages)
+        ]
+        for i in range(0, len(rows), 10000):
+            await conn.execute(insert(Message.__table__), rows[i : i + 10000])
+
+    for i in range(0, len(messages), 500):
+        store.upsert_records("", [
+            {"_id": message_id, "text": content, "conversation_id": "conv-memories"}
+            for message_id, content in messages[i : i + 500]
+        ])
+
+
+def score(rankings: list, k: int) -> tuple:
+    """(recall@k, MRR) over (ranked IDs, expected ID) pairs."""
+    hits, reciprocal = 0, 0.0
+    for ranked, expected in rankings:
+        if expected in ranked[:k]:
+            hits += 1
+        if expected in ranked:
+            reciprocal += 1.0 / (ranked.index(expected) + 1)
+    return hits / len(rankings), reciprocal / len(rankings)
+
+
+async def main(memory_count: int, filler_count: int, query_count: int, k: int, rrf_k: int, max_doc_fraction: float):
+    messages, queries = build_corpus(memory_count, filler_count, query_count)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        store = LocalVectorStore(ENTITY_ID, root_dir=tmp, embedder=get_local_embedder())
+        print(f"Indexing {len(messages)} messages ({memory_count} tagged memories)...")
+        await populate(engine, store, messages)
+
+        results = {"semantic": [], "lexical": [], "hybrid": []}
+        lexical_seconds = 0.0
+        session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_maker() as db:
+            for text, expected in queries:
+                hits = store.search("", {"inputs": {"text": text}, "top_k": CANDIDATES}).result.hits
+                semantic = [{"id": hit["_id"], "score": hit["_score"]} for hit in hits]
+                started = time.perf_counter()
+                lexical = await search_lexical(
+                    db, text, ENTITY_ID, None, CANDIDATES, max_doc_fraction=max_doc_fraction,
+                )
+                lexical_seconds += time.perf_counter() - started
+                hybrid = fuse_candidates(semantic, lexical, CANDIDATES, k=rrf_k)
+                for label, candidates in (("semantic", semantic), ("lexical", lexical), ("hybrid", hybrid)):
+                    results[label].append(([c["id"] for c in candidates], expected))
+        store.close()
+        await engine.dispose()
+
+    print(f"\n{len(queries)} queries, embedder={type(store.embedder).__name__}, rrf_k={rrf_k}")
+    print(f"{'retrieval':<12}{f'recall@{k}':>12}{'MRR':>10}")
+    for label, rankings in results.items():
+        recall, mrr = score(rankings, k)
+        print(f"{label:<12}{recall:>12.3f}{mrr:>10.3f}")
+    print(f"\nLexical leg: {lexical_seconds / len(queries) * 1000:.2f} ms per query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--memories", type=int, default=3000)
+    parser.add_argument("--filler", type=int, default=6000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5, help="Cutoff for recall@k")
+    parser.add_argument("--rrf-k", type=int, default=settings.hybrid_rrf_k)
+    parser.add_argument("--max-doc-fraction", type=float, default=settings.hybrid_lexical_max_doc_fraction)
+    args = parser.parse_args()
+    asyncio.run(main(args.memories, args.filler, args.queries, args.k, args.rrf_k, args.max_doc_fraction))
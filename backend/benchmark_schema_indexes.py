@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark the hot query shapes with and without the schema indexes.
+
+Builds a throwaway SQLite database with synthetic conversations, messages and
+memory links, times the session-load, memory-link reload and conversation-list
+queries with no secondary indexes, then runs the schema index migration
+(database._migrate_schema) and times them again.
+
+Run from the backend directory:
+    python benchmark_schema_indexes.py [--messages 120000] [--conversations 2400]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import Base, _migrate_schema
+from app.models import Conversation, ConversationMemoryLink, Message
+
+QUERIES = {
+    "session load (messages)": (
+        "SELECT * FROM messages WHERE conversation_id = :conversation_id "
+        "ORDER BY created_at"
+    ),
+    "session load (memory links)": (
+        "SELECT message_id, retrieved_at, passage_index FROM conversation_memory_links "
+        "WHERE conversation_id = :conversation_id AND entity_id = :entity_id "
+        "ORDER BY retrieved_at"
+    ),
+    "conversation list": (
+        "SELECT * FROM conversations WHERE is_archived = 0 AND is_imported = 0 "
+        "ORDER BY updated_at DESC, created_at DESC LIMIT 50"
+    ),
+}
+
+
+async def populate(engine, message_count: int, conversation_count: int) -> list:
+    """Fill the database; returns the conversation IDs."""
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    conversation_ids = [str(uuid.uuid4()) for _ in range(conversation_count)]
+    conversations = [
+        {
+            "id": conv_id,
+            "created_at": start + timedelta(minutes=i),
+            "updated_at": start + timedelta(minutes=i, seconds=rng.randint(0, 10**6)),
+            "title": f"Conversation {i}",
+            "conversation_type": "NORMAL",
+            "llm_model_used": "benchmark",
+            "entity_id": "entity-a",
+            "is_archived": rng.random() < 0.1,
+            "is_imported": rng.random() < 0.2,
+        }
+        for i, conv_id in enumerate(conversation_ids)
+    ]
+    messages = [
+        {
+            "id": str(uuid.uuid4()),
+            "conversation_id": rng.choice(conversation_ids),
+            "role": "HUMAN" if i % 2 == 0 else "ASSISTANT",
+            "content": f"Message {i} " + "lorem ipsum " * 20,
+            "created_at": start + timedelta(seconds=i),
+            "times_retrieved": 0,
+        }
+        for i in range(message_count)
+    ]
+    links = [
+        {
+            "id": str(uuid.uuid4()),
+            "conversation_id": rng.choice(conversation_ids),
+            "message_id": rng.choice(messages)["id"],
+            "entity_id": "entity-a",
+            "retrieved_at": start + timedelta(seconds=i),
+        }
+        for i in range(message_count // 2)
+    ]
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Conversation.__table__), conversations)
+        for i in range(0, len(messages), 10000):
+            await conn.execute(insert(Message.__table__), messages[i : i + 10000])
+        for i in range(0, len(links), 10000):
+            await conn.execute(insert(ConversationMemoryLink.__table__), links[i : i + 10000])
+
+        # Start from the pre-migration state: no secondary indexes
+        result = await conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type='index' AND name LIKE 'ix_%'"
+        ))
+        for (name,) in result.fetchall():
+            await conn.execute(text(f"DROP INDEX {name}"))
+        await conn.execute(text("PRAGMA user_version = 0"))
+
+    return conversation_ids
+
+
+async def time_queries(engine, conversation_ids: list, repeats: int) -> dict:
+    """Mean milliseconds per query shape."""
+    rng = random.Random(7)
+    timings = {}
+    async with engine.connect() as conn:
+        for label, sql in QUERIES.items():
+            elapsed = 0.0
+            for _ in range(repeats):
+                params = {"conversation_id": rng.choice(conversation_ids), "entity_id": "entity-a"}
+                started = time.perf_counter()
+                (await conn.execute(text(sql), params)).fetchall()
+                elapsed += time.perf_counter() - started
+            timings[label] = elapsed / repeats * 1000
+    return timings
+
+
+async def main(message_count: int, conversation_count: int, repeats: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        print(f"Populating {message_count} messages across {conversation_count} conversations...")
+        conversation_ids = await populate(engine, message_count, conversation_count)
+
+        before = await time_queries(engine, conversation_ids, repeats)
+        async with engine.begin() as conn:
+            await conn.run_sync(_migrate_schema)
+        after = await time_queries(engine, conversation_ids, repeats)
+        await engine.dispose()
+
+    print(f"\n{'query':<30}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for label in QUERIES:
+        speedup = before[label] / after[label] if after[label] else float("inf")
+        print(f"{label:<30}{before[label]:>14.2f}{after[label]:>14.2f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=120000)
+    parser.add_argument("--conversations", type=int, default=2400)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.conversations, args.repeats))
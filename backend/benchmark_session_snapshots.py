@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark session reload: full rebuild from the database vs snapshot restore.
+
+Builds a throwaway SQLite database holding one long conversation: turns of
+human and assistant messages, a memory_query tool exchange every few turns
+(whose results the rebuild resolves back to memory IDs), and memory links to
+memories in another conversation. It then times
+SessionManager.load_session_from_db with snapshots off (the full rebuild,
+with a cold memory content cache as after a restart) and with a valid
+snapshot (session_snapshots.py).
+
+Run from the backend directory:
+    python benchmark_session_snapshots.py [--messages 1000] [--links 100] [--repeats 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.database import Base
+from app.models import Conversation, ConversationMemoryLink, Message
+from app.services.cache_service import cache_service
+from app.services.session_manager import SessionManager
+from app.services.session_snapshots import session_snapshots
+
+CONVERSATION_ID = "bench-conversation"
+TOOL_EXCHANGE_EVERY = 5  # Turns
+
+
+async def populate(engine, message_count: int, link_count: int) -> None:
+    start = datetime(2025, 1, 1)
+    memory_ids = [str(uuid.uuid4()) for _ in range(link_count)]
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Conversation.__table__), [
+            {
+                "id": conv_id,
+                "created_at": start,
+                "updated_at": start,
+                "title": title,
+                "conversation_type": "NORMAL",
+                "llm_model_used": settings.default_model,
+                "entity_id": "benchmark",
+                "is_archived": False,
+                "is_imported": False,
+            }
+            for conv_id, title in ((CONVERSATION_ID, "Long conversation"), ("bench-source", "Memories"))
+        ])
+        await conn.execute(insert(Message.__table__), [
+            {
+                "id": memory_id,
+                "conversation_id": "bench-source",
+                "role": "ASSISTANT",
+                "content": f"An older memory, number {i}, about the garden and the weather. " * 4,
+                "created_at": start - timedelta(days=30, minutes=i),
+                "times_retrieved": 1,
+            }
+            for i, memory_id in enumerate(memory_ids)
+        ])
+
+        rows, turn, at = [], 0, start
+        while len(rows) < message_count:
+            at += timedelta(minutes=1)
+            rows.append({"role": "HUMAN", "content": f"Turn {turn}: tell me more about it. " * 6})
+            if turn % TOOL_EXCHANGE_EVERY == 0:
+                tool_id = f"toolu_{turn}"
+                surfaced = memory_ids[turn % link_count] if link_count else "00000000"
+                rows.append({"role": "TOOL_USE", "content": json.dumps([
+                    {"type": "tool_use", "id": tool_id, "name": "memory_query", "input": {"query": "garden"}},
+                ])})
+                rows.append({"role": "TOOL_RESULT", "content": json.dumps([{
+                    "type": "tool_result",
+                    "tool_use_id": tool_id,
+                    "content": f"--- Memory {surfaced[:8]} (I said, 30.0 days ago, similarity: 0.812) ---\nThe garden.",
+                }])})
+            rows.append({"role": "ASSISTANT", "content": f"Here is a longer answer for turn {turn}. " * 12})
+            turn += 1
+        await conn.execute(insert(Message.__table__), [
+            {
+                "id": str(uuid.uuid4()),
+                "conversation_id": CONVERSATION_ID,
+                "created_at": start + timedelta(seconds=i),
+                "times_retrieved": 0,
+                **row,
+            }
+            for i, row in enumerate(rows[:message_count])
+        ])
+        await conn.execute(insert(ConversationMemoryLink.__table__), [
+            {
+                "id": str(uuid.uuid4()),
+                "conversation_id": CONVERSATION_ID,
+                "message_id": memory_id,
+                "retrieved_at": start + timedelta(seconds=i * message_count // max(link_count, 1)),
+                "entity_id": "benchmark",
+            }
+            for i, memory_id in enumerate(memory_ids)
+        ])
+
+
+async def time_loads(session_maker, repeats: int, cold_cache: bool) -> float:
+    """Mean milliseconds per load_session_from_db, each in a fresh manager."""
+    total = 0.0
+    for _ in range(repeats):
+        if cold_cache:
+            cache_service.clear_all()
+        manager = SessionManager()
+        async with session_maker() as db:
+            started = time.perf_counter()
+            session = await manager.load_session_from_db(CONVERSATION_ID, db)
+            total += time.perf_counter() - started
+    assert session is not None
+    return total / repeats * 1000
+
+
+async def main(message_count: int, link_count: int, repeats: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        print(f"Populating a {message_count}-message conversation with {link_count} memory links...")
+        await populate(engine, message_count, link_count)
+        session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        settings.notes_enabled = False
+        settings.session_snapshot_dir = os.path.join(tmp, "snapshots")
+
+        settings.session_snapshots_enabled = False
+        rebuild_ms = await time_loads(session_maker, repeats, cold_cache=True)
+
+        settings.session_snapshots_enabled = True
+        await time_loads(session_maker, 1, cold_cache=True)  # Writes the snapshot
+        snapshot_ms = await time_loads(session_maker, repeats, cold_cache=True)
+        stats = session_snapshots.get_stats()
+        size = sum(p.stat().st_size for p in session_snapshots.directory.glob("*.snap"))
+        await engine.dispose()
+
+    print(f"\n{'load':<20}{'ms per load':>14}")
+    print(f"{'full rebuild':<20}{rebuild_ms:>14.2f}")
+    print(f"{'snapshot restore':<20}{snapshot_ms:>14.2f}")
+    print(f"\nSpeedup {rebuild_ms / snapshot_ms:.1f}x; snapshot {size / 1024:.0f} KiB; "
+          f"hits={stats['hits']} misses={stats['misses']} writes={stats['writes']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--links", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.links, args.repeats))
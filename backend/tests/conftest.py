@@ -10,7 +10,7 @@ import pytest
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 
-from app.config import Settings
+from app.config import Settings, settings
 from app.database import Base
 from app.models import Conversation, ConversationType, Message, MessageRole
 
@@ -26,6 +26,12 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def session_snapshot_dir(tmp_path, monkeypatch):
+    """Keep session snapshots written by tests out of the working directory."""
+    monkeypatch.setattr(settings, "session_snapshot_dir", str(tmp_path / "session_snapshots"))
+
+
 @pytest.fixture
 async def test_engine():
     """Create a test database engine."""
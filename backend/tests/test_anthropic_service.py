@@ -872,6 +872,27 @@ class TestCacheBreakpointPlacement:
         last_cached_msg = messages[1]
         assert isinstance(last_cached_msg["content"], str)
 
+    def test_precomputed_history_tokens_skip_counting(self):
+        """A caller-supplied cached_history_tokens decides caching without tokenizing the history."""
+        service = AnthropicService()
+        mock_encoder = MagicMock()
+        service._encoder = mock_encoder
+
+        cached_context = [
+            {"role": "user", "content": "Short message"},
+            {"role": "assistant", "content": "Short reply"},
+        ]
+
+        messages = service.build_messages(
+            [], "Test",
+            cached_context=cached_context,
+            new_context=[],
+            cached_history_tokens=2000,
+        )
+
+        mock_encoder.encode.assert_not_called()
+        assert messages[1]["content"][0]["cache_control"]["type"] == "ephemeral"
+
     def test_cache_control_on_last_cached_history_message(self):
         """Test that cache_control is placed on last cached history message."""
         service = AnthropicService()
@@ -7,12 +7,14 @@ import threading
 import time
 from datetime import datetime, timedelta
 
+import numpy as np
 import pytest
 
 from app.services.cache_service import (
     CacheEntry,
     CacheService,
     TTLCache,
+    normalize_search_query,
 )
 
 
@@ -305,6 +307,43 @@ class TestCacheService:
         assert service.get_search_results("q2", "entity1", 5, None) is None
         assert service.get_search_results("q3", "entity2", 5, None) is not None
 
+    def test_search_cache_keys_on_normalized_query(self, service):
+        """Case, whitespace and a stamp_human_message prefix don't cause misses."""
+        assert normalize_search_query(
+            "[2026-01-05 14:32 UTC]   What did we  say about\nthe GARDEN? "
+        ) == "what did we say about the garden?"
+
+        service.set_search_results("What did we say about the garden?", "entity1", 5, None, [{"id": "1"}])
+        cached = service.get_search_results(
+            "[2026-01-05 14:32 UTC] what did we say  about the garden?", "entity1", 5, None
+        )
+        assert cached == [{"id": "1"}]
+
+    def test_search_cache_similarity_lookup(self, service):
+        """With query embeddings, a near-identical query reuses the entry."""
+        stored = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+        close = np.array([0.99, 0.141, 0.0], dtype=np.float32)
+        far = np.array([0.0, 1.0, 0.0], dtype=np.float32)
+        service.set_search_results(
+            "tomato garden", "entity1", 5, None, [{"id": "1"}], query_vector=stored
+        )
+
+        assert service.get_search_results(
+            "my tomato gardens", "entity1", 5, None, query_vector=close, similarity_threshold=0.95
+        ) == [{"id": "1"}]
+        assert service.get_search_results(
+            "tax filing", "entity1", 5, None, query_vector=far, similarity_threshold=0.95
+        ) is None
+        # Different bucket (entity) never matches
+        assert service.get_search_results(
+            "my tomato gardens", "entity2", 5, None, query_vector=close, similarity_threshold=0.95
+        ) is None
+
+        service.invalidate_search_cache_for_entity("entity1")
+        assert service.get_search_results(
+            "my tomato gardens", "entity1", 5, None, query_vector=close, similarity_threshold=0.95
+        ) is None
+
     def test_memory_content_cache(self, service):
         """Test memory content cache helpers."""
         content = {"id": "msg1", "content": "Test memory content"}
@@ -322,6 +361,19 @@ class TestCacheService:
         assert result is True
         assert service.get_memory_content("msg1") is None
 
+    def test_memory_stats_invalidation(self, service):
+        """Invalidating an entity drops its stats and the all-entities totals."""
+        for entity_id in ("entity-a", "entity-b", None):
+            service.set_memory_stats(entity_id, {"total_count": 1})
+
+        assert service.invalidate_memory_stats("entity-a") == 2
+        assert service.get_memory_stats("entity-a") is None
+        assert service.get_memory_stats(None) is None
+        assert service.get_memory_stats("entity-b") == {"total_count": 1}
+
+        service.invalidate_memory_stats()
+        assert service.get_memory_stats("entity-b") is None
+
     def test_github_tree_cache(self, service):
         """Test GitHub tree cache helpers."""
         tree_data = {"sha": "abc123", "tree": []}
@@ -69,6 +69,7 @@ class TestEntityConfig:
             "llm_provider": "anthropic",
             "default_model": "claude-sonnet-4-5-20250929",
             "host": None,
+            "vector_backend": "pinecone",
         }
 
 
@@ -227,15 +227,11 @@ class TestConversationSessionSharedMethods:
             {"role": "assistant", "content": "R2"},
         ]
 
-        # Always over limit until only 2 messages remain
-        def mock_count(text):
-            if len(session.conversation_context) > 2:
-                return 1000
-            return 10
-
+        # 11 tokens a message (10 + the joining newline): over limit until
+        # only 2 messages remain
         removed = session.trim_context_to_limit(
-            max_tokens=50,
-            count_tokens_fn=mock_count,
+            max_tokens=30,
+            count_tokens_fn=lambda text: 10,
         )
         # Should have removed user+assistant pair
         assert removed == 2
@@ -263,10 +259,11 @@ class TestConversationSessionSharedMethods:
         ]
         session.last_cached_context_length = 6
 
-        # Over limit until only 6 messages remain (removes the first 4).
+        # 11 tokens a message: over limit until only 6 messages remain
+        # (removes the first 4).
         removed = session.trim_context_to_limit(
-            max_tokens=50,
-            count_tokens_fn=lambda text: 1000 if len(session.conversation_context) > 6 else 10,
+            max_tokens=66,
+            count_tokens_fn=lambda text: 10,
         )
         assert removed == 4
         # Breakpoint shifts down by the number removed from the front.
@@ -281,13 +278,76 @@ class TestConversationSessionSharedMethods:
         session.last_cached_context_length = 2
 
         removed = session.trim_context_to_limit(
-            max_tokens=50,
-            count_tokens_fn=lambda text: 1000 if len(session.conversation_context) > 3 else 10,
+            max_tokens=33,
+            count_tokens_fn=lambda text: 10,
         )
         assert removed > 2
         assert session.last_cached_context_length == 0
 
 
+    def test_trim_tokenizes_each_message_once(self):
+        """Counts are cached on the messages: a later trim only tokenizes what was appended."""
+        session = ConversationSession(conversation_id="conv-1")
+        session.conversation_context = [
+            {"role": "user", "content": f"m{i}"} for i in range(6)
+        ]
+        counted = []
+
+        def count(text):
+            counted.append(text)
+            return 10
+
+        session.trim_context_to_limit(max_tokens=1000, count_tokens_fn=count)
+        assert len(counted) == 6
+        assert session.context_token_count(count) == 66
+
+        counted.clear()
+        session.conversation_context.append({"role": "assistant", "content": "new"})
+        removed = session.trim_context_to_limit(max_tokens=44, count_tokens_fn=count, current_message="next")
+
+        assert counted == ["assistant: new", "user: next"]
+        assert removed == 4  # 77 + 10 -> 43
+        assert session.context_token_count(count) == 33
+
+
+    def test_cached_prefix_count_is_memoized(self):
+        """The prefix count advances with the breakpoint and follows front trims without recounting."""
+        session = ConversationSession(conversation_id="conv-1")
+        session.conversation_context = [
+            {"role": "user", "content": f"m{i}"} for i in range(4)
+        ]
+        session.last_cached_context_length = 2
+        counted = []
+
+        def count(text):
+            counted.append(text)
+            return 10
+
+        assert session.cached_prefix_token_count(count) == 22
+        assert session.context_token_count(count) == 44
+
+        session.update_cache_state(4)
+        assert session.cached_prefix_token_count(count) == 44
+        # The memoized part isn't summed again
+        session.conversation_context[0]["token_count"] = 1000
+        assert session.cached_prefix_token_count(count) == 44
+        session.conversation_context[0]["token_count"] = 11
+
+        session.conversation_context.append({"role": "assistant", "content": "new"})
+        session.update_cache_state(5)
+        removed = session.trim_context_to_limit(max_tokens=40, count_tokens_fn=count)
+
+        assert removed == 2
+        assert session.last_cached_context_length == 3
+        # Trim subtracted the dropped messages' counts from the memo
+        assert session.cached_prefix_token_count(count) == 33
+        assert counted == [f"user: m{i}" for i in range(4)] + ["assistant: new"]
+
+        # A replaced context (e.g. regenerate truncation) is summed again
+        session.conversation_context = session.conversation_context[:2]
+        assert session.cached_prefix_token_count(count) == 22
+
+
 class TestTokenCalibration:
     """Tests for provider-usage token calibration."""
 
@@ -333,15 +393,12 @@ class TestTokenCalibration:
             {"role": "user", "content": "M2"},
             {"role": "assistant", "content": "R2"},
         ]
-        # Estimator says 90 (< 100 limit), but calibration says real usage
-        # runs 1.5x the estimate -> 135 (> 100), so trimming must kick in.
+        # Estimator says 44 (< 50 limit), but calibration says real usage
+        # runs 1.5x the estimate -> 66 (> 50), so trimming must kick in.
         session.record_prompt_usage(actual_tokens=150, estimated_tokens=100)
 
-        def mock_count(text):
-            return 90 if len(session.conversation_context) > 2 else 10
-
         removed = session.trim_context_to_limit(
-            max_tokens=100,
-            count_tokens_fn=mock_count,
+            max_tokens=50,
+            count_tokens_fn=lambda text: 10,
         )
         assert removed == 2
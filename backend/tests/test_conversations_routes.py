@@ -4,6 +4,7 @@ Integration tests for conversations routes.
 Tests conversation CRUD, archiving, and entity handling.
 """
 import uuid
+from datetime import datetime, timedelta
 from unittest.mock import patch
 
 import pytest
@@ -12,7 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from sqlalchemy.pool import StaticPool
 
 from app.config import EntityConfig
-from app.database import Base, get_db
+from app.database import Base, get_db, get_read_db
 from app.main import app
 from app.models import Conversation, Message, MessageRole
 
@@ -89,6 +90,7 @@ async def async_client(test_engine, mock_settings):
             yield session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -217,6 +219,55 @@ class TestListConversations:
         assert data[0]["message_count"] == 1
         assert "Hello" in data[0]["preview"]
 
+    @pytest.mark.asyncio
+    async def test_list_cleanup_spares_conversations_that_got_a_message(
+        self, async_client, test_engine
+    ):
+        """Empty conversations seen by the read snapshot are deleted only if
+        they are still empty when the cleanup writes."""
+        async_session = async_sessionmaker(
+            test_engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+        empty_id, answered_id = str(uuid.uuid4()), str(uuid.uuid4())
+        async with async_session() as session:
+            session.add(Conversation(id=empty_id, title="Empty", entity_id="test-entity"))
+            session.add(Conversation(id=answered_id, title="Answered", entity_id="test-entity"))
+            await session.commit()
+
+        class RacingSession(AsyncSession):
+            """Read session after whose listing query a message is sent."""
+            raced = False
+
+            async def execute(self, *args, **kwargs):
+                result = await super().execute(*args, **kwargs)
+                if not RacingSession.raced:
+                    RacingSession.raced = True
+                    async with async_session() as writer:
+                        writer.add(Message(
+                            conversation_id=answered_id,
+                            role=MessageRole.HUMAN,
+                            content="Sent while the list was loading",
+                        ))
+                        await writer.commit()
+                return result
+
+        read_session = async_sessionmaker(test_engine, class_=RacingSession, expire_on_commit=False)
+
+        async def override_get_read_db():
+            async with read_session() as session:
+                yield session
+
+        app.dependency_overrides[get_read_db] = override_get_read_db
+
+        response = await async_client.get("/api/conversations/")
+
+        assert response.status_code == 200
+        async with async_session() as session:
+            assert await session.get(Conversation, empty_id) is None
+            assert await session.get(Conversation, answered_id) is not None
+
     @pytest.mark.asyncio
     async def test_list_excludes_archived(self, async_client, test_engine):
         """Test that archived conversations are excluded by default."""
@@ -330,6 +381,39 @@ class TestListConversations:
         assert data[0]["entity_id"] == "entity-1"
 
 
+    @pytest.mark.asyncio
+    async def test_list_pages_with_cursor(self, async_client, test_engine):
+        """Cursor pages follow the list order, including never-updated conversations."""
+        async_session = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        start = datetime(2025, 1, 1)
+        async with async_session() as session:
+            for i in range(5):
+                conversation = Conversation(
+                    title=f"Conv {i}",
+                    created_at=start + timedelta(days=i),
+                    # Two conversations were never updated and list first
+                    updated_at=start + timedelta(days=10 + i) if i >= 2 else None,
+                )
+                session.add(conversation)
+                await session.flush()
+                session.add(Message(conversation_id=conversation.id, role=MessageRole.HUMAN, content="hi"))
+            await session.commit()
+
+        full = [c["title"] for c in (await async_client.get("/api/conversations/")).json()]
+        assert full == ["Conv 1", "Conv 0", "Conv 4", "Conv 3", "Conv 2"]
+
+        titles, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = await async_client.get("/api/conversations/", params=params)
+            titles += [c["title"] for c in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert titles == full
+
+
 class TestGetConversation:
     """Tests for getting a specific conversation."""
 
@@ -550,6 +634,39 @@ class TestArchiveConversation:
         assert data["status"] == "unarchived"
         assert data["id"] == conv_id
 
+    @pytest.mark.asyncio
+    async def test_archive_and_unarchive_update_archived_index(self, async_client, test_engine):
+        """Archive/unarchive keep the in-memory archived set that filters
+        retrieval current, without it being reloaded from the database."""
+        from app.services import memory_service
+
+        async_session = async_sessionmaker(
+            test_engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+
+        conv_id = str(uuid.uuid4())
+        async with async_session() as session:
+            session.add(Conversation(id=conv_id, entity_id="test-entity", is_archived=False))
+            await session.commit()
+
+        with patch.object(memory_service, "_archived_by_entity", {}), \
+                patch.object(memory_service, "_archived_all", set()):
+            response = await async_client.post(f"/api/conversations/{conv_id}/archive")
+            assert response.status_code == 200
+            # Loaded index: the lookup needs no DB session
+            assert conv_id in await memory_service.get_archived_conversation_ids(
+                None, entity_id="test-entity"
+            )
+
+            response = await async_client.post(f"/api/conversations/{conv_id}/unarchive")
+            assert response.status_code == 200
+            assert conv_id not in await memory_service.get_archived_conversation_ids(
+                None, entity_id="test-entity"
+            )
+            assert conv_id not in await memory_service.get_archived_conversation_ids(None)
+
     @pytest.mark.asyncio
     async def test_unarchive_not_archived(self, async_client, test_engine):
         """Test unarchiving a conversation that isn't archived."""
@@ -742,6 +859,60 @@ class TestGetConversationMessages:
         assert data[0]["role"] == "human"
         assert data[1]["role"] == "assistant"
 
+    @staticmethod
+    async def _conversation_with_messages(test_engine, count):
+        async_session = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        conv_id = str(uuid.uuid4())
+        start = datetime(2025, 1, 1)
+        async with async_session() as session:
+            session.add(Conversation(id=conv_id, title="Paged", entity_id="test-entity"))
+            await session.flush()
+            for i in range(count):
+                session.add(Message(
+                    conversation_id=conv_id,
+                    role=MessageRole.HUMAN if i % 2 == 0 else MessageRole.ASSISTANT,
+                    content=f"Message {i}",
+                    created_at=start + timedelta(minutes=i),
+                ))
+            await session.commit()
+        return conv_id
+
+    @pytest.mark.asyncio
+    async def test_get_messages_pages_forward(self, async_client, test_engine):
+        """With a limit, pages continue after the X-Next-Cursor header."""
+        conv_id = await self._conversation_with_messages(test_engine, 5)
+
+        contents, cursor = [], None
+        for _ in range(3):
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = await async_client.get(f"/api/conversations/{conv_id}/messages", params=params)
+            contents += [m["content"] for m in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+
+        assert contents == [f"Message {i}" for i in range(5)]
+        assert cursor is None
+
+    @pytest.mark.asyncio
+    async def test_get_messages_latest_pages_backward(self, async_client, test_engine):
+        """latest=true serves the newest messages first, each page in chronological order."""
+        conv_id = await self._conversation_with_messages(test_engine, 5)
+        url = f"/api/conversations/{conv_id}/messages"
+
+        response = await async_client.get(url, params={"limit": 2, "latest": True})
+        assert [m["content"] for m in response.json()] == ["Message 3", "Message 4"]
+
+        cursor = response.headers["X-Next-Cursor"]
+        response = await async_client.get(url, params={"limit": 2, "latest": True, "cursor": cursor})
+        assert [m["content"] for m in response.json()] == ["Message 1", "Message 2"]
+
+    @pytest.mark.asyncio
+    async def test_get_messages_rejects_bad_cursor(self, async_client, test_engine):
+        conv_id = await self._conversation_with_messages(test_engine, 1)
+        response = await async_client.get(
+            f"/api/conversations/{conv_id}/messages", params={"limit": 2, "cursor": "not-a-cursor"}
+        )
+        assert response.status_code == 400
+
     @pytest.mark.asyncio
     async def test_get_messages_nonexistent_conversation(self, async_client):
         """Test getting messages for a non-existent conversation."""
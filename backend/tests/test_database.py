@@ -0,0 +1,166 @@
+"""
+Tests for the SQLite connection profile and the versioned schema index
+migration (database.py).
+"""
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import SCHEMA_VERSION, _apply_sqlite_profile, _migrate_schema, sqlite_pragmas
+
+
+async def _index_names(engine):
+    async with engine.connect() as conn:
+        result = await conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type='index' AND name LIKE 'ix_%'"
+        ))
+        return {row[0] for row in result.fetchall()}
+
+
+async def _user_version(engine):
+    async with engine.connect() as conn:
+        return (await conn.execute(text("PRAGMA user_version"))).scalar()
+
+
+class TestMigrateIndexes:
+    async def test_creates_missing_indexes_and_records_version(self, test_engine):
+        # Simulate a database created before the indexes were declared
+        async with test_engine.begin() as conn:
+            for name in await _index_names(test_engine):
+                await conn.execute(text(f"DROP INDEX {name}"))
+            await conn.execute(text(
+                "CREATE INDEX ix_messages_conversation_id ON messages(conversation_id)"
+            ))
+            await conn.execute(text("PRAGMA user_version = 0"))
+
+        async with test_engine.begin() as conn:
+            await conn.run_sync(_migrate_schema)
+
+        names = await _index_names(test_engine)
+        assert {
+            "ix_messages_conversation_id_created_at",
+            "ix_messages_role_created_at",
+            "ix_conversation_memory_links_conversation_id_entity_id",
+            "ix_conversations_is_archived_is_imported_updated_at",
+            "ix_conversation_entities_conversation_id",
+        } <= names
+        assert "ix_messages_conversation_id" not in names
+        assert await _user_version(test_engine) == SCHEMA_VERSION
+
+    async def test_current_version_leaves_indexes_alone(self, test_engine):
+        async with test_engine.begin() as conn:
+            await conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
+            await conn.execute(text("DROP INDEX ix_messages_role_created_at"))
+
+        async with test_engine.begin() as conn:
+            await conn.run_sync(_migrate_schema)
+
+        assert "ix_messages_role_created_at" not in await _index_names(test_engine)
+
+
+    async def test_backfills_conversation_summaries(self, test_engine):
+        async with test_engine.begin() as conn:
+            await conn.execute(text(
+                "INSERT INTO conversations "
+                "(id, created_at, conversation_type, llm_model_used, is_archived, is_imported) "
+                "VALUES ('c1', '2025-01-01 09:00:00.000000', 'NORMAL', 'model', 0, 0)"
+            ))
+            await conn.execute(text(
+                "INSERT INTO messages (id, conversation_id, role, content, created_at, times_retrieved) VALUES "
+                "('m1', 'c1', 'HUMAN', 'Hello', '2025-01-01 10:00:00.000000', 0), "
+                "('m2', 'c1', 'ASSISTANT', 'Hi', '2025-01-01 10:01:00.000000', 0)"
+            ))
+            # A database from before the summaries: stale columns, no triggers
+            await conn.execute(text(
+                "UPDATE conversations SET message_count = 0, preview = NULL, last_message_at = NULL"
+            ))
+            await conn.execute(text("DROP TRIGGER trg_messages_summary_insert"))
+            await conn.execute(text("PRAGMA user_version = 1"))
+
+        async with test_engine.begin() as conn:
+            await conn.run_sync(_migrate_schema)
+            summary = (await conn.execute(text(
+                "SELECT message_count, preview, last_message_at FROM conversations WHERE id = 'c1'"
+            ))).one()
+            triggers = (await conn.execute(text(
+                "SELECT name FROM sqlite_master WHERE type='trigger' AND name = 'trg_messages_summary_insert'"
+            ))).fetchall()
+
+        assert tuple(summary) == (2, "Hello", "2025-01-01 10:01:00.000000")
+        assert triggers
+
+    async def test_rebuilds_message_search_index(self, test_engine):
+        async with test_engine.begin() as conn:
+            # A database from before the full-text index
+            await conn.execute(text("DROP TABLE messages_fts"))
+            await conn.execute(text("DROP TRIGGER trg_messages_fts_insert"))
+            await conn.execute(text("DROP TRIGGER trg_messages_fts_delete"))
+            await conn.execute(text("DROP TRIGGER trg_messages_fts_update"))
+            await conn.execute(text(
+                "INSERT INTO conversations "
+                "(id, created_at, conversation_type, llm_model_used, is_archived, is_imported) "
+                "VALUES ('c1', '2025-01-01 09:00:00.000000', 'NORMAL', 'model', 0, 0)"
+            ))
+            await conn.execute(text(
+                "INSERT INTO messages (id, conversation_id, role, content, created_at, times_retrieved) "
+                "VALUES ('m1', 'c1', 'HUMAN', 'An old kettle', '2025-01-01 10:00:00.000000', 0)"
+            ))
+            await conn.execute(text("PRAGMA user_version = 3"))
+
+        async with test_engine.begin() as conn:
+            await conn.run_sync(_migrate_schema)
+            await conn.execute(text(
+                "INSERT INTO messages (id, conversation_id, role, content, created_at, times_retrieved) "
+                "VALUES ('m2', 'c1', 'ASSISTANT', 'A new kettle', '2025-01-01 10:01:00.000000', 0)"
+            ))
+            matches = (await conn.execute(text(
+                "SELECT m.id FROM messages_fts JOIN messages m ON m.rowid = messages_fts.rowid "
+                "WHERE messages_fts MATCH 'kettle' ORDER BY m.id"
+            ))).scalars().all()
+
+        assert matches == ["m1", "m2"]
+
+
+class TestSqliteProfile:
+    def test_invalid_choices_fall_back_to_defaults(self):
+        with patch("app.database.settings") as mock_settings:
+            mock_settings.sqlite_journal_mode = "WAL"
+            mock_settings.sqlite_synchronous = "sometimes"
+            mock_settings.sqlite_busy_timeout_ms = 2500
+            mock_settings.sqlite_cache_size_kib = 1024
+            mock_settings.sqlite_mmap_size_mb = 8
+            mock_settings.sqlite_temp_store = "memory; DROP TABLE messages"
+            pragmas = sqlite_pragmas()
+
+        assert pragmas == [
+            "PRAGMA journal_mode = wal",
+            "PRAGMA busy_timeout = 2500",
+            "PRAGMA synchronous = normal",
+            "PRAGMA cache_size = -1024",
+            "PRAGMA mmap_size = 8388608",
+            "PRAGMA temp_store = memory",
+        ]
+
+    async def test_read_write_and_read_only_connections(self, tmp_path):
+        url = f"sqlite+aiosqlite:///{tmp_path / 'profile.db'}"
+        write_engine = create_async_engine(url)
+        read_engine = create_async_engine(url)
+        _apply_sqlite_profile(write_engine)
+        _apply_sqlite_profile(read_engine, read_only=True)
+        try:
+            async with write_engine.begin() as conn:
+                assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+                assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+                await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+                await conn.execute(text("INSERT INTO t VALUES (1)"))
+
+            async with read_engine.connect() as conn:
+                assert (await conn.execute(text("SELECT x FROM t"))).scalar() == 1
+                with pytest.raises(OperationalError):
+                    await conn.execute(text("INSERT INTO t VALUES (2)"))
+        finally:
+            await write_engine.dispose()
+            await read_engine.dispose()
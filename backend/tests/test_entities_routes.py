@@ -18,7 +18,7 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from sqlalchemy.pool import StaticPool
 
 from app.config import EntityConfig
-from app.database import Base, get_db
+from app.database import Base, get_db, get_read_db
 from app.models import EntitySetting
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -55,6 +55,7 @@ async def entities_client():
     app = FastAPI()
     app.include_router(router)
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
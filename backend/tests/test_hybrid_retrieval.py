@@ -0,0 +1,239 @@
+"""
+Tests for hybrid lexical + semantic retrieval (hybrid_retrieval.py): rank
+fusion, the rare-term lexical leg and its use in SessionManager.
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Conversation, ConversationEntity, Message, MessageRole
+from app.services.conversation_session import ConversationSession
+from app.services.hybrid_retrieval import (
+    describe_scores,
+    fuse_candidates,
+    lexical_candidates,
+    ranking_score,
+    reciprocal_rank_fusion,
+)
+from app.services.message_search import index_terms, rare_terms
+from app.services.session_manager import SessionManager
+
+
+@pytest.fixture
+def session_maker(test_engine):
+    return async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+def entity_settings():
+    """Entities a (labelled "Ada") and b (the default), for memory scoping."""
+    mock_settings = MagicMock()
+    mock_settings.get_default_entity.return_value = SimpleNamespace(index_name="entity-b")
+    mock_settings.get_entity_by_index.side_effect = lambda index: SimpleNamespace(
+        label={"entity-a": "Ada", "entity-b": "Bea"}.get(index)
+    )
+    with patch("app.services.message_search.settings", mock_settings):
+        yield mock_settings
+
+
+@pytest.fixture
+async def corpus(session_maker):
+    """Filler chatter plus a few messages naming a rare identifier; returns {label: message_id}."""
+    start = datetime(2025, 1, 1)
+    ids = {}
+    async with session_maker() as db:
+        own = Conversation(id="conv-own", title="Own", entity_id="entity-a")
+        shared = Conversation(id="conv-shared", title="Shared", entity_id="multi-entity")
+        foreign = Conversation(id="conv-foreign", title="Foreign", entity_id="multi-entity")
+        other = Conversation(id="conv-other", title="Other", entity_id="entity-b")
+        current = Conversation(id="conv-current", title="Current", entity_id="entity-a")
+        legacy = Conversation(id="conv-legacy", title="Legacy", entity_id=None)
+        db.add_all([own, shared, foreign, other, current, legacy])
+        db.add_all([
+            ConversationEntity(conversation_id="conv-shared", entity_id="entity-a"),
+            ConversationEntity(conversation_id="conv-shared", entity_id="entity-b"),
+            ConversationEntity(conversation_id="conv-foreign", entity_id="entity-b"),
+            ConversationEntity(conversation_id="conv-foreign", entity_id="entity-c"),
+        ])
+        await db.flush()
+        rows = [
+            (f"filler{i}", own, MessageRole.HUMAN, f"How was your day today, friend {i}?", None)
+            for i in range(50)
+        ]
+        rows += [
+            ("own", own, MessageRole.ASSISTANT, "The build broke on ticket QX-4471 again.", None),
+            ("shared", shared, MessageRole.HUMAN, "Did anyone look at QX-4471 today?", None),
+            ("shared_b", shared, MessageRole.ASSISTANT, "I looked at QX-4471.", "entity-b"),
+            ("reflection_a", shared, MessageRole.REFLECTION, "QX-4471 keeps coming back.", "entity-a"),
+            ("reflection_b", shared, MessageRole.REFLECTION, "I should own QX-4471.", "entity-b"),
+            ("tool", own, MessageRole.TOOL_RESULT, '{"ticket": "QX-4471"}', None),
+            ("foreign", foreign, MessageRole.ASSISTANT, "QX-4471 is closed.", None),
+            ("other", other, MessageRole.ASSISTANT, "QX-4471 came up here too.", None),
+            ("legacy", legacy, MessageRole.HUMAN, "Old notes on QX-4471.", None),
+            ("current", current, MessageRole.HUMAN, "What happened with QX-4471?", None),
+        ]
+        for i, (label, conversation, role, content, speaker) in enumerate(rows):
+            message = Message(
+                conversation_id=conversation.id, role=role, content=content,
+                speaker_entity_id=speaker, created_at=start + timedelta(minutes=i),
+            )
+            db.add(message)
+            await db.flush()
+            ids[label] = message.id
+        await db.commit()
+    return ids
+
+
+class TestRankFusion:
+    def test_reciprocal_rank_fusion(self):
+        scores = reciprocal_rank_fusion([["a", "b"], ["b", "c"]], k=10)
+        assert scores["a"] == pytest.approx(1 / 11)
+        assert scores["b"] == pytest.approx(1 / 12 + 1 / 11)
+        assert scores["c"] == pytest.approx(1 / 12)
+
+    def test_fuse_candidates(self):
+        semantic = [
+            {"id": "a", "score": 0.8, "passage_index": 2},
+            {"id": "b", "score": 0.6, "passage_index": None},
+        ]
+        lexical = [
+            {"id": "c", "score": None, "passage_index": None, "lexical_rank": 1},
+            {"id": "b", "score": None, "passage_index": None, "lexical_rank": 2},
+        ]
+
+        fused = fuse_candidates(semantic, lexical, limit=2, k=10)
+
+        # b is in both lists, so it outranks the single-list leaders
+        assert [c["id"] for c in fused] == ["b", "a"]
+        assert fused[0]["fused_score"] == pytest.approx((1 / 12 + 1 / 12) * 11 / 2)
+        # The vector similarity is kept as the score
+        assert fused[0]["score"] == 0.6
+        assert fused[0]["lexical_rank"] == 2
+        assert fused[1]["passage_index"] == 2
+        assert fused[1]["lexical_rank"] is None
+
+    def test_lexical_only_hits_have_no_similarity(self):
+        fused = fuse_candidates([], [{"id": "c", "score": None, "lexical_rank": 1}], limit=5, k=10)
+        assert fused[0]["score"] is None
+        assert ranking_score(fused[0]) == fused[0]["fused_score"]
+        assert describe_scores(None, fused[0]["fused_score"]) == "similarity=n/a fused=0.500"
+
+    def test_top_of_both_lists_scores_one(self):
+        fused = fuse_candidates([{"id": "a", "score": 0.9}], [{"id": "a", "score": None}], limit=5, k=60)
+        assert fused[0]["fused_score"] == pytest.approx(1.0)
+        assert ranking_score(fused[0]) == pytest.approx(1.0)
+        assert ranking_score({"id": "a", "score": 0.9}) == 0.9
+
+
+class TestRareTerms:
+    def test_index_terms_match_the_tokenizer(self):
+        assert index_terms("Café QX-4471, café snake_case") == ["cafe", "qx", "4471", "snake", "case"]
+
+    @pytest.mark.asyncio
+    async def test_common_and_unknown_terms_are_dropped(self, session_maker, corpus):
+        async with session_maker() as db:
+            terms = await rare_terms(db, "Was QX-4471 fixed today?", max_doc_fraction=0.2)
+        # "was"/"today" are in most messages, "fixed" in none
+        assert terms == ["qx", "4471"]
+
+
+class TestLexicalCandidates:
+    @pytest.mark.asyncio
+    async def test_matches_the_entity_memories(self, session_maker, corpus, entity_settings):
+        with patch("app.services.hybrid_retrieval.read_session_maker", session_maker), \
+             patch("app.services.hybrid_retrieval.settings") as mock_settings:
+            mock_settings.hybrid_lexical_max_doc_fraction = 0.2
+            candidates = await lexical_candidates(
+                "any news on QX-4471 today?",
+                entity_id="entity-a",
+                exclude_conversation_id="conv-current",
+                limit=10,
+            )
+
+        # Own and participating conversations only, and only the entity's own
+        # reflections; no legacy conversations (entity-a is not the default),
+        # tool results or current conversation
+        by_id = {c["id"]: c for c in candidates}
+        assert set(by_id) == {
+            corpus["own"], corpus["shared"], corpus["shared_b"], corpus["reflection_a"],
+        }
+        assert [c["lexical_rank"] for c in candidates] == [1, 2, 3, 4]
+        assert all(c["score"] is None and c["passage_index"] is None for c in candidates)
+        # Another entity's words carry its label, as in the vector index
+        assert by_id[corpus["shared_b"]]["role"] == "Bea"
+        assert by_id[corpus["own"]]["role"] == "assistant"
+
+    @pytest.mark.asyncio
+    async def test_default_entity_covers_legacy_conversations(
+        self, session_maker, corpus, entity_settings
+    ):
+        with patch("app.services.hybrid_retrieval.read_session_maker", session_maker), \
+             patch("app.services.hybrid_retrieval.settings") as mock_settings:
+            mock_settings.hybrid_lexical_max_doc_fraction = 0.2
+            candidates = await lexical_candidates(
+                "QX-4471", entity_id="entity-b", exclude_conversation_id=None, limit=20,
+            )
+
+        by_id = {c["id"]: c for c in candidates}
+        # The unattributed assistant message of a multi-entity conversation is
+        # in no index
+        assert set(by_id) == {
+            corpus["shared"], corpus["shared_b"], corpus["reflection_b"],
+            corpus["other"], corpus["legacy"],
+        }
+        assert by_id[corpus["shared_b"]]["role"] == "assistant"
+
+    @pytest.mark.asyncio
+    async def test_only_common_words_skips_the_search(self, session_maker, corpus):
+        with patch("app.services.hybrid_retrieval.read_session_maker", session_maker), \
+             patch("app.services.hybrid_retrieval.search_messages") as mock_search, \
+             patch("app.services.hybrid_retrieval.settings") as mock_settings:
+            mock_settings.hybrid_lexical_max_doc_fraction = 0.2
+            candidates = await lexical_candidates(
+                "how was your day", entity_id="entity-a", exclude_conversation_id=None, limit=10,
+            )
+        assert candidates == []
+        mock_search.assert_not_called()
+
+
+class TestSearchCandidates:
+    @pytest.mark.asyncio
+    async def test_hybrid_fuses_lexical_hits(self, session_maker, corpus, entity_settings):
+        session = ConversationSession(conversation_id="conv-current", entity_id="entity-a")
+        semantic = [{"id": corpus["filler3"], "score": 0.7, "conversation_id": "conv-own"}]
+
+        with patch("app.services.session_manager.memory_service") as mock_memory, \
+             patch("app.services.session_manager.settings") as mock_settings, \
+             patch("app.services.hybrid_retrieval.read_session_maker", session_maker), \
+             patch("app.services.hybrid_retrieval.settings") as mock_hybrid_settings:
+            mock_memory.search_memories = AsyncMock(return_value=semantic)
+            mock_settings.hybrid_retrieval_enabled = True
+            mock_hybrid_settings.hybrid_lexical_max_doc_fraction = 0.2
+            mock_hybrid_settings.hybrid_rrf_k = 60
+
+            candidates = await SessionManager()._search_candidates(session, "status of QX-4471?")
+
+        assert {c["id"] for c in candidates} == {
+            corpus["filler3"], corpus["own"], corpus["shared"], corpus["shared_b"],
+            corpus["reflection_a"],
+        }
+        mock_memory.search_memories.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_disabled_is_semantic_only(self):
+        session = ConversationSession(conversation_id="conv-current", entity_id="entity-a")
+        semantic = [{"id": "m1", "score": 0.7}]
+
+        with patch("app.services.session_manager.memory_service") as mock_memory, \
+             patch("app.services.session_manager.settings") as mock_settings, \
+             patch("app.services.session_manager.lexical_candidates") as mock_lexical:
+            mock_memory.search_memories = AsyncMock(return_value=semantic)
+            mock_settings.hybrid_retrieval_enabled = False
+
+            candidates = await SessionManager()._search_candidates(session, "status of QX-4471?")
+
+        assert candidates == semantic
+        mock_lexical.assert_not_called()
@@ -3,20 +3,23 @@ Integration tests for memories routes.
 
 Tests memory listing, search, statistics, and deletion.
 """
+import json
 import uuid
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, patch
 
 import pytest
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 
 from app.config import EntityConfig
-from app.database import Base, get_db
+from app.database import Base, get_db, get_read_db
 from app.main import app
 from app.models import Conversation, Message, MessageRole
 from app.routes.memories import calculate_significance
+from app.services.cache_service import cache_service
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -45,7 +48,8 @@ async def test_engine():
 @pytest.fixture
 def mock_settings():
     """Mock settings for significance calculation."""
-    with patch("app.routes.memories.settings") as mock:
+    with patch("app.routes.memories.settings") as mock, \
+            patch("app.services.memory_significance.settings", mock):
         mock.significance_half_life_days = 60
         mock.recency_boost_strength = 1.2
         mock.significance_floor = 0.25
@@ -96,6 +100,9 @@ async def async_client(test_engine, mock_settings):
             yield session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    # Stats are cached process-wide; each test starts from its own database
+    cache_service.stats_cache.clear()
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -375,6 +382,29 @@ class TestListMemories:
         significances = [m["significance"] for m in data]
         assert significances == sorted(significances, reverse=True)
 
+    @pytest.mark.asyncio
+    async def test_list_memories_sorts_by_stored_significance(
+        self, async_client, create_test_data, test_engine
+    ):
+        """The stored column drives the order; rows without one fall back to computing it."""
+        first, second = create_test_data["messages"][:2]
+        async with test_engine.begin() as conn:
+            await conn.execute(update(Message).values(significance=0.5))
+            await conn.execute(update(Message).where(Message.id == first).values(significance=None))
+            await conn.execute(update(Message).where(Message.id == second).values(significance=9.0))
+
+        response = await async_client.get(
+            "/api/memories/", params={"sort_by": "significance", "limit": 1}
+        )
+        assert [m["id"] for m in response.json()] == [second]
+
+        response = await async_client.get(
+            "/api/memories/", params={"sort_by": "significance", "limit": 1, "offset": 5}
+        )
+        data = response.json()
+        assert [m["id"] for m in data] == [first]
+        assert data[0]["significance"] == pytest.approx(1.0)
+
     @pytest.mark.asyncio
     async def test_list_memories_sort_by_created_at(self, async_client, create_test_data):
         """Test sorting memories by created_at."""
@@ -411,6 +441,24 @@ class TestListMemories:
         assert data[0]["id"] != data2[0]["id"]
 
 
+    @pytest.mark.asyncio
+    async def test_list_memories_cursor_pagination(self, async_client, create_test_data):
+        """Cursor pages cover the same memories, in order, as one big page."""
+        params = {"sort_by": "times_retrieved"}
+        full = [m["id"] for m in (await async_client.get("/api/memories/", params=params)).json()]
+
+        ids, cursor = [], None
+        while True:
+            page_params = {**params, "limit": 4, **({"cursor": cursor} if cursor else {})}
+            response = await async_client.get("/api/memories/", params=page_params)
+            ids += [m["id"] for m in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert ids == full
+        assert len(ids) == 6
+
 class TestSearchMemories:
     """Tests for semantic memory search."""
 
@@ -653,6 +701,37 @@ class TestMemoryStats:
         assert "11-20" in dist
         assert "21+" in dist
 
+    @pytest.mark.asyncio
+    async def test_stats_aggregates(self, async_client, create_test_data):
+        """Histogram counts and top memories come from the SQL aggregates."""
+        response = await async_client.get("/api/memories/stats")
+
+        data = response.json()
+        # times_retrieved 0, 2, 4, 6, 8 plus the never-retrieved reflection
+        assert data["retrieval_distribution"] == {"0": 2, "1-5": 2, "6-10": 2, "11-20": 0, "21+": 0}
+        assert data["max_times_retrieved"] == 8
+        assert data["avg_times_retrieved"] == pytest.approx(20 / 6, abs=0.01)
+        significances = [m["significance"] for m in data["most_significant"]]
+        assert len(significances) == 6
+        assert significances == sorted(significances, reverse=True)
+        assert set(data["most_significant"][0]) == {
+            "id", "content_preview", "times_retrieved", "significance"
+        }
+
+    @pytest.mark.asyncio
+    async def test_stats_cached_until_memory_write(self, async_client, create_test_data, test_engine):
+        """Stats are served from cache until that entity's memories are written."""
+        first = (await async_client.get("/api/memories/stats", params={"entity_id": "test-entity"})).json()
+
+        async with test_engine.begin() as conn:
+            await conn.execute(update(Message).values(times_retrieved=30))
+        cached = (await async_client.get("/api/memories/stats", params={"entity_id": "test-entity"})).json()
+        assert cached == first
+
+        cache_service.invalidate_memory_stats("test-entity")
+        fresh = (await async_client.get("/api/memories/stats", params={"entity_id": "test-entity"})).json()
+        assert fresh["retrieval_distribution"]["21+"] == 6
+
 
 class TestMemoryHealth:
     """Tests for memory system health check."""
@@ -828,6 +907,43 @@ class TestOrphanedRecords:
         assert data["orphans_deleted"] == 2
 
 
+class TestReconcile:
+    """Tests for the streaming SQL/vector reconciliation endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_streams_progress_and_summary(self, async_client, mock_memory_service, test_engine):
+        async def orphan_pages(db, entity_id, delete=False):
+            assert delete is True
+            yield {"page": 1, "records_scanned": 100, "orphans": [{"id": "o1", "metadata": None}],
+                   "orphans_deleted": 1, "errors": []}
+            yield {"page": 2, "records_scanned": 130, "orphans": [], "orphans_deleted": 0, "errors": []}
+
+        async def missing_batches(db, entity_id):
+            yield {"batch": 1, "messages_checked": 40, "errors": [], "missing": [
+                {"message_id": "m1", "conversation_id": "c1", "role": "human", "missing_records": ["m1"]},
+            ]}
+
+        mock_memory_service.reconcile_orphaned_records = orphan_pages
+        session_maker = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        with patch("app.routes.memories.async_session_maker", session_maker), \
+                patch("app.routes.memories.vector_rebuild_service") as mock_rebuild:
+            mock_rebuild.find_missing_vectors = missing_batches
+            response = await async_client.post(
+                "/api/memories/reconcile",
+                json={"entity_id": "test", "delete_orphans": True},
+            )
+
+        assert response.status_code == 200
+        events = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+        assert events == ["orphans", "orphans", "missing", "done"]
+        summary = json.loads(response.text.strip().splitlines()[-1][len("data: "):])
+        assert summary["records_scanned"] == 130
+        assert summary["orphans_found"] == 1
+        assert summary["orphans_deleted"] == 1
+        assert summary["messages_checked"] == 40
+        assert summary["messages_missing_vectors"] == 1
+
+
 class TestQueryLinkCleanup:
     """Tests for the stale memory_query link cleanup endpoint."""
 
@@ -0,0 +1,196 @@
+"""
+Tests for the memory vectorization outbox (memory_outbox.py).
+"""
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import MemoryOutboxEntry
+from app.services.memory_outbox import MemoryOutbox
+from app.services.memory_service import MemoryService
+
+
+@pytest.fixture
+def outbox_env(test_engine):
+    """Point the outbox at the test database and a mock vector index."""
+    index = MagicMock()
+    maker = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    with patch("app.services.memory_outbox.async_session_maker", maker), \
+            patch("app.services.memory_outbox.memory_service") as mock_memory, \
+            patch("app.services.memory_outbox.settings") as mock_settings:
+        mock_memory.get_index.return_value = index
+        mock_memory.memory_records.side_effect = MemoryService.memory_records
+        mock_memory.list_passage_ids.side_effect = lambda index, message_id: [f"msg:{message_id}:0"]
+        mock_settings.memory_outbox_retry_base_seconds = 5.0
+        mock_settings.memory_outbox_retry_max_seconds = 60.0
+        yield index
+
+
+def _queue(outbox, db, message, entity_id="entity-a", role="human"):
+    outbox.add(
+        db,
+        message_id=message.id,
+        conversation_id=message.conversation_id,
+        role=role,
+        content=message.content,
+        created_at=message.created_at,
+        entity_id=entity_id,
+    )
+
+
+class TestMemoryOutbox:
+    @pytest.mark.asyncio
+    async def test_drain_batches_per_entity_and_clears_rows(
+        self, db_session, sample_messages, outbox_env
+    ):
+        outbox = MemoryOutbox()
+        for message in sample_messages:
+            _queue(outbox, db_session, message, entity_id="entity-a")
+        _queue(outbox, db_session, sample_messages[0], entity_id="entity-b", role="Other")
+        await db_session.commit()
+
+        assert await outbox.drain() == len(sample_messages) + 1
+
+        # One upsert per entity, in queue order
+        assert outbox_env.upsert_records.call_count == 2
+        first_batch = outbox_env.upsert_records.call_args_list[0].kwargs["records"]
+        assert [r["_id"] for r in first_batch] == [m.id for m in sample_messages]
+
+        status = await outbox.get_status(db_session)
+        assert status["pending"] == 0
+        assert status["vectorized"] == len(sample_messages) + 1
+
+    @pytest.mark.asyncio
+    async def test_failed_upsert_is_retried_with_backoff(
+        self, db_session, sample_messages, outbox_env
+    ):
+        outbox = MemoryOutbox()
+        _queue(outbox, db_session, sample_messages[0])
+        await db_session.commit()
+
+        outbox_env.upsert_records.side_effect = RuntimeError("index unavailable")
+        assert await outbox.drain() == 0
+
+        status = await outbox.get_status(db_session)
+        assert status["pending"] == 1
+        assert status["retrying"] == 1
+        assert status["entities"][0]["entity_id"] == "entity-a"
+        assert "index unavailable" in status["last_error"]
+
+        row = (await db_session.execute(select(MemoryOutboxEntry))).scalar_one()
+        await db_session.refresh(row)
+        assert row.attempts == 1
+        assert row.next_attempt_at > datetime.utcnow() + timedelta(seconds=3)
+
+        # Not due yet: a drain before the backoff expires leaves it alone
+        outbox_env.upsert_records.side_effect = None
+        assert await outbox.drain() == 0
+
+        row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        await db_session.commit()
+        assert await outbox.drain() == 1
+        assert (await outbox.get_status(db_session))["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_entries_for_deleted_messages_are_discarded(
+        self, db_session, sample_messages, outbox_env
+    ):
+        outbox = MemoryOutbox()
+        message = sample_messages[0]
+        _queue(outbox, db_session, message)
+        await db_session.delete(message)
+        await db_session.commit()
+
+        assert await outbox.drain() == 0
+        outbox_env.upsert_records.assert_not_called()
+        assert (await outbox.get_status(db_session))["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_message_deleted_during_upsert_loses_its_records(
+        self, db_session, sample_messages, outbox_env
+    ):
+        outbox = MemoryOutbox()
+        deleted, kept = sample_messages[0], sample_messages[1]
+        _queue(outbox, db_session, deleted)
+        _queue(outbox, db_session, kept)
+        await db_session.commit()
+
+        async def run_pinecone(fn, *args, **kwargs):
+            result = fn(*args, **kwargs)
+            if fn is outbox_env.upsert_records:
+                # The delete commits while the upsert is in flight, and its
+                # vector delete already ran
+                await db_session.delete(deleted)
+                await db_session.commit()
+            return result
+
+        with patch("app.services.memory_outbox.run_pinecone", run_pinecone):
+            assert await outbox.drain() == 2
+
+        outbox_env.delete.assert_called_once_with(ids=[deleted.id])
+        assert (await outbox.get_status(db_session))["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_entries_for_unconfigured_entities_are_dropped(
+        self, db_session, sample_messages, outbox_env
+    ):
+        outbox = MemoryOutbox()
+        _queue(outbox, db_session, sample_messages[0], entity_id="removed-entity")
+        await db_session.commit()
+
+        with patch("app.services.memory_outbox.settings.get_entity_by_index", return_value=None):
+            assert await outbox.drain() == 0
+
+        outbox_env.upsert_records.assert_not_called()
+        assert (await outbox.get_status(db_session))["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_discard_drops_queued_rows_of_edited_messages(
+        self, db_session, sample_messages, outbox_env
+    ):
+        outbox = MemoryOutbox()
+        _queue(outbox, db_session, sample_messages[0], entity_id="entity-a")
+        _queue(outbox, db_session, sample_messages[0], entity_id="entity-b")
+        _queue(outbox, db_session, sample_messages[1])
+        await db_session.commit()
+
+        await outbox.discard(db_session, [sample_messages[0].id])
+        await db_session.commit()
+
+        assert await outbox.drain() == 1
+        records = outbox_env.upsert_records.call_args.kwargs["records"]
+        assert [r["_id"] for r in records] == [sample_messages[1].id]
+
+    @pytest.mark.asyncio
+    async def test_edit_rows_replace_existing_records(
+        self, db_session, sample_messages, outbox_env
+    ):
+        outbox = MemoryOutbox()
+        message = sample_messages[0]
+        outbox.add(
+            db_session,
+            message_id=message.id,
+            conversation_id=message.conversation_id,
+            role="human",
+            content="Edited text",
+            created_at=message.created_at,
+            entity_id="entity-a",
+            replace=True,
+        )
+        _queue(outbox, db_session, sample_messages[1])
+        await db_session.commit()
+
+        assert await outbox.drain() == 2
+
+        # Only the edited message's old records are deleted, before the upsert
+        outbox_env.delete.assert_called_once_with(ids=[message.id, f"msg:{message.id}:0"])
+        records = outbox_env.upsert_records.call_args.kwargs["records"]
+        assert records[0]["text"] == "Edited text"
+
+    def test_retry_delay_is_capped(self, outbox_env):
+        assert MemoryOutbox._retry_delay(1) == timedelta(seconds=5)
+        assert MemoryOutbox._retry_delay(3) == timedelta(seconds=20)
+        assert MemoryOutbox._retry_delay(20) == timedelta(seconds=60)
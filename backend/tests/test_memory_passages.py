@@ -0,0 +1,88 @@
+"""
+Tests for passage-level memory records (memory_passages.py).
+"""
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.memory_passages import (
+    memory_context_content,
+    parse_memory_record_id,
+    passage_record_id,
+)
+from app.services.memory_service import MemoryService
+
+
+def _long_message(paragraphs=3):
+    """A message the notes chunker splits into one passage per paragraph."""
+    return "\n\n".join(f"Paragraph {n}. " + ("word " * 390) for n in range(paragraphs))
+
+
+class TestPassageRecordIds:
+    def test_round_trip(self):
+        record_id = passage_record_id("abc-123", 4)
+        assert record_id == "msg:abc-123:4"
+        assert parse_memory_record_id(record_id) == ("abc-123", 4)
+
+    def test_whole_message_ids_have_no_passage(self):
+        assert parse_memory_record_id("abc-123") == ("abc-123", None)
+        assert parse_memory_record_id("msg:abc-123:x") == ("msg:abc-123:x", None)
+
+
+class TestMemoryRecords:
+    def test_short_message_is_one_record(self):
+        records = MemoryService.memory_records("m1", "c1", "assistant", "short", datetime.utcnow())
+        assert len(records) == 1
+        assert records[0]["_id"] == "m1"
+        assert "passage_index" not in records[0]
+
+    def test_long_message_is_split_into_passages(self):
+        records = MemoryService.memory_records(
+            "m1", "c1", "assistant", _long_message(), datetime.utcnow(), times_retrieved=2
+        )
+        assert [r["_id"] for r in records] == ["msg:m1:0", "msg:m1:1", "msg:m1:2"]
+        assert all(r["message_id"] == "m1" for r in records)
+        assert all(r["passage_count"] == 3 for r in records)
+        assert all(r["times_retrieved"] == 2 for r in records)
+        assert records[1]["text"].startswith("Paragraph 1.")
+
+
+class TestMemoryContextContent:
+    def test_passage_hit_injects_excerpt(self):
+        content, passage_index = memory_context_content(
+            "assistant", _long_message(), "m1234567890", 1
+        )
+        assert passage_index == 1
+        assert content.startswith("(Excerpt: passage 2 of 3 from memory m1234567")
+        assert "Paragraph 1." in content
+        assert "Paragraph 0." not in content
+
+    def test_whole_message_and_stale_passages_inject_full_content(self):
+        assert memory_context_content("assistant", "short", "m1", None) == ("short", None)
+        # Passage index no longer valid (e.g. message edited): use it whole
+        assert memory_context_content("assistant", "short", "m1", 2) == ("short", None)
+
+
+class TestSearchCollapsesPassages:
+    @pytest.mark.asyncio
+    async def test_best_passage_per_message_is_kept(self):
+        hits = [
+            {"_id": "msg:m1:2", "_score": 0.9, "fields": {"conversation_id": "c1", "role": "assistant"}},
+            {"_id": "msg:m1:0", "_score": 0.8, "fields": {"conversation_id": "c1", "role": "assistant"}},
+            {"_id": "m2", "_score": 0.7, "fields": {"conversation_id": "c2", "role": "human"}},
+        ]
+        index = MagicMock()
+        index.search.return_value = SimpleNamespace(result=SimpleNamespace(hits=hits))
+
+        with patch("app.services.memory_service.settings") as mock_settings:
+            mock_settings.pinecone_api_key = "test-key"
+            mock_settings.retrieval_top_k = 5
+            mock_settings.similarity_threshold = 0.1
+            service = MemoryService()
+            service._cache_service = MagicMock()
+            service.get_index = MagicMock(return_value=index)
+            results = await service.search_memories("query", use_cache=False)
+
+        assert [(r["id"], r["passage_index"]) for r in results] == [("m1", 2), ("m2", None)]
@@ -7,8 +7,10 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from app.models import ConversationMemoryLink, Message, MessageRole
+from app.models import ConversationMemoryLink, MemoryQueryResult, Message, MessageRole
+from app.models.memory_query_result import backfill_memory_query_results
 from app.services.memory_service import MemoryService
+from app.services.message_history import delete_tool_exchange_messages
 
 
 class TestMemoryServiceConfiguration:
@@ -411,6 +413,30 @@ class TestMemoryServiceDatabase:
 
         assert result is None
 
+    @pytest.mark.asyncio
+    async def test_get_full_memory_contents_bulk(self, db_session, sample_conversation, sample_messages):
+        """Bulk hydration serves cache hits, fetches misses in one select,
+        and omits IDs that don't exist."""
+        from app.services.cache_service import CacheService
+
+        service = MemoryService()
+        service._cache_service = CacheService()
+        cached, uncached = sample_messages
+        service.cache.set_memory_content(cached.id, {"id": cached.id, "content": "from cache"})
+
+        with patch.object(db_session, "execute", wraps=db_session.execute) as execute:
+            result = await service.get_full_memory_contents(
+                [cached.id, uncached.id, "nonexistent-id", uncached.id], db_session
+            )
+
+        assert set(result) == {cached.id, uncached.id}
+        assert result[cached.id]["content"] == "from cache"
+        assert result[uncached.id]["content"] == uncached.content
+        assert result[uncached.id]["role"] == uncached.role.value
+        assert execute.await_count == 1
+        # Fetched rows are cached for the next lookup
+        assert service.cache.get_memory_content(uncached.id) == result[uncached.id]
+
     @pytest.mark.asyncio
     async def test_get_retrieved_ids_for_conversation(self, db_session, sample_conversation, sample_messages):
         """Test getting retrieved memory IDs for conversation."""
@@ -776,6 +802,99 @@ class TestMemoryServiceDatabase:
             assert other_conv.id in other_archived  # but should include its own conversation
 
 
+class TestMemoryServiceSearchInvalidation:
+    """Writes to an entity's memory set drop its cached search results."""
+
+    @pytest.mark.asyncio
+    async def test_store_and_delete_invalidate_entity_searches(self):
+        with patch("app.services.memory_service.settings") as mock_settings:
+            mock_settings.pinecone_api_key = "test-key"
+            mock_settings.get_entity_by_index.return_value = MagicMock()
+            mock_settings.get_default_entity.return_value = MagicMock(index_name="claude-main")
+
+            service = MemoryService()
+            service._cache_service = MagicMock()
+            service.get_index = MagicMock()
+
+            await service.store_memory(
+                "m1", "conv-1", "human", "hello", datetime.utcnow(), entity_id="gpt-test"
+            )
+            service._cache_service.invalidate_search_cache_for_entity.assert_called_once_with(
+                "gpt-test"
+            )
+
+            # The default entity also owns searches cached without an entity
+            service._cache_service.reset_mock()
+            await service.delete_memory("m1")
+            invalidated = [
+                c.args[0]
+                for c in service._cache_service.invalidate_search_cache_for_entity.call_args_list
+            ]
+            assert invalidated == ["claude-main", None]
+
+
+class TestMemoryServiceArchivedIndex:
+    """The archived-conversation set is loaded once and then kept in memory."""
+
+    @pytest.mark.asyncio
+    async def test_lookups_after_load_do_not_query(self, db_session):
+        from app.models import Conversation
+
+        archived = Conversation(id=str(uuid.uuid4()), entity_id="gpt-test", is_archived=True)
+        db_session.add(archived)
+        await db_session.commit()
+
+        service = MemoryService()
+        with patch("app.services.memory_service.settings") as mock_settings:
+            mock_settings.get_default_entity.return_value = MagicMock(index_name="claude-main")
+            await service.load_archived_conversation_ids(db_session)
+
+        db = MagicMock()  # any query would fail: execute isn't awaitable
+        assert archived.id in await service.get_archived_conversation_ids(db, entity_id="gpt-test")
+        assert await service.get_archived_conversation_ids(db, entity_id="claude-main") == set()
+        db.execute.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_note_archived_and_unarchived(self, db_session):
+        from app.models import Conversation, ConversationEntity, ConversationType
+
+        multi = Conversation(
+            id=str(uuid.uuid4()),
+            entity_id="multi-entity",
+            conversation_type=ConversationType.MULTI_ENTITY,
+        )
+        legacy = Conversation(id=str(uuid.uuid4()), entity_id=None)
+        db_session.add_all([multi, legacy])
+        await db_session.flush()
+        db_session.add(ConversationEntity(
+            conversation_id=multi.id, entity_id="gpt-test", display_order=0
+        ))
+        await db_session.commit()
+
+        service = MemoryService()
+        with patch("app.services.memory_service.settings") as mock_settings:
+            mock_settings.get_default_entity.return_value = MagicMock(index_name="claude-main")
+            await service.load_archived_conversation_ids(db_session)
+            await service.note_conversation_archived(multi, db_session)
+            await service.note_conversation_archived(legacy, db_session)
+
+            assert multi.id in await service.get_archived_conversation_ids(
+                db_session, entity_id="gpt-test"
+            )
+            assert legacy.id in await service.get_archived_conversation_ids(
+                db_session, entity_id="claude-main"
+            )
+            assert multi.id not in await service.get_archived_conversation_ids(
+                db_session, entity_id="claude-main"
+            )
+
+            service.note_conversation_unarchived(multi.id)
+            assert multi.id not in await service.get_archived_conversation_ids(
+                db_session, entity_id="gpt-test"
+            )
+            assert await service.get_archived_conversation_ids(db_session) == {legacy.id}
+
+
 class TestMemoryServiceRetrievalCount:
     """Tests for retrieval count updates."""
 
@@ -928,6 +1047,70 @@ class TestMemoryServiceRetrievalCount:
             assert link.retrieved_at == anchored
 
 
+    @pytest.mark.asyncio
+    async def test_update_retrieval_counts_bulk(
+        self, db_session, sample_conversation, sample_messages
+    ):
+        """The bulk variant bumps every ID, writes every link with its own
+        timestamp in one transaction, and queues the metadata sync instead
+        of calling the index inline."""
+        from datetime import timedelta
+
+        from sqlalchemy import select
+
+        with patch("app.services.memory_service.settings") as mock_settings:
+            mock_settings.pinecone_api_key = "test-key"
+            mock_settings.get_entity_by_index.return_value = MagicMock()
+
+            service = MemoryService()
+            service.get_index = MagicMock()
+            first, second = sample_messages[0], sample_messages[1]
+            anchored = datetime.utcnow() - timedelta(milliseconds=1)
+
+            ok = await service.update_retrieval_counts(
+                [first.id, second.id],
+                sample_conversation.id,
+                db_session,
+                entity_id="claude-main",
+                link_retrieved_at={first.id: anchored},
+            )
+            assert ok is True
+
+            await db_session.refresh(first)
+            await db_session.refresh(second)
+            assert first.times_retrieved == 1
+            assert second.times_retrieved == 1
+
+            result = await db_session.execute(
+                select(ConversationMemoryLink).where(
+                    ConversationMemoryLink.conversation_id == sample_conversation.id
+                )
+            )
+            links = {link.message_id: link for link in result.scalars().all()}
+            assert set(links) == {first.id, second.id}
+            assert links[first.id].retrieved_at == anchored
+            assert links[second.id].entity_id == "claude-main"
+
+            service.get_index.assert_not_called()
+            assert service.retrieval_count_queue.depth() == 2
+
+    @pytest.mark.asyncio
+    async def test_get_retrieval_counts_reads_sql(self, test_engine, db_session, sample_messages):
+        """The queue syncs these absolute SQL counts to vector metadata."""
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+        sample_messages[0].times_retrieved = 4
+        await db_session.commit()
+        maker = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+        with patch("app.database.read_session_maker", maker):
+            counts = await MemoryService().get_retrieval_counts(
+                [sample_messages[0].id, sample_messages[1].id, "deleted"]
+            )
+
+        assert counts == {sample_messages[0].id: 4, sample_messages[1].id: 0}
+
+
 class TestMemoryServiceRecordMemoryLink:
     """Tests for record_memory_link (link-only, no retrieval tracking)."""
 
@@ -1020,7 +1203,8 @@ class TestCleanupMemoryQueryLinks:
         self, db_session, conversation_id, tool_use_id, memory_ids,
         speaker_entity_id=None, tool_name="memory_query",
     ):
-        """Persist a memory_query tool exchange the way routes/chat.py does."""
+        """Persist a memory_query tool exchange from before query results
+        were recorded, and run the migration's backfill over it."""
         tool_use = Message(
             id=str(uuid.uuid4()),
             conversation_id=conversation_id,
@@ -1048,6 +1232,27 @@ class TestCleanupMemoryQueryLinks:
         db_session.add(tool_use)
         db_session.add(tool_result)
         await db_session.commit()
+        await db_session.run_sync(lambda session: backfill_memory_query_results(session.connection()))
+        await db_session.commit()
+
+    @staticmethod
+    def _record_live_exchange(db_session, service, conversation_id, memory_ids):
+        """Persist a memory_query tool_result and record its results, as
+        routes/chat.py does."""
+        tool_result = Message(
+            id=str(uuid.uuid4()),
+            conversation_id=conversation_id,
+            role=MessageRole.TOOL_RESULT,
+            content=Message.serialize_content_blocks([]),
+            token_count=0,
+        )
+        db_session.add(tool_result)
+        service.record_query_results(
+            db_session,
+            conversation_id,
+            {"assistant": {}, "user": {}, "memory_query_ids": memory_ids},
+            tool_result,
+        )
 
     async def _add_link(self, db_session, conversation_id, message_id, entity_id=None):
         link = ConversationMemoryLink(
@@ -1178,6 +1383,95 @@ class TestCleanupMemoryQueryLinks:
             assert result["links_deleted"] == 0
             assert await self._link_message_ids(db_session, sample_conversation.id) == {linked.id}
 
+    @pytest.mark.asyncio
+    async def test_backfill_is_idempotent(self, db_session, sample_conversation, sample_messages):
+        await self._add_query_exchange(
+            db_session, sample_conversation.id, "toolu_1", [sample_messages[0].id]
+        )
+        written = await db_session.run_sync(
+            lambda session: backfill_memory_query_results(session.connection())
+        )
+        assert written == 0
+
+    @pytest.mark.asyncio
+    async def test_recorded_query_results_from_live_turns(
+        self, db_session, sample_conversation, sample_messages
+    ):
+        """Results recorded with the tool exchanges (routes/chat.py) are
+        matched without any tool exchange parsing."""
+        with patch("app.services.memory_service.settings") as mock_settings:
+            mock_settings.pinecone_api_key = ""
+
+            service = MemoryService()
+            queried = sample_messages[0]
+            self._record_live_exchange(db_session, service, sample_conversation.id, [queried.id, queried.id])
+            await db_session.commit()
+            await self._add_link(db_session, sample_conversation.id, queried.id)
+
+            result = await service.cleanup_memory_query_links(db_session, dry_run=False)
+
+            assert result["links_deleted"] == 1
+            assert await self._link_message_ids(db_session, sample_conversation.id) == set()
+
+    @pytest.mark.asyncio
+    async def test_query_results_are_deleted_with_their_tool_exchange(
+        self, db_session, sample_conversation, sample_messages
+    ):
+        """A regenerated response's tool exchange takes its query results
+        with it, so a later automatic retrieval of the same memory keeps its
+        link."""
+        with patch("app.services.memory_service.settings") as mock_settings:
+            mock_settings.pinecone_api_key = ""
+
+            service = MemoryService()
+            queried = sample_messages[0]
+            self._record_live_exchange(db_session, service, sample_conversation.id, [queried.id])
+            await db_session.commit()
+
+            # Regenerate discards the response's tool exchange rows...
+            await delete_tool_exchange_messages(db_session, sample_conversation.id)
+            await db_session.commit()
+            # ...and the next response auto-retrieves the memory
+            await self._add_link(db_session, sample_conversation.id, queried.id)
+
+            result = await service.cleanup_memory_query_links(db_session, dry_run=False)
+
+            assert result["conversations_with_query_results"] == 0
+            assert result["links_deleted"] == 0
+            assert await self._link_message_ids(db_session, sample_conversation.id) == {queried.id}
+
+    @pytest.mark.asyncio
+    async def test_incremental_checks_conversations_updated_since_last_run(
+        self, db_session, sample_conversation, sample_messages
+    ):
+        with patch("app.services.memory_service.settings") as mock_settings:
+            mock_settings.pinecone_api_key = ""
+
+            service = MemoryService()
+            queried = sample_messages[0]
+            db_session.add(MemoryQueryResult(
+                conversation_id=sample_conversation.id, message_id=queried.id,
+            ))
+            await db_session.commit()
+
+            first = await service.cleanup_memory_query_links(db_session, dry_run=False, incremental=True)
+            assert first["incremental"] is False  # No earlier run: everything is checked
+
+            # A stale link in a conversation not updated since is skipped...
+            sample_conversation.updated_at = datetime(2020, 1, 1)
+            await db_session.commit()
+            await self._add_link(db_session, sample_conversation.id, queried.id)
+            skipped = await service.cleanup_memory_query_links(db_session, dry_run=False, incremental=True)
+            assert skipped["incremental"] is True
+            assert skipped["links_matched"] == 0
+
+            # ...until the conversation changes again
+            sample_conversation.updated_at = datetime.utcnow()
+            await db_session.commit()
+            result = await service.cleanup_memory_query_links(db_session, dry_run=False, incremental=True)
+            assert result["conversations_with_query_results"] == 1
+            assert result["links_deleted"] == 1
+
 
 class TestMemoryServiceDelete:
     """Tests for memory deletion."""
@@ -0,0 +1,93 @@
+"""
+Tests for stored memory significance (memory_significance.py).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models import Conversation, Message, MessageRole
+from app.services.memory_service import MemoryService
+from app.services.memory_significance import (
+    calculate_significance,
+    refresh_all_significance,
+    refresh_significance,
+)
+
+
+async def _conversation_with_messages(db_session):
+    conversation = Conversation(title="Significance")
+    db_session.add(conversation)
+    await db_session.flush()
+    old = datetime.utcnow() - timedelta(days=120)
+    messages = [
+        Message(conversation_id=conversation.id, role=MessageRole.HUMAN, content="new"),
+        Message(conversation_id=conversation.id, role=MessageRole.ASSISTANT, content="old", created_at=old),
+        Message(conversation_id=conversation.id, role=MessageRole.TOOL_USE, content="[]"),
+    ]
+    db_session.add_all(messages)
+    await db_session.commit()
+    return conversation, messages
+
+
+async def _significance(db_session, message_id):
+    result = await db_session.execute(select(Message.significance).where(Message.id == message_id))
+    return result.scalar_one()
+
+
+class TestStoredSignificance:
+    @pytest.mark.asyncio
+    async def test_insert_stores_initial_significance(self, db_session):
+        _, (new, old, _) = await _conversation_with_messages(db_session)
+
+        assert await _significance(db_session, new.id) == pytest.approx(1.0)
+        assert await _significance(db_session, old.id) == pytest.approx(
+            calculate_significance(0, old.created_at, None, None, "assistant")
+        )
+
+    @pytest.mark.asyncio
+    async def test_retrieval_refreshes_significance(self, db_session):
+        conversation, (new, _, _) = await _conversation_with_messages(db_session)
+        message_id = new.id
+        before = await _significance(db_session, message_id)
+
+        service = MemoryService()
+        assert await service.update_retrieval_counts([message_id], conversation.id, db_session)
+
+        assert await _significance(db_session, message_id) > before
+
+    @pytest.mark.asyncio
+    async def test_pinning_refreshes_significance(self, db_session):
+        _, (_, old, _) = await _conversation_with_messages(db_session)
+        message_id = old.id
+        before = await _significance(db_session, message_id)
+
+        service = MemoryService()
+        assert await service.set_memory_status(message_id, "pinned", db_session)
+
+        assert await _significance(db_session, message_id) == pytest.approx(1.0)
+        assert before < 1.0
+
+    @pytest.mark.asyncio
+    async def test_refresh_skips_non_memory_roles(self, db_session):
+        _, (new, _, tool_use) = await _conversation_with_messages(db_session)
+        await db_session.execute(update(Message).values(significance=None))
+
+        assert await refresh_significance(db_session, [new.id, tool_use.id]) == 1
+        await db_session.commit()
+
+        assert await _significance(db_session, new.id) is not None
+        assert await _significance(db_session, tool_use.id) is None
+
+    @pytest.mark.asyncio
+    async def test_refresh_all_fills_rows_in_batches(self, db_session, monkeypatch):
+        _, (new, old, _) = await _conversation_with_messages(db_session)
+        # Rows that predate the column
+        await db_session.execute(update(Message).values(significance=None))
+        await db_session.commit()
+
+        monkeypatch.setattr("app.services.memory_significance.REFRESH_BATCH_SIZE", 1)
+        assert await refresh_all_significance(db_session) == 2
+
+        assert await _significance(db_session, new.id) == pytest.approx(1.0)
+        assert await _significance(db_session, old.id) < 1.0
@@ -0,0 +1,172 @@
+"""
+Tests for full-text message search (message_search.py), the search endpoint,
+memory_query's exact matching and indexed ID-prefix resolution.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database import get_db, get_read_db
+from app.main import app
+from app.models import Conversation, Message, MessageRole
+from app.services.memory_tools import _memory_query, set_memory_tool_context
+from app.services.message_search import match_expression, search_messages
+
+
+@pytest.fixture
+def session_maker(test_engine):
+    return async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+async def corpus(session_maker):
+    """Two entities' conversations; returns {label: message_id}."""
+    start = datetime(2025, 1, 1)
+    ids = {}
+    async with session_maker() as db:
+        own = Conversation(id="conv-own", title="Own", entity_id="entity-a")
+        other = Conversation(id="conv-other", title="Other", entity_id="entity-b")
+        current = Conversation(id="conv-current", title="Current", entity_id="entity-a")
+        db.add_all([own, other, current])
+        await db.flush()
+        rows = [
+            ("phrase", own, MessageRole.HUMAN, "We called the cat Biscuit the Brave."),
+            ("scattered", own, MessageRole.ASSISTANT, "Brave choice, and Biscuit suits a cat."),
+            ("tool", own, MessageRole.TOOL_RESULT, '{"text": "Biscuit the Brave"}'),
+            ("other_entity", other, MessageRole.ASSISTANT, "Biscuit the Brave is elsewhere."),
+            ("current", current, MessageRole.HUMAN, "Remember Biscuit the Brave?"),
+        ]
+        for i, (label, conversation, role, content) in enumerate(rows):
+            message = Message(
+                conversation_id=conversation.id, role=role, content=content,
+                created_at=start + timedelta(minutes=i),
+            )
+            db.add(message)
+            await db.flush()
+            ids[label] = message.id
+        await db.commit()
+    return ids
+
+
+class TestMatchExpression:
+    def test_words_are_quoted(self):
+        assert match_expression("cat OR dog*") == '"cat" "OR" "dog"'
+
+    def test_phrase(self):
+        assert match_expression("Biscuit, the Brave!", phrase=True) == '"Biscuit the Brave"'
+
+    def test_no_words(self):
+        assert match_expression("  ?! ") is None
+
+
+class TestSearchMessages:
+    @pytest.mark.asyncio
+    async def test_all_words_vs_phrase(self, session_maker, corpus):
+        memory_roles = (MessageRole.HUMAN, MessageRole.ASSISTANT)
+        async with session_maker() as db:
+            words = await search_messages(db, "brave biscuit", entity_id="entity-a", roles=memory_roles)
+            phrase = await search_messages(
+                db, "biscuit the brave", phrase=True, entity_id="entity-a",
+                roles=memory_roles, exclude_conversation_id="conv-current",
+            )
+
+        assert {r["message_id"] for r in words} == {corpus["phrase"], corpus["scattered"], corpus["current"]}
+        assert [r["message_id"] for r in phrase] == [corpus["phrase"]]
+        assert phrase[0]["snippet"] == "We called the cat [Biscuit the Brave]."
+
+    @pytest.mark.asyncio
+    async def test_index_follows_edits_and_deletes(self, session_maker, corpus):
+        async with session_maker() as db:
+            message = await db.get(Message, corpus["scattered"])
+            message.content = "Renamed to Marmalade."
+            await db.commit()
+            await db.delete(await db.get(Message, corpus["phrase"]))
+            await db.commit()
+
+            assert [r["message_id"] for r in await search_messages(db, "marmalade")] == [corpus["scattered"]]
+            biscuit_ids = {r["message_id"] for r in await search_messages(db, "biscuit")}
+
+        assert corpus["phrase"] not in biscuit_ids
+        assert corpus["scattered"] not in biscuit_ids
+
+
+class TestIdPrefix:
+    @pytest.mark.asyncio
+    async def test_prefix_clause_uses_primary_key_range(self, session_maker, corpus):
+        message_id = corpus["phrase"]
+        query = select(Message.id).where(Message.id_prefix_clause(message_id[:8]))
+        async with session_maker() as db:
+            assert (await db.execute(query)).scalars().all() == [message_id]
+
+            compiled = query.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+            plan = await db.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+            assert any("INDEX" in str(row[-1]) for row in plan.all())
+
+
+class TestSearchEndpoint:
+    @pytest.mark.asyncio
+    async def test_search_route(self, session_maker, corpus):
+        async def override_get_db():
+            async with session_maker() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_db
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.get(
+                    "/api/conversations/search",
+                    params={"q": "Biscuit the Brave", "phrase": True, "entity_id": "entity-a"},
+                )
+                empty = await client.get("/api/conversations/search", params={"q": "?"})
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        hits = response.json()
+        # Tool results are not conversation text
+        assert {h["message_id"] for h in hits} == {corpus["phrase"], corpus["current"]}
+        assert {h["conversation_title"] for h in hits} == {"Own", "Current"}
+        assert empty.status_code == 400
+
+
+class TestMemoryQueryExactMatch:
+    @pytest.mark.asyncio
+    async def test_exact_match_uses_full_text_index(self, session_maker, corpus):
+        set_memory_tool_context("entity-a", "conv-current")
+
+        with patch("app.services.memory_tools.memory_service") as mock_service, \
+             patch("app.services.memory_tools.async_session_maker", session_maker):
+            mock_service.is_configured.return_value = True
+            mock_service.get_archived_conversation_ids = AsyncMock(return_value=set())
+            mock_service.search_memories = AsyncMock()
+
+            async def full_content(message_id, db):
+                message = await db.get(Message, message_id)
+                return {
+                    "id": message.id, "role": message.role.value, "content": message.content,
+                    "created_at": message.created_at, "times_retrieved": 0,
+                }
+            mock_service.get_full_memory_content = AsyncMock(side_effect=full_content)
+            mock_service.update_retrieval_count = AsyncMock(return_value=True)
+
+            result = await _memory_query("Biscuit the Brave", match="exact")
+
+        mock_service.search_memories.assert_not_called()
+        assert "(exact phrase)" in result
+        assert "exact match" in result
+        assert corpus["phrase"][:8] in result
+        # Scattered words, other entities, tool results and the current conversation don't match
+        assert "Found 1 memories" in result
+
+    @pytest.mark.asyncio
+    async def test_unknown_match_is_reported(self):
+        set_memory_tool_context("entity-a", "conv-current")
+        with patch("app.services.memory_tools.memory_service") as mock_service:
+            mock_service.is_configured.return_value = True
+            result = await _memory_query("anything", match="fuzzy")
+        assert result.startswith("Error: Unknown match 'fuzzy'")
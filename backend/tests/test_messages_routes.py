@@ -15,7 +15,7 @@ from sqlalchemy.pool import StaticPool
 
 from app.database import Base, get_db
 from app.main import app
-from app.models import Conversation, Message, MessageRole
+from app.models import Conversation, MemoryOutboxEntry, Message, MessageRole
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -232,11 +232,13 @@ class TestUpdateMessage:
         mock_session_manager.close_session.assert_called_once_with(conv_id)
 
     @pytest.mark.asyncio
-    async def test_update_message_updates_pinecone(
-        self, async_client, create_conversation_with_messages, mock_memory_service
+    async def test_update_message_queues_revectorization(
+        self, async_client, create_conversation_with_messages, mock_memory_service, test_engine
     ):
-        """Test that updating a message updates Pinecone embeddings."""
+        """The edited text is queued in the outbox, replacing the old records;
+        the deleted response's vector is removed."""
         human_msg_id = create_conversation_with_messages["messages"][0]["id"]
+        assistant_msg_id = create_conversation_with_messages["messages"][1]["id"]
 
         response = await async_client.put(
             f"/api/messages/{human_msg_id}",
@@ -244,10 +246,45 @@ class TestUpdateMessage:
         )
 
         assert response.status_code == 200
+        mock_memory_service.store_memory.assert_not_called()
+        mock_memory_service.delete_memory.assert_called_once_with(
+            assistant_msg_id, entity_id="test-entity"
+        )
+        async_session = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        async with async_session() as session:
+            row = (await session.execute(select(MemoryOutboxEntry))).scalar_one()
+        assert (row.message_id, row.entity_id, row.role) == (human_msg_id, "test-entity", "human")
+        assert row.content == "Updated content."
+        assert row.replace_existing is True
 
-        # Should delete old embedding and store new one
-        assert mock_memory_service.delete_memory.call_count >= 1
-        mock_memory_service.store_memory.assert_called_once()
+    @pytest.mark.asyncio
+    async def test_update_message_discards_queued_vectorization(
+        self, async_client, create_conversation_with_messages, test_engine
+    ):
+        """A queued snapshot of the old text is replaced by the edited text."""
+        conv_id = create_conversation_with_messages["conversation_id"]
+        human_msg_id = create_conversation_with_messages["messages"][0]["id"]
+        async_session = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        async with async_session() as session:
+            session.add(MemoryOutboxEntry(
+                message_id=human_msg_id,
+                conversation_id=conv_id,
+                entity_id="test-entity",
+                role="human",
+                content="Hello, this is my question.",
+                message_created_at=datetime.utcnow(),
+            ))
+            await session.commit()
+
+        response = await async_client.put(
+            f"/api/messages/{human_msg_id}",
+            json={"content": "Updated content."}
+        )
+
+        assert response.status_code == 200
+        async with async_session() as session:
+            result = await session.execute(select(MemoryOutboxEntry))
+            assert [row.content for row in result.scalars().all()] == ["Updated content."]
 
 
 class TestDeleteMessage:
@@ -303,6 +303,58 @@ class TestConversationMemoryLinkModel:
         assert entity_ids == {"claude-main", "gpt-test"}
 
 
+class TestConversationSummary:
+    """Tests for the trigger-maintained conversation listing summary."""
+
+    async def _summary(self, db_session, conversation_id):
+        result = await db_session.execute(
+            select(
+                Conversation.message_count,
+                Conversation.preview,
+                Conversation.last_message_at,
+            ).where(Conversation.id == conversation_id)
+        )
+        return result.one()
+
+    async def test_insert_edit_and_delete_maintain_summary(self, db_session, sample_conversation):
+        first_at = datetime(2025, 1, 1, 12, 0)
+        human = Message(
+            conversation_id=sample_conversation.id,
+            role=MessageRole.HUMAN,
+            content="x" * 150,
+            created_at=first_at,
+        )
+        reply = Message(
+            conversation_id=sample_conversation.id,
+            role=MessageRole.ASSISTANT,
+            content="Reply",
+            created_at=first_at.replace(minute=1),
+        )
+        db_session.add_all([human, reply])
+        await db_session.commit()
+
+        count, preview, last_message_at = await self._summary(db_session, sample_conversation.id)
+        assert count == 2
+        assert preview == "x" * 100 + "..."
+        assert last_message_at == reply.created_at
+
+        human.content = "Edited question"
+        await db_session.commit()
+        _, preview, _ = await self._summary(db_session, sample_conversation.id)
+        assert preview == "Edited question"
+
+        await db_session.delete(reply)
+        await db_session.commit()
+        count, preview, last_message_at = await self._summary(db_session, sample_conversation.id)
+        assert count == 1
+        assert preview == "Edited question"
+        assert last_message_at == first_at
+
+        await db_session.delete(human)
+        await db_session.commit()
+        assert await self._summary(db_session, sample_conversation.id) == (0, None, None)
+
+
 class TestCascadeDeletes:
     """Tests for cascade delete behavior."""
 
@@ -0,0 +1,141 @@
+"""
+Tests for the write-behind retrieval count queue (retrieval_count_queue.py).
+"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.memory_passages import passage_record_id
+from app.services.retrieval_count_queue import RetrievalCountQueue
+
+
+def _index_with_counts(counts):
+    """Mock index whose fetch returns times_retrieved metadata for known IDs."""
+    index = MagicMock()
+    index.fetch.side_effect = lambda ids: SimpleNamespace(vectors={
+        i: SimpleNamespace(metadata={"times_retrieved": counts[i]})
+        for i in ids if i in counts
+    })
+    return index
+
+
+def _sql_counts(counts):
+    """count_reader returning the given SQL times_retrieved values."""
+    async def read(message_ids):
+        return {i: counts[i] for i in message_ids if i in counts}
+    return read
+
+
+@pytest.fixture
+def queue_settings():
+    with patch("app.services.retrieval_count_queue.settings") as mock_settings:
+        mock_settings.retrieval_count_flush_batch_size = 100
+        mock_settings.retrieval_count_flush_interval_seconds = 60
+        yield mock_settings
+
+
+class TestRetrievalCountQueue:
+    @pytest.mark.asyncio
+    async def test_coalesces_increments_per_id(self, queue_settings):
+        index = _index_with_counts({"m1": 3, "m2": 0})
+        queue = RetrievalCountQueue(lambda entity_id: index, _sql_counts({"m1": 5, "m2": 1}))
+
+        queue.enqueue(["m1", "m2"], "entity-a")
+        queue.enqueue(["m1"], "entity-a")
+        stats = queue.get_stats()
+        assert stats["pending_ids"] == 2
+        assert stats["pending_increments"] == 3
+
+        assert await queue.flush() == 2
+        index.fetch.assert_called_once()
+        updates = {
+            c.kwargs["id"]: c.kwargs["set_metadata"]["times_retrieved"]
+            for c in index.update.call_args_list
+        }
+        assert updates == {"m1": 5, "m2": 1}
+        assert queue.depth() == 0
+        assert queue.get_stats()["flushed_increments"] == 3
+
+    @pytest.mark.asyncio
+    async def test_flushes_in_batches(self, queue_settings):
+        queue_settings.retrieval_count_flush_batch_size = 2
+        index = _index_with_counts({f"m{i}": 0 for i in range(5)})
+        queue = RetrievalCountQueue(
+            lambda entity_id: index, _sql_counts({f"m{i}": 1 for i in range(5)})
+        )
+
+        queue.enqueue([f"m{i}" for i in range(5)])
+        assert await queue.flush() == 5
+        assert index.fetch.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_updates_are_requeued(self, queue_settings):
+        index = _index_with_counts({"m1": 1})
+        index.update.side_effect = RuntimeError("unavailable")
+        sql_counts = {"m1": 2}
+        queue = RetrievalCountQueue(lambda entity_id: index, _sql_counts(sql_counts))
+
+        queue.enqueue(["m1"])
+        assert await queue.flush() == 0
+        assert queue.depth() == 1
+        assert queue.get_stats()["failed_updates"] == 1
+
+        # Later increments merge with the retained one
+        index.update.side_effect = None
+        sql_counts["m1"] = 3
+        queue.enqueue(["m1"])
+        assert await queue.flush() == 1
+        index.update.assert_called_with(id="m1", set_metadata={"times_retrieved": 3})
+        assert queue.get_stats()["flushed_increments"] == 2
+
+    @pytest.mark.asyncio
+    async def test_partly_updated_passages_are_not_counted_twice(self, queue_settings):
+        records = {
+            passage_record_id("m1", n): {"times_retrieved": 4, "passage_count": 2}
+            for n in range(2)
+        }
+        index = MagicMock()
+        index.fetch.side_effect = lambda ids: SimpleNamespace(vectors={
+            i: SimpleNamespace(metadata=dict(records[i])) for i in ids if i in records
+        })
+
+        def update(id, set_metadata):
+            if id == passage_record_id("m1", 1) and not update.recovered:
+                raise RuntimeError("unavailable")
+            records[id].update(set_metadata)
+        update.recovered = False
+        index.update.side_effect = update
+        queue = RetrievalCountQueue(lambda entity_id: index, _sql_counts({"m1": 5}))
+
+        queue.enqueue(["m1"])
+        assert await queue.flush() == 0
+        # The first passage took the new count, the second did not
+        assert [r["times_retrieved"] for r in records.values()] == [5, 4]
+
+        update.recovered = True
+        assert await queue.flush() == 1
+        assert [r["times_retrieved"] for r in records.values()] == [5, 5]
+
+    @pytest.mark.asyncio
+    async def test_ids_missing_from_index_are_dropped(self, queue_settings):
+        index = _index_with_counts({})
+        queue = RetrievalCountQueue(lambda entity_id: index, _sql_counts({"not-vectorized": 1}))
+
+        queue.enqueue(["not-vectorized"])
+        assert await queue.flush() == 0
+        index.update.assert_not_called()
+        assert queue.depth() == 0
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_pending(self, queue_settings):
+        index = _index_with_counts({"m1": 0})
+        queue = RetrievalCountQueue(lambda entity_id: index, _sql_counts({"m1": 1}))
+
+        queue.start()
+        assert queue.get_stats()["worker_running"] is True
+        queue.enqueue(["m1"])
+        await queue.stop()
+
+        index.update.assert_called_once_with(id="m1", set_metadata={"times_retrieved": 1})
+        assert queue.get_stats()["worker_running"] is False
@@ -19,10 +19,12 @@ from app.services.session_helpers import (
     add_cache_control_to_tool_result,
     build_memory_queries,
     calculate_significance,
+    draft_matches_message,
     ensure_role_balance,
     estimate_prompt_tokens,
     get_message_content_text,
     make_link_timestamper,
+    select_within_token_budget,
     stamp_human_message,
     total_prompt_tokens_from_usage,
 )
@@ -138,6 +140,36 @@ class TestBuildMemoryQueries:
         assert assistant_q == "Second response"
 
 
+# ============================================================
+# Tests for draft_matches_message
+# ============================================================
+
+class TestDraftMatchesMessage:
+    """Tests for matching a prefetched draft against the sent message."""
+
+    def test_identical_after_normalization(self):
+        assert draft_matches_message("Tell me  about\nthe Garden", "tell me about the garden")
+
+    def test_small_edit_matches(self):
+        assert draft_matches_message(
+            "What did we talk about in the garden last week",
+            "What did we talk about in the garden last week?",
+        )
+
+    def test_different_message_does_not_match(self):
+        assert not draft_matches_message("Tell me about the garden", "What's the weather today?")
+
+    def test_draft_much_shorter_than_message_does_not_match(self):
+        assert not draft_matches_message(
+            "Tell me",
+            "Tell me about the garden we planted together last spring",
+        )
+
+    def test_empty_inputs_do_not_match(self):
+        assert not draft_matches_message("", "Hello")
+        assert not draft_matches_message("Hello", None)
+
+
 # ============================================================
 # Tests for calculate_significance
 # ============================================================
@@ -340,6 +372,95 @@ class TestEnsureRoleBalance:
         assert all(r["mem_data"]["role"] == "human" for r in result)
 
 
+# ============================================================
+# Tests for select_within_token_budget
+# ============================================================
+
+class TestSelectWithinTokenBudget:
+    """Tests for knapsack memory selection under a token budget."""
+
+    def _make_candidate(self, role, score, mem_id, tokens):
+        return {
+            "mem_data": {"role": role, "id": mem_id, "tokens": tokens},
+            "combined_score": score,
+        }
+
+    @staticmethod
+    def _cost(item):
+        return item["mem_data"]["tokens"]
+
+    def _ids(self, result):
+        return [r["mem_data"]["id"] for r in result]
+
+    def test_prefers_several_short_memories_over_one_long(self):
+        candidates = [
+            self._make_candidate("human", 1.0, "long", 900),
+            self._make_candidate("assistant", 0.6, "a1", 300),
+            self._make_candidate("human", 0.6, "h1", 300),
+            self._make_candidate("assistant", 0.5, "a2", 300),
+        ]
+        result = select_within_token_budget(candidates, 1000, self._cost)
+        assert self._ids(result) == ["a1", "h1", "a2"]
+
+    def test_never_exceeds_budget(self):
+        candidates = [
+            self._make_candidate("human" if i % 2 else "assistant", 1.0 - i * 0.01, f"m{i}", 97 + i * 13)
+            for i in range(20)
+        ]
+        result = select_within_token_budget(candidates, 777, self._cost)
+        assert result
+        assert sum(self._cost(r) for r in result) <= 777
+
+    def test_skips_memories_larger_than_budget(self):
+        candidates = [
+            self._make_candidate("human", 0.9, "huge", 5000),
+            self._make_candidate("assistant", 0.5, "a1", 100),
+        ]
+        assert self._ids(select_within_token_budget(candidates, 1000, self._cost)) == ["a1"]
+
+    def test_result_in_score_order(self):
+        candidates = [
+            self._make_candidate("human", 0.9, "h1", 100),
+            self._make_candidate("assistant", 0.8, "a1", 100),
+            self._make_candidate("human", 0.7, "h2", 100),
+        ]
+        assert self._ids(select_within_token_budget(candidates, 1000, self._cost)) == ["h1", "a1", "h2"]
+
+    def test_role_balance_forces_other_role(self):
+        candidates = [
+            self._make_candidate("human", 0.9, "h1", 100),
+            self._make_candidate("human", 0.8, "h2", 100),
+            self._make_candidate("human", 0.7, "h3", 100),
+            self._make_candidate("assistant", 0.3, "a1", 100),
+        ]
+        result = select_within_token_budget(candidates, 300, self._cost)
+        assert self._ids(result) == ["h1", "h2", "a1"]
+
+    def test_role_balance_disabled(self):
+        candidates = [
+            self._make_candidate("human", 0.9, "h1", 100),
+            self._make_candidate("human", 0.8, "h2", 100),
+            self._make_candidate("human", 0.7, "h3", 100),
+            self._make_candidate("assistant", 0.3, "a1", 100),
+        ]
+        result = select_within_token_budget(candidates, 300, self._cost, role_balance=False)
+        assert self._ids(result) == ["h1", "h2", "h3"]
+
+    def test_role_balance_not_forced_when_only_one_fits(self):
+        """Swapping the only memory that fits for a lower-scored one of the
+        other role would not give both roles, so the best one is kept."""
+        candidates = [
+            self._make_candidate("human", 0.9, "h1", 250),
+            self._make_candidate("assistant", 0.3, "a1", 250),
+        ]
+        assert self._ids(select_within_token_budget(candidates, 300, self._cost)) == ["h1"]
+
+    def test_empty_or_zero_budget(self):
+        assert select_within_token_budget([], 1000, self._cost) == []
+        candidates = [self._make_candidate("human", 0.9, "h1", 10)]
+        assert select_within_token_budget(candidates, 0, self._cost) == []
+
+
 # ============================================================
 # Tests for get_message_content_text
 # ============================================================
@@ -1,6 +1,7 @@
 """
 Unit tests for SessionManager.
 """
+import asyncio
 import re
 import uuid
 from datetime import datetime, timedelta
@@ -17,6 +18,12 @@ from app.services.session_manager import (
 )
 
 
+def _bulk_contents_mock(mem_data):
+    """Stub for memory_service.get_full_memory_contents that hydrates every
+    requested ID with mem_data."""
+    return AsyncMock(side_effect=lambda ids, db, **kwargs: {str(mid): mem_data for mid in ids})
+
+
 class TestMemoryEntry:
     """Tests for MemoryEntry dataclass."""
 
@@ -181,11 +188,8 @@ class TestConversationSession:
         session.add_exchange("Hello", "Hi there")
         session.add_exchange("How are you?", "I'm well!")
 
-        # Over limit until the first three messages are gone
-        def count_tokens(x):
-            return 50000 if len(session.conversation_context) > 2 else 100
-
-        removed = session.trim_context_to_limit(max_tokens=40000, count_tokens_fn=count_tokens)
+        # 101 tokens a message: over limit until the first three are gone
+        removed = session.trim_context_to_limit(max_tokens=202, count_tokens_fn=lambda x: 100)
 
         assert removed > 0
         assert "mem-1" not in session.get_in_context_memory_ids()
@@ -220,17 +224,11 @@ class TestConversationSession:
         session.add_exchange("Second question", "Second answer")
         session.add_exchange("Third question", "Third answer")
 
-        # Token counter that forces trimming
-        call_count = [0]
-        def count_tokens(x):
-            call_count[0] += 1
-            if call_count[0] <= 2:
-                return 200000  # Over limit
-            return 100  # Under limit after removing some
-
+        # 11 tokens a context message, 10 for the current one: 76 in all,
+        # and under the limit once two exchanges are gone
         removed = session.trim_context_to_limit(
-            max_tokens=150000,
-            count_tokens_fn=count_tokens,
+            max_tokens=40,
+            count_tokens_fn=lambda x: 10,
             current_message="New message"
         )
 
@@ -433,7 +431,7 @@ class TestSessionManager:
                     {"message_id": retrieved_id, "retrieved_at": datetime.utcnow()}
                 ]
             )
-            mock_memory.get_full_memory_content = AsyncMock(return_value={
+            mock_memory.get_full_memory_contents = _bulk_contents_mock({
                 "id": retrieved_id,
                 "conversation_id": "other-conv",
                 "role": "assistant",
@@ -513,7 +511,7 @@ class TestSessionManager:
                     "last_retrieved_at": None,
                 }
             ])
-            mock_memory.get_full_memory_content = AsyncMock(return_value={
+            mock_memory.get_full_memory_contents = _bulk_contents_mock({
                 "id": "mem-1",
                 "conversation_id": "old-conv",
                 "role": "assistant",
@@ -522,7 +520,7 @@ class TestSessionManager:
                 "times_retrieved": 2,
                 "last_retrieved_at": None,
             })
-            mock_memory.update_retrieval_count = AsyncMock()
+            mock_memory.update_retrieval_counts = AsyncMock()
             mock_memory.record_memory_link = AsyncMock()
 
             mock_llm.build_messages.return_value = [
@@ -547,6 +545,7 @@ class TestSessionManager:
             mock_settings.initial_retrieval_top_k = 5
             mock_settings.retrieval_top_k = 5
             mock_settings.recent_reflections_enabled = False
+            mock_settings.hybrid_retrieval_enabled = False
 
             session = manager.create_session(sample_conversation.id)
             result = await manager.process_message(session, "Hello", db_session)
@@ -560,7 +559,63 @@ class TestSessionManager:
         assert "mem-1" in session.session_memories
 
         # Update count should have been called
-        mock_memory.update_retrieval_count.assert_called_once()
+        mock_memory.update_retrieval_counts.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_memory_searches_run_concurrently(self, db_session, sample_conversation):
+        """The user-query and assistant-query searches and the archived-ID
+        lookup are awaited together: each search blocks until the other has
+        started, which would deadlock (and time out) if they ran serially."""
+        manager = SessionManager()
+        started = []
+        both_started = asyncio.Event()
+
+        async def search(query, **kwargs):
+            started.append(query)
+            if len(started) == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=2)
+            return []
+
+        async def archived_ids(db, entity_id=None):
+            # Runs while the searches are in flight
+            assert started
+            return set()
+
+        with patch("app.services.session_manager.memory_service") as mock_memory, \
+             patch("app.services.session_manager.llm_service") as mock_llm, \
+             patch("app.services.session_manager.settings") as mock_settings:
+            mock_memory.is_configured.return_value = True
+            mock_memory.get_archived_conversation_ids = AsyncMock(side_effect=archived_ids)
+            mock_memory.search_memories = AsyncMock(side_effect=search)
+
+            mock_llm.build_messages.return_value = []
+            mock_llm.send_message = AsyncMock(return_value={
+                "content": "Response",
+                "model": "claude-sonnet-4-5-20250929",
+                "usage": {"input_tokens": 10, "output_tokens": 5},
+                "stop_reason": "end_turn",
+            })
+            mock_llm.count_tokens = MagicMock(return_value=50)
+
+            mock_settings.default_model = "claude-sonnet-4-5-20250929"
+            mock_settings.default_temperature = 1.0
+            mock_settings.default_max_tokens = 64000
+            mock_settings.context_token_limit = 150000
+            mock_settings.initial_retrieval_top_k = 5
+            mock_settings.retrieval_top_k = 5
+            mock_settings.recent_reflections_enabled = False
+            mock_settings.hybrid_retrieval_enabled = False
+
+            session = manager.create_session(sample_conversation.id)
+            session.conversation_context = [
+                {"role": "user", "content": "Earlier question"},
+                {"role": "assistant", "content": "Earlier answer"},
+            ]
+            await manager.process_message(session, "Hello", db_session)
+
+        assert sorted(started) == ["Earlier answer", "Hello"]
+        mock_memory.get_archived_conversation_ids.assert_awaited_once()
 
     @pytest.mark.asyncio
     async def test_memory_link_anchored_before_user_message_timestamp(
@@ -580,7 +635,7 @@ class TestSessionManager:
             mock_memory.search_memories = AsyncMock(return_value=[
                 {"id": "mem-1", "score": 0.9, "conversation_id": "old-conv", "created_at": "2024-01-01", "last_retrieved_at": None}
             ])
-            mock_memory.get_full_memory_content = AsyncMock(return_value={
+            mock_memory.get_full_memory_contents = _bulk_contents_mock({
                 "id": "mem-1",
                 "conversation_id": "old-conv",
                 "role": "assistant",
@@ -589,7 +644,7 @@ class TestSessionManager:
                 "times_retrieved": 1,
                 "last_retrieved_at": None,
             })
-            mock_memory.update_retrieval_count = AsyncMock()
+            mock_memory.update_retrieval_counts = AsyncMock()
             mock_memory.record_memory_link = AsyncMock()
 
             mock_llm.build_messages.return_value = []
@@ -612,6 +667,7 @@ class TestSessionManager:
             mock_settings.initial_retrieval_top_k = 5
             mock_settings.retrieval_top_k = 5
             mock_settings.recent_reflections_enabled = False
+            mock_settings.hybrid_retrieval_enabled = False
 
             session = manager.create_session(sample_conversation.id)
             sent_at = datetime.utcnow()
@@ -619,8 +675,8 @@ class TestSessionManager:
                 session, "Hello", db_session, user_message_timestamp=sent_at
             )
 
-            call_kwargs = mock_memory.update_retrieval_count.call_args.kwargs
-            link_retrieved_at = call_kwargs["link_retrieved_at"]
+            call_kwargs = mock_memory.update_retrieval_counts.call_args.kwargs
+            link_retrieved_at = call_kwargs["link_retrieved_at"]["mem-1"]
             assert link_retrieved_at is not None
             assert link_retrieved_at < sent_at
             # Anchored 1ms back, not some arbitrary wall-clock time
@@ -639,7 +695,7 @@ class TestSessionManager:
             mock_memory.search_memories = AsyncMock(return_value=[
                 {"id": "mem-1", "score": 0.9, "conversation_id": "old-conv", "created_at": "2024-01-01", "last_retrieved_at": None}
             ])
-            mock_memory.get_full_memory_content = AsyncMock(return_value={
+            mock_memory.get_full_memory_contents = _bulk_contents_mock({
                 "id": "mem-1",
                 "conversation_id": "old-conv",
                 "role": "assistant",
@@ -648,7 +704,7 @@ class TestSessionManager:
                 "times_retrieved": 1,
                 "last_retrieved_at": None,
             })
-            mock_memory.update_retrieval_count = AsyncMock()
+            mock_memory.update_retrieval_counts = AsyncMock()
             mock_memory.record_memory_link = AsyncMock()
 
             mock_llm.build_messages.return_value = []
@@ -671,16 +727,17 @@ class TestSessionManager:
             mock_settings.initial_retrieval_top_k = 5
             mock_settings.retrieval_top_k = 5
             mock_settings.recent_reflections_enabled = False
+            mock_settings.hybrid_retrieval_enabled = False
 
             session = manager.create_session(sample_conversation.id)
 
             # First message should retrieve memory
             await manager.process_message(session, "First", db_session)
-            assert mock_memory.update_retrieval_count.call_count == 1
+            assert mock_memory.update_retrieval_counts.call_count == 1
 
             # Second message - memory should be excluded
             mock_memory.search_memories.reset_mock()
-            mock_memory.update_retrieval_count.reset_mock()
+            mock_memory.update_retrieval_counts.reset_mock()
 
             await manager.process_message(session, "Second", db_session)
 
@@ -691,7 +748,7 @@ class TestSessionManager:
 
             # Update count should NOT be called again for same memory
             # (session.add_memory returns added=False for duplicates)
-            mock_memory.update_retrieval_count.assert_not_called()
+            mock_memory.update_retrieval_counts.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_process_message_restores_rolled_out_memory_without_count_update(
@@ -747,6 +804,234 @@ class TestSessionManager:
         assert "mem-1" in session.retrieved_ids
 
 
+class TestMemoryPrefetch:
+    """Speculative retrieval for a draft message (/api/chat/prefetch)."""
+
+    MEMORY = {
+        "id": "mem-1",
+        "score": 0.9,
+        "conversation_id": "old-conv",
+        "created_at": "2024-01-01",
+        "role": "assistant",
+        "last_retrieved_at": None,
+    }
+
+    def _configure(self, mock_memory, mock_llm, mock_settings):
+        mock_memory.is_configured.return_value = True
+        mock_memory.get_archived_conversation_ids = AsyncMock(return_value=set())
+        mock_memory.search_memories = AsyncMock(return_value=[dict(self.MEMORY)])
+        mock_memory.get_full_memory_contents = _bulk_contents_mock({
+            **self.MEMORY,
+            "content": "Previous memory content",
+            "times_retrieved": 2,
+        })
+        mock_memory.update_retrieval_counts = AsyncMock()
+
+        mock_llm.build_messages.return_value = []
+        mock_llm.send_message = AsyncMock(return_value={
+            "content": "Response",
+            "model": "claude-sonnet-4-5-20250929",
+            "usage": {"input_tokens": 10, "output_tokens": 5},
+            "stop_reason": "end_turn",
+        })
+        mock_llm.count_tokens = MagicMock(return_value=50)
+
+        mock_settings.default_model = "claude-sonnet-4-5-20250929"
+        mock_settings.default_temperature = 1.0
+        mock_settings.default_max_tokens = 64000
+        mock_settings.context_token_limit = 150000
+        mock_settings.initial_retrieval_top_k = 5
+        mock_settings.retrieval_top_k = 5
+        mock_settings.recent_reflections_enabled = False
+        mock_settings.hybrid_retrieval_enabled = False
+        mock_settings.memory_prefetch_ttl_seconds = 60.0
+
+    @pytest.mark.asyncio
+    async def test_prefetch_parks_candidates_without_touching_context(
+        self, db_session, sample_conversation
+    ):
+        manager = SessionManager()
+
+        with patch("app.services.session_manager.memory_service") as mock_memory, \
+             patch("app.services.session_manager.llm_service") as mock_llm, \
+             patch("app.services.session_manager.settings") as mock_settings:
+            self._configure(mock_memory, mock_llm, mock_settings)
+            session = manager.create_session(sample_conversation.id)
+            count = await manager.prefetch_memories(session, "Tell me about the garden", db_session)
+
+        assert count == 1
+        assert session.memory_prefetch is not None
+        assert session.memory_prefetch.draft == "Tell me about the garden"
+        assert "mem-1" in session.memory_prefetch.memory_contents
+        assert session.conversation_context == []
+        mock_memory.update_retrieval_counts.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_matching_message_reuses_prefetch(self, db_session, sample_conversation):
+        manager = SessionManager()
+
+        with patch("app.services.session_manager.memory_service") as mock_memory, \
+             patch("app.services.session_manager.llm_service") as mock_llm, \
+             patch("app.services.session_manager.settings") as mock_settings:
+            self._configure(mock_memory, mock_llm, mock_settings)
+            session = manager.create_session(sample_conversation.id)
+            await manager.prefetch_memories(session, "Tell me about the garden", db_session)
+            result = await manager.process_message(
+                session, "Tell me about the garden!", db_session
+            )
+
+        # Only the prefetch searched and hydrated
+        assert mock_memory.search_memories.await_count == 1
+        assert mock_memory.get_full_memory_contents.await_count == 1
+        assert [m["id"] for m in result["new_memories_retrieved"]] == ["mem-1"]
+        assert session.memory_prefetch is None
+
+    @pytest.mark.asyncio
+    async def test_different_message_falls_back_to_search(self, db_session, sample_conversation):
+        manager = SessionManager()
+
+        with patch("app.services.session_manager.memory_service") as mock_memory, \
+             patch("app.services.session_manager.llm_service") as mock_llm, \
+             patch("app.services.session_manager.settings") as mock_settings:
+            self._configure(mock_memory, mock_llm, mock_settings)
+            session = manager.create_session(sample_conversation.id)
+            await manager.prefetch_memories(session, "Tell me about the garden", db_session)
+            await manager.process_message(session, "What did we decide yesterday?", db_session)
+
+        assert mock_memory.search_memories.await_count == 2
+        assert mock_memory.search_memories.await_args.kwargs["query"] == (
+            "What did we decide yesterday?"
+        )
+        assert session.memory_prefetch is None
+
+    @pytest.mark.asyncio
+    async def test_expired_prefetch_is_not_reused(self, db_session, sample_conversation):
+        manager = SessionManager()
+
+        with patch("app.services.session_manager.memory_service") as mock_memory, \
+             patch("app.services.session_manager.llm_service") as mock_llm, \
+             patch("app.services.session_manager.settings") as mock_settings:
+            self._configure(mock_memory, mock_llm, mock_settings)
+            session = manager.create_session(sample_conversation.id)
+            await manager.prefetch_memories(session, "Tell me about the garden", db_session)
+            session.memory_prefetch.created_at -= 120
+            await manager.process_message(session, "Tell me about the garden", db_session)
+
+        assert mock_memory.search_memories.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_prefetch_from_before_a_turn_is_not_reused(
+        self, db_session, sample_conversation
+    ):
+        """A new assistant response changes the assistant-side query, so a
+        prefetch taken before it no longer describes this turn's searches."""
+        manager = SessionManager()
+
+        with patch("app.services.session_manager.memory_service") as mock_memory, \
+             patch("app.services.session_manager.llm_service") as mock_llm, \
+             patch("app.services.session_manager.settings") as mock_settings:
+            self._configure(mock_memory, mock_llm, mock_settings)
+            session = manager.create_session(sample_conversation.id)
+            await manager.prefetch_memories(session, "Tell me more", db_session)
+            session.conversation_context = [
+                {"role": "user", "content": "Earlier question"},
+                {"role": "assistant", "content": "Earlier answer"},
+            ]
+            await manager.process_message(session, "Tell me more", db_session)
+
+        # One prefetch search, then both user and assistant searches
+        assert mock_memory.search_memories.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_route_ignores_responding_entity_for_single_entity_conversations(
+        self, db_session, sample_conversation
+    ):
+        """A stray responding_entity_id must not load (and cache) the session
+        for another entity: /send would then reuse it."""
+        from app.routes.chat import PrefetchRequest, prefetch_memories
+
+        manager = SessionManager()
+        with patch("app.routes.chat.session_manager", manager), \
+             patch.object(manager, "prefetch_memories", AsyncMock(return_value=1)) as prefetch:
+            result = await prefetch_memories(
+                PrefetchRequest(
+                    conversation_id=sample_conversation.id,
+                    message="Tell me about the garden",
+                    responding_entity_id="some-other-entity",
+                ),
+                db_session,
+            )
+
+        assert result == {"status": "prefetched", "candidates": 1}
+        session = manager.get_session(sample_conversation.id)
+        assert session.entity_id == "test-memories"
+        assert prefetch.await_args.args[0] is session
+
+
+class TestTokenBudgetedSelection:
+    """Memory selection filling a per-turn token budget instead of top_k."""
+
+    @pytest.mark.asyncio
+    async def test_budget_replaces_count_selection(self, db_session, sample_conversation):
+        manager = SessionManager()
+        sizes = {"long": 4000, "short-1": 40, "short-2": 40, "short-3": 40}
+        results = [
+            {
+                "id": mem_id,
+                "score": 0.95 if mem_id == "long" else 0.8,
+                "conversation_id": "old-conv",
+                "created_at": "2024-01-01",
+                "role": "human" if i % 2 else "assistant",
+                "last_retrieved_at": None,
+            }
+            for i, mem_id in enumerate(sizes)
+        ]
+
+        def contents(ids, db, **kwargs):
+            by_id = {r["id"]: r for r in results}
+            return {
+                mid: {**by_id[mid], "content": "x" * sizes[mid], "times_retrieved": 0}
+                for mid in ids
+            }
+
+        with patch("app.services.session_manager.memory_service") as mock_memory, \
+             patch("app.services.session_manager.llm_service") as mock_llm, \
+             patch("app.services.session_manager.settings") as mock_settings, \
+             patch("app.services.session_manager.retrieval_token_budget", return_value=500):
+            mock_memory.is_configured.return_value = True
+            mock_memory.get_archived_conversation_ids = AsyncMock(return_value=set())
+            mock_memory.search_memories = AsyncMock(return_value=results)
+            mock_memory.get_full_memory_contents = AsyncMock(side_effect=contents)
+            mock_memory.update_retrieval_counts = AsyncMock()
+
+            mock_llm.build_messages.return_value = []
+            mock_llm.send_message = AsyncMock(return_value={
+                "content": "Response",
+                "model": "claude-sonnet-4-5-20250929",
+                "usage": {"input_tokens": 10, "output_tokens": 5},
+                "stop_reason": "end_turn",
+            })
+            # One token per character: the formatted long memory is > 4000
+            mock_llm.count_tokens = MagicMock(side_effect=len)
+
+            mock_settings.default_model = "claude-sonnet-4-5-20250929"
+            mock_settings.default_temperature = 1.0
+            mock_settings.default_max_tokens = 64000
+            mock_settings.context_token_limit = 150000
+            mock_settings.initial_retrieval_top_k = 1
+            mock_settings.retrieval_top_k = 1
+            mock_settings.memory_role_balance_enabled = True
+            mock_settings.recent_reflections_enabled = False
+            mock_settings.hybrid_retrieval_enabled = False
+
+            session = manager.create_session(sample_conversation.id)
+            result = await manager.process_message(session, "Hello", db_session)
+
+        # All three short memories fit; the long one (and top_k=1) do not apply
+        retrieved = sorted(m["id"] for m in result["new_memories_retrieved"])
+        assert retrieved == ["short-1", "short-2", "short-3"]
+
+
 class TestMultiEntityMemoryIsolation:
     """Tests for multi-entity conversation memory isolation."""
 
@@ -903,6 +1188,106 @@ class TestMultiEntityMemoryIsolation:
         assert session.conversation_context[1]["content"] == "Hi there!"
 
 
+class TestEntityViews:
+    """Per-entity views of a multi-entity conversation over a shared timeline."""
+
+    def test_views_catch_up_on_published_messages(self):
+        from app.services.conversation_session import EntityViews
+
+        views = EntityViews()
+        alpha = ConversationSession(conversation_id="conv-1", is_multi_entity=True, responding_entity_label="Alpha")
+        beta = ConversationSession(conversation_id="conv-1", is_multi_entity=True, responding_entity_label="Beta")
+        views.join("alpha", alpha)
+        views.join("beta", beta)
+
+        alpha.add_exchange("Hello", "Hi from Alpha")
+        alpha.add_exchange("And?", "More from Alpha")
+        assert len(views.timeline) == 4  # Beta hasn't caught up yet
+
+        assert views.catch_up(beta) == 4
+        assert beta.conversation_context == alpha.conversation_context
+        assert views.timeline == []  # Every view has them now
+        assert views.catch_up(beta) == 0
+
+        beta.add_exchange(None, "Beta continues")
+        views.catch_up(alpha)
+        assert alpha.conversation_context[-1] == {"role": "assistant", "content": "[Beta]: Beta continues"}
+
+    @pytest.mark.asyncio
+    async def test_switching_entities_matches_a_reload(self, db_session):
+        """Switching views costs no reload and rebuilds what a reload from the database would."""
+        from app.models import ConversationEntity, ConversationMemoryLink
+        from app.services.session_helpers import stamp_human_message
+
+        start = datetime(2025, 5, 1, 12, 0)
+        db_session.add_all([
+            Conversation(id="conv-multi", title="Round robin", conversation_type=ConversationType.MULTI_ENTITY),
+            Conversation(id="conv-source", title="Source", entity_id="entity-a"),
+            ConversationEntity(conversation_id="conv-multi", entity_id="entity-a", display_order=0),
+            ConversationEntity(conversation_id="conv-multi", entity_id="entity-b", display_order=1),
+            Message(
+                id="memory-a", conversation_id="conv-source", role=MessageRole.ASSISTANT,
+                content="Alpha remembers the lighthouse.", created_at=start - timedelta(days=3),
+            ),
+            Message(
+                conversation_id="conv-multi", role=MessageRole.HUMAN,
+                content="Hello both", created_at=start,
+            ),
+            Message(
+                conversation_id="conv-multi", role=MessageRole.ASSISTANT, speaker_entity_id="entity-a",
+                content="Hello from Alpha", created_at=start + timedelta(seconds=1),
+            ),
+            ConversationMemoryLink(
+                conversation_id="conv-multi", message_id="memory-a",
+                retrieved_at=start - timedelta(seconds=1), entity_id="entity-a",
+            ),
+        ])
+        await db_session.commit()
+
+        async def take_turn(session, entity_id, text, reply, at):
+            """What a /send turn does to the session and the database."""
+            session.add_exchange(stamp_human_message(text, at), reply)
+            session.update_cache_state(len(session.conversation_context))
+            db_session.add_all([
+                Message(conversation_id="conv-multi", role=MessageRole.HUMAN, content=text, created_at=at),
+                Message(
+                    conversation_id="conv-multi", role=MessageRole.ASSISTANT, speaker_entity_id=entity_id,
+                    content=reply, created_at=at + timedelta(seconds=1),
+                ),
+            ])
+            await db_session.commit()
+
+        async def reload(entity_id):
+            return await SessionManager().load_session_from_db(
+                "conv-multi", db_session, responding_entity_id=entity_id
+            )
+
+        manager = SessionManager()
+        alpha = await manager.load_session_from_db("conv-multi", db_session, responding_entity_id="entity-a")
+        assert manager.get_entity_session("conv-multi", "entity-b") is None
+        beta = await manager.load_session_from_db("conv-multi", db_session, responding_entity_id="entity-b")
+        assert beta.entity_views is alpha.entity_views
+        await take_turn(beta, "entity-b", "Your turn, Beta", "Beta here", start + timedelta(minutes=1))
+        alpha_breakpoint = alpha.last_cached_context_length
+
+        with patch.object(manager, "_build_history") as build:
+            switched = manager.get_entity_session("conv-multi", "entity-a")
+        build.assert_not_called()
+
+        assert switched is alpha
+        assert manager.get_session("conv-multi") is alpha
+        assert alpha.conversation_context == (await reload("entity-a")).conversation_context
+        assert set(alpha.session_memories) == {"memory-a"}
+        assert beta.session_memories == {}
+        # Alpha's own breakpoint: its cached prefix is unchanged, Beta's turn is new
+        assert alpha.last_cached_context_length == alpha_breakpoint
+
+        await take_turn(alpha, "entity-a", "Back to you, Beta", "Alpha again", start + timedelta(minutes=2))
+        assert manager.get_entity_session("conv-multi", "entity-b") is beta
+        assert beta.conversation_context == (await reload("entity-b")).conversation_context
+        assert manager.get_stats()["view_switches"] == 2
+
+
 class TestCacheStateManagement:
     """Tests for cache state management and conversation-first caching."""
 
@@ -2761,6 +3146,7 @@ class TestRecentReflectionsInjection:
         mock_settings.memory_role_balance_enabled = False
         mock_settings.tool_use_max_iterations = 10
         mock_settings.recent_reflections_enabled = enabled
+        mock_settings.hybrid_retrieval_enabled = False
         mock_settings.recent_reflections_count = count
 
     @staticmethod
@@ -2787,7 +3173,7 @@ class TestRecentReflectionsInjection:
             mock_memory.is_configured.return_value = True
             mock_memory.get_archived_conversation_ids = AsyncMock(return_value=set())
             mock_memory.search_memories = AsyncMock(return_value=[])
-            mock_memory.update_retrieval_count = AsyncMock()
+            mock_memory.update_retrieval_counts = AsyncMock()
             mock_memory.record_memory_link = AsyncMock()
             # Newest first, as the real get_recent_reflections returns them
             mock_memory.get_recent_reflections = AsyncMock(return_value=[
@@ -2822,7 +3208,7 @@ class TestRecentReflectionsInjection:
             # reload re-insertion/dedup) but times_retrieved is NOT incremented —
             # that counter is reserved for semantic recall
             assert mock_memory.record_memory_link.call_count == 2
-            mock_memory.update_retrieval_count.assert_not_called()
+            mock_memory.update_retrieval_counts.assert_not_called()
 
             # The fetch excluded the current conversation and was recency-limited
             call_kwargs = mock_memory.get_recent_reflections.call_args.kwargs
@@ -2840,7 +3226,7 @@ class TestRecentReflectionsInjection:
             mock_memory.is_configured.return_value = True
             mock_memory.get_archived_conversation_ids = AsyncMock(return_value=set())
             mock_memory.search_memories = AsyncMock(return_value=[])
-            mock_memory.update_retrieval_count = AsyncMock()
+            mock_memory.update_retrieval_counts = AsyncMock()
             mock_memory.record_memory_link = AsyncMock()
             mock_memory.get_recent_reflections = AsyncMock(return_value=[
                 self._reflection_dict("refl-1"),
@@ -2873,7 +3259,7 @@ class TestRecentReflectionsInjection:
             mock_memory.is_configured.return_value = True
             mock_memory.get_archived_conversation_ids = AsyncMock(return_value=set())
             mock_memory.search_memories = AsyncMock(return_value=[])
-            mock_memory.update_retrieval_count = AsyncMock()
+            mock_memory.update_retrieval_counts = AsyncMock()
             mock_memory.record_memory_link = AsyncMock()
             mock_memory.get_recent_reflections = AsyncMock(return_value=[
                 self._reflection_dict("refl-1"),
@@ -2895,8 +3281,8 @@ class TestRecentReflectionsInjection:
             mock_memory.search_memories = AsyncMock(return_value=[
                 {"id": "refl-1", "score": 0.95, "conversation_id": "reflection-source-conv", "created_at": "2026-01-02T00:00:00", "last_retrieved_at": None}
             ])
-            mock_memory.get_full_memory_content = AsyncMock(
-                return_value=self._reflection_dict("refl-1")
+            mock_memory.get_full_memory_contents = _bulk_contents_mock(
+                self._reflection_dict("refl-1")
             )
 
             result = await manager.process_message(session, "Second", db_session)
@@ -2907,7 +3293,7 @@ class TestRecentReflectionsInjection:
             assert result["total_memories_in_context"] == 1
             memory_messages = [m for m in session.conversation_context if m.get("is_memory")]
             assert len(memory_messages) == 1
-            mock_memory.update_retrieval_count.assert_not_called()
+            mock_memory.update_retrieval_counts.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_disabled_by_default_setting(self, db_session, sample_conversation):
@@ -2920,7 +3306,7 @@ class TestRecentReflectionsInjection:
             mock_memory.is_configured.return_value = True
             mock_memory.get_archived_conversation_ids = AsyncMock(return_value=set())
             mock_memory.search_memories = AsyncMock(return_value=[])
-            mock_memory.update_retrieval_count = AsyncMock()
+            mock_memory.update_retrieval_counts = AsyncMock()
             mock_memory.record_memory_link = AsyncMock()
             mock_memory.get_recent_reflections = AsyncMock(return_value=[])
             self._configure_llm(mock_llm)
@@ -2947,10 +3333,10 @@ class TestRecentReflectionsInjection:
                 {"id": "refl-dup", "score": 0.9, "conversation_id": "reflection-source-conv",
                  "created_at": "2026-01-01", "role": "reflection", "last_retrieved_at": None}
             ])
-            mock_memory.get_full_memory_content = AsyncMock(
-                return_value=self._reflection_dict("refl-dup", created_at="2026-01-01T00:00:00")
+            mock_memory.get_full_memory_contents = _bulk_contents_mock(
+                self._reflection_dict("refl-dup", created_at="2026-01-01T00:00:00")
             )
-            mock_memory.update_retrieval_count = AsyncMock()
+            mock_memory.update_retrieval_counts = AsyncMock()
             mock_memory.record_memory_link = AsyncMock()
             # Simulate the fetch returning the duplicate anyway (belt-and-braces:
             # the SQL-level exclude_ids filter is tested in test_memory_service)
@@ -2972,7 +3358,7 @@ class TestRecentReflectionsInjection:
             retrieved_ids = [m["id"] for m in result["new_memories_retrieved"]]
             assert retrieved_ids == ["refl-dup"]
             assert result["total_memories_in_context"] == 1
-            assert mock_memory.update_retrieval_count.call_count == 1
+            assert mock_memory.update_retrieval_counts.call_count == 1
             mock_memory.record_memory_link.assert_not_called()
 
     @pytest.mark.asyncio
@@ -2988,7 +3374,7 @@ class TestRecentReflectionsInjection:
             mock_memory.is_configured.return_value = True
             mock_memory.get_archived_conversation_ids = AsyncMock(return_value=set())
             mock_memory.search_memories = AsyncMock(return_value=[])
-            mock_memory.update_retrieval_count = AsyncMock()
+            mock_memory.update_retrieval_counts = AsyncMock()
             mock_memory.record_memory_link = AsyncMock()
             mock_memory.get_recent_reflections = AsyncMock(return_value=[
                 self._reflection_dict("refl-new", created_at="2026-01-02T00:00:00"),
@@ -3046,10 +3432,10 @@ class TestRecentReflectionsInjection:
                 {"id": "refl-newest", "score": 0.9, "conversation_id": "reflection-source-conv",
                  "created_at": "2026-01-03", "role": "reflection", "last_retrieved_at": None}
             ])
-            mock_memory.get_full_memory_content = AsyncMock(
-                return_value=self._reflection_dict("refl-newest", created_at="2026-01-03T00:00:00")
+            mock_memory.get_full_memory_contents = _bulk_contents_mock(
+                self._reflection_dict("refl-newest", created_at="2026-01-03T00:00:00")
             )
-            mock_memory.update_retrieval_count = AsyncMock()
+            mock_memory.update_retrieval_counts = AsyncMock()
             mock_memory.record_memory_link = AsyncMock()
 
             # Emulate the real SQL behavior: exclusion applies before LIMIT,
@@ -3082,7 +3468,7 @@ class TestRecentReflectionsInjection:
             assert session.session_memories["refl-oldest"].source == "recent_reflection"
             # Only the semantic retrieval counts toward times_retrieved; the
             # two recency-injected reflections get link-only tracking
-            assert mock_memory.update_retrieval_count.call_count == 1
+            assert mock_memory.update_retrieval_counts.call_count == 1
             assert mock_memory.record_memory_link.call_count == 2
 
     @staticmethod
@@ -3144,7 +3530,7 @@ class TestRecentReflectionsInjection:
             mock_memory.is_configured.return_value = True
             mock_memory.get_archived_conversation_ids = AsyncMock(return_value=set())
             mock_memory.search_memories = AsyncMock(return_value=[])
-            mock_memory.update_retrieval_count = AsyncMock()
+            mock_memory.update_retrieval_counts = AsyncMock()
             mock_memory.record_memory_link = AsyncMock()
             mock_memory.get_recent_reflections = AsyncMock(return_value=[
                 self._reflection_dict("refl-b"),
@@ -3170,7 +3556,7 @@ class TestRecentReflectionsInjection:
             assert call_kwargs["entity_id"] == "entity-b"
             mock_memory.record_memory_link.assert_called_once()
             assert mock_memory.record_memory_link.call_args.kwargs["entity_id"] == "entity-b"
-            mock_memory.update_retrieval_count.assert_not_called()
+            mock_memory.update_retrieval_counts.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_multi_entity_entity_that_already_spoke_gets_none(self, db_session):
@@ -3184,7 +3570,7 @@ class TestRecentReflectionsInjection:
             mock_memory.is_configured.return_value = True
             mock_memory.get_archived_conversation_ids = AsyncMock(return_value=set())
             mock_memory.search_memories = AsyncMock(return_value=[])
-            mock_memory.update_retrieval_count = AsyncMock()
+            mock_memory.update_retrieval_counts = AsyncMock()
             mock_memory.record_memory_link = AsyncMock()
             mock_memory.get_recent_reflections = AsyncMock(return_value=[
                 self._reflection_dict("refl-b"),
@@ -3283,7 +3669,7 @@ class TestMemoryQueryResultDedup:
             mock_memory.search_memories = AsyncMock(return_value=[
                 {"id": "mem-query-1", "score": 0.9, "conversation_id": "old-conv", "created_at": "2024-01-01", "last_retrieved_at": None}
             ])
-            mock_memory.get_full_memory_content = AsyncMock(return_value={
+            mock_memory.get_full_memory_contents = _bulk_contents_mock({
                 "id": "mem-query-1",
                 "conversation_id": "old-conv",
                 "role": "assistant",
@@ -3292,7 +3678,7 @@ class TestMemoryQueryResultDedup:
                 "times_retrieved": 1,
                 "last_retrieved_at": None,
             })
-            mock_memory.update_retrieval_count = AsyncMock()
+            mock_memory.update_retrieval_counts = AsyncMock()
             mock_memory.record_memory_link = AsyncMock()
 
             mock_llm.build_messages.return_value = []
@@ -3315,6 +3701,7 @@ class TestMemoryQueryResultDedup:
             mock_settings.initial_retrieval_top_k = 5
             mock_settings.retrieval_top_k = 5
             mock_settings.recent_reflections_enabled = False
+            mock_settings.hybrid_retrieval_enabled = False
 
             session = manager.create_session(sample_conversation.id)
             # A previous turn's memory_query surfaced this memory
@@ -3330,7 +3717,7 @@ class TestMemoryQueryResultDedup:
             assert result["new_memories_retrieved"] == []
             assert result["total_memories_in_context"] == 0
             assert not any(m.get("is_memory") for m in session.conversation_context)
-            mock_memory.update_retrieval_count.assert_not_called()
+            mock_memory.update_retrieval_counts.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_load_session_restores_memory_query_ids(
@@ -0,0 +1,185 @@
+"""
+Tests for persisted session snapshots (session_snapshots.py): a reload
+restores the history a full rebuild produced, and any change the rebuild
+would see invalidates it.
+"""
+import copy
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import select
+
+from app.models import Conversation, ConversationMemoryLink, Message, MessageRole
+from app.services.memory_service import memory_service
+from app.services.session_manager import SessionManager
+from app.services.session_snapshots import session_snapshots
+
+
+@pytest.fixture
+async def conversation(db_session):
+    """A conversation with a few turns and one memory from another conversation."""
+    start = datetime(2025, 3, 1, 9, 0)
+    db_session.add_all([
+        Conversation(id="conv-main", title="Main", entity_id="test-entity", updated_at=start),
+        Conversation(id="conv-source", title="Source", entity_id="test-entity"),
+        Message(
+            id="memory-1", conversation_id="conv-source", role=MessageRole.ASSISTANT,
+            content="We planted the tomatoes by the fence.", created_at=start - timedelta(days=30),
+        ),
+    ])
+    for i in range(3):
+        db_session.add(Message(
+            conversation_id="conv-main", role=MessageRole.HUMAN,
+            content=f"Question {i}", created_at=start + timedelta(minutes=2 * i),
+        ))
+        db_session.add(Message(
+            conversation_id="conv-main", role=MessageRole.ASSISTANT,
+            content=f"Answer {i}", created_at=start + timedelta(minutes=2 * i + 1),
+        ))
+    db_session.add(ConversationMemoryLink(
+        conversation_id="conv-main", message_id="memory-1",
+        retrieved_at=start + timedelta(minutes=2), entity_id="test-entity",
+    ))
+    await db_session.commit()
+    return "conv-main"
+
+
+def history(session):
+    return (
+        session.conversation_context,
+        set(session.session_memories),
+        session.retrieved_ids,
+        session.memory_tracker.memory_positions,
+    )
+
+
+async def load(db_session, conversation_id):
+    """Load in a fresh manager, as after a restart; returns (session, rebuilt)."""
+    manager = SessionManager()
+    with patch.object(manager, "_build_history", wraps=manager._build_history) as build:
+        session = await manager.load_session_from_db(conversation_id, db_session)
+    return session, build.called
+
+
+class TestSessionSnapshots:
+    @pytest.mark.asyncio
+    async def test_reload_restores_the_rebuilt_history(self, db_session, conversation):
+        first, rebuilt = await load(db_session, conversation)
+        assert rebuilt
+        assert "memory-1" in first.session_memories
+
+        second, rebuilt = await load(db_session, conversation)
+
+        assert not rebuilt
+        assert history(second) == history(first)
+        assert second.session_memories["memory-1"] == first.session_memories["memory-1"]
+        assert second.last_cached_context_length == len(second.conversation_context)
+
+    @pytest.mark.asyncio
+    async def test_new_message_invalidates(self, db_session, conversation):
+        await load(db_session, conversation)
+        db_session.add(Message(
+            conversation_id=conversation, role=MessageRole.HUMAN,
+            content="Question 3", created_at=datetime(2025, 3, 1, 10, 0),
+        ))
+        await db_session.commit()
+
+        session, rebuilt = await load(db_session, conversation)
+
+        assert rebuilt
+        assert session.conversation_context[-1]["content"].endswith("Question 3")
+
+    @pytest.mark.asyncio
+    async def test_edit_invalidates_through_updated_at(self, db_session, conversation):
+        await load(db_session, conversation)
+        # The edit route rewrites content in place and bumps updated_at
+        edited = (await db_session.execute(
+            select(Message).where(Message.content == "Question 2")
+        )).scalar_one()
+        edited.content = "Question 2, edited"
+        (await db_session.get(Conversation, conversation)).updated_at = datetime(2025, 3, 2)
+        await db_session.commit()
+
+        session, rebuilt = await load(db_session, conversation)
+
+        assert rebuilt
+        assert any(
+            isinstance(m["content"], str) and m["content"].endswith("Question 2, edited")
+            for m in session.conversation_context
+        )
+
+    @pytest.mark.asyncio
+    async def test_same_length_memory_edit_invalidates(self, db_session, conversation):
+        await load(db_session, conversation)
+        memory = await db_session.get(Message, "memory-1")
+        memory.content = "We planted the potatoes by the gate."[:len(memory.content)].ljust(
+            len(memory.content), "."
+        )
+        await db_session.commit()
+
+        session, rebuilt = await load(db_session, conversation)
+
+        assert rebuilt
+
+    @pytest.mark.asyncio
+    async def test_turn_snapshot_makes_the_next_load_hit(self, db_session, conversation):
+        await load(db_session, conversation)
+        # A turn is committed: the version moves on
+        db_session.add_all([
+            Message(
+                conversation_id=conversation, role=MessageRole.HUMAN,
+                content="Question 3", created_at=datetime(2025, 3, 1, 10, 0),
+            ),
+            Message(
+                conversation_id=conversation, role=MessageRole.ASSISTANT,
+                content="Answer 3", created_at=datetime(2025, 3, 1, 10, 1),
+            ),
+        ])
+        await db_session.commit()
+        manager = SessionManager()
+        with patch("app.services.session_manager.settings.session_snapshots_enabled", False):
+            live = await manager.load_session_from_db(conversation, db_session)
+        expected = copy.deepcopy(history(live))
+        live.context_token_count(lambda text: len(text.split()))
+
+        await manager.save_snapshot(live, db_session)
+        session, rebuilt = await load(db_session, conversation)
+
+        assert not rebuilt
+        assert history(session) == expected
+        # Token counts are recounted after a restore, not carried over
+        assert all("token_count" not in m for m in session.conversation_context)
+
+    @pytest.mark.asyncio
+    async def test_released_memory_invalidates(self, db_session, conversation):
+        await load(db_session, conversation)
+        await memory_service.set_memory_status("memory-1", "released", db_session)
+
+        session, rebuilt = await load(db_session, conversation)
+
+        assert rebuilt
+        assert "memory-1" not in session.session_memories
+
+    @pytest.mark.asyncio
+    async def test_unreadable_snapshot_falls_back_to_rebuild(self, db_session, conversation):
+        first, _ = await load(db_session, conversation)
+        for path in session_snapshots.directory.glob("conv-main--*.snap"):
+            path.write_bytes(path.read_bytes()[:80])
+        errors = session_snapshots.get_stats()["errors"]
+
+        second, rebuilt = await load(db_session, conversation)
+
+        assert rebuilt
+        assert history(second) == history(first)
+        assert session_snapshots.get_stats()["errors"] == errors + 1
+
+    @pytest.mark.asyncio
+    async def test_discard_and_disable(self, db_session, conversation):
+        await load(db_session, conversation)
+        session_snapshots.discard(conversation)
+        assert not list(session_snapshots.directory.glob("conv-main--*.snap"))
+
+        with patch("app.services.session_manager.settings.session_snapshots_enabled", False):
+            await load(db_session, conversation)
+        assert not list(session_snapshots.directory.glob("conv-main--*.snap"))
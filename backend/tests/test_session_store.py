@@ -0,0 +1,106 @@
+"""
+Tests for the bounded in-memory session store (session_store.py).
+"""
+import pytest
+
+from app.models import Conversation, Message, MessageRole
+from app.services.conversation_session import ConversationSession
+from app.services.session_manager import SessionManager
+from app.services.session_store import SessionStore, estimate_session_bytes
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_session(conversation_id, text=""):
+    session = ConversationSession(conversation_id=conversation_id, model="test-model")
+    if text:
+        session.conversation_context.append({"role": "user", "content": text})
+    return session
+
+
+class TestSessionStore:
+    def test_evicts_least_recently_used_over_capacity(self):
+        store = SessionStore(max_sessions=2, max_bytes=0, idle_ttl_seconds=0)
+        store.put("a", make_session("a"))
+        store.put("b", make_session("b"))
+        assert store.get("a") is not None  # a is now more recent than b
+
+        store.put("c", make_session("c"))
+
+        assert "a" in store and "c" in store
+        assert "b" not in store
+        assert store.get_stats()["evictions_capacity"] == 1
+
+    def test_byte_limit_counts_growth_on_use(self):
+        store = SessionStore(max_sessions=0, max_bytes=100, idle_ttl_seconds=0)
+        first = make_session("a", "x" * 40)
+        store.put("a", first)
+        store.put("b", make_session("b", "y" * 40))
+        assert store.get_stats()["resident_bytes"] == 80
+
+        # A turn grows "a"; it is measured again the next time it's used
+        first.conversation_context.append({"role": "assistant", "content": [{"type": "text", "text": "z" * 30}]})
+        assert store.get("a") is first
+
+        assert "b" not in store
+        assert store.get_stats()["resident_bytes"] == estimate_session_bytes(first)
+        assert store.get_stats()["evictions_bytes"] == 1
+
+    def test_oversized_session_stays_resident_alone(self):
+        store = SessionStore(max_sessions=0, max_bytes=10, idle_ttl_seconds=0)
+        store.put("a", make_session("a", "x" * 50))
+        assert "a" in store
+
+    def test_idle_sessions_expire(self):
+        clock = FakeClock()
+        store = SessionStore(max_sessions=0, max_bytes=0, idle_ttl_seconds=60, clock=clock)
+        store.put("a", make_session("a"))
+        clock.now += 30
+        store.put("b", make_session("b"))
+        clock.now += 45
+
+        assert store.get("a") is None
+        assert store.get("b") is not None
+        assert store.get_stats()["evictions_idle"] == 1
+
+    def test_close_is_not_an_eviction(self):
+        store = SessionStore(max_sessions=0, max_bytes=0, idle_ttl_seconds=0)
+        store.put("a", make_session("a", "hello"))
+        store.pop("a")
+        store.record_load("a")
+
+        stats = store.get_stats()
+        assert stats["resident_sessions"] == 0
+        assert stats["resident_bytes"] == 0
+        assert stats["loads"] == 1
+        assert stats["reloads"] == 0
+
+
+class TestEvictedSessionReload:
+    @pytest.mark.asyncio
+    async def test_evicted_session_reloads_from_db(self, db_session):
+        for conversation_id in ("conv-1", "conv-2"):
+            db_session.add(Conversation(id=conversation_id, title="Test", llm_model_used="test-model"))
+            db_session.add(Message(conversation_id=conversation_id, role=MessageRole.HUMAN, content="Hello"))
+        await db_session.commit()
+
+        manager = SessionManager()
+        manager._sessions = SessionStore(max_sessions=1, max_bytes=0, idle_ttl_seconds=0)
+        await manager.load_session_from_db("conv-1", db_session)
+        await manager.load_session_from_db("conv-2", db_session)
+        assert manager.get_session("conv-1") is None
+
+        session = await manager.load_session_from_db("conv-1", db_session)
+
+        assert [m["content"] for m in session.conversation_context][-1].endswith("Hello")
+        assert manager.get_session("conv-1") is session
+        stats = manager.get_stats()
+        assert stats["loads"] == 3
+        assert stats["reloads"] == 1
+        assert stats["evictions_capacity"] == 2
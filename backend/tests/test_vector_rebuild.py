@@ -267,6 +267,91 @@ class TestRebuildVectorsFromDatabase:
         assert "Unknown entity: nope" in result["errors"]
 
 
+class TestFindMissingVectors:
+    async def _collect(self, service, db_session, settings, **kwargs):
+        with patch("app.services.vector_rebuild_service.settings", settings):
+            return [batch async for batch in service.find_missing_vectors(db_session, **kwargs)]
+
+    @pytest.mark.asyncio
+    async def test_reports_memories_without_records(self, db_session, test_settings):
+        conv = Conversation(id=str(uuid.uuid4()), title="Test", entity_id="test-memories")
+        db_session.add(conv)
+        stored = Message(
+            id=str(uuid.uuid4()), conversation_id=conv.id,
+            role=MessageRole.HUMAN, content="I was vectorized",
+        )
+        lost = Message(
+            id=str(uuid.uuid4()), conversation_id=conv.id,
+            role=MessageRole.ASSISTANT, content="My record is gone",
+        )
+        long_lost = Message(
+            id=str(uuid.uuid4()), conversation_id=conv.id,
+            role=MessageRole.ASSISTANT, content="A long reply. " * 400,
+        )
+        closing = Message(
+            id=str(uuid.uuid4()), conversation_id=conv.id,
+            role=MessageRole.HUMAN, content="[CLOSING TURN] Goodbye.",
+        )
+        db_session.add_all([stored, lost, long_lost, closing])
+        await db_session.commit()
+
+        # Only the first passage of the long reply survived
+        index = FakeIndex([
+            pinecone_record(stored.id, conv.id, "human", stored.content),
+            pinecone_record(f"msg:{long_lost.id}:0", conv.id, "assistant", "A long reply."),
+        ])
+        service = make_service({"test-memories": index})
+
+        batches = await self._collect(service, db_session, test_settings, batch_size=2)
+
+        assert [b["batch"] for b in batches] == [1, 2]
+        assert batches[-1]["messages_checked"] == 4
+        missing = {m["message_id"]: m for b in batches for m in b["missing"]}
+        # Closing turns were never vectorized, so they aren't missing
+        assert set(missing) == {lost.id, long_lost.id}
+        assert missing[lost.id]["missing_records"] == [lost.id]
+        assert missing[lost.id]["role"] == "assistant"
+        assert f"msg:{long_lost.id}:0" not in missing[long_lost.id]["missing_records"]
+        assert f"msg:{long_lost.id}:1" in missing[long_lost.id]["missing_records"]
+
+    @pytest.mark.asyncio
+    async def test_scoped_to_the_entity(self, db_session, test_settings_multi_entity):
+        shared = Conversation(
+            id=str(uuid.uuid4()),
+            entity_id="multi-entity",
+            conversation_type=ConversationType.MULTI_ENTITY,
+        )
+        gpt_only = Conversation(id=str(uuid.uuid4()), entity_id="gpt-test")
+        db_session.add_all([shared, gpt_only])
+        db_session.add(ConversationEntity(conversation_id=shared.id, entity_id="claude-test", display_order=0))
+        db_session.add(ConversationEntity(conversation_id=shared.id, entity_id="gpt-test", display_order=1))
+        human = Message(
+            id=str(uuid.uuid4()), conversation_id=shared.id,
+            role=MessageRole.HUMAN, content="Hello both of you",
+        )
+        gpt_msg = Message(
+            id=str(uuid.uuid4()), conversation_id=shared.id,
+            role=MessageRole.ASSISTANT, content="GPT speaking", speaker_entity_id="gpt-test",
+        )
+        elsewhere = Message(
+            id=str(uuid.uuid4()), conversation_id=gpt_only.id,
+            role=MessageRole.HUMAN, content="Only GPT saw this",
+        )
+        db_session.add_all([human, gpt_msg, elsewhere])
+        await db_session.commit()
+
+        claude_index = FakeIndex([pinecone_record(human.id, shared.id, "human", human.content)])
+        service = make_service({"claude-test": claude_index, "gpt-test": FakeIndex()})
+
+        batches = await self._collect(
+            service, db_session, test_settings_multi_entity, entity_id="claude-test",
+        )
+
+        # The GPT-only conversation isn't read at all
+        assert batches[-1]["messages_checked"] == 2
+        assert [m["message_id"] for b in batches for m in b["missing"]] == [gpt_msg.id]
+
+
 def pinecone_record(message_id, conversation_id, role, text, created_at="2024-06-01T12:00:00", times_retrieved=0):
     return {
         "_id": message_id,
@@ -0,0 +1,327 @@
+"""
+Tests for the vector store backends (vector_store.py) and their selection
+in MemoryService.
+"""
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.config import EntityConfig
+from app.models import Conversation, Message, MessageRole
+from app.services.memory_service import MemoryService
+from app.services.vector_store import (
+    HashingEmbedder,
+    LocalVectorStore,
+    metadata_matches,
+    uses_local_backend,
+    vector_store_configured,
+)
+
+
+@pytest.fixture
+def local_store(tmp_path):
+    store = LocalVectorStore("test-local", root_dir=str(tmp_path), embedder=HashingEmbedder(256))
+    yield store
+    store.close()
+
+
+def _memory_record(record_id, text, conversation_id="conv-1", role="human"):
+    return {
+        "_id": record_id,
+        "text": text,
+        "conversation_id": conversation_id,
+        "created_at": "2026-01-01T00:00:00",
+        "role": role,
+        "content_preview": text[:200],
+        "times_retrieved": 0,
+    }
+
+
+class TestHashingEmbedder:
+    def test_embeddings_are_normalized_and_deterministic(self):
+        embedder = HashingEmbedder(128)
+        a = embedder.embed(["the quiet garden at dusk", ""])
+        b = embedder.embed(["the quiet garden at dusk"])
+        assert a.shape == (2, 128)
+        assert np.isclose(np.linalg.norm(a[0]), 1.0)
+        assert np.allclose(a[1], 0.0)
+        assert np.allclose(a[0], b[0])
+
+    def test_related_text_scores_higher(self):
+        embedder = HashingEmbedder(512)
+        query, near, far = embedder.embed(
+            ["gardening tomatoes", "my tomato garden", "quarterly tax filing"]
+        )
+        assert float(query @ near) > float(query @ far)
+
+
+class TestMetadataFilters:
+    def test_operators(self):
+        md = {"conversation_id": "a", "role": "human"}
+        assert metadata_matches(md, None)
+        assert metadata_matches(md, {"conversation_id": {"$ne": "b"}})
+        assert not metadata_matches(md, {"conversation_id": {"$ne": "a"}})
+        assert metadata_matches(md, {"role": {"$eq": "human"}})
+        assert metadata_matches(md, {"role": "human"})
+        assert metadata_matches(md, {"role": {"$in": ["human", "assistant"]}})
+        assert not metadata_matches(md, {"role": {"$nin": ["human"]}})
+        # Multiple keys are ANDed
+        assert not metadata_matches(
+            md, {"conversation_id": {"$ne": "b"}, "role": {"$ne": "human"}}
+        )
+
+    def test_unknown_operator_raises(self):
+        with pytest.raises(ValueError):
+            metadata_matches({"a": 1}, {"a": {"$gt": 0}})
+
+
+class TestLocalVectorStore:
+    def test_upsert_and_search(self, local_store):
+        local_store.upsert_records(namespace="", records=[
+            _memory_record("m1", "we talked about the garden and tomatoes"),
+            _memory_record("m2", "the tax filing deadline is next week"),
+        ])
+        results = local_store.search(
+            namespace="", query={"inputs": {"text": "tomato garden"}, "top_k": 2}
+        )
+        hits = results.result.hits
+        assert [h["_id"] for h in hits][0] == "m1"
+        assert hits[0]["fields"]["conversation_id"] == "conv-1"
+        assert hits[0]["fields"]["text"] == "we talked about the garden and tomatoes"
+        assert hits[0]["_score"] >= hits[1]["_score"]
+
+    def test_search_applies_memory_filters(self, local_store):
+        local_store.upsert_records(namespace="", records=[
+            _memory_record("same-conv", "garden tomatoes", conversation_id="current"),
+            _memory_record("human", "garden tomatoes", conversation_id="old", role="human"),
+            _memory_record("ai", "garden tomatoes", conversation_id="old", role="assistant"),
+        ])
+        query = {
+            "inputs": {"text": "garden tomatoes"},
+            "top_k": 10,
+            "filter": {"conversation_id": {"$ne": "current"}, "role": {"$ne": "human"}},
+        }
+        hits = local_store.search(namespace="", query=query).result.hits
+        assert [h["_id"] for h in hits] == ["ai"]
+
+    def test_namespaces_are_isolated(self, local_store):
+        local_store.upsert_records(namespace="", records=[_memory_record("m1", "garden")])
+        local_store.upsert_records(
+            namespace="notes", records=[{"_id": "note:private:a.md:0", "text": "garden"}]
+        )
+        hits = local_store.search(
+            namespace="notes", query={"inputs": {"text": "garden"}, "top_k": 5}
+        ).result.hits
+        assert [h["_id"] for h in hits] == ["note:private:a.md:0"]
+
+    def test_fetch_update_delete(self, local_store):
+        local_store.upsert_records(namespace="", records=[_memory_record("m1", "garden")])
+        local_store.update(id="m1", set_metadata={"times_retrieved": 3})
+        fetched = local_store.fetch(ids=["m1", "missing"])
+        assert "missing" not in fetched.vectors
+        assert fetched.vectors["m1"].metadata["times_retrieved"] == 3
+
+        local_store.delete(ids=["m1"])
+        assert local_store.fetch(ids=["m1"]).vectors == {}
+        assert local_store.search(
+            namespace="", query={"inputs": {"text": "garden"}, "top_k": 5}
+        ).result.hits == []
+
+    def test_list_paginated_with_prefix(self, local_store):
+        records = [{"_id": f"note:shared:a.md:{i}", "text": f"chunk {i}"} for i in range(5)]
+        records.append({"_id": "note:shared:b.md:0", "text": "other"})
+        local_store.upsert_records(namespace="notes", records=records)
+
+        ids = []
+        token = None
+        while True:
+            kwargs = {"namespace": "notes", "limit": 2, "prefix": "note:shared:a.md:"}
+            if token:
+                kwargs["pagination_token"] = token
+            page = local_store.list_paginated(**kwargs)
+            ids.extend(v.id for v in page.vectors)
+            if page.pagination and page.pagination.next:
+                token = page.pagination.next
+            else:
+                break
+        assert ids == [f"note:shared:a.md:{i}" for i in range(5)]
+
+    def test_persists_across_reopen_and_grows(self, tmp_path):
+        embedder = HashingEmbedder(64)
+        store = LocalVectorStore("persist", root_dir=str(tmp_path), embedder=embedder)
+        # More than the initial capacity, so the vector file has to grow
+        store.upsert_records(namespace="", records=[
+            _memory_record(f"m{i:04d}", f"memory number {i}") for i in range(1100)
+        ])
+        store.delete(ids=["m0000"])
+        store.close()
+
+        reopened = LocalVectorStore("persist", root_dir=str(tmp_path), embedder=embedder)
+        stats = reopened.describe_index_stats()
+        assert stats.total_vector_count == 1099
+        assert stats.dimension == 64
+        hits = reopened.search(
+            namespace="", query={"inputs": {"text": "memory number 1099"}, "top_k": 1}
+        ).result.hits
+        assert hits[0]["_id"] == "m1099"
+        reopened.close()
+
+    def test_dimension_mismatch_is_rejected(self, tmp_path):
+        store = LocalVectorStore("dims", root_dir=str(tmp_path), embedder=HashingEmbedder(64))
+        store.upsert_records(namespace="", records=[_memory_record("m1", "garden")])
+        store.close()
+
+        other = LocalVectorStore("dims", root_dir=str(tmp_path), embedder=HashingEmbedder(128))
+        with pytest.raises(ValueError):
+            other.fetch(ids=["m1"])
+
+    def test_ivf_index_answers_queries(self, local_store):
+        records = [
+            _memory_record(f"m{i:04d}", f"topic{i % 50} detail{i}", role="human" if i % 2 else "assistant")
+            for i in range(600)
+        ]
+        local_store.upsert_records(namespace="", records=records)
+        with patch("app.services.vector_store.settings") as mock_settings:
+            mock_settings.local_vector_ivf_min_records = 100
+            mock_settings.local_vector_ivf_nprobe = 4
+            hits = local_store.search(namespace="", query={
+                "inputs": {"text": "topic7 detail307"},
+                "top_k": 3,
+                "filter": {"role": {"$eq": "human"}},
+            }).result.hits
+            assert local_store._namespace("")._centroids is not None
+        assert hits[0]["_id"] == "m0307"
+        assert all(h["fields"]["role"] == "human" for h in hits)
+        assert len(hits) == 3
+
+
+    def test_ivf_index_trains_on_fewer_records_than_lists(self, local_store):
+        records = [_memory_record(f"m{i}", f"topic{i}") for i in range(5)]
+        local_store.upsert_records(namespace="", records=records)
+        with patch("app.services.vector_store.settings") as mock_settings:
+            mock_settings.local_vector_ivf_min_records = 2
+            mock_settings.local_vector_ivf_nprobe = 16
+            hits = local_store.search(namespace="", query={
+                "inputs": {"text": "topic3"},
+                "top_k": 2,
+            }).result.hits
+            assert len(local_store._namespace("")._centroids) == 5
+        assert hits[0]["_id"] == "m3"
+
+
+class TestBackendSelection:
+    def test_uses_local_backend(self):
+        assert uses_local_backend(EntityConfig("a", "A", vector_backend="local"))
+        assert not uses_local_backend(EntityConfig("a", "A"))
+        assert not uses_local_backend(None)
+        assert not uses_local_backend(MagicMock())
+
+    def test_vector_store_configured_without_api_key(self):
+        mock_settings = MagicMock()
+        mock_settings.pinecone_api_key = ""
+        mock_settings.get_entities.return_value = [EntityConfig("a", "A")]
+        assert vector_store_configured(mock_settings) is False
+        mock_settings.get_entities.return_value = [EntityConfig("a", "A", vector_backend="local")]
+        assert vector_store_configured(mock_settings) is True
+
+    def test_memory_service_opens_local_store_without_pinecone(self, tmp_path):
+        local_entity = EntityConfig("local-entity", "Local", vector_backend="local")
+        with patch("app.services.memory_service.settings") as mock_settings, \
+                patch("app.services.vector_store.settings") as store_settings:
+            mock_settings.pinecone_api_key = ""
+            mock_settings.get_entities.return_value = [local_entity]
+            mock_settings.get_entity_by_index.side_effect = (
+                lambda name: local_entity if name == "local-entity" else None
+            )
+            store_settings.local_vector_store_dir = str(tmp_path)
+            store_settings.local_embedding_model = ""
+            store_settings.local_embedding_dim = 128
+
+            service = MemoryService()
+            assert service.is_configured() is True
+            assert service.is_configured("local-entity") is True
+            assert service.is_configured("unknown") is False
+
+            index = service.get_index("local-entity")
+            assert isinstance(index, LocalVectorStore)
+            assert service.get_index("local-entity") is index
+            assert service._pc is None
+
+    @pytest.mark.asyncio
+    async def test_memory_service_round_trip_on_local_store(self, tmp_path):
+        local_entity = EntityConfig("local-entity", "Local", vector_backend="local")
+        with patch("app.services.memory_service.settings") as mock_settings:
+            mock_settings.pinecone_api_key = ""
+            mock_settings.get_entities.return_value = [local_entity]
+            mock_settings.get_entity_by_index.return_value = local_entity
+            mock_settings.retrieval_top_k = 5
+            mock_settings.search_cache_similarity_threshold = 0.95
+
+            service = MemoryService()
+            service._cache_service = MagicMock()
+            service._cache_service.get_search_results.return_value = None
+            service._indexes["local-entity"] = LocalVectorStore(
+                "local-entity", root_dir=str(tmp_path), embedder=HashingEmbedder(256)
+            )
+
+            await service.store_memory(
+                "m-human", "old-conv", "human", "I planted tomatoes in the garden",
+                datetime(2026, 1, 1), entity_id="local-entity",
+            )
+            await service.store_memory(
+                "m-current", "current", "human", "tomatoes in the garden again",
+                datetime(2026, 1, 2), entity_id="local-entity",
+            )
+            results = await service.search_memories(
+                "tomatoes garden", exclude_conversation_id="current",
+                entity_id="local-entity", similarity_threshold=0.0,
+            )
+            assert [r["id"] for r in results] == ["m-human"]
+            assert results[0]["role"] == "human"
+
+            assert await service.list_all_pinecone_ids("local-entity") == [
+                "m-current", "m-human"
+            ]
+            assert await service.delete_memory("m-human", entity_id="local-entity")
+            assert await service.list_all_pinecone_ids("local-entity") == ["m-current"]
+
+
+class TestReconcileOrphanedRecords:
+    @pytest.mark.asyncio
+    async def test_streams_pages_and_deletes_orphans(self, tmp_path, db_session):
+        conv = Conversation(id="conv-1", title="Test", entity_id="local-entity")
+        db_session.add(conv)
+        db_session.add(Message(id="m-live", conversation_id="conv-1", role=MessageRole.HUMAN, content="Live"))
+        await db_session.commit()
+
+        local_entity = EntityConfig("local-entity", "Local", vector_backend="local")
+        with patch("app.services.memory_service.settings") as mock_settings, \
+                patch("app.services.memory_service.RECORD_PAGE_SIZE", 2):
+            mock_settings.pinecone_api_key = ""
+            mock_settings.get_entities.return_value = [local_entity]
+            mock_settings.get_entity_by_index.return_value = local_entity
+
+            service = MemoryService()
+            service._cache_service = MagicMock()
+            store = LocalVectorStore("local-entity", root_dir=str(tmp_path), embedder=HashingEmbedder(64))
+            service._indexes["local-entity"] = store
+            store.upsert_records("", [
+                {"_id": record_id, "text": f"memory {record_id}", "conversation_id": "conv-1"}
+                for record_id in ("m-gone-1", "m-gone-2", "m-live", "msg:m-gone-3:0", "msg:m-live:1")
+            ])
+
+            pages = [
+                page async for page in service.reconcile_orphaned_records(
+                    db_session, "local-entity", delete=True,
+                )
+            ]
+
+        assert [p["page"] for p in pages] == [1, 2, 3]
+        assert pages[-1]["records_scanned"] == 5
+        orphan_ids = {o["id"] for p in pages for o in p["orphans"]}
+        # Passage records belong to the message their ID names
+        assert orphan_ids == {"m-gone-1", "m-gone-2", "msg:m-gone-3:0"}
+        assert sum(p["orphans_deleted"] for p in pages) == 3
+        assert sorted(store.fetch(["m-live", "msg:m-live:1", "m-gone-1"]).vectors) == ["m-live", "msg:m-live:1"]
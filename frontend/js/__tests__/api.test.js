@@ -472,6 +472,17 @@ describe('ApiClient', () => {
             );
         });
 
+        it('prefetchMemories should POST to /chat/prefetch', async () => {
+            await api.prefetchMemories({ conversation_id: 'conv-123', message: 'draft' });
+            expect(global.fetch).toHaveBeenCalledWith(
+                '/api/chat/prefetch',
+                expect.objectContaining({
+                    method: 'POST',
+                    body: '{"conversation_id":"conv-123","message":"draft"}',
+                }),
+            );
+        });
+
         it('getSessionInfo should call /chat/session/{id}', async () => {
             await api.getSessionInfo('conv-123');
             expect(global.fetch).toHaveBeenCalledWith('/api/chat/session/conv-123', expect.any(Object));
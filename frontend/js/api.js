@@ -408,6 +408,17 @@ class ApiClient {
         }
     }
 
+    /**
+     * Retrieve memories for a draft message ahead of sending it.
+     * @param {Object} data - { conversation_id, message, responding_entity_id? }
+     */
+    async prefetchMemories(data) {
+        return this.request('/chat/prefetch', {
+            method: 'POST',
+            body: data,
+        });
+    }
+
     async quickChat(data) {
         return this.request('/chat/quick', {
             method: 'POST',
@@ -70,7 +70,8 @@ import {
     regenerateMessageWithEntity,
     startEditMessage,
     startContinuationMode,
-    sendClosingTurn
+    sendClosingTurn,
+    scheduleMemoryPrefetch
 } from './modules/chat.js';
 import {
     setElements as setMemoryElements,
@@ -420,7 +421,10 @@ class App {
                 sendMessage();
             }
         });
-        this.elements.messageInput?.addEventListener('input', () => this.handleInputChange());
+        this.elements.messageInput?.addEventListener('input', () => {
+            this.handleInputChange();
+            scheduleMemoryPrefetch();
+        });
 
         // Draggable divider to resize the message-entry area
         this.setupInputResizer();
@@ -38,6 +38,13 @@ let callbacks = {
 // Stream abort controller
 let streamAbortController = null;
 
+// Memory prefetch: after this long without typing, the draft is sent to
+// /chat/prefetch so the backend can retrieve memories before the real send
+const PREFETCH_DELAY_MS = 800;
+const PREFETCH_MIN_LENGTH = 12;
+let prefetchTimer = null;
+let lastPrefetchedDraft = null;
+
 // Import abort controller
 
 /**
@@ -119,6 +126,28 @@ function endStreaming() {
     }
 }
 
+/**
+ * Schedule a memory prefetch for the current draft once typing pauses.
+ *
+ * Single-entity conversations only: in multi-entity mode the responder (and
+ * so the memory index) is chosen after the message is written. Failures are
+ * ignored; the send simply retrieves memories itself.
+ */
+export function scheduleMemoryPrefetch() {
+    clearTimeout(prefetchTimer);
+    prefetchTimer = setTimeout(() => {
+        const draft = elements.messageInput?.value.trim() || '';
+        if (!state.currentConversationId || state.isMultiEntityMode || state.isLoading) return;
+        if (draft.length < PREFETCH_MIN_LENGTH || draft === lastPrefetchedDraft) return;
+
+        lastPrefetchedDraft = draft;
+        api.prefetchMemories({
+            conversation_id: state.currentConversationId,
+            message: buildMessageToSend(draft),
+        }).catch(() => {});
+    }, PREFETCH_DELAY_MS);
+}
+
 /**
  * Send a message (main entry point)
  * @param {boolean} skipEntityModal - Skip entity selection modal
@@ -130,6 +159,9 @@ export async function sendMessage(skipEntityModal = false) {
     // Need either content or attachments to send
     if ((!content && !hasAttachmentsFlag) || state.isLoading) return;
 
+    clearTimeout(prefetchTimer);
+    lastPrefetchedDraft = null;
+
     // Capture attachments before clearing
     const attachments = getAttachmentsForRequest();
 